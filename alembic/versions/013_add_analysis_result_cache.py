@@ -0,0 +1,50 @@
+"""add_analysis_result_cache
+
+Revision ID: 013_add_analysis_cache
+Revises: 012_add_analytics
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_add_analysis_cache'
+down_revision = '012_add_analytics'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Check if the table exists before creating it (handles case where create_tables already created it)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+    
+    if 'analysis_result_cache' not in existing_tables:
+        op.create_table(
+            'analysis_result_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('service', sa.String(length=20), nullable=False),
+        sa.Column('file_hashes', sa.JSON(), nullable=False),
+        sa.Column('analysis_type', sa.String(length=50), nullable=True),
+        sa.Column('lawsuit_type', sa.String(length=100), nullable=True),
+        sa.Column('prompt_version', sa.String(length=20), nullable=False),
+        sa.Column('result_data', sa.JSON(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('last_hit_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_analysis_result_cache_id'), 'analysis_result_cache', ['id'], unique=False)
+        op.create_index(op.f('ix_analysis_result_cache_cache_key'), 'analysis_result_cache', ['cache_key'], unique=True)
+        op.create_index(op.f('ix_analysis_result_cache_service'), 'analysis_result_cache', ['service'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analysis_result_cache_service'), table_name='analysis_result_cache')
+    op.drop_index(op.f('ix_analysis_result_cache_cache_key'), table_name='analysis_result_cache')
+    op.drop_index(op.f('ix_analysis_result_cache_id'), table_name='analysis_result_cache')
+    op.drop_table('analysis_result_cache')
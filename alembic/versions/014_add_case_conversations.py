@@ -0,0 +1,51 @@
+"""add_case_conversations
+
+Revision ID: 014_add_case_conversations
+Revises: 013_add_analysis_cache
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_add_case_conversations'
+down_revision = '013_add_analysis_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Check if the table exists before creating it (handles case where create_tables already created it)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+    
+    if 'case_conversations' not in existing_tables:
+        op.create_table(
+            'case_conversations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('analysis_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('turns', sa.JSON(), nullable=False),
+        sa.Column('turn_count', sa.Integer(), nullable=False),
+        sa.Column('context_cache_name', sa.String(length=255), nullable=True),
+        sa.Column('context_cache_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['analysis_id'], ['case_analyses.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['profiles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_case_conversations_id'), 'case_conversations', ['id'], unique=False)
+        op.create_index(op.f('ix_case_conversations_analysis_id'), 'case_conversations', ['analysis_id'], unique=True)
+        op.create_index(op.f('ix_case_conversations_user_id'), 'case_conversations', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_case_conversations_user_id'), table_name='case_conversations')
+    op.drop_index(op.f('ix_case_conversations_analysis_id'), table_name='case_conversations')
+    op.drop_index(op.f('ix_case_conversations_id'), table_name='case_conversations')
+    op.drop_table('case_conversations')
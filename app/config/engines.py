@@ -0,0 +1,46 @@
+"""
+Engine Catalog - Heavy dependencies loaded on demand
+
+Declares every expensive engine (ML models, vector stores, PDF/OCR toolkits)
+by import path so none of them is imported while the application boots.
+
+Environment Variables:
+- WARMUP_ENGINES: Comma-separated engine names to build in the background after
+  startup, or 'all' for every engine. Empty (default) means fully lazy.
+"""
+
+import os
+from typing import List
+
+from ..utils.lazy_loader import register_engine, registered_engines
+
+register_engine(
+    "vectorstore",
+    "app.services.legal.knowledge.document_parser_service:VectorstoreManager",
+    "Chroma vectorstore, Arabic embeddings and Gemini client for law documents",
+)
+register_engine(
+    "rag_models",
+    "app.services.knowledge.optimized_knowledge_service:GlobalModelManager",
+    "RAG embeddings, cross-encoder reranker and Gemini client",
+)
+register_engine(
+    "pdf_toolkit",
+    "app.processors.enhanced_arabic_pdf_processor:load_pdf_toolkit",
+    "PyMuPDF, Tesseract, pdf2image and Arabic reshaping/BiDi libraries",
+)
+
+
+def get_warmup_engines() -> List[str]:
+    """
+    Engines to warm up in the background after startup.
+
+    Returns:
+        List of engine names (empty when warm-up is disabled)
+    """
+    raw = os.getenv("WARMUP_ENGINES", "").strip()
+    if not raw:
+        return []
+    if raw.lower() == "all":
+        return registered_engines()
+    return [name.strip() for name in raw.split(",") if name.strip()]
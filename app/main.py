@@ -4,13 +4,16 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import asyncio
 import uuid
 import os
 
 # Import models to ensure they are registered with SQLAlchemy
 from .config.enhanced_logging import setup_logging, get_logger
 from .config.embedding_config import EmbeddingConfig  # Import config EARLY
+from .config.engines import get_warmup_engines
 from .db.database import create_tables
+from .utils.lazy_loader import engines_status, warm_up_engines
 
 # Import all models to ensure they are registered with SQLAlchemy before relationships are resolved
 from .models import (
@@ -33,6 +36,7 @@ from .routes.subscription_router import router as subscription_router
 from .routes.premium_router import router as premium_router
 from .routes.legal_laws_router import router as legal_laws_router
 from .routes.legal_cases_router import router as legal_cases_router
+from .routes.uploads_router import router as uploads_router
 from .routes.support_router import router as support_router
 from .routes.templates_router import router as templates_router
 from .routes.analytics_router import router as analytics_router
@@ -344,6 +348,7 @@ app.include_router(subscription_router, prefix="/api/v1")
 app.include_router(premium_router, prefix="/api/v1")
 app.include_router(legal_laws_router)  # Legal Laws Management (includes document upload)
 app.include_router(legal_cases_router)  # Legal Cases Ingestion Pipeline
+app.include_router(uploads_router)  # Resumable chunked uploads
 app.include_router(support_router, prefix="/api/v1")  # Support Tickets Management
 app.include_router(templates_router)  # Contract Templates Management
 app.include_router(contracts_library_router, prefix="/api/v1")  # Contracts Library (Enhanced)
@@ -371,8 +376,36 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Failed to log startup event: {str(e)}")
     
+    # Heavy engines load lazily; optionally warm them up once the server is listening
+    warmup_targets = get_warmup_engines()
+    app.state.warmup_targets = warmup_targets
+    app.state.warmup_task = None
+    if warmup_targets:
+        logger.info(f"🔥 Scheduling background warm-up for engines: {warmup_targets}")
+        app.state.warmup_task = asyncio.create_task(warm_up_engines(warmup_targets))
+    
+    # Optional background SQL/Chroma reconciliation (bounded pages per cycle)
+    reconcile_interval = os.getenv("VECTOR_RECONCILE_INTERVAL_SECONDS", "").strip()
+    if reconcile_interval:
+        from .services.legal.knowledge.vector_reconciliation_service import run_reconciliation_forever
+        logger.info(f"🔁 Scheduling background vector reconciliation every {reconcile_interval}s")
+        app.state.reconcile_task = asyncio.create_task(
+            run_reconciliation_forever(
+                interval_seconds=float(reconcile_interval),
+                repair=os.getenv("VECTOR_RECONCILE_REPAIR", "false").lower() == "true",
+            )
+        )
+    
     logger.info("Application started successfully!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop long-lived worker processes."""
+    from .services.case_analysis.analysis_pdf_renderer import shutdown_render_pool
+    from .utils.office_conversion import shutdown_conversion_pool
+    await shutdown_conversion_pool()
+    shutdown_render_pool()
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -446,6 +479,29 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint reporting which heavy engines are loaded.
+    
+    Returns 503 while a requested background warm-up (WARMUP_ENGINES) is still
+    running, so load balancers only route traffic once the pod is warm.
+    """
+    warmup_task = getattr(app.state, "warmup_task", None)
+    warming_up = warmup_task is not None and not warmup_task.done()
+    engines = engines_status()
+    
+    return JSONResponse(
+        status_code=503 if warming_up else 200,
+        content={
+            "status": "warming_up" if warming_up else "ready",
+            "warmup_targets": getattr(app.state, "warmup_targets", []),
+            "engines_loaded": [name for name, info in engines.items() if info["loaded"]],
+            "engines": engines,
+        }
+    )
+
+
 @app.get("/test-deployment")
 async def test_deployment():
     """Simple test endpoint to verify deployment is working."""
@@ -13,7 +13,7 @@ from .legal_knowledge import (
     KnowledgeDocument, KnowledgeChunk
 )
 from .query_log import QueryLog
-from .case_analysis import CaseAnalysis
+from .case_analysis import CaseAnalysis, AnalysisResultCache, CaseConversation
 from .support_ticket import SupportTicket, TicketStatus, TicketPriority
 from .contract_template import ContractTemplate, Contract
 from .contracts_library import (
@@ -57,6 +57,8 @@ __all__ = [
     "QueryLog",
     # Case Analysis
     "CaseAnalysis",
+    "AnalysisResultCache",
+    "CaseConversation",
     # Support Tickets
     "SupportTicket",
     "TicketStatus",
@@ -72,3 +72,77 @@ class CaseAnalysis(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+
+
+class AnalysisResultCache(Base):
+    """
+    Cached AI analysis results.
+    
+    One row per distinct analysis request: the key covers the uploaded files'
+    content hashes, the request parameters and the prompt version, so an
+    identical request is answered from here instead of calling Gemini again.
+    """
+    
+    __tablename__ = "analysis_result_cache"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    
+    # What was analysed
+    service = Column(String(20), nullable=False, index=True)  # 'case' or 'contract'
+    file_hashes = Column(JSON, nullable=False)  # SHA-256 of each file, in upload order
+    analysis_type = Column(String(50), nullable=True)
+    lawsuit_type = Column(String(100), nullable=True)
+    prompt_version = Column(String(20), nullable=False)
+    
+    result_data = Column(JSON, nullable=False)
+    
+    # Usage
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<AnalysisResultCache(id={self.id}, service='{self.service}', hit_count={self.hit_count})>"
+
+
+class CaseConversation(Base):
+    """
+    Follow-up questions and answers about one case analysis.
+    
+    Only the most recent turns are kept verbatim; older ones are compacted
+    into ``summary`` so the prompt stays bounded however long the
+    conversation runs.
+    """
+    
+    __tablename__ = "case_conversations"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    analysis_id = Column(Integer, ForeignKey("case_analyses.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    summary = Column(Text, nullable=True)  # Compacted older turns
+    turns = Column(JSON, nullable=False)  # Recent turns: [{"question", "answer", "asked_at"}]
+    turn_count = Column(Integer, nullable=False, default=0)
+    
+    # Gemini context cache holding the documents and the analysis
+    context_cache_name = Column(String(255), nullable=True)
+    context_cache_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    
+    def __repr__(self):
+        return f"<CaseConversation(id={self.id}, analysis_id={self.analysis_id}, turn_count={self.turn_count})>"
+    
+    def to_dict(self):
+        """Convert model instance to dictionary."""
+        return {
+            "id": self.id,
+            "analysis_id": self.analysis_id,
+            "summary": self.summary,
+            "turns": self.turns or [],
+            "turn_count": self.turn_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
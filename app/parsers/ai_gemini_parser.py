@@ -1,24 +1,100 @@
 """
 Gemini-based parser implementing a small interface that returns hierarchy.
+
+Small files go to Gemini in one request. Large PDFs (over
+GEMINI_PARALLEL_MIN_PAGES pages, or over the 20 MB single-request limit) are
+split into overlapping windows of GEMINI_WINDOW_PAGES pages that are parsed
+concurrently under a shared rate limit and merged back into one hierarchy
+(see hierarchy_merge). Every successful response is kept in the extraction
+cache keyed by file hash, window and PROMPT_VERSION, so re-parsing a file, or
+retrying after one window failed, only calls Gemini for what is missing.
+Whole files go through the shared document handles (gemini_files), so a file
+that is parsed again after a prompt change is not uploaded again.
 """
 
+import io
 import os
 import json
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from .hierarchy_merge import count_articles, merge_hierarchies
+from ..utils.extraction_cache import extraction_key, file_sha256, get_extraction_cache
+from ..utils.gemini_files import get_document_handles
+from ..utils.lazy_loader import optional_import
+from ..utils.rate_limiter import AsyncRateLimiter
 
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL = os.getenv("GEMINI_PARSER_MODEL", "gemini-2.5-flash")
+GEMINI_MAX_FILE_MB = 20
+GEMINI_TIMEOUT_SECONDS = 300
+
+# Page-window parsing of large PDFs
+GEMINI_PARALLEL_MIN_PAGES = int(os.getenv("GEMINI_PARALLEL_MIN_PAGES", "40"))
+GEMINI_WINDOW_PAGES = int(os.getenv("GEMINI_WINDOW_PAGES", "20"))
+GEMINI_WINDOW_OVERLAP = int(os.getenv("GEMINI_WINDOW_OVERLAP", "2"))
+GEMINI_WINDOW_TIMEOUT_SECONDS = int(os.getenv("GEMINI_WINDOW_TIMEOUT_SECONDS", "180"))
+GEMINI_WINDOW_RETRIES = int(os.getenv("GEMINI_WINDOW_RETRIES", "2"))
+GEMINI_RETRY_BACKOFF_SECONDS = float(os.getenv("GEMINI_RETRY_BACKOFF_SECONDS", "2"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "30"))
+
+# Part of every cache key; bump whenever _prompt or _window_note changes
+PROMPT_VERSION = "1"
+
+_rate_limiter: Optional[AsyncRateLimiter] = None
+
+
+def get_gemini_rate_limiter() -> AsyncRateLimiter:
+    """Rate limiter shared by every Gemini parse in the process."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = AsyncRateLimiter(GEMINI_MAX_CONCURRENCY, GEMINI_REQUESTS_PER_MINUTE)
+    return _rate_limiter
+
+
+def page_windows(page_count: int, window_pages: int, overlap: int) -> List[Tuple[int, int]]:
+    """1-based inclusive (first, last) page ranges of ``window_pages`` overlapping by ``overlap``."""
+    window_pages = max(1, window_pages)
+    step = max(1, window_pages - max(0, overlap))
+    windows = []
+    first = 1
+    while first <= page_count:
+        last = min(page_count, first + window_pages - 1)
+        windows.append((first, last))
+        if last == page_count:
+            break
+        first += step
+    return windows
+
 
 class GeminiParser:
     """Thin wrapper around Gemini to extract hierarchy JSON."""
 
-    def __init__(self, api_key: Optional[str] = None) -> None:
+    def __init__(self, api_key: Optional[str] = None, rate_limiter: Optional[AsyncRateLimiter] = None) -> None:
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self._client = None
+        self._rate_limiter = rate_limiter
+        self._pdf_lock = threading.Lock()
 
-    async def parse(self, file_path: str, law_source_details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def parse(
+        self,
+        file_path: str,
+        law_source_details: Optional[Dict[str, Any]] = None,
+        parallel: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a law document into its branches/chapters/articles hierarchy.
+
+        Args:
+            file_path: PDF, DOC or DOCX file
+            law_source_details: Optional details; ``name`` is given to the model
+            parallel: True to force page-window parsing of a PDF, False to
+                force a single request, None to decide from size and page count
+        """
         try:
             if not self._client:
                 try:
@@ -36,75 +112,258 @@ class GeminiParser:
             if not mime:
                 return {"success": False, "message": f"Unsupported file type: {file_ext}", "data": None}
 
-            with open(file_path, "rb") as f:
-                content = f.read()
+            name = (law_source_details or {}).get("name") or "القانون"
+            file_size = os.path.getsize(file_path)
+            content_hash = await asyncio.to_thread(file_sha256, file_path)
 
-            # Check file size to prevent timeouts
-            file_size_mb = len(content) / (1024 * 1024)
-            if file_size_mb > 20:  # Limit to 20MB
-                return {"success": False, "message": f"File too large ({file_size_mb:.1f}MB). Maximum size is 20MB.", "data": None}
+            if mime == "application/pdf" and parallel is not False:
+                planned = await asyncio.to_thread(self._plan_windows, file_path, file_size, parallel)
+                if planned is not None:
+                    reader, windows = planned
+                    return await self._parse_windows(reader, windows, name, content_hash)
+            return await self._parse_whole(file_path, file_size, mime, name, content_hash)
+        except Exception as e:
+            logger.error(f"Gemini parse failed: {e}")
+            return {"success": False, "message": f"Gemini parse failed: {e}", "data": None}
 
-            try:
-                from google.genai import types  # type: ignore
-            except Exception as e:
-                return {"success": False, "message": f"Gemini SDK not available: {e}", "data": None}
+    async def _parse_whole(
+        self, file_path: str, file_size: int, mime: str, name: str, content_hash: str
+    ) -> Dict[str, Any]:
+        """Parse the whole file in a single Gemini request."""
+        cache = get_extraction_cache()
+        cache_key = extraction_key(content_hash, None, "gemini-hierarchy", PROMPT_VERSION, model=GEMINI_MODEL, law_name=name)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"♻️ Gemini hierarchy for {name} served from cache")
+            return self._build_result(json.loads(cached))
 
-            part = types.Part.from_bytes(data=content, mime_type=mime)
-            name = (law_source_details or {}).get("name") or "القانون"
-            prompt = self._prompt(name)
-            
-            logger.info(f"Starting Gemini AI processing for: {name}")
-            logger.info(f"File size: {len(content)} bytes, MIME type: {mime}")
-            
-            # Add timeout protection for Gemini API call
+        # Check file size to prevent timeouts
+        file_size_mb = file_size / (1024 * 1024)
+        if file_size_mb > GEMINI_MAX_FILE_MB:
+            return {"success": False, "message": f"File too large ({file_size_mb:.1f}MB). Maximum size is {GEMINI_MAX_FILE_MB}MB.", "data": None}
+
+        with open(file_path, "rb") as f:
+            content = f.read()
+
+        try:
+            part = await get_document_handles().part(content, mime, os.path.basename(file_path), client=self._client)
+            if part is None:
+                part = self._make_part(content, mime)
+        except Exception as e:
+            return {"success": False, "message": f"Gemini SDK not available: {e}", "data": None}
+
+        logger.info(f"Starting Gemini AI processing for: {name}")
+        logger.info(f"File size: {len(content)} bytes, MIME type: {mime}")
+
+        async def request(document_part: Any) -> str:
+            async with self._limiter():
+                return await self._generate(document_part, self._prompt(name), GEMINI_TIMEOUT_SECONDS)
+
+        # Add timeout protection for Gemini API call
+        try:
+            text = await get_document_handles().with_inline_fallback(
+                part, content, mime, request, lambda: self._make_part(content, mime)
+            )
+            logger.info("Gemini AI processing completed successfully")
+        except asyncio.TimeoutError:
+            logger.error("Gemini AI processing timed out after 5 minutes")
+            return {"success": False, "message": "Gemini AI processing timed out after 5 minutes", "data": None}
+        except Exception as e:
+            logger.error(f"Gemini AI API call failed: {e}")
+            return {"success": False, "message": f"Gemini AI API call failed: {e}", "data": None}
+        data = self._parse_json(text)
+        if not data:
+            return {"success": False, "message": "AI response not parseable as JSON", "data": None}
+
+        result = self._build_result(data)
+        if result["success"]:
+            cache.put(cache_key, json.dumps(data, ensure_ascii=False))
+        return result
+
+    def _build_result(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Handle the comprehensive structure from the working script
+        if "law_sources" in data and data["law_sources"]:
+            # Extract the first law source and its branches
+            law_source = data["law_sources"][0]
+            branches = law_source.get("branches", [])
+
+            # Log processing report if available
+            processing_report = data.get("processing_report", {})
+            logger.info(f"Processing report: {processing_report}")
+
+            return {
+                "success": True,
+                "message": f"AI parsed successfully. Extracted {len(branches)} branches, {processing_report.get('total_articles', 0)} articles",
+                "data": {
+                    "hierarchy": {"branches": branches},
+                    "law_source": law_source,
+                    "processing_report": processing_report
+                }
+            }
+        elif "branches" in data:
+            # Fallback for simpler structure
+            return {"success": True, "message": "AI parsed", "data": {"hierarchy": {"branches": data.get("branches", [])}}}
+        else:
+            return {"success": False, "message": "No valid law structure found in AI response", "data": None}
+
+    # ==================== PAGE-WINDOW PARSING ====================
+
+    def _open_pdf(self, file_path: str) -> Any:
+        PyPDF2 = optional_import("PyPDF2")
+        if PyPDF2 is None:
+            raise RuntimeError("PyPDF2 is required for page-window parsing (pip install PyPDF2)")
+        return PyPDF2.PdfReader(file_path)
+
+    def _window_bytes(self, reader: Any, first: int, last: int) -> bytes:
+        """A standalone PDF of pages ``first``..``last`` (1-based, inclusive)."""
+        PyPDF2 = optional_import("PyPDF2")
+        writer = PyPDF2.PdfWriter()
+        with self._pdf_lock:  # PdfReader is not safe to share between threads
+            for index in range(first - 1, last):
+                writer.add_page(reader.pages[index])
+            buffer = io.BytesIO()
+            writer.write(buffer)
+        return buffer.getvalue()
+
+    def _plan_windows(
+        self, file_path: str, file_size: int, parallel: Optional[bool]
+    ) -> Optional[Tuple[Any, List[Tuple[int, int]]]]:
+        """(reader, page windows) when the PDF should be parsed in windows, else None."""
+        try:
+            reader = self._open_pdf(file_path)
+        except Exception as e:
+            if parallel:
+                raise
+            logger.warning(f"⚠️ Cannot split {file_path} into page windows ({e}), parsing it in one request")
+            return None
+        page_count = len(reader.pages)
+        too_big = file_size > GEMINI_MAX_FILE_MB * 1024 * 1024
+        if not parallel and not too_big and page_count <= GEMINI_PARALLEL_MIN_PAGES:
+            return None
+        return reader, page_windows(page_count, GEMINI_WINDOW_PAGES, GEMINI_WINDOW_OVERLAP)
+
+    async def _parse_windows(
+        self, reader: Any, windows: List[Tuple[int, int]], name: str, content_hash: str
+    ) -> Dict[str, Any]:
+        """Parse page windows concurrently and merge them into one hierarchy."""
+        page_count = windows[-1][1]
+        logger.info(f"🪟 Parsing {name}: {page_count} pages in {len(windows)} windows of {GEMINI_WINDOW_PAGES} pages")
+        outcomes = await asyncio.gather(*(
+            self._parse_window(reader, first, last, page_count, name, content_hash) for first, last in windows
+        ))
+
+        failed = [f"pages {first}-{last}: {error}" for (first, last), (_, _, error) in zip(windows, outcomes) if error]
+        if failed:
+            return {
+                "success": False,
+                "message": f"Gemini parsing failed for {len(failed)} of {len(windows)} page windows: {'; '.join(failed)}",
+                "data": None,
+            }
+
+        parts = [self._hierarchy_parts(data) for data, _, _ in outcomes]
+        branches = merge_hierarchies([window_branches for _, window_branches, _ in parts])
+        law_source = next(({**source, "branches": branches} for source, _, _ in parts if source), {"branches": branches})
+        reports = [report for _, _, report in parts]
+        total_articles = count_articles(branches)
+        confidences = [report["structure_confidence"] for report in reports if isinstance(report.get("structure_confidence"), (int, float))]
+        processing_report = {
+            "warnings": [item for report in reports for item in report.get("warnings") or []],
+            "errors": [item for report in reports for item in report.get("errors") or []],
+            "suggestions": list(dict.fromkeys(item for report in reports for item in report.get("suggestions") or [])),
+            "structure_confidence": min(confidences) if confidences else None,
+            "total_chapters": sum(len(branch["chapters"]) for branch in branches),
+            "total_articles": total_articles,
+            "total_cases": 0,
+            "windows": [
+                {"pages": [first, last], "cached": cached} for (first, last), (_, cached, _) in zip(windows, outcomes)
+            ],
+        }
+        return {
+            "success": True,
+            "message": f"AI parsed successfully in {len(windows)} page windows. Extracted {len(branches)} branches, {total_articles} articles",
+            "data": {
+                "hierarchy": {"branches": branches},
+                "law_source": law_source,
+                "processing_report": processing_report
+            }
+        }
+
+    async def _parse_window(
+        self, reader: Any, first: int, last: int, page_count: int, name: str, content_hash: str
+    ) -> Tuple[Optional[Dict[str, Any]], bool, Optional[str]]:
+        """(parsed JSON, served from cache, error) for one page window, with retries."""
+        cache = get_extraction_cache()
+        cache_key = extraction_key(
+            content_hash, first, "gemini-window", PROMPT_VERSION, model=GEMINI_MODEL, law_name=name, last_page=last
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached), True, None
+
+        prompt = self._prompt(name) + self._window_note(first, last, page_count)
+        error = None
+        for attempt in range(GEMINI_WINDOW_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(GEMINI_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
             try:
-                resp = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self._client.models.generate_content,
-                        model="gemini-2.5-flash",
-                        contents=[part, prompt]
-                    ),
-                    timeout=300  # 5 minutes timeout
-                )
-                logger.info("Gemini AI processing completed successfully")
-                text = getattr(resp, "text", "")
+                async with self._limiter():
+                    # Built inside the slot, so at most max_concurrency windows are in memory
+                    content = await asyncio.to_thread(self._window_bytes, reader, first, last)
+                    if len(content) > GEMINI_MAX_FILE_MB * 1024 * 1024:
+                        return None, False, f"window is over {GEMINI_MAX_FILE_MB}MB, lower GEMINI_WINDOW_PAGES"
+                    text = await self._generate(
+                        self._make_part(content, "application/pdf"), prompt, GEMINI_WINDOW_TIMEOUT_SECONDS
+                    )
+                data = self._parse_json(text)
+                if data and ("law_sources" in data or "branches" in data):
+                    cache.put(cache_key, json.dumps(data, ensure_ascii=False))
+                    logger.info(f"✅ Parsed pages {first}-{last} of {name}")
+                    return data, False, None
+                error = "AI response not parseable as JSON"
             except asyncio.TimeoutError:
-                logger.error("Gemini AI processing timed out after 5 minutes")
-                return {"success": False, "message": "Gemini AI processing timed out after 5 minutes", "data": None}
+                error = f"timed out after {GEMINI_WINDOW_TIMEOUT_SECONDS}s"
             except Exception as e:
-                logger.error(f"Gemini AI API call failed: {e}")
-                return {"success": False, "message": f"Gemini AI API call failed: {e}", "data": None}
-            data = self._parse_json(text)
-            if not data:
-                return {"success": False, "message": "AI response not parseable as JSON", "data": None}
-            
-            # Handle the comprehensive structure from the working script
-            if "law_sources" in data and data["law_sources"]:
-                # Extract the first law source and its branches
-                law_source = data["law_sources"][0]
-                branches = law_source.get("branches", [])
-                
-                # Log processing report if available
-                processing_report = data.get("processing_report", {})
-                logger.info(f"Processing report: {processing_report}")
-                
-                return {
-                    "success": True, 
-                    "message": f"AI parsed successfully. Extracted {len(branches)} branches, {processing_report.get('total_articles', 0)} articles", 
-                    "data": {
-                        "hierarchy": {"branches": branches},
-                        "law_source": law_source,
-                        "processing_report": processing_report
-                    }
-                }
-            elif "branches" in data:
-                # Fallback for simpler structure
-                return {"success": True, "message": "AI parsed", "data": {"hierarchy": {"branches": data.get("branches", [])}}}
-            else:
-                return {"success": False, "message": "No valid law structure found in AI response", "data": None}
-        except Exception as e:
-            logger.error(f"Gemini parse failed: {e}")
-            return {"success": False, "message": f"Gemini parse failed: {e}", "data": None}
+                error = str(e)
+            logger.warning(f"⚠️ Pages {first}-{last} attempt {attempt + 1} failed: {error}")
+        return None, False, error
+
+    @staticmethod
+    def _hierarchy_parts(data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+        """(law source details without branches, branches, processing report) of one response."""
+        if data.get("law_sources"):
+            source = dict(data["law_sources"][0])
+            branches = source.pop("branches", None) or []
+            return source, branches, data.get("processing_report") or {}
+        return None, data.get("branches") or [], data.get("processing_report") or {}
+
+    def _window_note(self, first: int, last: int, page_count: int) -> str:
+        return f"""
+## نطاق هذا الجزء:
+الملف المرفق هو الصفحات من {first} إلى {last} فقط من وثيقة عدد صفحاتها {page_count}، وتتداخل الأجزاء المتجاورة في بضع صفحات.
+- استخرج كل المواد الظاهرة في هذه الصفحات بأرقامها الأصلية كما هي في الوثيقة.
+- إذا بدأت الصفحات في منتصف باب أو فصل دون ظهور عنوانه، فاجعل رقمه واسمه null وضع المواد تحته.
+- إذا انقطعت مادة في آخر صفحة، فاستخرج الجزء الظاهر منها فقط.
+"""
+
+    # ==================== GEMINI CALLS ====================
+
+    def _limiter(self) -> AsyncRateLimiter:
+        return self._rate_limiter or get_gemini_rate_limiter()
+
+    def _make_part(self, content: bytes, mime: str) -> Any:
+        from google.genai import types  # type: ignore
+        return types.Part.from_bytes(data=content, mime_type=mime)
+
+    async def _generate(self, part: Any, prompt: str, timeout: float) -> str:
+        resp = await asyncio.wait_for(
+            asyncio.to_thread(
+                self._client.models.generate_content,
+                model=GEMINI_MODEL,
+                contents=[part, prompt]
+            ),
+            timeout=timeout
+        )
+        return getattr(resp, "text", "")
 
     def _prompt(self, law_name: str) -> str:
         return f"""
@@ -0,0 +1,145 @@
+"""
+Merging of law hierarchies parsed from overlapping page windows.
+
+Each window of a large PDF is parsed on its own into the usual
+``branches -> chapters -> articles`` structure. Windows overlap by a few pages
+so that no article is only ever seen cut in half, which means the seams repeat
+content:
+
+- a branch or chapter that continues across a seam shows up in both windows,
+  either under the same number/name or, when the window starts mid-way, with
+  neither (the window prompt asks for nulls); both fold into one node;
+- an article in the overlap is parsed twice, possibly truncated in the window
+  where it runs past the last page; the longest text wins and keywords are
+  united.
+
+Numbers are compared after folding Arabic-Indic digits, names after Arabic
+normalisation, so "المادة ١٢" from one window meets "12" from the next.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.arabic_text_processor import normalize_arabic
+
+_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '01234567890123456789')
+_NUMBER_PREFIXES = ('المادة', 'مادة', 'الباب', 'باب', 'الفصل', 'فصل', 'article', 'chapter', 'part')
+
+
+def _number_key(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = ' '.join(str(value).translate(_DIGITS).lower().split()).strip(' .:-()')
+    for prefix in _NUMBER_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):].strip(' .:-()')
+            break
+    return text or None
+
+
+def _name_key(value: Any) -> Optional[str]:
+    if not value:
+        return None
+    return ' '.join(normalize_arabic(str(value), letter_variants=True).split()) or None
+
+
+def _node_key(node: Dict[str, Any], number_field: str, name_field: str) -> Optional[Tuple[str, str]]:
+    """('number', n) or ('name', n) identifying a branch/chapter; None for a continuation."""
+    number = _number_key(node.get(number_field))
+    if number:
+        return ('number', number)
+    name = _name_key(node.get(name_field))
+    return ('name', name) if name else None
+
+
+def _article_key(article: Dict[str, Any]) -> Tuple[str, str]:
+    number = _number_key(article.get('article_number'))
+    if number:
+        return ('number', number)
+    # Unnumbered articles are matched on the start of their text
+    content = _name_key(article.get('content')) or ''
+    return ('content', hashlib.sha1(content[:200].encode('utf-8')).hexdigest())
+
+
+def _fill_missing(target: Dict[str, Any], source: Dict[str, Any], children: str) -> None:
+    for field, value in source.items():
+        if field != children and value not in (None, '', []) and target.get(field) in (None, '', []):
+            target[field] = value
+
+
+def _merge_article(existing: Dict[str, Any], article: Dict[str, Any]) -> None:
+    if len(article.get('content') or '') > len(existing.get('content') or ''):
+        existing['content'] = article['content']
+    keywords = list(existing.get('keywords') or [])
+    keywords.extend(keyword for keyword in article.get('keywords') or [] if keyword not in keywords)
+    existing['keywords'] = keywords
+    _fill_missing(existing, article, 'keywords')
+
+
+def merge_hierarchies(window_branches: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merge the ``branches`` lists of consecutive windows into one hierarchy.
+
+    Args:
+        window_branches: One branches list per window, in page order
+
+    Returns:
+        Merged branches with ``order_index`` renumbered from 1 at every level
+    """
+    branches: List[Dict[str, Any]] = []
+    branch_index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    chapter_index: Dict[int, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+    article_index: Dict[int, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+
+    for window in window_branches:
+        for branch in window or []:
+            key = _node_key(branch, 'branch_number', 'branch_name')
+            target = branch_index.get(key) if key else (branches[-1] if branches else None)
+            if target is None:
+                target = {field: value for field, value in branch.items() if field != 'chapters'}
+                target['chapters'] = []
+                branches.append(target)
+                chapter_index[id(target)] = {}
+                article_index[id(target)] = {}
+            else:
+                _fill_missing(target, branch, 'chapters')
+            if key:
+                branch_index.setdefault(key, target)
+
+            chapters = target['chapters']
+            for chapter in branch.get('chapters') or []:
+                chapter_key = _node_key(chapter, 'chapter_number', 'chapter_name')
+                chapter_target = (
+                    chapter_index[id(target)].get(chapter_key) if chapter_key else (chapters[-1] if chapters else None)
+                )
+                if chapter_target is None:
+                    chapter_target = {field: value for field, value in chapter.items() if field != 'articles'}
+                    chapter_target['articles'] = []
+                    chapters.append(chapter_target)
+                else:
+                    _fill_missing(chapter_target, chapter, 'articles')
+                if chapter_key:
+                    chapter_index[id(target)].setdefault(chapter_key, chapter_target)
+
+                # Article numbers are unique within a branch; a repeat is the seam overlap
+                for article in chapter.get('articles') or []:
+                    article_key = _article_key(article)
+                    existing = article_index[id(target)].get(article_key)
+                    if existing is not None:
+                        _merge_article(existing, article)
+                        continue
+                    merged = dict(article)
+                    chapter_target['articles'].append(merged)
+                    article_index[id(target)][article_key] = merged
+
+    for branch_order, branch in enumerate(branches, 1):
+        branch['order_index'] = branch_order
+        for chapter_order, chapter in enumerate(branch['chapters'], 1):
+            chapter['order_index'] = chapter_order
+            for article_order, article in enumerate(chapter['articles'], 1):
+                article['order_index'] = article_order
+    return branches
+
+
+def count_articles(branches: List[Dict[str, Any]]) -> int:
+    return sum(len(chapter.get('articles') or []) for branch in branches for chapter in branch.get('chapters') or [])
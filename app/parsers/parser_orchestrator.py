@@ -22,9 +22,10 @@ class ParserOrchestrator:
         law_source_id: Optional[int] = None,
         use_ai: bool = True,
         fallback_on_failure: bool = True,
+        parallel: Optional[bool] = None,
     ) -> Dict[str, Any]:
         if use_ai:
-            ai_res = await self.ai.parse(file_path, law_source_details)
+            ai_res = await self.ai.parse(file_path, law_source_details, parallel=parallel)
             if ai_res.get("success"):
                 return {**ai_res, "parser_used": "gemini"}
             if not fallback_on_failure:
@@ -10,22 +10,232 @@ Features:
 - Fragmented text normalization
 - RTL direction handling
 - Multi-method extraction (Direct + OCR)
-- Intelligent method selection based on Arabic content quality
+- Page-level quality scoring: only poor pages are OCR'd, in a process pool
+- Per-page direct and OCR text cached on disk by content hash and settings
 """
 
+import json
 import logging
-import fitz  # PyMuPDF
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-import arabic_reshaper
-from bidi.algorithm import get_display
+import multiprocessing
+import os
+import queue
 import re
-from typing import Tuple, Optional
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Tuple, Optional
 from pathlib import Path
 
+from ..utils import arabic_text_processor as arabic_text
+from ..utils.extraction_cache import extraction_key, get_extraction_cache
+from ..utils.lazy_loader import get_engine
+
 logger = logging.getLogger(__name__)
 
+PAGE_SEPARATOR = "\n---PAGE_SEPARATOR---\n"
+TESSERACT_LANGUAGES = {'ar': 'ara', 'en': 'eng', 'fr': 'fra'}
+
+# Page-level extraction settings
+OCR_DPI = int(os.getenv("PDF_OCR_DPI", "300"))
+OCR_MAX_WORKERS = int(os.getenv("PDF_OCR_MAX_WORKERS", "0")) or (os.cpu_count() or 1)
+PAGE_QUALITY_THRESHOLD = float(os.getenv("PDF_PAGE_QUALITY_THRESHOLD", "0.5"))
+MIN_PAGE_CHARS = int(os.getenv("PDF_MIN_PAGE_CHARS", "40"))
+
+# Streaming OCR settings: pages rendered per pdf2image call and rendered pages
+# allowed to wait for an OCR worker (bounds how many rasters live in memory)
+RENDER_WINDOW = int(os.getenv("PDF_RENDER_WINDOW", "2"))
+OCR_QUEUE_SIZE = int(os.getenv("PDF_OCR_QUEUE_SIZE", "4"))
+
+# Tesseract page segmentation modes, tried in order until one finds text
+OCR_PSM_MODES = (4, 11)
+
+# Part of every extraction cache key; bump when page extraction or Arabic
+# fixing changes its output so stale cached pages are no longer served
+PDF_EXTRACTOR_VERSION = "1"
+
+
+def load_pdf_toolkit() -> SimpleNamespace:
+    """
+    Import the PDF/OCR/Arabic shaping libraries and configure Tesseract.
+
+    Registered as the "pdf_toolkit" engine so these imports happen on first
+    extraction (or during background warm-up) rather than at application boot.
+    """
+    import fitz  # PyMuPDF
+    import pytesseract
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    from PIL import Image
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    try:
+        pytesseract.pytesseract.tesseract_cmd = os.getenv('TESSERACT_CMD', 'tesseract')
+    except Exception as e:
+        logger.warning(f"Tesseract configuration warning: {e}")
+
+    return SimpleNamespace(
+        fitz=fitz,
+        pytesseract=pytesseract,
+        convert_from_path=convert_from_path,
+        pdfinfo_from_path=pdfinfo_from_path,
+        Image=Image,
+        arabic_reshaper=arabic_reshaper,
+        get_display=get_display,
+    )
+
+
+def pdf_toolkit() -> SimpleNamespace:
+    """Return the lazily loaded PDF toolkit."""
+    return get_engine("pdf_toolkit").get()
+
+
+def iter_page_images(
+    pdf_path: str,
+    dpi: int = OCR_DPI,
+    page_numbers: Optional[List[int]] = None,
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Render PDF pages one at a time for OCR, yielding (page_num, PIL image).
+    
+    Uses PyMuPDF grayscale pixmaps (no temporary files, one page in memory);
+    falls back to pdf2image in windows of RENDER_WINDOW pages via
+    first_page/last_page when PyMuPDF cannot open the file.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        dpi: Render resolution
+        page_numbers: 1-based pages to render (defaults to every page)
+    """
+    toolkit = pdf_toolkit()
+    
+    try:
+        doc = toolkit.fitz.open(pdf_path)
+    except Exception as e:
+        logger.warning(f"PyMuPDF could not open {pdf_path} for rendering ({e}), using pdf2image")
+        doc = None
+    
+    if doc is not None:
+        try:
+            targets = page_numbers or range(1, doc.page_count + 1)
+            for page_num in targets:
+                pixmap = doc[page_num - 1].get_pixmap(dpi=dpi, colorspace=toolkit.fitz.csGRAY)
+                image = toolkit.Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+                del pixmap
+                yield page_num, image
+        finally:
+            doc.close()
+        return
+    
+    if page_numbers is None:
+        page_count = int(toolkit.pdfinfo_from_path(pdf_path).get("Pages", 0))
+        page_numbers = list(range(1, page_count + 1))
+    
+    # Group consecutive pages into windows so each pdf2image call stays small
+    window: List[int] = []
+    for page_num in list(page_numbers) + [None]:
+        if page_num is not None and (not window or (page_num == window[-1] + 1 and len(window) < RENDER_WINDOW)):
+            window.append(page_num)
+            continue
+        if window:
+            images = toolkit.convert_from_path(pdf_path, dpi=dpi, first_page=window[0], last_page=window[-1])
+            for offset, image in enumerate(images):
+                yield window[0] + offset, image
+            del images
+        window = [page_num] if page_num is not None else []
+
+
+def render_page_image(pdf_path: str, page_num: int, dpi: int = OCR_DPI) -> Optional[Any]:
+    """Render a single 1-based page, or None if it could not be rendered."""
+    for _, image in iter_page_images(pdf_path, dpi, [page_num]):
+        return image
+    return None
+
+
+def count_arabic_chars(text: str) -> int:
+    """Number of characters in the basic Arabic block."""
+    return arabic_text.arabic_char_count(text)
+
+
+def score_page_text(text: str) -> float:
+    """
+    Score the quality of a page's directly extracted text between 0 and 1.
+    
+    Scanned pages yield little or no text, and broken font encodings yield
+    replacement/private-use characters or runs of isolated letters; all of
+    these pull the score down so the page is sent to OCR instead.
+    """
+    stripped = text.strip()
+    if len(stripped) < MIN_PAGE_CHARS:
+        return 0.0
+    
+    visible = [c for c in stripped if not c.isspace()]
+    if not visible:
+        return 0.0
+    
+    letters = sum(1 for c in visible if c.isalpha())
+    junk = sum(1 for c in visible if c == '\ufffd' or '\ue000' <= c <= '\uf8ff' or ord(c) < 32)
+    
+    words = stripped.split()
+    fragments = sum(1 for w in words if len(w) == 1 and '\u0600' <= w <= '\u06FF')
+    
+    score = letters / len(visible) - 2 * junk / len(visible) - 0.6 * fragments / len(words)
+    return max(0.0, min(1.0, score))
+
+
+def _page_cache_key(content_hash: Optional[str], page_num: Optional[int], extractor: str, **settings: Any) -> Optional[str]:
+    """Extraction cache key for one page; shaping availability changes the fixed text."""
+    return extraction_key(
+        content_hash, page_num, extractor, PDF_EXTRACTOR_VERSION,
+        shaping=arabic_text.shaping_available(), **settings
+    )
+
+
+def _ocr_cache_key(content_hash: Optional[str], page_num: Optional[int], language: str, dpi: int = OCR_DPI) -> Optional[str]:
+    return _page_cache_key(
+        content_hash, page_num, "pdf-ocr",
+        language=TESSERACT_LANGUAGES.get(language, 'ara'), dpi=dpi, psm=OCR_PSM_MODES,
+    )
+
+
+def _log_ocr_install_hint(error_type: str, error_msg: str) -> None:
+    """Provide helpful hints for common OCR setup errors."""
+    if "tesseract" in error_msg.lower() or "tesseract" in error_type.lower():
+        logger.error("Tesseract OCR is not installed or not in PATH. Install it: sudo apt-get install tesseract-ocr tesseract-ocr-ara")
+    elif "pdf2image" in error_msg.lower() or "poppler" in error_msg.lower():
+        logger.error("pdf2image or poppler not installed. Install: sudo apt-get install poppler-utils")
+
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Shared process pool for page OCR (spawned workers, created on first use)."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=OCR_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"🧵 Started OCR process pool with {OCR_MAX_WORKERS} workers")
+        return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    """Shut the shared OCR pool down (a new one is created on next use)."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False, cancel_futures=True)
+            _ocr_pool = None
+
+
+def _ocr_page_worker(pdf_path: str, page_num: int, language: str) -> str:
+    """Process-pool entry point: OCR a single page."""
+    return EnhancedArabicPDFProcessor().ocr_page(pdf_path, page_num, language)
+
 
 class EnhancedArabicPDFProcessor:
     """
@@ -36,293 +246,100 @@ class EnhancedArabicPDFProcessor:
 
     def __init__(self):
         """Initialize the enhanced Arabic PDF processor."""
-        # Configure Tesseract if available
-        try:
-            import os
-            tesseract_cmd = os.getenv('TESSERACT_CMD', 'tesseract')
-            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-        except Exception as e:
-            logger.warning(f"Tesseract configuration warning: {e}")
+        # Tesseract is configured when the PDF toolkit engine is first loaded
+        pass
 
     # ==================== ARABIC TEXT DETECTION & FIXING ====================
 
     def needs_fixing(self, text: str) -> bool:
-        """
-        Enhanced detection of Arabic text that needs fixing - ALWAYS fix Arabic text in PDFs
-        
-        From extract_arabic_pdf.py - comprehensive Arabic text detection logic.
-        """
-        if not text.strip():
-            return False
-
-        # Check for any Arabic characters
-        arabic_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        if arabic_chars == 0:
-            return False
-
-        # Check for fragmented words (average word length <= 2)
-        words = text.split()
-        if words:
-            avg_word_len = sum(len(w) for w in words) / len(words)
-            if avg_word_len <= 2:
-                return True
+        """Whether a line of extracted text needs Arabic fixing (see arabic_text_processor)."""
+        return arabic_text.needs_fixing(text)
 
-        # Check for fragmented individual Arabic characters
-        fragmented_patterns = [
-            len(word) == 1 and '\u0600' <= word <= '\u06FF' for word in words
-        ]
-        if any(fragmented_patterns):
-            return True
+    def fix_arabic_text(self, text: str) -> str:
+        """Clean, de-fragment, reshape and BiDi-reorder a line, padding predominantly Arabic lines."""
+        return arabic_text.fix_arabic_text(text, pad_rtl=True)
 
-        # Check for artifacts (isolated Unicode characters)
-        artifacts = ['ﻢ', 'ﻪ', 'ﻆ', 'ﺍ', 'ﺕ', 'ﺏ', 'ﻞ', 'ﺝ', 'ﺡ', 'ﺥ', 'ﺩ', 'ﺫ', 'ﺭ', 'ﺯ', 'ﺱ', 'ﺵ', 'ﺹ', 'ﺽ', 'ﻁ', 'ﻅ', 'ﻉ', 'ﻍ', 'ﻑ', 'ﻕ', 'ﻙ', 'ﻝ', 'ﻡ', 'ﻥ', 'ﻩ', 'ﻭ', 'ﻱ']
-        if any(artifact in text for artifact in artifacts):
-            return True
+    def ensure_rtl_text_direction(self, text: str) -> str:
+        """Mark Arabic words and lines as right-to-left."""
+        return arabic_text.ensure_rtl_text_direction(text)
 
-        # For PDFs, ALWAYS apply fixing if Arabic text is detected (it may look good but still need reshaping)
-        arabic_ratio = arabic_chars / len(text.strip()) if text.strip() else 0
-        if arabic_ratio > 0.1:  # If 10% or more Arabic characters, fix it
-            return True
+    def normalize_fragmented_arabic(self, text: str) -> str:
+        """Merge fragmented Arabic letters back into words."""
+        return arabic_text.normalize_fragmented_arabic(text)
 
-        return False
+    def clean_text_artifacts(self, text: str) -> str:
+        """Collapse whitespace and map presentation-form glyphs to standard letters."""
+        return arabic_text.clean_text_artifacts(text)
 
-    def fix_arabic_text(self, text: str) -> str:
+    # ==================== PDF TEXT EXTRACTION ====================
+
+    def _extract_page_direct(self, page, page_num: int) -> Tuple[str, str]:
         """
-        Comprehensive Arabic text fixing with proper RTL handling
+        Direct extraction of a single PyMuPDF page.
         
-        From extract_arabic_pdf.py - advanced Arabic text processing.
+        Returns:
+            Tuple of (processed_text, raw_text) where raw_text is the unfixed
+            span text used to score the page's extraction quality
         """
-        if not text.strip():
-            return text
+        # Use get_text("dict") to get all possible text
+        page_dict = page.get_text("dict")
         
-        # Step 1: Clean Unicode artifacts first
-        cleaned_text = self.clean_text_artifacts(text)
+        if not page_dict or "blocks" not in page_dict:
+            logger.warning(f"No dict blocks found at page {page_num}")
+            return f"\n---EMPTY_PAGE_{page_num}---\n", ""
         
-        # Step 2: Normalize fragmented text - merge broken letters into words
-        normalized = self.normalize_fragmented_arabic(cleaned_text)
+        blocks = page_dict["blocks"]
+        logger.debug(f"Page {page_num}: Found {len(blocks)} blocks in dict")
         
-        # Step 3: Ensure proper word spacing for RTL
-        words = normalized.split()
-        fixed_words = []
+        parts = []
+        raw_lines = []
         
-        for word in words:
-            # Check if word contains Arabic characters
-            arabic_chars = sum(1 for c in word if '\u0600' <= c <= '\u06FF')
-            if arabic_chars > 0:
-                # Apply reshaping to Arabic words
-                reshaped_word = arabic_reshaper.reshape(word)
-                fixed_words.append(reshaped_word)
-            else:
-                # Keep non-Arabic words as-is
-                fixed_words.append(word)
-        
-        # Step 4: Join words and apply BiDi algorithm for proper RTL/LTR display
-        text_for_bidi = ' '.join(fixed_words)
-        
-        # Apply BiDi algorithm with proper base direction for Arabic text
-        try:
-            # Check if Arabic content dominates the text
-            arabic_ratio = sum(1 for c in text_for_bidi if '\u0600' <= c <= '\u06FF') / len(text_for_bidi.strip()) if text_for_bidi.strip() else 0
+        # Process each block individually - full depth: blocks -> lines -> spans
+        for block in blocks:
+            if "lines" not in block:
+                parts.append("\n")  # Keep separator
+                continue
             
-            if arabic_ratio > 0.5:  # More than 50% Arabic
-                # Prepend RTL mark for proper Arabic text direction
-                rtl_text = '\u202F' + text_for_bidi + '\u202F'  # Use Narrow No-Black Space
-                fixed_text = get_display(rtl_text)
-            else:
-                # Mixed content - use default BiDi processing
-                fixed_text = get_display(text_for_bidi)
+            # Process each line individually
+            for line in block["lines"]:
+                if "spans" not in line:
+                    parts.append("\n")  # Keep empty line
+                    continue
                 
-        except Exception as e:
-            logger.warning(f"RTL processing error: {e}")
-            # Fallback: just apply reshaping without BiDi
-            fixed_text = text_for_bidi
-        
-        return fixed_text
-
-    def ensure_rtl_text_direction(self, text: str) -> str:
-        """
-        Ensure Arabic text is displayed in proper RTL direction
-        
-        From extract_arabic_pdf.py - RTL direction handling.
-        """
-        if not text.strip():
-            return text
-        
-        # Check if text contains Arabic characters
-        arabic_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        if arabic_chars == 0:
-            return text
-        
-        # Split text into lines and process each line
-        lines = text.split('\n')
-        rtl_lines = []
-        
-        for line in lines:
-            if line.strip() and arabic_chars > 0:
-                # Split line into words and process each word
-                words = line.split()
-                processed_words = []
+                # Extract each span individually (empty spans keep a space)
+                line_text = "".join(
+                    span["text"] if span["text"].strip() else " "
+                    for span in line["spans"] if "text" in span
+                )
                 
-                for word in words:
-                    # Check if word contains Arabic
-                    word_arabic_chars = sum(1 for c in word if '\u0600' <= c <= '\u06FF')
-                    if word_arabic_chars > 0:
-                        # For Arabic words, apply RTL mark
-                        processed_word = '\u200F' + word + '\u200F'
-                        processed_words.append(processed_word)
+                # Apply fix_arabic_text to each line (always) - don't ignore any text
+                if line_text.strip():
+                    raw_lines.append(line_text)
+                    # Always apply Arabic fixing and RTL direction for any Arabic content
+                    if self.needs_fixing(line_text):
+                        fixed_line = self.fix_arabic_text(line_text)
+                        # Apply RTL direction for Arabic text
+                        fixed_line = self.ensure_rtl_text_direction(fixed_line)
                     else:
-                        processed_words.append(word)
-                
-                # Rejoin words and add RTL mark to the entire line
-                processed_line = '\u202E' + ' '.join(processed_words) + '\u202C'
-                rtl_lines.append(processed_line)
-            else:
-                rtl_lines.append(line)
-        
-        return '\n'.join(rtl_lines)
-
-    def normalize_fragmented_arabic(self, text: str) -> str:
-        """
-        Merge fragmented Arabic letters back into words
-        
-        From extract_arabic_pdf.py - fragmented text normalization.
-        """
-        if not text.strip():
-            return text
-        
-        # First, try to merge isolated Arabic characters that are separated by spaces
-        # Split by spaces and analyze each token
-        words = text.split()
-        current_word = ""
-        normalized_words = []
-        
-        for i, word in enumerate(words):
-            word_clean = word.strip()
-            
-            if not word_clean:
-                continue
-                
-            # If this is a single Arabic character
-            if len(word_clean) == 1 and '\u0600' <= word_clean <= '\u06FF':
-                # Merge with current_word if it's building an Arabic word
-                if current_word and '\u0600' <= current_word[-1] <= '\u06FF':
-                    current_word += word_clean
+                        # Check if line contains Arabic and needs RTL direction
+                        fixed_line = self.ensure_rtl_text_direction(line_text)
+                    parts.append(fixed_line + "\n")
                 else:
-                    if current_word:
-                        normalized_words.append(current_word)
-                    current_word = word_clean
-            
-            # If this is a number or English, separate it
-            elif word_clean.isdigit() or word_clean.isalpha() or word_clean in ['.', ',', ':', ';']:
-                if current_word:
-                    normalized_words.append(current_word)
-                    current_word = ""
-                normalized_words.append(word_clean)
-            
-            # If this is a longer word that contains Arabic
-            else:
-                arabic_chars = sum(1 for c in word_clean if '\u0600' <= c <= '\u06FF')
-                if arabic_chars > len(word_clean) * 0.7:  # Mostly Arabic word
-                    if current_word and '\u0600' <= current_word[-1] <= '\u06FF':
-                        current_word += word_clean
-                    else:
-                        if current_word:
-                            normalized_words.append(current_word)
-                            current_word = ""
-                        current_word = word_clean
-                else:  # Non-Arabic word
-                    if current_word:
-                        normalized_words.append(current_word)
-                        current_word = ""
-                    normalized_words.append(word_clean)
-        
-        # Add any remaining word
-        if current_word:
-            normalized_words.append(current_word)
-        
-        # Clean up artifacts and excessive spaces
-        normalized_text = ' '.join(normalized_words)
-        normalized_text = self.clean_text_artifacts(normalized_text)
-        
-        return normalized_text
-
-    def clean_text_artifacts(self, text: str) -> str:
-        """
-        Remove artifacts and clean up text formatting
-        
-        From extract_arabic_pdf.py - comprehensive Unicode artifact cleaning.
-        """
-        if not text:
-            return text
-        
-        # Remove excessive spaces
-        text = ' '.join(text.split())
-        
-        # Comprehensive Arabic Unicode artifact cleaning
-        # Convert various Unicode forms to standard Arabic letters
+                    parts.append("\n")  # Keep empty line to preserve structure
         
-        # Isolated forms to standard forms
-        artifacts_map = {
-            # Alef forms
-            'ﺍ': 'ا', 'ﺎ': 'ا', 'ﺀ': 'ء', 'ﺃ': 'أ', 'ﺄ': 'أ', 'ﺇ': 'إ', 'ﺈ': 'إ', 'ﺅ': 'ؤ', 'ﺆ': 'ؤ',
-            
-            # Ba forms  
-            'ﺏ': 'ب', 'ﺐ': 'ب', 'ﺑ': 'ب', 'ﺒ': 'ب',
-            
-            # Ta forms
-            'ﺕ': 'ت', 'ﺖ': 'ت', 'ﺗ': 'ت', 'ﺘ': 'ت', 'ﺙ': 'ث', 'ﺚ': 'ث', 'ﺛ': 'ث', 'ﺜ': 'ث',
-            
-            # Dal forms
-            'ﺩ': 'د', 'ﺪ': 'د', 'ﺫ': 'ذ', 'ﺬ': 'ذ',
-            
-            # Ra forms
-            'ﺭ': 'ر', 'ﺮ': 'ر', 'ﺯ': 'ز', 'ﺰ': 'ز',
-            
-            # Seen forms
-            'ﺱ': 'س', 'ﺲ': 'س', 'ﺳ': 'س', 'ﺴ': 'س', 'ﺵ': 'ش', 'ﺶ': 'ش', 'ﺷ': 'ش', 'ﺸ': 'ش',
-            
-            # Sad forms
-            'ﺹ': 'ص', 'ﺺ': 'ص', 'ﺻ': 'ص', 'ﺼ': 'ص', 'ﺽ': 'ض', 'ﺾ': 'ض', 'ﺿ': 'ض', 'ﻀ': 'ض',
-            
-            # Ta forms (different types)
-            'ﻁ': 'ط', 'ﻂ': 'ط', 'ﻃ': 'ط', 'ﻄ': 'ط', 'ﻅ': 'ظ', 'ﻆ': 'ظ', 'ﻈ': 'ظ', 'ﻇ': 'ظ',
-            
-            # Ain forms
-            'ﻉ': 'ع', 'ﻊ': 'ع', 'ﻋ': 'ع', 'ﻌ': 'ع', 'ﻍ': 'غ', 'ﻎ': 'غ', 'ﻏ': 'غ', 'ﻐ': 'غ',
-            
-            # Fa forms
-            'ﻑ': 'ف', 'ﻒ': 'ف', 'ﻓ': 'ف', 'ﻔ': 'ف', 'ﻕ': 'ق', 'ﻖ': 'ق', 'ﻗ': 'ق', 'ﻘ': 'ق',
-            
-            # Kaf forms
-            'ﻙ': 'ك', 'ﻚ': 'ك', 'ﻛ': 'ك', 'ﻜ': 'ك',
-            
-            # Lam forms
-            'ﻝ': 'ل', 'ﻞ': 'ل', 'ﻟ': 'ل', 'ﻠ': 'ل', 'ﻡ': 'م', 'ﻢ': 'م', 'ﻣ': 'م', 'ﻤ': 'م',
-            
-            # Noon forms
-            'ﻥ': 'ن', 'ﻦ': 'ن', 'ﻧ': 'ن', 'ﻨ': 'ن', 'ﻩ': 'ه', 'ﻪ': 'ه', 'ﻫ': 'ه', 'ﻬ': 'ه',
-            
-            # Waw forms
-            'ﻭ': 'و', 'ﻮ': 'و', 'ﺩ': 'د', 'ﺪ': 'د', 'ﺰ': 'ز', 'ﺯ': 'ز',
-            
-            # Ya forms
-            'ﻱ': 'ي', 'ﻲ': 'ي', 'ﻳ': 'ي', 'ﻴ': 'ي', 'ﺀ': 'ء', 'ﺁ': 'آ', 'ﺂ': 'آ',
-            
-            # Additional artifacts
-            'ﻼ': 'لا', 'ﻻ': 'لا', 'ﺒ': 'ب', 'ﺑ': 'ب', 'ﺔ': 'ة', 'ﺓ': 'ة',
-        }
-        
-        # Apply character mapping
-        for artifact, correct_char in artifacts_map.items():
-            text = text.replace(artifact, correct_char)
-        
-        # Clean up any remaining isolated Arabic forms that might have been missed
-        # Remove any remaining isolated Unicode forms (Unicode range U+FE70-U+FEFC)
-        text = re.sub(r'[\uFE70-\uFEFC]', lambda m: artifacts_map.get(m.group(), m.group()), text)
-        
-        return text
+        return "".join(parts), "\n".join(raw_lines)
 
-    # ==================== PDF TEXT EXTRACTION ====================
+    def _extract_page_cached(self, page, page_num: int, content_hash: Optional[str]) -> Tuple[str, str]:
+        """``_extract_page_direct`` through the extraction cache."""
+        cache = get_extraction_cache()
+        key = _page_cache_key(content_hash, page_num, "pdf-direct")
+        cached = cache.get(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            return entry["text"], entry["raw"]
+        page_text, raw_text = self._extract_page_direct(page, page_num)
+        cache.put(key, json.dumps({"text": page_text, "raw": raw_text}, ensure_ascii=False))
+        return page_text, raw_text
 
     def extract_text_direct(self, pdf_path: str) -> str:
         """
@@ -331,84 +348,26 @@ class EnhancedArabicPDFProcessor:
         From extract_arabic_pdf.py - sophisticated direct extraction logic.
         """
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
+            doc = pdf_toolkit().fitz.open(pdf_path)
+            content_hash = get_extraction_cache().content_hash(pdf_path)
+            parts = []
             
             for page_num, page in enumerate(doc, 1):
                 try:
                     logger.info(f"Processing page {page_num} with dict extraction...")
-                    
-                    # Use get_text("dict") to get all possible text
-                    page_dict = page.get_text("dict")
-                    
-                    if not page_dict or "blocks" not in page_dict:
-                        logger.warning(f"No dict blocks found at page {page_num}")
-                        text += f"\n---EMPTY_PAGE_{page_num}---\n"
-                        continue
-                    
-                    blocks = page_dict["blocks"]
-                    logger.info(f"Page {page_num}: Found {len(blocks)} blocks in dict")
-                    
-                    # Process each block individually - full depth: blocks -> lines -> spans
-                    for block_num, block in enumerate(blocks):
-                        if "lines" not in block:
-                            logger.warning(f"Block {block_num} at page {page_num} has no lines")
-                            text += "\n"  # Keep separator
-                            continue
-                        
-                        lines = block["lines"]
-                        logger.debug(f"Page {page_num}, Block {block_num}: Found {len(lines)} lines")
-                        
-                        # Process each line individually
-                        for line_num, line in enumerate(lines):
-                            if "spans" not in line:
-                                logger.warning(f"Line {line_num} in block {block_num} at page {page_num} has no spans")
-                                text += "\n"  # Keep empty line
-                                continue
-                            
-                            spans = line["spans"]
-                            line_text = ""
-                            
-                            # Extract each span individually
-                            for span_num, span in enumerate(spans):
-                                if "text" not in span:
-                                    logger.warning(f"Span {span_num} in line {line_num}, block {block_num}, page {page_num} has no text")
-                                    continue
-                                
-                                span_text = span["text"]
-                                if not span_text.strip():
-                                    logger.warning(f"Empty span {span_num} in line {line_num}, block {block_num}, page {page_num}")
-                                    line_text += " "  # Keep space
-                                    continue
-                                
-                                logger.debug(f"Page {page_num}, Block {block_num}, Line {line_num}, Span {span_num}: '{span_text[:30]}...'")
-                                line_text += span_text
-                            
-                            # Apply fix_arabic_text to each line (always) - don't ignore any text
-                            if line_text.strip():
-                                # Always apply Arabic fixing and RTL direction for any Arabic content
-                                if self.needs_fixing(line_text):
-                                    fixed_line = self.fix_arabic_text(line_text)
-                                    # Apply RTL direction for Arabic text
-                                    fixed_line = self.ensure_rtl_text_direction(fixed_line)
-                                    logger.debug(f"Fixed Arabic line: '{line_text[:30]}...' -> '{fixed_line[:30]}...'")
-                                else:
-                                    # Check if line contains Arabic and needs RTL direction
-                                    fixed_line = self.ensure_rtl_text_direction(line_text)
-                                text += fixed_line + "\n"
-                            else:
-                                logger.warning(f"Empty line {line_num} in block {block_num} at page {page_num}")
-                                text += "\n"  # Keep empty line to preserve structure
+                    page_text, _ = self._extract_page_cached(page, page_num, content_hash)
+                    parts.append(page_text)
                     
                     # Add page separator
-                    text += "\n---PAGE_SEPARATOR---\n"
+                    parts.append(PAGE_SEPARATOR)
                     
                 except Exception as page_e:
                     logger.error(f"Error processing page {page_num}: {page_e}")
-                    text += f"\n---ERROR_PAGE_{page_num}---\n"
+                    parts.append(f"\n---ERROR_PAGE_{page_num}---\n")
                     continue
             
             doc.close()
+            text = "".join(parts)
             text_length = len(text.strip())
             logger.info(f"[Direct] Extracted {len(text)} characters ({text_length} stripped) from PDF using dict extraction")
             
@@ -421,138 +380,307 @@ class EnhancedArabicPDFProcessor:
             logger.error(f"Direct extraction failed with error: {type(e).__name__}: {str(e)}")
             return ""
 
-    def extract_text_ocr(self, pdf_path: str, language: str = 'ar') -> str:
+    def _ocr_image(self, image, page_num: int, tesseract_lang: str) -> Optional[str]:
         """
-        OCR-based extraction using pdf2image + Tesseract with advanced Arabic processing
+        OCR one rendered page image and apply Arabic fixing line by line.
         
-        From extract_arabic_pdf.py - sophisticated OCR extraction logic.
+        Returns:
+            Processed page text, or None when Tesseract found no text
         """
-        try:
-            # Map language codes for OCR
-            lang_map = {
-                'ar': 'ara',
-                'en': 'eng',
-                'fr': 'fra'
-            }
-            tesseract_lang = lang_map.get(language, 'ara')
-            
-            pages = convert_from_path(pdf_path, dpi=300)
-            text = ""
+        toolkit = pdf_toolkit()
+        
+        # --psm 4 (single column) first, then --psm 11 (sparse text)
+        for psm in OCR_PSM_MODES:
+            raw_page_text = toolkit.pytesseract.image_to_string(
+                image, lang=tesseract_lang, config=f"--oem 3 --psm {psm}"
+            )
+            if raw_page_text.strip():
+                break
+            logger.warning(f"No text with --psm {psm} from page {page_num}")
+        
+        if not raw_page_text.strip():
+            logger.warning(f"No OCR text extracted from page {page_num} with any PSM")
+            return None
+        
+        logger.info(f"Page {page_num} raw OCR: {len(raw_page_text)} characters")
+        
+        # Process each line individually - don't ignore anything
+        parts = []
+        for line in raw_page_text.splitlines():
+            if not line.strip():
+                parts.append("\n")  # Keep empty line
+                continue
             
-            for page_num, page in enumerate(pages, 1):
+            # Apply fix_arabic_text to each line - OCR always needs fixing for Arabic texts
+            if self.needs_fixing(line):
+                fixed_line = self.fix_arabic_text(line)
+                # Apply RTL direction for OCR Arabic text
+                fixed_line = self.ensure_rtl_text_direction(fixed_line)
+            else:
+                # Check if OCR line contains Arabic and needs RTL direction
+                fixed_line = self.ensure_rtl_text_direction(line)
+            parts.append(fixed_line + "\n")
+        
+        return "".join(parts)
+
+    def ocr_page(self, pdf_path: str, page_num: int, language: str = 'ar', dpi: int = OCR_DPI) -> str:
+        """
+        Render and OCR a single page (1-based page number).
+        
+        Only this page is rasterised, so memory stays bounded regardless of
+        document length. Used by the page-level pipeline's OCR workers.
+        """
+        tesseract_lang = TESSERACT_LANGUAGES.get(language, 'ara')
+        image = render_page_image(pdf_path, page_num, dpi)
+        if image is None:
+            return f"\n---NO_OCR_PAGE_{page_num}---\n"
+        page_text = self._ocr_image(image, page_num, tesseract_lang)
+        return page_text if page_text is not None else f"\n---NO_OCR_PAGE_{page_num}---\n"
+
+    def extract_text_ocr(self, pdf_path: str, language: str = 'ar') -> str:
+        """
+        OCR-based extraction using streamed page rendering + Tesseract with advanced Arabic processing
+        
+        Pages are rendered one at a time and handed to OCR worker threads
+        through a bounded queue, so at most OCR_QUEUE_SIZE + workers page
+        images are alive at once however long the document is. The whole
+        result is cached, as pages cannot be told apart without PyMuPDF, but
+        only when every page was OCR'd: a page lost to a Tesseract or memory
+        failure must not become the document's permanent cached text.
+        """
+        cache = get_extraction_cache()
+        cache_key = _ocr_cache_key(cache.content_hash(pdf_path), None, language)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"[OCR] Served {len(cached)} characters from the extraction cache")
+            return cached
+        
+        tesseract_lang = TESSERACT_LANGUAGES.get(language, 'ara')
+        page_texts: Dict[int, str] = {}
+        incomplete_pages: List[int] = []
+        work: "queue.Queue[Optional[Tuple[int, Any]]]" = queue.Queue(maxsize=OCR_QUEUE_SIZE)
+        
+        def ocr_worker() -> None:
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                page_num, image = item
                 try:
-                    logger.info(f"OCR processing page {page_num}/{len(pages)}...")
-                    
-                    # Use --psm 4 as default (single column) instead of --psm 6
-                    raw_page_text = pytesseract.image_to_string(
-                        page, lang=tesseract_lang, config="--oem 3 --psm 4"
-                    )
-                    
-                    # If no text extracted, try --psm 11 (sparse text)
-                    if not raw_page_text.strip():
-                        logger.warning(f"No text with --psm 4 from page {page_num}, trying --psm 11...")
-                        raw_page_text = pytesseract.image_to_string(
-                            page, lang=tesseract_lang, config="--oem 3 --psm 11"
-                        )
-                    
-                    if not raw_page_text.strip():
-                        logger.warning(f"No OCR text extracted from page {page_num} with any PSM")
-                        text += f"\n---NO_OCR_PAGE_{page_num}---\n"
-                        text += "\n---PAGE_SEPARATOR---\n"
-                        continue
-                    
-                    logger.info(f"Page {page_num} raw OCR: {len(raw_page_text)} characters")
-                    
-                    # Split text into lines - keep every line
-                    ocr_lines = raw_page_text.splitlines()
-                    logger.info(f"Page {page_num}: Found {len(ocr_lines)} lines from OCR")
-                    
-                    # Process each line individually - don't ignore anything
-                    for line_num, line in enumerate(ocr_lines):
-                        if not line.strip():
-                            logger.warning(f"Empty OCR line {line_num} at page {page_num}")
-                            text += "\n"  # Keep empty line
-                            continue
-                        
-                        # Print debug for raw content
-                        logger.debug(f"Page {page_num}, Line {line_num}: '{line[:50]}...'")
-                        
-                        # Apply fix_arabic_text to each line - OCR always needs fixing for Arabic texts
-                        if self.needs_fixing(line):
-                            fixed_line = self.fix_arabic_text(line)
-                            # Apply RTL direction for OCR Arabic text
-                            fixed_line = self.ensure_rtl_text_direction(fixed_line)
-                            logger.debug(f"Fixed OCR line: '{line[:30]}...' -> '{fixed_line[:30]}...'")
-                        else:
-                            # Check if OCR line contains Arabic and needs RTL direction
-                            fixed_line = self.ensure_rtl_text_direction(line)
-                        text += fixed_line + "\n"
-                    
-                    # Add page separator
-                    text += "\n---PAGE_SEPARATOR---\n"
-                    
+                    logger.info(f"OCR processing page {page_num}...")
+                    page_text = self._ocr_image(image, page_num, tesseract_lang)
+                    if page_text is None:
+                        incomplete_pages.append(page_num)
+                        page_text = f"\n---NO_OCR_PAGE_{page_num}---\n"
+                    page_texts[page_num] = page_text
                 except Exception as page_e:
                     logger.error(f"Error processing OCR page {page_num}: {page_e}")
                     # Even if page fails, try to continue
-                    text += f"\n---ERROR_PAGE_{page_num}---\n"
-                    text += "\n---PAGE_SEPARATOR---\n"
-                    continue
-            
-            text_length = len(text.strip())
-            logger.info(f"[OCR] Extracted {len(text)} characters ({text_length} stripped) from {len(pages)} pages using improved PSM")
-            
-            if text_length == 0:
-                logger.warning("[OCR] No text extracted via OCR - check if Tesseract is installed and configured properly")
-            
-            return text
-            
+                    incomplete_pages.append(page_num)
+                    page_texts[page_num] = f"\n---ERROR_PAGE_{page_num}---\n"
+                finally:
+                    del image
+        
+        workers = [
+            threading.Thread(target=ocr_worker, name=f"ocr-worker-{i}", daemon=True)
+            for i in range(max(1, OCR_MAX_WORKERS))
+        ]
+        for worker in workers:
+            worker.start()
+        
+        failed = False
+        try:
+            for page_num, image in iter_page_images(pdf_path, OCR_DPI):
+                work.put((page_num, image))  # blocks while the queue is full
+                del image
         except Exception as e:
             error_type = type(e).__name__
             error_msg = str(e)
             logger.error(f"OCR extraction failed with {error_type}: {error_msg}")
-            
-            # Provide helpful hints for common errors
-            if "tesseract" in error_msg.lower() or "tesseract" in error_type.lower():
-                logger.error("Tesseract OCR is not installed or not in PATH. Install it: sudo apt-get install tesseract-ocr tesseract-ocr-ara")
-            elif "pdf2image" in error_msg.lower():
-                logger.error("pdf2image or poppler not installed. Install: sudo apt-get install poppler-utils")
-            
+            _log_ocr_install_hint(error_type, error_msg)
+            failed = True
+        finally:
+            for _ in workers:
+                work.put(None)
+            for worker in workers:
+                worker.join()
+        
+        if failed or not page_texts:
             return ""
+        
+        parts = []
+        for page_num in sorted(page_texts):
+            parts.append(page_texts[page_num])
+            parts.append(PAGE_SEPARATOR)
+        text = "".join(parts)
+        
+        text_length = len(text.strip())
+        logger.info(f"[OCR] Extracted {len(text)} characters ({text_length} stripped) from {len(page_texts)} pages using improved PSM")
+        
+        if text_length == 0:
+            logger.warning("[OCR] No text extracted via OCR - check if Tesseract is installed and configured properly")
+        elif incomplete_pages:
+            logger.warning(f"[OCR] Not caching: no OCR text for pages {sorted(incomplete_pages)}")
+        else:
+            cache.put(cache_key, text)
+        
+        return text
+
+    def _ocr_pages(self, pdf_path: str, page_numbers: List[int], language: str) -> Dict[int, str]:
+        """
+        OCR the given pages, fanning out across the shared process pool.
+        
+        At most ``2 * workers`` pages are in flight at once so a long scanned
+        document never queues hundreds of tasks (and their results) up front.
+        Falls back to in-process OCR when the pool is unavailable.
+        
+        Returns:
+            Mapping of page number to processed OCR text ('' on failure)
+        """
+        results: Dict[int, str] = {}
+        workers = min(OCR_MAX_WORKERS, len(page_numbers))
+        
+        def run_serially(pages: List[int]) -> None:
+            for page_num in pages:
+                try:
+                    results[page_num] = self.ocr_page(pdf_path, page_num, language)
+                except Exception as e:
+                    logger.error(f"Error processing OCR page {page_num}: {e}")
+                    _log_ocr_install_hint(type(e).__name__, str(e))
+                    results[page_num] = ""
+        
+        if workers <= 1:
+            run_serially(page_numbers)
+            return results
+        
+        try:
+            pool = get_ocr_pool()
+            pending = set()
+            page_queue = iter(page_numbers)
+            future_pages = {}
+            
+            def submit_next() -> bool:
+                page_num = next(page_queue, None)
+                if page_num is None:
+                    return False
+                future = pool.submit(_ocr_page_worker, pdf_path, page_num, language)
+                future_pages[future] = page_num
+                pending.add(future)
+                return True
+            
+            for _ in range(workers * 2):
+                if not submit_next():
+                    break
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_num = future_pages.pop(future)
+                    try:
+                        results[page_num] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error processing OCR page {page_num}: {e}")
+                        results[page_num] = ""
+                    submit_next()
+                    
+        except BrokenProcessPool as e:
+            logger.warning(f"⚠️ OCR process pool failed ({e}), continuing in-process")
+            shutdown_ocr_pool()
+            run_serially([page_num for page_num in page_numbers if page_num not in results])
+        
+        return results
+
+    def _ocr_pages_cached(
+        self, pdf_path: str, page_numbers: List[int], language: str, content_hash: Optional[str]
+    ) -> Dict[int, str]:
+        """``_ocr_pages`` for the pages missing from the extraction cache; successful pages are stored."""
+        cache = get_extraction_cache()
+        keys = {page_num: _ocr_cache_key(content_hash, page_num, language) for page_num in page_numbers}
+        results: Dict[int, str] = {}
+        for page_num, key in keys.items():
+            cached = cache.get(key)
+            if cached is not None:
+                results[page_num] = cached
+        
+        missing = [page_num for page_num in page_numbers if page_num not in results]
+        if results:
+            logger.info(f"♻️ {len(results)} OCR pages served from the extraction cache")
+        if missing:
+            fresh = self._ocr_pages(pdf_path, missing, language)
+            for page_num, ocr_text in fresh.items():
+                if ocr_text:
+                    cache.put(keys[page_num], ocr_text)
+            results.update(fresh)
+        return results
 
     def extract_pdf_text(self, pdf_path: str, language: str = 'ar') -> Tuple[str, str]:
         """
-        Extract text from PDF using the best method available.
+        Extract text from PDF using the best method available, page by page.
         
-        Combines direct extraction and OCR, then selects the best result based on Arabic content quality.
+        Every page is extracted directly first and its text quality is scored.
+        Only pages whose direct text is poor (scanned, garbled or empty) are
+        sent to OCR, in parallel; the results are merged back in page order.
+        Both the direct and the OCR text of each page go through the
+        extraction cache, so re-extracting a known file skips Tesseract.
         
         Args:
             pdf_path: Path to the PDF file
             language: Document language ('ar', 'en', 'fr')
             
         Returns:
-            Tuple of (extracted_text, method_used)
+            Tuple of (extracted_text, method_used) where method_used is
+            'Direct', 'OCR', 'Hybrid' or 'FAILED'
         """
         logger.info(f"Starting enhanced PDF extraction for: {pdf_path}")
         
-        # 1. Try Direct Extraction first
+        # 1. Direct extraction + quality score for every page
         logger.info("=== Starting Direct Text Extraction ===")
-        direct_text = self.extract_text_direct(pdf_path)
-        
-        # Count characters and Arabic content for assessment
-        direct_chars = len(direct_text)
-        direct_arabic_chars = sum(1 for c in direct_text if '\u0600' <= c <= '\u06FF')
-        
-        # 2. Try OCR Extraction as backup/complement
-        logger.info("=== Starting OCR Text Extraction ===")
-        ocr_text = self.extract_text_ocr(pdf_path, language)
-        
-        # Count characters and Arabic content for assessment
-        ocr_chars = len(ocr_text)
-        ocr_arabic_chars = sum(1 for c in ocr_text if '\u0600' <= c <= '\u06FF')
+        direct_pages: List[str] = []
+        poor_pages: List[int] = []
+        content_hash = get_extraction_cache().content_hash(pdf_path)
+        try:
+            doc = pdf_toolkit().fitz.open(pdf_path)
+            try:
+                for page_num, page in enumerate(doc, 1):
+                    try:
+                        page_text, raw_text = self._extract_page_cached(page, page_num, content_hash)
+                    except Exception as page_e:
+                        logger.error(f"Error processing page {page_num}: {page_e}")
+                        page_text, raw_text = f"\n---ERROR_PAGE_{page_num}---\n", ""
+                    direct_pages.append(page_text)
+                    if score_page_text(raw_text) < PAGE_QUALITY_THRESHOLD:
+                        poor_pages.append(page_num)
+            finally:
+                doc.close()
+        except Exception as e:
+            logger.error(f"Direct extraction failed with error: {type(e).__name__}: {str(e)}")
+            # Without a page count we can only OCR the whole document
+            ocr_text = self.extract_text_ocr(pdf_path, language)
+            return (ocr_text, "OCR") if ocr_text.strip() else ("", "FAILED")
+        
+        page_count = len(direct_pages)
+        logger.info(f"📄 {page_count} pages, {len(poor_pages)} need OCR")
+        
+        # 2. OCR only the pages whose direct text is poor
+        ocr_pages: Dict[int, str] = {}
+        if poor_pages:
+            logger.info(f"=== Starting OCR Text Extraction for {len(poor_pages)} pages ===")
+            ocr_pages = self._ocr_pages_cached(pdf_path, poor_pages, language, content_hash)
+        
+        # 3. Merge in page order, keeping whichever text has more Arabic content
+        parts = []
+        ocr_used = 0
+        for page_num, direct_text in enumerate(direct_pages, 1):
+            ocr_text = ocr_pages.get(page_num)
+            if ocr_text and count_arabic_chars(ocr_text) > count_arabic_chars(direct_text):
+                parts.append(ocr_text)
+                ocr_used += 1
+            else:
+                parts.append(direct_text)
+            parts.append(PAGE_SEPARATOR)
         
-        # Choose the best result (more Arabic content is better for legal documents)
-        # If both methods failed, return empty with diagnostic info
-        if direct_chars == 0 and ocr_chars == 0:
+        best_text = "".join(parts)
+        if not best_text.replace(PAGE_SEPARATOR, "").strip():
             logger.error("❌ BOTH extraction methods returned empty text!")
             logger.error("Possible causes:")
             logger.error("  1. PDF is image-based and Tesseract OCR is not installed/configured")
@@ -561,24 +689,117 @@ class EnhancedArabicPDFProcessor:
             logger.error("  4. PDF requires specific fonts or rendering")
             return "", "FAILED"
         
-        # Choose best method based on Arabic content
-        if ocr_arabic_chars > direct_arabic_chars:
-            logger.info(f"✅ OCR extraction yielded more Arabic content ({ocr_arabic_chars} vs {direct_arabic_chars} chars)")
-            best_text = ocr_text
+        if ocr_used == 0:
+            best_method = "Direct"
+        elif ocr_used == page_count:
             best_method = "OCR"
         else:
-            logger.info(f"✅ Direct extraction yielded more Arabic content ({direct_arabic_chars} vs {ocr_arabic_chars} chars)")
-            best_text = direct_text
-            best_method = "Direct"
+            best_method = "Hybrid"
         
         # Summary
         logger.info(f"📊 Extraction Summary:")
-        logger.info(f"   Direct: {direct_chars} chars ({direct_arabic_chars} Arabic)")
-        logger.info(f"   OCR: {ocr_chars} chars ({ocr_arabic_chars} Arabic)")
+        logger.info(f"   Pages: {page_count} ({len(poor_pages)} scored poor, {ocr_used} taken from OCR)")
         logger.info(f"   Best method: {best_method} with {len(best_text)} chars")
         
         return best_text, best_method
 
+    def iter_pdf_pages(self, pdf_path: str, language: str = 'ar') -> Iterator[Tuple[int, str]]:
+        """
+        Yield ``(page_number, text)`` in page order as soon as each page is ready.
+
+        Same per-page choice as extract_pdf_text (direct text, or OCR text for
+        poor pages when it has more Arabic content), but pages are handed out
+        while later pages are still being extracted and OCR'd, so a consumer
+        can parse page 1 while page 40 is in Tesseract. At most ``2 * workers``
+        OCR pages are in flight, and only pages waiting behind an unfinished
+        OCR page are buffered. Pages found in the extraction cache are not
+        extracted or OCR'd again.
+
+        If the PDF cannot be opened page by page, the whole-document OCR text is
+        yielded as page 1.
+        """
+        try:
+            doc = pdf_toolkit().fitz.open(pdf_path)
+        except Exception as e:
+            logger.error(f"Direct extraction failed with error: {type(e).__name__}: {str(e)}")
+            ocr_text = self.extract_text_ocr(pdf_path, language)
+            if ocr_text.strip():
+                yield 1, ocr_text
+            return
+
+        cache = get_extraction_cache()
+        content_hash = cache.content_hash(pdf_path)
+        pool = get_ocr_pool() if OCR_MAX_WORKERS > 1 else None
+        in_flight_limit = max(1, OCR_MAX_WORKERS * 2)
+        ready: Dict[int, str] = {}
+        in_flight: Dict[int, Tuple[Any, str, Optional[str]]] = {}
+        next_page = 1
+
+        def resolve(page_num: int) -> str:
+            future, direct_text, cache_key = in_flight.pop(page_num)
+            try:
+                ocr_text = future.result()
+            except BrokenProcessPool as e:
+                logger.warning(f"⚠️ OCR process pool failed ({e}), continuing in-process")
+                shutdown_ocr_pool()
+                ocr_text = self.ocr_page(pdf_path, page_num, language)
+            except Exception as e:
+                logger.error(f"Error processing OCR page {page_num}: {e}")
+                ocr_text = ""
+            if ocr_text:
+                cache.put(cache_key, ocr_text)
+            if ocr_text and count_arabic_chars(ocr_text) > count_arabic_chars(direct_text):
+                return ocr_text
+            return direct_text
+
+        def drain(block: bool) -> Iterator[Tuple[int, str]]:
+            nonlocal next_page
+            while True:
+                if next_page in ready:
+                    yield next_page, ready.pop(next_page)
+                elif next_page in in_flight and (block or in_flight[next_page][0].done()):
+                    yield next_page, resolve(next_page)
+                    block = False
+                else:
+                    return
+                next_page += 1
+
+        try:
+            for page_num, page in enumerate(doc, 1):
+                try:
+                    page_text, raw_text = self._extract_page_cached(page, page_num, content_hash)
+                except Exception as page_e:
+                    logger.error(f"Error processing page {page_num}: {page_e}")
+                    page_text, raw_text = f"\n---ERROR_PAGE_{page_num}---\n", ""
+
+                if score_page_text(raw_text) >= PAGE_QUALITY_THRESHOLD:
+                    ready[page_num] = page_text
+                else:
+                    cache_key = _ocr_cache_key(content_hash, page_num, language)
+                    ocr_text = cache.get(cache_key)
+                    if ocr_text is None and pool is not None:
+                        in_flight[page_num] = (
+                            pool.submit(_ocr_page_worker, pdf_path, page_num, language), page_text, cache_key
+                        )
+                    else:
+                        if ocr_text is None:
+                            ocr_text = self._ocr_pages(pdf_path, [page_num], language).get(page_num, "")
+                            if ocr_text:
+                                cache.put(cache_key, ocr_text)
+                        keep_ocr = ocr_text and count_arabic_chars(ocr_text) > count_arabic_chars(page_text)
+                        ready[page_num] = ocr_text if keep_ocr else page_text
+
+                while len(in_flight) >= in_flight_limit:
+                    yield from drain(block=True)
+                yield from drain(block=False)
+
+            while next_page in ready or next_page in in_flight:
+                yield from drain(block=True)
+        finally:
+            for future, _, _ in in_flight.values():
+                future.cancel()
+            doc.close()
+
     def process_extracted_text(self, text: str) -> dict:
         """
         Process extracted text and return comprehensive analysis.
@@ -602,7 +823,7 @@ class EnhancedArabicPDFProcessor:
             }
         
         # Analyze original text
-        original_arabic_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
+        original_arabic_chars = arabic_text.arabic_char_count(text)
         original_total_chars = len(text)
         original_arabic_ratio = original_arabic_chars / original_total_chars if original_total_chars > 0 else 0
         
@@ -613,7 +834,7 @@ class EnhancedArabicPDFProcessor:
         rtl_applied = False
         
         # Clean artifacts
-        if any(artifact in text for artifact in ['ﻢ', 'ﻪ', 'ﻆ', 'ﺍ', 'ﺕ', 'ﺏ', 'ﻞ', 'ﺝ', 'ﺡ', 'ﺥ', 'ﺩ', 'ﺫ', 'ﺭ', 'ﺯ', 'ﺱ', 'ﺵ', 'ﺹ', 'ﺽ', 'ﻁ', 'ﻅ', 'ﻉ', 'ﻍ', 'ﻑ', 'ﻕ', 'ﻙ', 'ﻝ', 'ﻡ', 'ﻥ', 'ﻩ', 'ﻭ', 'ﻱ']):
+        if not arabic_text.ARTIFACT_CHARS.isdisjoint(text):
             processed_text = self.clean_text_artifacts(processed_text)
             artifacts_cleaned = True
         
@@ -628,7 +849,7 @@ class EnhancedArabicPDFProcessor:
             rtl_applied = True
         
         # Analyze processed text
-        processed_arabic_chars = sum(1 for c in processed_text if '\u0600' <= c <= '\u06FF')
+        processed_arabic_chars = arabic_text.arabic_char_count(processed_text)
         processed_total_chars = len(processed_text)
         processed_arabic_ratio = processed_arabic_chars / processed_total_chars if processed_total_chars > 0 else 0
         
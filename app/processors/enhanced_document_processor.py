@@ -30,11 +30,17 @@ from PIL import Image
 # Arabic text processing
 import arabic_reshaper
 from bidi.algorithm import get_display
-from ..utils.arabic_text_processor import ArabicTextProcessor
+from ..utils.arabic_text_processor import ArabicTextProcessor, arabic_char_count
+from ..utils.extraction_cache import get_extraction_cache
 from .enhanced_arabic_pdf_processor import EnhancedArabicPDFProcessor
 
 logger = logging.getLogger(__name__)
 
+# Extraction cache version of the DOCX and image extractors (PDFs are cached
+# page by page in EnhancedArabicPDFProcessor); bump when their output changes
+DOCUMENT_EXTRACTOR_VERSION = "1"
+IMAGE_OCR_PSM = 6
+
 
 class EnhancedDocumentProcessor:
     """
@@ -274,10 +280,13 @@ class EnhancedDocumentProcessor:
         return await loop.run_in_executor(None, self._extract_docx_sync, file_path)
 
     def _extract_docx_sync(self, file_path: str) -> str:
-        """Synchronous DOCX extraction."""
-        document = DocxDocument(file_path)
-        paragraphs = [para.text for para in document.paragraphs if para.text.strip()]
-        return '\n\n'.join(paragraphs)
+        """Synchronous DOCX extraction (through the extraction cache)."""
+        def extract() -> str:
+            document = DocxDocument(file_path)
+            paragraphs = [para.text for para in document.paragraphs if para.text.strip()]
+            return '\n\n'.join(paragraphs)
+        
+        return get_extraction_cache().get_or_extract(file_path, "docx", DOCUMENT_EXTRACTOR_VERSION, extract)
 
     async def _extract_from_image(self, file_path: str, language: str = 'ar') -> str:
         """
@@ -300,6 +309,8 @@ class EnhancedDocumentProcessor:
         - 'ara' for Arabic
         - 'eng' for English
         - 'ara+eng' for mixed
+        
+        Results are cached by image content, language and PSM.
         """
         try:
             # Map language codes
@@ -310,18 +321,22 @@ class EnhancedDocumentProcessor:
             }
             tesseract_lang = lang_map.get(language, 'ara')
             
-            # Open image
-            image = Image.open(file_path)
+            def extract() -> str:
+                # Open image
+                image = Image.open(file_path)
+                
+                # Perform OCR
+                return pytesseract.image_to_string(
+                    image,
+                    lang=tesseract_lang,
+                    config=f'--psm {IMAGE_OCR_PSM}'  # Assume uniform block of text
+                )
             
-            # Perform OCR
-            text = pytesseract.image_to_string(
-                image,
-                lang=tesseract_lang,
-                config='--psm 6'  # Assume uniform block of text
+            return get_extraction_cache().get_or_extract(
+                file_path, "image-ocr", DOCUMENT_EXTRACTOR_VERSION, extract,
+                language=tesseract_lang, psm=IMAGE_OCR_PSM
             )
             
-            return text
-            
         except Exception as e:
             logger.error(f"OCR failed for {file_path}: {str(e)}")
             raise ValueError(f"OCR extraction failed: {str(e)}")
@@ -640,7 +655,7 @@ class EnhancedDocumentProcessor:
             Language code (ar, en, fr)
         """
         # Simple language detection based on character sets
-        arabic_chars = len(re.findall(r'[\u0600-\u06FF]', text))
+        arabic_chars = arabic_char_count(text)
         total_chars = len(re.findall(r'\w', text))
         
         if total_chars == 0:
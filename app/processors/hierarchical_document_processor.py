@@ -5,10 +5,14 @@ This module implements the complete workflow for extracting hierarchical structu
 (Chapters → Sections → Articles) from legal documents with maximum accuracy.
 """
 
+import asyncio
+import os
 import re
 import logging
+import threading
 import time
-from typing import Dict, List, Optional, Tuple, Any, Union
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Any, Union
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
@@ -20,6 +24,8 @@ from ..models.legal_knowledge import (
     LawSource, LawArticle,
     KnowledgeDocument, KnowledgeChunk
 )
+from ..repositories.legal_knowledge_repository import LegalBulkRepository
+from ..utils.arabic_text_processor import PRESENTATION_FORMS_TABLE
 from ..schemas.legal_knowledge import (
     DocumentStructure, ChapterStructure, SectionStructure, ArticleStructure,
     ProcessingReport, HierarchicalDocumentResponse, DocumentStructureElement
@@ -27,6 +33,11 @@ from ..schemas.legal_knowledge import (
 
 logger = logging.getLogger(__name__)
 
+# Streaming mode: pages buffered between the extraction thread and the parser,
+# and closed articles written per bulk insert
+STREAM_PAGE_QUEUE_SIZE = int(os.getenv("HIERARCHICAL_STREAM_PAGE_QUEUE_SIZE", "4"))
+STREAM_FLUSH_SIZE = int(os.getenv("HIERARCHICAL_STREAM_FLUSH_SIZE", "200"))
+
 
 class ElementType(Enum):
     """Types of document elements"""
@@ -243,6 +254,40 @@ class ArabicLegalPatternRecognizer:
             text = text.replace(arabic, english)
         return text
     
+    def _build_analysis(
+        self,
+        line: str,
+        line_number: int,
+        element_type: ElementType,
+        confidence: float,
+        number: Optional[str],
+        match_text: str,
+        pattern_index: int
+    ) -> LineAnalysis:
+        """Build the LineAnalysis for a heading/sub-article match"""
+        return LineAnalysis(
+            line_number=line_number,
+            content=line,
+            element_type=element_type,
+            confidence=confidence,
+            metadata={
+                'number': number,
+                'title': line.replace(match_text, '').strip(),
+                'pattern_index': pattern_index,
+                'match_text': match_text
+            },
+            warnings=[],
+            errors=[]
+        )
+    
+    def _match_number(self, match: "re.Match") -> str:
+        """Captured number, or the Arabic ordinal in the match converted to digits"""
+        number = match.group(1) if match.groups() else None
+        if not number:
+            # Extract Arabic number from the match
+            number = self.normalize_arabic_number(match.group(0))
+        return number
+    
     def analyze_line(self, line: str, line_number: int, context: Dict[str, Any] = None) -> LineAnalysis:
         """Analyze a single line to determine its type and extract metadata"""
         line = line.strip()
@@ -261,90 +306,37 @@ class ArabicLegalPatternRecognizer:
         for i, regex in enumerate(self.chapter_regexes):
             match = regex.search(line)
             if match:
-                number = match.group(1) if match.groups() else None
-                if not number:
-                    # Extract Arabic number from the match
-                    number = self.normalize_arabic_number(match.group(0))
-                
-                return LineAnalysis(
-                    line_number=line_number,
-                    content=line,
-                    element_type=ElementType.CHAPTER,
-                    confidence=0.95 if i < 2 else 0.85,  # Higher confidence for exact matches
-                    metadata={
-                        'number': number,
-                        'title': line.replace(match.group(0), '').strip(),
-                        'pattern_index': i,
-                        'match_text': match.group(0)
-                    },
-                    warnings=[],
-                    errors=[]
+                # Higher confidence for exact matches
+                return self._build_analysis(
+                    line, line_number, ElementType.CHAPTER, 0.95 if i < 2 else 0.85,
+                    self._match_number(match), match.group(0), i
                 )
         
         # Check for section patterns
         for i, regex in enumerate(self.section_regexes):
             match = regex.search(line)
             if match:
-                number = match.group(1) if match.groups() else None
-                if not number:
-                    number = self.normalize_arabic_number(match.group(0))
-                
-                return LineAnalysis(
-                    line_number=line_number,
-                    content=line,
-                    element_type=ElementType.SECTION,
-                    confidence=0.90 if i < 3 else 0.80,
-                    metadata={
-                        'number': number,
-                        'title': line.replace(match.group(0), '').strip(),
-                        'pattern_index': i,
-                        'match_text': match.group(0)
-                    },
-                    warnings=[],
-                    errors=[]
+                return self._build_analysis(
+                    line, line_number, ElementType.SECTION, 0.90 if i < 3 else 0.80,
+                    self._match_number(match), match.group(0), i
                 )
         
         # Check for article patterns
         for i, regex in enumerate(self.article_regexes):
             match = regex.search(line)
             if match:
-                number = match.group(1) if match.groups() else None
-                if not number:
-                    number = self.normalize_arabic_number(match.group(0))
-                
-                return LineAnalysis(
-                    line_number=line_number,
-                    content=line,
-                    element_type=ElementType.ARTICLE,
-                    confidence=0.95 if i < 2 else 0.85,
-                    metadata={
-                        'number': number,
-                        'title': line.replace(match.group(0), '').strip(),
-                        'pattern_index': i,
-                        'match_text': match.group(0)
-                    },
-                    warnings=[],
-                    errors=[]
+                return self._build_analysis(
+                    line, line_number, ElementType.ARTICLE, 0.95 if i < 2 else 0.85,
+                    self._match_number(match), match.group(0), i
                 )
         
         # Check for sub-article patterns
         for i, regex in enumerate(self.sub_article_regexes):
             match = regex.search(line)
             if match:
-                number = match.group(1)
-                return LineAnalysis(
-                    line_number=line_number,
-                    content=line,
-                    element_type=ElementType.SUB_ARTICLE,
-                    confidence=0.80,
-                    metadata={
-                        'number': number,
-                        'title': line.replace(match.group(0), '').strip(),
-                        'pattern_index': i,
-                        'match_text': match.group(0)
-                    },
-                    warnings=[],
-                    errors=[]
+                return self._build_analysis(
+                    line, line_number, ElementType.SUB_ARTICLE, 0.80,
+                    match.group(1), match.group(0), i
                 )
         
         # Default to content
@@ -359,12 +351,580 @@ class ArabicLegalPatternRecognizer:
         )
 
 
+_PRESENTATION_FORMS_REGEX = re.compile('[\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# One pass over the normalised line tells which heading families can possibly
+# match; the article anchor is zero-width so it never hides a later anchor
+_TRIGGER_REGEX = re.compile(
+    r'(?P<chapter>الباب)'
+    r'|(?P<section>الفصل|أولاً|ثانياً|ثالثاً|رابعاً|خامساً|سادساً|سابعاً|ثامناً|تاسعاً|عاشراً)'
+    r'|(?P<article>مادة|م(?=\s*[.．]))'
+)
+
+
+class CompiledArabicLegalPatternRecognizer(ArabicLegalPatternRecognizer):
+    """
+    Single-pass variant of ArabicLegalPatternRecognizer with identical results.
+    
+    Each line is normalised once with a ``str.translate`` presentation-form
+    table and scanned once by a combined trigger alternation with named groups
+    (chapter/section/article). Only the families whose anchor occurs are
+    then checked, in the original priority order: the glyph-encoded literal
+    patterns with a substring test (and only when the line contains
+    presentation forms), the rest with their compiled regexes. Lines without
+    any heading anchor skip the ~80 heading regexes entirely.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._families = [
+            ('chapter', ElementType.CHAPTER, self._compile_family(self.chapter_patterns, self.chapter_regexes, 2, 0.95, 0.85)),
+            ('section', ElementType.SECTION, self._compile_family(self.section_patterns, self.section_regexes, 3, 0.90, 0.80)),
+            ('article', ElementType.ARTICLE, self._compile_family(self.article_patterns, self.article_regexes, 2, 0.95, 0.85)),
+        ]
+        self._number_cache: Dict[str, str] = {}
+    
+    @staticmethod
+    def _compile_family(
+        patterns: List[str],
+        regexes: List["re.Pattern"],
+        high_confidence_count: int,
+        high_confidence: float,
+        confidence: float
+    ) -> List[Tuple[int, Optional[str], "re.Pattern", float]]:
+        """(pattern_index, literal or None, regex, confidence) in priority order"""
+        compiled = []
+        for i, (pattern, regex) in enumerate(zip(patterns, regexes)):
+            is_literal = (
+                pattern.translate(PRESENTATION_FORMS_TABLE) != pattern
+                and not any(char in pattern for char in '\\.^$*+?{}[]()|')
+            )
+            compiled.append((
+                i,
+                pattern if is_literal else None,
+                regex,
+                high_confidence if i < high_confidence_count else confidence
+            ))
+        return compiled
+    
+    def normalize_arabic_number(self, text: str) -> str:
+        """Memoised: heading match texts repeat across a document"""
+        number = self._number_cache.get(text)
+        if number is None:
+            number = super().normalize_arabic_number(text)
+            self._number_cache[text] = number
+        return number
+    
+    def analyze_line(self, line: str, line_number: int, context: Dict[str, Any] = None) -> LineAnalysis:
+        """Analyze a single line to determine its type and extract metadata"""
+        line = line.strip()
+        if not line:
+            return LineAnalysis(
+                line_number=line_number,
+                content=line,
+                element_type=ElementType.IGNORE,
+                confidence=1.0,
+                metadata={},
+                warnings=[],
+                errors=[]
+            )
+        
+        has_presentation_forms = _PRESENTATION_FORMS_REGEX.search(line) is not None
+        normalized = line.translate(PRESENTATION_FORMS_TABLE) if has_presentation_forms else line
+        triggers = {match.lastgroup for match in _TRIGGER_REGEX.finditer(normalized)}
+        
+        if triggers:
+            for family, element_type, patterns in self._families:
+                if family not in triggers:
+                    continue
+                for i, literal, regex, confidence in patterns:
+                    if literal is not None:
+                        # Glyph-encoded pattern: plain substring test on the original line
+                        if not has_presentation_forms or literal not in line:
+                            continue
+                        return self._build_analysis(
+                            line, line_number, element_type, confidence,
+                            self.normalize_arabic_number(literal), literal, i
+                        )
+                    match = regex.search(line)
+                    if match:
+                        return self._build_analysis(
+                            line, line_number, element_type, confidence,
+                            self._match_number(match), match.group(0), i
+                        )
+        
+        # Sub-article markers are short enough that the regexes are their own check
+        for i, regex in enumerate(self.sub_article_regexes):
+            match = regex.search(line)
+            if match:
+                return self._build_analysis(
+                    line, line_number, ElementType.SUB_ARTICLE, 0.80,
+                    match.group(1), match.group(0), i
+                )
+        
+        # Default to content
+        return LineAnalysis(
+            line_number=line_number,
+            content=line,
+            element_type=ElementType.CONTENT,
+            confidence=0.70,
+            metadata={},
+            warnings=[],
+            errors=[]
+        )
+
+
+class TableOfContentsDetector:
+    """
+    Incremental table-of-contents detection.
+    
+    Lines are fed one at a time and each line's TOC membership is decided as
+    soon as the ``LOOKAHEAD`` lines after it are known (or the input ends), so
+    only a small window of the document is ever held. The rules are the
+    sequential strategies of the original whole-document detector: explicit
+    TOC headers, repeated "Chapter" prefixes, heading lines ending in page
+    numbers and rapid branch listings open a TOC; the first article without a
+    page number, headings followed by real content and similar signals close it.
+    """
+    
+    # Longest lookahead used by any rule below
+    LOOKAHEAD = 15
+    
+    PAGE_NUMBER_AT_END = r'\.+\s*\d+\s*$|\s+\d+\s*$'  # Matches "...31" or "  31"
+    PAGE_NUMBER_LINE = r'^\s*\d+\s*$'
+    CHAPTER_PREFIX = r'^(Chapter|chapter)\s+'
+    CHAPTER_MARKER = r'ﺍﻟﺒﺎﺏ|الباب'
+    
+    # Patterns that indicate table of contents
+    TOC_INDICATORS = [
+        r'الفهرس',
+        r'ﺍﻟﻔﻬﺮﺱ',  # Encoded version
+        r'جدول المحتويات',
+        r'ﺟﺪﻭﻝ ﺍﻟﻤﺤﺘﻮﻳﺎﺕ',  # Encoded version
+        r'المحتويات',
+        r'ﺍﻟﻤﺤﺘﻮﻳﺎﺕ',  # Encoded version
+        r'محتوى الكتاب',
+        r'فهرس المحتويات',
+        r'ﻓﻬﺮﺱ ﺍﻟﻤﺤﺘﻮﻳﺎﺕ',  # Encoded version
+        r'index',
+        r'table of contents',
+        r'contents',
+        r'فهرس',
+        r'ﻓﻬﺮﺱ'
+    ]
+    
+    # Patterns that indicate end of table of contents
+    # المتطلب الحاسم: يجب أن ينتهي جدول المحتويات عند أول ظهور لـ "المادة الأولى" بدون أرقام صفحات
+    TOC_END_INDICATORS = [
+        r'المادة الأولى',      # المادة الأولى (عادي)
+        r'ﺍﻟﻤﺎﺩﺓ ﺍﻷﻭﻟﻰ',     # المادة الأولى (encoded)
+        r'المادة\s+1\s*:',     # المادة 1:
+        r'المادة\s+الاولى',    # تهجئة بديلة
+        r'مادة\s+1\s*:',       # مادة 1:
+        r'الفصل الأول',
+        r'الباب الأول',
+        r'بداية النص',
+        r'start of text',
+        r'beginning of document'
+    ]
+    
+    # ★★★ المتطلب الحاسم: اكتشاف "المادة الأولى" بدون أرقام صفحات ★★★
+    FIRST_ARTICLE_PATTERNS = [
+        r'المادة الأولى',
+        r'ﺍﻟﻤﺎﺩﺓ ﺍﻷﻭﻟﻰ',
+        r'المادة\s+1\s*:',
+        r'المادة\s+الاولى',
+        r'المادة\s+١'  # رقم عربي
+    ]
+    
+    CHAPTER_SECTION_KEYWORDS = [r'الباب', r'الفصل', r'المادة', r'أولاً', r'ثانياً', r'ﺍﻟﺒﺎﺏ', r'ﺍﻟﻔﺼﻞ', r'ﺍﻟﻤﺎﺩﺓ']
+    CHAPTER_START_PATTERNS = [r'ﺍﻟﺒﺎﺏ ﺍﻷﻭﻝ', r'ﺍﻟﺒﺎﺏ ﺍﻟﺜﺎﻧﻲ', r'ﺍﻟﻔﺼﻞ ﺍﻷﻭﻝ', r'ﺍﻟﻤﺎﺩﺓ ﺍﻷﻭﻟﻰ']
+    
+    def __init__(self, pattern_recognizer: ArabicLegalPatternRecognizer):
+        self.pattern_recognizer = pattern_recognizer
+        self.sections: List[Tuple[int, int]] = []
+        self._current_toc_start: Optional[int] = None
+        self._window: List[str] = []
+        self._window_offset = 0
+        self._next_index = 0
+        self._finished = False
+    
+    # ==================== WINDOW ====================
+    
+    @property
+    def _end(self) -> int:
+        """Number of lines fed so far (the document length once finished)."""
+        return self._window_offset + len(self._window)
+    
+    def _line(self, index: int) -> str:
+        return self._window[index - self._window_offset]
+    
+    def _lines(self, start: int, stop: int) -> List[str]:
+        return [self._line(index) for index in range(start, min(stop, self._end))]
+    
+    def feed(self, line: str) -> List[Tuple[int, str, bool]]:
+        """
+        Add the next line of the document.
+        
+        Returns:
+            (line_number, line, in_toc) for every line decided by this call,
+            in document order (1-based line numbers)
+        """
+        self._window.append(line)
+        decided = []
+        while self._next_index + self.LOOKAHEAD <= self._end:
+            decided.append(self._decide_next())
+        # Keep one line of look-behind for the consecutive page-number rule
+        drop = self._next_index - 1 - self._window_offset
+        if drop > self.LOOKAHEAD:
+            del self._window[:drop]
+            self._window_offset += drop
+        return decided
+    
+    def finish(self) -> List[Tuple[int, str, bool]]:
+        """Decide the remaining lines; an unterminated TOC runs to the end."""
+        self._finished = True
+        decided = []
+        while self._next_index < self._end:
+            decided.append(self._decide_next())
+        if self._current_toc_start is not None:
+            self.sections.append((self._current_toc_start, self._end))
+            logger.info(f"TOC section continues to end of document from line {self._current_toc_start}")
+            self._current_toc_start = None
+        return decided
+    
+    def _decide_next(self) -> Tuple[int, str, bool]:
+        i = self._next_index
+        line = self._line(i)
+        if self._current_toc_start is None:
+            self._check_toc_start(i, line)
+            in_toc = self._current_toc_start is not None
+        else:
+            in_toc = not self._check_toc_end(i, line)
+        self._next_index += 1
+        return i + 1, line, in_toc
+    
+    # ==================== RULES ====================
+    
+    def _check_toc_start(self, i: int, line: str) -> None:
+        line_clean = line.strip().lower()
+        line_original = line.strip()
+        
+        # Check explicit TOC indicators
+        for indicator in self.TOC_INDICATORS:
+            if re.search(indicator, line_clean, re.IGNORECASE):
+                self._current_toc_start = i + 1  # 1-based line numbering
+                logger.info(f"Found TOC start at line {self._current_toc_start}: {line[:50]}...")
+                return
+        
+        # Detect "Chapter" prefix pattern (common in TOC)
+        # Pattern: "Chapter الباب الأول", "Chapter الباب الثاني", etc.
+        if re.search(self.CHAPTER_PREFIX, line_original):
+            # Check if this pattern repeats in next 15 lines (allowing gaps)
+            chapter_prefix_count = sum(
+                1 for lookahead_line in self._lines(i, i + 15)
+                if re.search(self.CHAPTER_PREFIX, lookahead_line.strip())
+            )
+            # If we find 3+ lines with "Chapter" prefix within 15 lines, it's TOC
+            if chapter_prefix_count >= 3:
+                self._current_toc_start = i + 1
+                logger.info(f"Found TOC by 'Chapter' prefix pattern (count: {chapter_prefix_count} in 15-line window) at line {self._current_toc_start}: {line[:50]}...")
+                return
+        
+        # Also detect TOC by pattern: lines ending with page numbers
+        # Pattern: "Chapter/Section Name ... 31" or "الباب الأول ... 31"
+        if re.search(self.PAGE_NUMBER_AT_END, line.strip()):
+            for keyword in self.CHAPTER_SECTION_KEYWORDS:
+                if re.search(keyword, line, re.IGNORECASE):
+                    # Look ahead to confirm it's TOC and not just a page reference
+                    toc_pattern_count = 0
+                    for lookahead_line in self._lines(i, i + 5):
+                        lookahead_line = lookahead_line.strip()
+                        if re.search(self.PAGE_NUMBER_AT_END, lookahead_line):
+                            for kw in self.CHAPTER_SECTION_KEYWORDS:
+                                if re.search(kw, lookahead_line, re.IGNORECASE):
+                                    toc_pattern_count += 1
+                                    break
+                    
+                    # If we find 3+ consecutive lines with this pattern, it's definitely TOC
+                    if toc_pattern_count >= 3:
+                        self._current_toc_start = i + 1
+                        logger.info(f"Found TOC by pattern (consecutive matches: {toc_pattern_count}) at line {self._current_toc_start}: {line[:50]}...")
+                        return
+                    break
+        
+        # Detect rapid sequential branch markers (TOC listing)
+        # If we see multiple branch markers in quick succession without content, it's likely TOC
+        if re.search(self.CHAPTER_MARKER, line_original):
+            branch_count = 0
+            content_count = 0
+            for lookahead_line in self._lines(i, i + 10):
+                lookahead_line = lookahead_line.strip()
+                if re.search(self.CHAPTER_MARKER, lookahead_line):
+                    branch_count += 1
+                elif len(lookahead_line) > 100:  # Substantial content
+                    content_count += 1
+            
+            # If we have 5+ branches but little content, it's likely TOC
+            if branch_count >= 5 and content_count < 2:
+                self._current_toc_start = i + 1
+                logger.info(f"Found TOC by rapid branch listing (branches: {branch_count}, content: {content_count}) at line {self._current_toc_start}: {line[:50]}...")
+    
+    def _check_toc_end(self, i: int, line: str) -> bool:
+        """Close the open TOC at this line if any end signal fires; returns True if closed."""
+        line_clean = line.strip().lower()
+        line_original = line.strip()
+        should_end_toc = False
+        
+        # هذا هو المؤشر الأقوى على نهاية جدول المحتويات وبداية المحتوى الفعلي
+        if any(re.search(pattern, line_original, re.IGNORECASE) for pattern in self.FIRST_ARTICLE_PATTERNS):
+            # التحقق الحاسم: هل هذا السطر يحتوي على رقم صفحة في النهاية؟
+            if not re.search(self.PAGE_NUMBER_AT_END, line_original):
+                # ✓ وجدنا "المادة الأولى" بدون رقم صفحة = نهاية جدول المحتويات حتماً
+                should_end_toc = True
+                logger.info(f"✓ TOC ENDED at line {i+1}: Found first article WITHOUT page number: {line[:60]}...")
+            else:
+                # لا يزال في جدول المحتويات (المادة الأولى مع رقم الصفحة)
+                logger.debug(f"Still in TOC at line {i+1}: First article WITH page number: {line[:60]}...")
+        
+        # Check explicit end indicators (secondary check)
+        if not should_end_toc:
+            for indicator in self.TOC_END_INDICATORS:
+                if re.search(indicator, line_clean, re.IGNORECASE):
+                    # التأكد من عدم وجود رقم صفحة
+                    if not re.search(self.PAGE_NUMBER_AT_END, line_original):
+                        should_end_toc = True
+                        break
+        
+        # Look for page numbers followed by chapter/section headers
+        if re.match(self.PAGE_NUMBER_LINE, line_clean):
+            for offset, next_line in enumerate(self._lines(i + 1, i + 4)):
+                if self.pattern_recognizer.analyze_line(next_line, i + 2 + offset).element_type == ElementType.CHAPTER:
+                    should_end_toc = True
+                    break
+            
+            # Check for consecutive lines with page numbers (typical TOC pattern)
+            if i > 0 and not re.match(self.PAGE_NUMBER_LINE, self._line(i - 1).strip().lower()):
+                # Check if this line is followed by structural elements
+                if i + 2 < self._end:
+                    next_analysis = self.pattern_recognizer.analyze_line(self._line(i + 1), i + 2)
+                    if next_analysis.element_type in [ElementType.CHAPTER, ElementType.SECTION]:
+                        should_end_toc = True
+        
+        # A line that starts with chapter/section patterns but doesn't end with
+        # page numbers means we're likely out of TOC
+        for pattern in self.CHAPTER_START_PATTERNS:
+            if re.search(pattern, line, re.IGNORECASE):
+                if not re.search(self.PAGE_NUMBER_AT_END, line.strip()):
+                    should_end_toc = True
+                    break
+        
+        # Check if we stopped seeing "Chapter" prefix (was in TOC, now in actual content)
+        if i > self._current_toc_start + 3 and re.search(self.CHAPTER_MARKER, line_original):
+            if not re.search(self.CHAPTER_PREFIX, line_original):
+                no_chapter_prefix_count = sum(
+                    1 for check_line in self._lines(i, i + 3)
+                    if re.search(self.CHAPTER_MARKER, check_line.strip())
+                    and not re.search(self.CHAPTER_PREFIX, check_line.strip())
+                )
+                # If we consistently don't see "Chapter" prefix anymore, TOC likely ended
+                if no_chapter_prefix_count >= 2:
+                    should_end_toc = True
+                    logger.info(f"TOC likely ended at line {i} - no more 'Chapter' prefix pattern")
+        
+        # Check for substantial content following a branch marker (indicates actual content, not TOC)
+        if re.search(r'ﺍﻟﺒﺎﺏ|الباب|ﺍﻟﻔﺼﻞ|الفصل', line_original):
+            for check_line in self._lines(i + 1, i + 5):
+                check_line = check_line.strip()
+                # A line with 50+ chars that's not another branch/chapter marker
+                if len(check_line) > 50 and not re.search(r'ﺍﻟﺒﺎﺏ|الباب|ﺍﻟﻔﺼﻞ|الفصل|Chapter', check_line):
+                    should_end_toc = True
+                    logger.info(f"TOC likely ended at line {i} - found substantial content after branch marker")
+                    break
+        
+        if should_end_toc:
+            self.sections.append((self._current_toc_start, i))
+            logger.info(f"Found TOC end at line {i}: {line[:50]}...")
+            self._current_toc_start = None
+        return should_end_toc
+
+
+class StreamingHierarchyBuilder:
+    """
+    Incremental hierarchy reconstruction (Chapters → Sections → Articles).
+    
+    Consumes LineAnalysis objects in document order and holds only the open
+    chapter, section and article. ``add`` returns an article the moment it is
+    closed by the next heading, and ``close`` returns the last one, so callers
+    can persist articles while the rest of the document is still being read.
+    
+    With ``keep_articles`` the articles also stay attached to their chapter,
+    section or the orphan list (the full structure); without it chapters and
+    sections are kept as headings only and memory does not grow with the
+    number of articles.
+    """
+    
+    def __init__(self, keep_articles: bool = True):
+        self.keep_articles = keep_articles
+        self.chapters: List[ChapterStructure] = []
+        self.orphaned_articles: List[ArticleStructure] = []
+        self.current_chapter: Optional[ChapterStructure] = None
+        self.current_section: Optional[SectionStructure] = None
+        self.current_article: Optional[ArticleStructure] = None
+        self.total_sections = 0
+        self.total_articles = 0
+        self.orphaned_count = 0
+        self._section_article_count = 0
+        self._chapter_article_count = 0
+        self._confidence_sum = 0.0
+        self._element_count = 0
+    
+    def _count_element(self, confidence: float) -> None:
+        self._confidence_sum += confidence
+        self._element_count += 1
+    
+    def close(self) -> Optional[ArticleStructure]:
+        """Close the open article (if any) and return it."""
+        article, self.current_article = self.current_article, None
+        return article
+    
+    def add(self, analysis: LineAnalysis) -> Optional[ArticleStructure]:
+        """Apply one analysed line; returns the article it closed, if any."""
+        # Skip lines marked as IGNORE (e.g., TOC sections, headers, footers)
+        if analysis.element_type == ElementType.IGNORE:
+            logger.debug(f"Skipping IGNORE line {analysis.line_number}: {analysis.content[:50]}...")
+            return None
+        
+        if analysis.element_type == ElementType.CHAPTER:
+            closed = self.close()
+            chapter_title = analysis.metadata.get('title', '').strip()
+            if not chapter_title:
+                chapter_title = f"Chapter {analysis.metadata.get('number', len(self.chapters) + 1)}"
+            
+            self.current_chapter = ChapterStructure(
+                number=analysis.metadata.get('number', ''),
+                title=chapter_title,
+                confidence=analysis.confidence,
+                warnings=analysis.warnings,
+                errors=analysis.errors,
+                sections=[],
+                articles=[],
+                order_index=len(self.chapters)
+            )
+            self.chapters.append(self.current_chapter)
+            self._count_element(analysis.confidence)
+            self.current_section = None
+            self._chapter_article_count = 0
+            return closed
+        
+        if analysis.element_type == ElementType.SECTION and self.current_chapter:
+            closed = self.close()
+            section_title = analysis.metadata.get('title', '').strip()
+            if not section_title:
+                section_title = f"Section {analysis.metadata.get('number', len(self.current_chapter.sections) + 1)}"
+            
+            self.current_section = SectionStructure(
+                number=analysis.metadata.get('number', ''),
+                title=section_title,
+                confidence=analysis.confidence,
+                warnings=analysis.warnings,
+                errors=analysis.errors,
+                articles=[],
+                order_index=len(self.current_chapter.sections)
+            )
+            self.current_chapter.sections.append(self.current_section)
+            self.total_sections += 1
+            self._count_element(analysis.confidence)
+            self._section_article_count = 0
+            return closed
+        
+        if analysis.element_type == ElementType.ARTICLE:
+            closed = self.close()
+            article_title = analysis.metadata.get('title', '').strip()
+            if not article_title:
+                article_title = f"Article {analysis.metadata.get('number', '')}"
+            
+            article = ArticleStructure(
+                number=analysis.metadata.get('number', ''),
+                title=article_title,
+                content=analysis.content,
+                confidence=analysis.confidence,
+                warnings=analysis.warnings,
+                errors=analysis.errors,
+                order_index=0
+            )
+            
+            if self.current_section:
+                # Article belongs to current section
+                article.order_index = self._section_article_count
+                self._section_article_count += 1
+                if self.keep_articles:
+                    self.current_section.articles.append(article)
+            elif self.current_chapter:
+                # Article belongs to current chapter (not in any section)
+                article.order_index = self._chapter_article_count
+                self._chapter_article_count += 1
+                if self.keep_articles:
+                    self.current_chapter.articles.append(article)
+            else:
+                # Orphaned article
+                article.order_index = self.orphaned_count
+                self.orphaned_count += 1
+                if self.keep_articles:
+                    self.orphaned_articles.append(article)
+            
+            self.total_articles += 1
+            self._count_element(analysis.confidence)
+            self.current_article = article
+            return closed
+        
+        if analysis.element_type == ElementType.SUB_ARTICLE and self.current_article:
+            sub_article_title = analysis.metadata.get('title', '').strip()
+            if not sub_article_title:
+                sub_article_title = f"Sub-article {analysis.metadata.get('number', '')}"
+            
+            sub_article = ArticleStructure(
+                number=analysis.metadata.get('number', ''),
+                title=sub_article_title,
+                content=analysis.content,
+                confidence=analysis.confidence,
+                warnings=analysis.warnings,
+                errors=analysis.errors,
+                order_index=len(self.current_article.sub_articles or [])
+            )
+            
+            if not self.current_article.sub_articles:
+                self.current_article.sub_articles = []
+            self.current_article.sub_articles.append(sub_article)
+        
+        elif analysis.element_type == ElementType.CONTENT and self.current_article:
+            if self.current_article.content:
+                self.current_article.content += " " + analysis.content
+            else:
+                self.current_article.content = analysis.content
+        
+        return None
+    
+    def build(self) -> DocumentStructure:
+        """Structure (and running statistics) of everything added so far."""
+        return DocumentStructure(
+            chapters=self.chapters,
+            orphaned_articles=self.orphaned_articles,
+            total_chapters=len(self.chapters),
+            total_sections=self.total_sections,
+            total_articles=self.total_articles,
+            structure_confidence=(
+                self._confidence_sum / self._element_count if self._element_count else 0.0
+            )
+        )
+
+
 class HierarchicalDocumentProcessor:
     """Main processor for hierarchical document structure extraction"""
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.pattern_recognizer = ArabicLegalPatternRecognizer()
+        self.pattern_recognizer = CompiledArabicLegalPatternRecognizer()
         self.processing_start_time = None
         self.processing_report = ProcessingReport(
             warnings=[],
@@ -433,6 +993,191 @@ class HierarchicalDocumentProcessor:
                 "data": None
             }
     
+    async def process_document_streaming(
+        self,
+        file_path: str,
+        law_source_details: Optional[Dict[str, Any]] = None,
+        uploaded_by: Optional[int] = None,
+        law_source_id: Optional[int] = None,
+        commit: bool = True
+    ) -> Dict[str, Any]:
+        """Process a legal document page by page with bounded memory
+        
+        Pages are extracted (and OCR'd) in a background thread and parsed as
+        they arrive: every line goes through the incremental TOC detector and
+        the recognizer, the hierarchy builder keeps only the open chapter,
+        section and article, and each article is added to the session as soon
+        as it closes (bulk-inserted every STREAM_FLUSH_SIZE articles, committed
+        once at the end). The returned structure carries chapter and section
+        headings plus statistics; the articles themselves are in the database.
+        
+        Unlike process_document, articles are numbered in document order and
+        the whole-document "Chapter" prefix pre-pass of TOC detection is not
+        applied (such lines are still ignored line by line).
+        
+        Args:
+            file_path: Path to the document file
+            law_source_details: Details for creating/updating law source
+            uploaded_by: User ID who uploaded the document
+            law_source_id: Optional existing LawSource ID (if already created)
+            commit: Commit the articles; False leaves the transaction to the
+                caller (it is still rolled back on failure)
+        """
+        self.processing_start_time = time.time()
+        
+        try:
+            law_source = await self._get_or_create_law_source(law_source_details, law_source_id)
+            detector = TableOfContentsDetector(self.pattern_recognizer)
+            builder = StreamingHierarchyBuilder(keep_articles=False)
+            bulk = LegalBulkRepository(self.db, batch_size=STREAM_FLUSH_SIZE)
+            pending: List[Dict[str, Any]] = []
+            article_order = 0
+            has_text = False
+            
+            async def flush() -> None:
+                if pending:
+                    await bulk.insert_rows(LawArticle, pending)
+                    pending.clear()
+            
+            async def emit(article: Optional[ArticleStructure]) -> None:
+                nonlocal article_order
+                if article is None:
+                    return
+                pending.append(self._law_article_row(law_source.id, article, article_order))
+                article_order += 1
+                if len(pending) >= STREAM_FLUSH_SIZE:
+                    await flush()
+            
+            async def consume(decided: List[Tuple[int, str, bool]]) -> None:
+                for line_number, line, in_toc in decided:
+                    await emit(builder.add(self._analyze_line(line_number, line, in_toc)))
+            
+            async with aclosing(self._iter_document_lines(file_path)) as lines:
+                async for line in lines:
+                    has_text = has_text or bool(line.strip())
+                    await consume(detector.feed(line))
+            
+            if not has_text:
+                raise Exception("Failed to extract text from file: no text could be extracted")
+            
+            await consume(detector.finish())
+            await emit(builder.close())
+            await flush()
+            
+            document_structure = builder.build()
+            await self._validate_structure(document_structure, orphaned_count=builder.orphaned_count)
+            if commit:
+                await self.db.commit()
+            
+            self.processing_report.processing_time = time.time() - self.processing_start_time
+            logger.info(
+                f"📄 Streamed {self.processing_report.pages_processed} pages into "
+                f"{document_structure.total_articles} articles for LawSource {law_source.id}"
+            )
+            
+            return {
+                "success": True,
+                "message": "Document processed successfully with hierarchical structure extracted",
+                "data": {
+                    "law_source": self._law_source_summary(law_source, document_structure),
+                    "structure": document_structure,
+                    "processing_report": self.processing_report
+                }
+            }
+            
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to process document: {str(e)}")
+            self.processing_report.errors.append(f"Processing failed: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Failed to process document: {str(e)}",
+                "data": None
+            }
+    
+    async def _iter_document_lines(self, file_path: str) -> AsyncIterator[str]:
+        """Direction-corrected lines of the document, as its pages arrive
+        
+        Yields exactly the lines of ``_extract_text_from_file(...).split('\\n')``
+        for the same extraction, carrying partial lines across page chunks.
+        """
+        self.processing_report.text_length = 0
+        self.processing_report.pages_processed = 0
+        buffer = ""
+        async with aclosing(self._iter_text_chunks(file_path)) as chunks:
+            async for chunk in chunks:
+                self.processing_report.text_length += len(chunk)
+                self.processing_report.pages_processed += 1
+                *complete, buffer = (buffer + chunk).split('\n')
+                if complete:
+                    for line in self._fix_arabic_text_direction('\n'.join(complete)).split('\n'):
+                        yield line
+        for line in self._fix_arabic_text_direction(buffer).split('\n'):
+            yield line
+    
+    async def _iter_text_chunks(self, file_path: str) -> AsyncIterator[str]:
+        """Raw text of the document in page-sized chunks"""
+        file_extension = file_path.lower().split('.')[-1]
+        
+        if file_extension in ['pdf']:
+            from .enhanced_arabic_pdf_processor import PAGE_SEPARATOR
+            
+            async with aclosing(self._iter_pdf_pages(file_path)) as pages:
+                async for _page_num, page_text in pages:
+                    # process_extracted_text() is not applied: process_document
+                    # discards its result (it reads a 'text' key that is never set)
+                    yield page_text + PAGE_SEPARATOR
+        
+        elif file_extension in ['docx', 'doc']:
+            # Word documents have no pages to stream; the text arrives at once
+            from .enhanced_document_processor import EnhancedDocumentProcessor
+            
+            yield await EnhancedDocumentProcessor().extract_text(file_path, language='ar')
+        
+        else:
+            raise Exception(f"Unsupported file type: {file_extension}. Supported formats: PDF, DOCX, DOC")
+    
+    async def _iter_pdf_pages(self, file_path: str) -> AsyncIterator[Tuple[int, str]]:
+        """Bridge EnhancedArabicPDFProcessor.iter_pdf_pages from a worker thread
+        
+        At most STREAM_PAGE_QUEUE_SIZE pages wait in the queue, so extraction
+        and OCR run ahead of parsing without buffering the whole document.
+        """
+        from .enhanced_arabic_pdf_processor import EnhancedArabicPDFProcessor
+        
+        loop = asyncio.get_running_loop()
+        pages: asyncio.Queue = asyncio.Queue(maxsize=STREAM_PAGE_QUEUE_SIZE)
+        stop = threading.Event()
+        done = object()
+        
+        def produce() -> None:
+            item: Any = done
+            try:
+                for page in EnhancedArabicPDFProcessor().iter_pdf_pages(file_path, language='ar'):
+                    if stop.is_set():
+                        break
+                    asyncio.run_coroutine_threadsafe(pages.put(page), loop).result()
+            except Exception as e:
+                item = e
+            asyncio.run_coroutine_threadsafe(pages.put(item), loop).result()
+        
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await pages.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise Exception(f"Failed to extract text from file: {str(item)}")
+                yield item
+        finally:
+            # Let a producer blocked on a full queue finish, then wait for it
+            stop.set()
+            while not producer.done():
+                while not pages.empty():
+                    pages.get_nowait()
+                await asyncio.sleep(0.01)
+    
     async def _extract_text_from_file(self, file_path: str) -> str:
         """Extract text from PDF or Word document"""
         try:
@@ -538,7 +1283,6 @@ class HierarchicalDocumentProcessor:
         Returns list of (start_line, end_line) tuples for TOC sections.
         """
         toc_sections = []
-        current_toc_start = None
         
         # ★★★ NEW: Track all lines with "Chapter" prefix to mark entire TOC block ★★★
         chapter_prefix_lines = []
@@ -581,246 +1325,12 @@ class HierarchicalDocumentProcessor:
             # Return early - we found the TOC block
             return toc_sections
         
-        # Track branch occurrences to detect duplicates (TOC vs actual content)
-        branch_occurrences = {}  # {branch_number: [line_numbers]}
-        
-        # Patterns that indicate table of contents
-        toc_indicators = [
-            r'الفهرس',
-            r'ﺍﻟﻔﻬﺮﺱ',  # Encoded version
-            r'جدول المحتويات',
-            r'ﺟﺪﻭﻝ ﺍﻟﻤﺤﺘﻮﻳﺎﺕ',  # Encoded version
-            r'المحتويات',
-            r'ﺍﻟﻤﺤﺘﻮﻳﺎﺕ',  # Encoded version
-            r'محتوى الكتاب',
-            r'فهرس المحتويات',
-            r'ﻓﻬﺮﺱ ﺍﻟﻤﺤﺘﻮﻳﺎﺕ',  # Encoded version
-            r'index',
-            r'table of contents',
-            r'contents',
-            r'فهرس',
-            r'ﻓﻬﺮﺱ'
-        ]
-        
-        # Also detect TOC by pattern: chapter/section names followed by page numbers
-        # This is common in Arabic legal documents
-        toc_pattern_detected = False
-        
-        # Patterns that indicate end of table of contents
-        # المتطلب الحاسم: يجب أن ينتهي جدول المحتويات عند أول ظهور لـ "المادة الأولى" بدون أرقام صفحات
-        toc_end_indicators = [
-            r'المادة الأولى',      # المادة الأولى (عادي)
-            r'ﺍﻟﻤﺎﺩﺓ ﺍﻷﻭﻟﻰ',     # المادة الأولى (encoded)
-            r'المادة\s+1\s*:',     # المادة 1:
-            r'المادة\s+الاولى',    # تهجئة بديلة
-            r'مادة\s+1\s*:',       # مادة 1:
-            r'الفصل الأول',
-            r'الباب الأول',
-            r'بداية النص',
-            r'start of text',
-            r'beginning of document'
-        ]
-        
-        for i, line in enumerate(lines):
-            line_clean = line.strip().lower()
-            line_original = line.strip()
-            
-            # Check for TOC start indicators
-            if current_toc_start is None:
-                # Check explicit TOC indicators
-                for indicator in toc_indicators:
-                    if re.search(indicator, line_clean, re.IGNORECASE):
-                        current_toc_start = i + 1  # 1-based line numbering
-                        logger.info(f"Found TOC start at line {current_toc_start}: {line[:50]}...")
-                        break
-                
-                # Detect "Chapter" prefix pattern (common in TOC)
-                # Pattern: "Chapter الباب الأول", "Chapter الباب الثاني", etc.
-                if not current_toc_start and re.search(r'^(Chapter|chapter)\s+', line_original):
-                    # Check if this pattern repeats in next 15 lines (allowing gaps)
-                    chapter_prefix_count = 0
-                    for lookahead_idx in range(i, min(i + 15, len(lines))):
-                        if lookahead_idx < len(lines):
-                            if re.search(r'^(Chapter|chapter)\s+', lines[lookahead_idx].strip()):
-                                chapter_prefix_count += 1
-                    
-                    # If we find 3+ lines with "Chapter" prefix within 15 lines, it's TOC
-                    # This is lenient enough to allow gaps between TOC entries
-                    if chapter_prefix_count >= 3:
-                        current_toc_start = i + 1
-                        logger.info(f"Found TOC by 'Chapter' prefix pattern (count: {chapter_prefix_count} in 15-line window) at line {current_toc_start}: {line[:50]}...")
-                
-                # Also detect TOC by pattern: lines ending with page numbers
-                # Pattern: "Chapter/Section Name ... 31" or "الباب الأول ... 31"
-                if not current_toc_start:
-                    # Look for lines that contain chapter/section patterns followed by page numbers
-                    page_number_at_end = r'\.+\s*\d+\s*$|\s+\d+\s*$'  # Matches "...31" or "  31"
-                    if re.search(page_number_at_end, line.strip()):
-                        # Check if this line contains chapter/section keywords
-                        chapter_section_keywords = [r'الباب', r'الفصل', r'المادة', r'أولاً', r'ثانياً', r'ﺍﻟﺒﺎﺏ', r'ﺍﻟﻔﺼﻞ', r'ﺍﻟﻤﺎﺩﺓ']
-                        for keyword in chapter_section_keywords:
-                            if re.search(keyword, line, re.IGNORECASE):
-                                # Additional check: look ahead to see if multiple consecutive lines have same pattern
-                                # This confirms it's TOC and not just a page reference
-                                toc_pattern_count = 0
-                                for lookahead_idx in range(i, min(i + 5, len(lines))):
-                                    if lookahead_idx < len(lines):
-                                        lookahead_line = lines[lookahead_idx].strip()
-                                        if re.search(page_number_at_end, lookahead_line):
-                                            for kw in chapter_section_keywords:
-                                                if re.search(kw, lookahead_line, re.IGNORECASE):
-                                                    toc_pattern_count += 1
-                                                    break
-                                
-                                # If we find 3+ consecutive lines with this pattern, it's definitely TOC
-                                if toc_pattern_count >= 3:
-                                    current_toc_start = i + 1
-                                    logger.info(f"Found TOC by pattern (consecutive matches: {toc_pattern_count}) at line {current_toc_start}: {line[:50]}...")
-                                    break
-                
-                # Detect rapid sequential branch markers (TOC listing)
-                # If we see multiple branch markers in quick succession without content, it's likely TOC
-                if not current_toc_start:
-                    chapter_pattern = r'ﺍﻟﺒﺎﺏ|الباب'
-                    if re.search(chapter_pattern, line_original):
-                        # Count how many branch markers appear in next 10 lines
-                        branch_count = 0
-                        content_count = 0
-                        for lookahead_idx in range(i, min(i + 10, len(lines))):
-                            if lookahead_idx < len(lines):
-                                lookahead_line = lines[lookahead_idx].strip()
-                                if re.search(chapter_pattern, lookahead_line):
-                                    branch_count += 1
-                                elif len(lookahead_line) > 100:  # Substantial content
-                                    content_count += 1
-                        
-                        # If we have 5+ branches but little content, it's likely TOC
-                        if branch_count >= 5 and content_count < 2:
-                            current_toc_start = i + 1
-                            logger.info(f"Found TOC by rapid branch listing (branches: {branch_count}, content: {content_count}) at line {current_toc_start}: {line[:50]}...")
-            
-            # Check for TOC end indicators or patterns that suggest end of TOC
-            elif current_toc_start is not None:
-                should_end_toc = False
-                
-                # ★★★ المتطلب الحاسم: اكتشاف "المادة الأولى" بدون أرقام صفحات ★★★
-                # هذا هو المؤشر الأقوى على نهاية جدول المحتويات وبداية المحتوى الفعلي
-                first_article_patterns = [
-                    r'المادة الأولى',
-                    r'ﺍﻟﻤﺎﺩﺓ ﺍﻷﻭﻟﻰ',
-                    r'المادة\s+1\s*:',
-                    r'المادة\s+الاولى',
-                    r'المادة\s+١'  # رقم عربي
-                ]
-                
-                # Check if line contains first article pattern
-                article_found = False
-                for article_pattern in first_article_patterns:
-                    if re.search(article_pattern, line_original, re.IGNORECASE):
-                        article_found = True
-                        break
-                
-                if article_found:
-                    # التحقق الحاسم: هل هذا السطر يحتوي على رقم صفحة في النهاية؟
-                    page_number_at_end = r'\.+\s*\d+\s*$|\s+\d+\s*$'
-                    has_page_number = re.search(page_number_at_end, line_original.strip())
-                    
-                    if not has_page_number:
-                        # ✓ وجدنا "المادة الأولى" بدون رقم صفحة = نهاية جدول المحتويات حتماً
-                        should_end_toc = True
-                        logger.info(f"✓ TOC ENDED at line {i+1}: Found first article WITHOUT page number: {line[:60]}...")
-                    else:
-                        # لا يزال في جدول المحتويات (المادة الأولى مع رقم الصفحة)
-                        logger.debug(f"Still in TOC at line {i+1}: First article WITH page number: {line[:60]}...")
-                
-                # Check explicit end indicators (secondary check)
-                if not should_end_toc:
-                    for indicator in toc_end_indicators:
-                        if re.search(indicator, line_clean, re.IGNORECASE):
-                            # التأكد من عدم وجود رقم صفحة
-                            page_number_at_end = r'\.+\s*\d+\s*$|\s+\d+\s*$'
-                            if not re.search(page_number_at_end, line_original.strip()):
-                                should_end_toc = True
-                                break
-                
-                # Check for patterns that suggest we're now in the main document
-                # Look for page numbers followed by chapter/section headers
-                page_number_pattern = r'^\s*\d+\s*$'
-                if re.match(page_number_pattern, line_clean):
-                    # Check if next few lines contain chapter patterns
-                    next_lines = lines[i+1:i+4]
-                    for next_line in next_lines:
-                        if self.pattern_recognizer.analyze_line(next_line, i+2).element_type == ElementType.CHAPTER:
-                            should_end_toc = True
-                            break
-                
-                # Check for consecutive lines with page numbers (typical TOC pattern)
-                if i > 0 and re.match(page_number_pattern, line_clean):
-                    prev_line = lines[i-1].strip().lower()
-                    # If previous line also has page number pattern, likely still in TOC
-                    if not re.match(page_number_pattern, prev_line):
-                        # Check if this line is followed by structural elements
-                        if i < len(lines) - 2:
-                            next_analysis = self.pattern_recognizer.analyze_line(lines[i+1], i+2)
-                            if next_analysis.element_type in [ElementType.CHAPTER, ElementType.SECTION]:
-                                should_end_toc = True
-                
-                # Additional check: if we encounter a line that starts with chapter/section patterns
-                # but doesn't end with page numbers, we're likely out of TOC
-                chapter_start_patterns = [r'ﺍﻟﺒﺎﺏ ﺍﻷﻭﻝ', r'ﺍﻟﺒﺎﺏ ﺍﻟﺜﺎﻧﻲ', r'ﺍﻟﻔﺼﻞ ﺍﻷﻭﻝ', r'ﺍﻟﻤﺎﺩﺓ ﺍﻷﻭﻟﻰ']
-                for pattern in chapter_start_patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        # Check if this line doesn't end with page number
-                        if not re.search(page_number_at_end, line.strip()):
-                            should_end_toc = True
-                            break
-                
-                # Check if we stopped seeing "Chapter" prefix (was in TOC, now in actual content)
-                if current_toc_start and i > current_toc_start + 3:
-                    # If this line has a branch pattern but NO "Chapter" prefix, might be actual content
-                    chapter_pattern = r'ﺍﻟﺒﺎﺏ|الباب'
-                    if re.search(chapter_pattern, line_original):
-                        if not re.search(r'^(Chapter|chapter)\s+', line_original):
-                            # Check if next few lines also lack "Chapter" prefix
-                            no_chapter_prefix_count = 0
-                            for check_idx in range(i, min(i + 3, len(lines))):
-                                if check_idx < len(lines):
-                                    check_line = lines[check_idx].strip()
-                                    if re.search(chapter_pattern, check_line) and not re.search(r'^(Chapter|chapter)\s+', check_line):
-                                        no_chapter_prefix_count += 1
-                            
-                            # If we consistently don't see "Chapter" prefix anymore, TOC likely ended
-                            if no_chapter_prefix_count >= 2:
-                                should_end_toc = True
-                                logger.info(f"TOC likely ended at line {i} - no more 'Chapter' prefix pattern")
-                
-                # Check for substantial content following a branch marker (indicates actual content, not TOC)
-                if re.search(r'ﺍﻟﺒﺎﺏ|الباب|ﺍﻟﻔﺼﻞ|الفصل', line_original):
-                    # Look at next few lines for substantial content
-                    content_found = False
-                    for check_idx in range(i + 1, min(i + 5, len(lines))):
-                        if check_idx < len(lines):
-                            check_line = lines[check_idx].strip()
-                            # If we find a line with 50+ chars that's not another branch/chapter marker
-                            if len(check_line) > 50 and not re.search(r'ﺍﻟﺒﺎﺏ|الباب|ﺍﻟﻔﺼﻞ|الفصل|Chapter', check_line):
-                                content_found = True
-                                break
-                    
-                    if content_found:
-                        should_end_toc = True
-                        logger.info(f"TOC likely ended at line {i} - found substantial content after branch marker")
-                
-                if should_end_toc:
-                    toc_sections.append((current_toc_start, i))
-                    logger.info(f"Found TOC end at line {i}: {line[:50]}...")
-                    current_toc_start = None
-        
-        # If we found a TOC start but no end, assume it continues to end of document
-        if current_toc_start is not None:
-            toc_sections.append((current_toc_start, len(lines)))
-            logger.info(f"TOC section continues to end of document from line {current_toc_start}")
-        
-        return toc_sections
+        # Sequential strategies, line by line with a bounded lookahead
+        detector = TableOfContentsDetector(self.pattern_recognizer)
+        for line in lines:
+            detector.feed(line)
+        detector.finish()
+        return detector.sections
     
     def _is_in_table_of_contents(self, line_number: int, toc_sections: List[Tuple[int, int]]) -> bool:
         """Check if a line number is within any table of contents section."""
@@ -829,197 +1339,61 @@ class HierarchicalDocumentProcessor:
                 return True
         return False
     
+    def _analyze_line(self, line_number: int, line: str, in_toc: bool) -> LineAnalysis:
+        """Phase 2 for a single line, given its table-of-contents membership"""
+        # Skip lines that are in table of contents sections
+        if in_toc:
+            return LineAnalysis(
+                line_number=line_number,
+                content=line,
+                element_type=ElementType.IGNORE,
+                confidence=1.0,
+                metadata={'reason': 'table_of_contents'},
+                warnings=[],
+                errors=[]
+            )
+        # Additional safety filter: Any line starting with "Chapter" followed by branch markers is TOC
+        if re.search(r'^(Chapter|chapter)\s+(ﺍﻟﺒﺎﺏ|الباب|ﺍﻟﻔﺼﻞ|الفصل)', line.strip()):
+            logger.debug(f"Line {line_number} marked as TOC due to 'Chapter' prefix: {line[:50]}...")
+            return LineAnalysis(
+                line_number=line_number,
+                content=line,
+                element_type=ElementType.IGNORE,
+                confidence=1.0,
+                metadata={'reason': 'chapter_prefix_toc'},
+                warnings=[],
+                errors=[]
+            )
+        return self.pattern_recognizer.analyze_line(line, line_number)
+    
     async def _analyze_document_structure(self, text: str) -> List[LineAnalysis]:
         """Analyze document structure line by line"""
         lines = text.split('\n')
-        line_analyses = []
         
         # Detect table of contents sections to exclude
         toc_sections = self._detect_table_of_contents_sections(lines)
         
-        for i, line in enumerate(lines, 1):
-            # Skip lines that are in table of contents sections
-            if self._is_in_table_of_contents(i, toc_sections):
-                analysis = LineAnalysis(
-                    line_number=i,
-                    content=line,
-                    element_type=ElementType.IGNORE,
-                    confidence=1.0,
-                    metadata={'reason': 'table_of_contents'},
-                    warnings=[],
-                    errors=[]
-                )
-            # Additional safety filter: Any line starting with "Chapter" followed by branch markers is TOC
-            elif re.search(r'^(Chapter|chapter)\s+(ﺍﻟﺒﺎﺏ|الباب|ﺍﻟﻔﺼﻞ|الفصل)', line.strip()):
-                analysis = LineAnalysis(
-                    line_number=i,
-                    content=line,
-                    element_type=ElementType.IGNORE,
-                    confidence=1.0,
-                    metadata={'reason': 'chapter_prefix_toc'},
-                    warnings=[],
-                    errors=[]
-                )
-                logger.debug(f"Line {i} marked as TOC due to 'Chapter' prefix: {line[:50]}...")
-            else:
-                analysis = self.pattern_recognizer.analyze_line(line, i)
-            
-            line_analyses.append(analysis)
-        
-        return line_analyses
+        return [
+            self._analyze_line(i, line, self._is_in_table_of_contents(i, toc_sections))
+            for i, line in enumerate(lines, 1)
+        ]
     
     async def _reconstruct_hierarchy(self, line_analyses: List[LineAnalysis]) -> DocumentStructure:
         """Reconstruct hierarchical structure from line analyses"""
-        chapters = []
-        orphaned_articles = []
-        current_chapter = None
-        current_section = None
-        current_article = None
-        
+        builder = StreamingHierarchyBuilder(keep_articles=True)
         for analysis in line_analyses:
-            # Skip lines marked as IGNORE (e.g., TOC sections, headers, footers)
-            if analysis.element_type == ElementType.IGNORE:
-                logger.debug(f"Skipping IGNORE line {analysis.line_number}: {analysis.content[:50]}...")
-                continue
-            
-            if analysis.element_type == ElementType.CHAPTER:
-                # Save previous chapter if exists
-                if current_chapter:
-                    chapters.append(current_chapter)
-                
-                # Create new chapter
-                chapter_title = analysis.metadata.get('title', '').strip()
-                if not chapter_title:
-                    chapter_title = f"Chapter {analysis.metadata.get('number', len(chapters) + 1)}"
-                
-                current_chapter = ChapterStructure(
-                    number=analysis.metadata.get('number', ''),
-                    title=chapter_title,
-                    confidence=analysis.confidence,
-                    warnings=analysis.warnings,
-                    errors=analysis.errors,
-                    sections=[],
-                    articles=[],
-                    order_index=len(chapters)
-                )
-                current_section = None
-                current_article = None
-                
-            elif analysis.element_type == ElementType.SECTION and current_chapter:
-                # Create new section
-                section_title = analysis.metadata.get('title', '').strip()
-                if not section_title:
-                    section_title = f"Section {analysis.metadata.get('number', len(current_chapter.sections) + 1)}"
-                
-                current_section = SectionStructure(
-                    number=analysis.metadata.get('number', ''),
-                    title=section_title,
-                    confidence=analysis.confidence,
-                    warnings=analysis.warnings,
-                    errors=analysis.errors,
-                    articles=[],
-                    order_index=len(current_chapter.sections)
-                )
-                current_chapter.sections.append(current_section)
-                current_article = None
-                
-            elif analysis.element_type == ElementType.ARTICLE:
-                # Create new article
-                article_title = analysis.metadata.get('title', '').strip()
-                if not article_title:
-                    article_title = f"Article {analysis.metadata.get('number', '')}"
-                
-                article = ArticleStructure(
-                    number=analysis.metadata.get('number', ''),
-                    title=article_title,
-                    content=analysis.content,
-                    confidence=analysis.confidence,
-                    warnings=analysis.warnings,
-                    errors=analysis.errors,
-                    order_index=0
-                )
-                
-                if current_section:
-                    # Article belongs to current section
-                    article.order_index = len(current_section.articles)
-                    current_section.articles.append(article)
-                elif current_chapter:
-                    # Article belongs to current chapter (not in any section)
-                    article.order_index = len(current_chapter.articles)
-                    current_chapter.articles.append(article)
-                else:
-                    # Orphaned article
-                    article.order_index = len(orphaned_articles)
-                    orphaned_articles.append(article)
-                
-                current_article = article
-                
-            elif analysis.element_type == ElementType.SUB_ARTICLE and current_article:
-                # Add sub-article to current article
-                sub_article_title = analysis.metadata.get('title', '').strip()
-                if not sub_article_title:
-                    sub_article_title = f"Sub-article {analysis.metadata.get('number', '')}"
-                
-                sub_article = ArticleStructure(
-                    number=analysis.metadata.get('number', ''),
-                    title=sub_article_title,
-                    content=analysis.content,
-                    confidence=analysis.confidence,
-                    warnings=analysis.warnings,
-                    errors=analysis.errors,
-                    order_index=len(current_article.sub_articles or [])
-                )
-                
-                if not current_article.sub_articles:
-                    current_article.sub_articles = []
-                current_article.sub_articles.append(sub_article)
-                
-            elif analysis.element_type == ElementType.CONTENT and current_article:
-                # Add content to current article
-                if current_article.content:
-                    current_article.content += " " + analysis.content
-                else:
-                    current_article.content = analysis.content
-        
-        # Add final chapter if exists
-        if current_chapter:
-            chapters.append(current_chapter)
-        
-        # Calculate statistics
-        total_chapters = len(chapters)
-        total_sections = sum(len(chapter.sections) for chapter in chapters)
-        total_articles = (
-            sum(len(chapter.articles) for chapter in chapters) +
-            sum(len(section.articles) for chapter in chapters for section in chapter.sections) +
-            len(orphaned_articles)
-        )
-        
-        # Calculate overall confidence
-        all_elements = []
-        for chapter in chapters:
-            all_elements.append(chapter)
-            all_elements.extend(chapter.sections)
-            all_elements.extend(chapter.articles)
-            for section in chapter.sections:
-                all_elements.extend(section.articles)
-        all_elements.extend(orphaned_articles)
-        
-        overall_confidence = (
-            sum(element.confidence for element in all_elements) / len(all_elements)
-            if all_elements else 0.0
-        )
-        
-        return DocumentStructure(
-            chapters=chapters,
-            orphaned_articles=orphaned_articles,
-            total_chapters=total_chapters,
-            total_sections=total_sections,
-            total_articles=total_articles,
-            structure_confidence=overall_confidence
-        )
+            builder.add(analysis)
+        builder.close()
+        return builder.build()
     
-    async def _validate_structure(self, structure: DocumentStructure) -> None:
-        """Validate the extracted structure and add warnings/errors"""
+    async def _validate_structure(self, structure: DocumentStructure, orphaned_count: Optional[int] = None) -> None:
+        """Validate the extracted structure and add warnings/errors
+        
+        Args:
+            structure: Parsed document structure
+            orphaned_count: Number of orphaned articles when they are not kept
+                in ``structure`` (streaming mode)
+        """
         warnings = []
         errors = []
         
@@ -1040,8 +1414,10 @@ class HierarchicalDocumentProcessor:
                     warnings.append(f"Section {section.number} in chapter {chapter.number} has non-numeric numbering")
         
         # Check for orphaned articles
-        if structure.orphaned_articles:
-            warnings.append(f"{len(structure.orphaned_articles)} articles found outside any chapter/section")
+        if orphaned_count is None:
+            orphaned_count = len(structure.orphaned_articles)
+        if orphaned_count:
+            warnings.append(f"{orphaned_count} articles found outside any chapter/section")
         
         # Check confidence scores
         low_confidence_elements = []
@@ -1066,6 +1442,72 @@ class HierarchicalDocumentProcessor:
         self.processing_report.errors.extend(errors)
         self.processing_report.suggestions.extend(suggestions)
     
+    async def _get_or_create_law_source(
+        self,
+        law_source_details: Optional[Dict[str, Any]] = None,
+        law_source_id: Optional[int] = None
+    ) -> LawSource:
+        """Existing LawSource by ID, or a new 'raw' one built from the details"""
+        # Use existing law_source if ID is provided, otherwise create new one
+        if law_source_id:
+            result = await self.db.execute(
+                select(LawSource).where(LawSource.id == law_source_id)
+            )
+            law_source = result.scalars().first()
+            
+            if not law_source:
+                raise Exception(f"LawSource with ID {law_source_id} not found")
+            
+            logger.info(f"Using existing LawSource {law_source.id}")
+            return law_source
+        
+        # Create new law source (legacy behavior)
+        law_source = LawSource(
+            name=law_source_details.get('name', 'Extracted Legal Document') if law_source_details else 'Extracted Legal Document',
+            type=law_source_details.get('type', 'law') if law_source_details else 'law',
+            jurisdiction=law_source_details.get('jurisdiction') if law_source_details else None,
+            issuing_authority=law_source_details.get('issuing_authority') if law_source_details else None,
+            issue_date=law_source_details.get('issue_date') if law_source_details else None,
+            last_update=law_source_details.get('last_update') if law_source_details else None,
+            description=law_source_details.get('description') if law_source_details else None,
+            source_url=law_source_details.get('source_url') if law_source_details else None,
+            knowledge_document_id=law_source_details.get('knowledge_document_id') if law_source_details else None,
+            status='raw'
+        )
+        
+        self.db.add(law_source)
+        await self.db.flush()  # Get the ID
+        logger.info(f"Created new LawSource {law_source.id}")
+        return law_source
+    
+    @staticmethod
+    def _law_article_row(law_source_id: int, article_structure: ArticleStructure, order_index: int) -> Dict[str, Any]:
+        """LawArticle column values for a bulk insert"""
+        return {
+            "law_source_id": law_source_id,
+            "article_number": article_structure.number,
+            "title": article_structure.title,
+            "content": article_structure.content,
+            "keywords": [],  # Could be extracted using NLP
+            "order_index": order_index
+        }
+    
+    @staticmethod
+    def _law_source_summary(law_source: LawSource, structure: DocumentStructure) -> Dict[str, Any]:
+        return {
+            "id": law_source.id,
+            "name": law_source.name,
+            "type": law_source.type,
+            "jurisdiction": law_source.jurisdiction,
+            "created_at": law_source.created_at,
+            "structure_stats": {
+                "chapters": structure.total_chapters,
+                "sections": structure.total_sections,
+                "articles": structure.total_articles,
+                "confidence": structure.structure_confidence
+            }
+        }
+    
     async def _persist_to_database(
         self,
         structure: DocumentStructure,
@@ -1082,102 +1524,25 @@ class HierarchicalDocumentProcessor:
             law_source_id: Optional existing LawSource ID to use (prevents duplicate creation)
         """
         try:
-            # Use existing law_source if ID is provided, otherwise create new one
-            if law_source_id:
-                # Fetch existing law source
-                result = await self.db.execute(
-                    select(LawSource).where(LawSource.id == law_source_id)
-                )
-                law_source = result.scalars().first()
-                
-                if not law_source:
-                    raise Exception(f"LawSource with ID {law_source_id} not found")
-                
-                logger.info(f"Using existing LawSource {law_source.id}")
-            else:
-                # Create new law source (legacy behavior)
-                law_source = LawSource(
-                    name=law_source_details.get('name', 'Extracted Legal Document') if law_source_details else 'Extracted Legal Document',
-                    type=law_source_details.get('type', 'law') if law_source_details else 'law',
-                    jurisdiction=law_source_details.get('jurisdiction') if law_source_details else None,
-                    issuing_authority=law_source_details.get('issuing_authority') if law_source_details else None,
-                    issue_date=law_source_details.get('issue_date') if law_source_details else None,
-                    last_update=law_source_details.get('last_update') if law_source_details else None,
-                    description=law_source_details.get('description') if law_source_details else None,
-                    source_url=law_source_details.get('source_url') if law_source_details else None,
-                    knowledge_document_id=law_source_details.get('knowledge_document_id') if law_source_details else None,
-                    status='raw'
-                )
-                
-                self.db.add(law_source)
-                await self.db.flush()  # Get the ID
-                logger.info(f"Created new LawSource {law_source.id}")
+            law_source = await self._get_or_create_law_source(law_source_details, law_source_id)
             
-            # Process chapters and their content - flatten to articles directly
-            article_order = 0
+            # Process chapters and their content - flatten to articles directly:
+            # section articles, then direct chapter articles, then orphans
+            article_structures = []
             for chapter_structure in structure.chapters:
-                # Process sections and articles within this chapter
                 for section_structure in chapter_structure.sections:
-                    # Create articles in this section
-                    for article_structure in section_structure.articles:
-                        article = LawArticle(
-                            law_source_id=law_source.id,
-                            article_number=article_structure.number,
-                            title=article_structure.title,
-                            content=article_structure.content,
-                            keywords=[],  # Could be extracted using NLP
-                            embedding=None,  # Could be generated using embeddings
-                            order_index=article_order
-                        )
-                        
-                        self.db.add(article)
-                        article_order += 1
-                
-                # Process direct articles in chapter (not in any section)
-                for article_structure in chapter_structure.articles:
-                    article = LawArticle(
-                        law_source_id=law_source.id,
-                        article_number=article_structure.number,
-                        title=article_structure.title,
-                        content=article_structure.content,
-                        keywords=[],
-                        embedding=None,
-                        order_index=article_order
-                    )
-                    
-                    self.db.add(article)
-                    article_order += 1
+                    article_structures.extend(section_structure.articles)
+                article_structures.extend(chapter_structure.articles)
+            article_structures.extend(structure.orphaned_articles)
             
-            # Process orphaned articles
-            for article_structure in structure.orphaned_articles:
-                article = LawArticle(
-                    law_source_id=law_source.id,
-                    article_number=article_structure.number,
-                    title=article_structure.title,
-                    content=article_structure.content,
-                    keywords=[],
-                    embedding=None,
-                    order_index=article_order
-                )
-                
-                self.db.add(article)
-                article_order += 1
+            await LegalBulkRepository(self.db).insert_rows(LawArticle, [
+                self._law_article_row(law_source.id, article_structure, article_order)
+                for article_order, article_structure in enumerate(article_structures)
+            ])
             
             await self.db.commit()
             
-            return {
-                "id": law_source.id,
-                "name": law_source.name,
-                "type": law_source.type,
-                "jurisdiction": law_source.jurisdiction,
-                "created_at": law_source.created_at,
-                "structure_stats": {
-                    "chapters": structure.total_chapters,
-                    "sections": structure.total_sections,
-                    "articles": structure.total_articles,
-                    "confidence": structure.structure_confidence
-                }
-            }
+            return self._law_source_summary(law_source, structure)
             
         except Exception as e:
             await self.db.rollback()
@@ -8,10 +8,11 @@ providing clean separation of data access logic from business logic.
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, desc
+from sqlalchemy import select, and_, or_, func, desc, insert
 from sqlalchemy.orm import selectinload
 import logging
 import json
+import os
 
 from ..models.legal_knowledge import (
     LawSource, LawArticle, LegalCase, CaseSection, LegalTerm,
@@ -715,10 +716,26 @@ class KnowledgeChunkRepository:
         return result.scalars().all()
 
     async def save_chunks_batch(self, chunks: List[KnowledgeChunk]) -> bool:
-        """Save multiple chunks in a batch operation."""
+        """Save multiple chunks in a batch operation (bulk insert, one commit)."""
         try:
-            for chunk in chunks:
-                self.db.add(chunk)
+            rows = [
+                {
+                    column.key: getattr(chunk, column.key)
+                    for column in KnowledgeChunk.__table__.columns
+                    if getattr(chunk, column.key) is not None
+                }
+                for chunk in chunks
+            ]
+            # executemany needs the same columns in every row; unset columns
+            # are left out so their defaults apply
+            groups: Dict[Tuple[str, ...], List[int]] = {}
+            for position, row in enumerate(rows):
+                groups.setdefault(tuple(sorted(row)), []).append(position)
+            bulk = LegalBulkRepository(self.db)
+            for positions in groups.values():
+                chunk_ids = await bulk.insert_rows_returning_ids(KnowledgeChunk, [rows[p] for p in positions])
+                for position, chunk_id in zip(positions, chunk_ids):
+                    chunks[position].id = chunk_id
             await self.db.commit()
             logger.info(f"Saved batch of {len(chunks)} chunks")
             return True
@@ -751,3 +768,104 @@ class KnowledgeChunkRepository:
             "chunks_with_embeddings": chunks_with_embeddings
         }
 
+
+
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+
+
+class LegalBulkRepository:
+    """
+    Set-based inserts for law articles and knowledge chunks.
+    
+    Rows are plain dicts written with Core ``insert()`` executemany in
+    batches of ``batch_size``, so a 1,000-article law with its chunks costs a
+    handful of statements instead of one flush per object. On SQLite, article
+    ids are pre-allocated so chunks can reference their article before either
+    is inserted; other engines get the ids back from the insert (RETURNING).
+    Nothing here commits: everything runs in the caller's transaction.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = BULK_INSERT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+
+    async def allocate_ids(self, model, count: int) -> List[int]:
+        """
+        Reserve ``count`` consecutive primary keys for ``model`` (SQLite only).
+        
+        ``MAX(id) + 1`` is only safe because SQLite has a single writer: once a
+        transaction has written (e.g. flushed the parent LawSource) it holds
+        the database write lock until commit, so no other writer can insert
+        the reserved ids. Both conditions are checked; anything else must use
+        ``insert_rows_returning_ids``.
+        
+        Raises:
+            RuntimeError: If the engine is not SQLite, or the transaction has
+                not written yet and so does not hold the write lock
+        """
+        if count <= 0:
+            return []
+        connection = await self.db.connection()
+        if connection.dialect.name != "sqlite":
+            raise RuntimeError(f"allocate_ids relies on SQLite's single writer, not {connection.dialect.name}")
+        raw_connection = await connection.get_raw_connection()
+        # The sqlite3 driver opens the transaction at its first write statement
+        if not raw_connection.driver_connection.in_transaction:
+            raise RuntimeError("allocate_ids must run in a transaction that has already written")
+        result = await self.db.execute(select(func.coalesce(func.max(model.id), 0)))
+        start = (result.scalar() or 0) + 1
+        return list(range(start, start + count))
+
+    async def insert_rows(self, model, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows with executemany, ``batch_size`` rows per statement."""
+        table = model.__table__
+        for start in range(0, len(rows), self.batch_size):
+            await self.db.execute(insert(table), rows[start:start + self.batch_size])
+        return len(rows)
+
+    async def insert_rows_returning_ids(self, model, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert rows letting the database assign ids; returns them in row order."""
+        statement = insert(model.__table__).returning(model.__table__.c.id, sort_by_parameter_order=True)
+        ids: List[int] = []
+        for start in range(0, len(rows), self.batch_size):
+            result = await self.db.execute(statement, rows[start:start + self.batch_size])
+            ids.extend(result.scalars().all())
+        return ids
+
+    async def insert_articles_with_chunks(
+        self,
+        article_rows: List[Dict[str, Any]],
+        chunk_rows_per_article: List[List[Dict[str, Any]]]
+    ) -> Tuple[List[int], int]:
+        """
+        Insert articles and their chunks, each chunk pointing at its article.
+        
+        SQLite pre-allocates the article ids (see ``allocate_ids``), so the
+        articles go in with one executemany per batch; other engines take the
+        ids from ``INSERT ... RETURNING``.
+        
+        Args:
+            article_rows: LawArticle column values, without ``id``
+            chunk_rows_per_article: KnowledgeChunk column values for each
+                article (same order), without ``id`` or ``article_id``
+        
+        Returns:
+            (article ids in row order, number of chunks inserted)
+        """
+        connection = await self.db.connection()
+        if connection.dialect.name == "sqlite":
+            article_ids = await self.allocate_ids(LawArticle, len(article_rows))
+            for article_id, row in zip(article_ids, article_rows):
+                row["id"] = article_id
+            await self.insert_rows(LawArticle, article_rows)
+        else:
+            article_ids = await self.insert_rows_returning_ids(LawArticle, article_rows)
+
+        chunk_rows = []
+        for article_id, chunks in zip(article_ids, chunk_rows_per_article):
+            for chunk in chunks:
+                chunk["article_id"] = article_id
+                chunk_rows.append(chunk)
+        await self.insert_rows(KnowledgeChunk, chunk_rows)
+        logger.info(f"Bulk inserted {len(article_rows)} articles and {len(chunk_rows)} chunks")
+        return article_ids, len(chunk_rows)
@@ -5,13 +5,16 @@ This module handles all database operations related to contract templates,
 following the Repository pattern for clean separation of concerns.
 """
 
-from typing import Optional, List
+import os
+from typing import Any, Dict, Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert
 
 from .base import BaseRepository
 from ..models.contract_template import ContractTemplate, Contract
 
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+
 
 class TemplateRepository(BaseRepository):
     """Repository for contract template data access operations."""
@@ -87,6 +90,26 @@ class TemplateRepository(BaseRepository):
         await self.db.refresh(contract)
         return contract
     
+    async def create_contracts(
+        self,
+        rows: List[Dict[str, Any]],
+        batch_size: int = BULK_INSERT_BATCH_SIZE
+    ) -> int:
+        """
+        Insert many contract records with executemany, without committing.
+        
+        Args:
+            rows: Contract column values (id, template_id, owner_id, filled_data, pdf_path, status)
+            batch_size: Rows per INSERT statement
+            
+        Returns:
+            Number of rows inserted
+        """
+        table = Contract.__table__
+        for start in range(0, len(rows), max(1, batch_size)):
+            await self.db.execute(insert(table), rows[start:start + batch_size])
+        return len(rows)
+    
     async def get_contract_by_id(self, contract_id: str) -> Optional[Contract]:
         """
         Get contract by ID.
@@ -9,6 +9,7 @@ from typing import Optional
 
 from ..db.database import get_db
 from ..services.analytics_service import AnalyticsService
+from ..services.case_analysis.analysis_result_cache_service import AnalysisResultCacheService
 from ..schemas.response import ApiResponse, create_success_response
 from ..utils.auth import get_current_user
 from ..utils.role_auth import require_super_admin
@@ -16,6 +17,8 @@ from ..schemas.profile_schemas import TokenData
 from ..models.login_history import LoginStatus
 from ..models.system_log import LogLevel
 from ..config.enhanced_logging import get_logger
+from ..utils.gemini_files import get_document_handles
+from ..utils.office_conversion import get_conversion_pool
 
 router = APIRouter(prefix="/api/v1/admin/analytics", tags=["Admin Analytics"])
 
@@ -195,3 +198,48 @@ async def get_dashboard_stats(
         logger = get_logger("analytics", correlation_id)
         logger.error(f"Error getting dashboard stats: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get dashboard stats")
+
+
+@router.get("/analysis-cache", response_model=ApiResponse)
+async def get_analysis_cache_stats(
+    request: Request,
+    current_user: TokenData = Depends(require_super_admin),
+    db: AsyncSession = Depends(get_db)
+) -> ApiResponse:
+    """Get hit/miss counts of the analysis result cache and Gemini file handle reuse."""
+    correlation_id = request.headers.get("X-Correlation-ID", "no-correlation-id")
+    
+    try:
+        stats = await AnalysisResultCacheService(db).get_stats()
+        stats["document_handles"] = get_document_handles().stats()
+        
+        return create_success_response(
+            message="Analysis cache stats retrieved",
+            data=stats
+        )
+    except Exception as e:
+        logger = get_logger("analytics", correlation_id)
+        logger.error(f"Error getting analysis cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get analysis cache stats")
+
+
+@router.get("/document-conversion", response_model=ApiResponse)
+async def get_document_conversion_stats(
+    request: Request,
+    current_user: TokenData = Depends(require_super_admin)
+) -> ApiResponse:
+    """Get queue depth, latency and worker restarts of the DOCX to PDF conversion pool."""
+    correlation_id = request.headers.get("X-Correlation-ID", "no-correlation-id")
+    
+    try:
+        pool = get_conversion_pool()
+        stats = pool.stats() if pool is not None else None
+        
+        return create_success_response(
+            message="Document conversion stats retrieved" if stats else "LibreOffice is not installed",
+            data=stats
+        )
+    except Exception as e:
+        logger = get_logger("analytics", correlation_id)
+        logger.error(f"Error getting document conversion stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get document conversion stats")
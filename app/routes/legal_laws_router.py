@@ -13,13 +13,17 @@ import uuid
 import json
 from typing import Optional, List
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, Query, HTTPException, Path, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, HTTPException, Path, UploadFile, File, Form, BackgroundTasks, Header
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db.database import get_db
 from ..services.legal.knowledge.legal_laws_service import LegalLawsService
 from ..schemas.response import ApiResponse, create_success_response, create_error_response
 from ..utils.auth import get_current_user
+from ..utils.role_auth import require_super_admin
+from ..utils.upload_ingestion import UploadRejected
+from ..utils.resumable_upload import receive_upload, upload_filename
 from ..models.user import User
 from ..schemas.profile_schemas import TokenData
 
@@ -28,6 +32,16 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/laws", tags=["Legal Laws Management"])
 
 
+def upload_rejected_response(error: UploadRejected):
+    """Error response for a refused upload, with its HTTP status."""
+    from fastapi.responses import JSONResponse
+    error_response = create_error_response(
+        message=error.message,
+        errors=[{"field": error.field, "message": error.message}]
+    )
+    return JSONResponse(status_code=error.status_code, content=error_response.model_dump())
+
+
 def calculate_file_hash(file_path: str) -> str:
     """Calculate SHA-256 hash of a file."""
     sha256_hash = hashlib.sha256()
@@ -43,7 +57,8 @@ def calculate_file_hash(file_path: str) -> str:
 
 @router.post("/upload", response_model=ApiResponse)
 async def upload_legal_file(
-    file: UploadFile = File(..., description="Legal document file (JSON, PDF, DOCX, TXT)"),
+    file: Optional[UploadFile] = File(None, description="Legal document file (JSON, PDF, DOCX, TXT)"),
+    upload_id: Optional[str] = Form(None, description="ID of a completed resumable upload, instead of file"),
     law_name: Optional[str] = Form(None, description="Name of the law"),
     law_type: Optional[str] = Form(None, description="Type: law, regulation, code, directive, decree"),
     jurisdiction: Optional[str] = Form(None, description="Jurisdiction (e.g., المملكة العربية السعودية)"),
@@ -54,6 +69,7 @@ async def upload_legal_file(
     source_url: Optional[str] = Form(None, description="Source URL"),
     use_ai: bool = Query(True, description="Use AI extractor when available"),
     fallback_on_failure: bool = Query(True, description="Fallback to local parser if AI fails"),
+    content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256", description="Optional SHA-256 of the file; duplicates are rejected before the upload is read"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -64,6 +80,8 @@ async def upload_legal_file(
     - **JSON**: Extracts law sources and articles directly from structured JSON
     - **PDF/DOCX/TXT**: Saves file and prepares for AI or manual parsing
     - **Status Management**: Automatically updates law status (unhandled → processing → processed)
+    - **Large files**: send `upload_id` of a completed resumable upload
+      (`/api/v1/uploads`) instead of `file`
     
     **Supported File Types:**
     - `.json` - Structured legal documents with law sources and articles
@@ -105,29 +123,7 @@ async def upload_legal_file(
     """
     file_path = None
     try:
-        # Step 1: Validate file
-        if not file.filename:
-            return create_error_response(
-                message="No file provided",
-                errors=[{"field": "file", "message": "File is required"}]
-            )
-        
-        # Step 2: Detect file type
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        allowed_extensions = ['.json', '.pdf', '.docx', '.doc', '.txt']
-        
-        if file_extension not in allowed_extensions:
-            return create_error_response(
-                message="Unsupported file type",
-                errors=[{
-                    "field": "file",
-                    "message": f"File type '{file_extension}' not supported. Allowed: {', '.join(allowed_extensions)}"
-                }]
-            )
-        
-        logger.info(f"📄 Detected file type: {file_extension} for {file.filename}")
-        
-        # Step 3: Validate law_type if provided
+        # Step 1: Validate law_type if provided (before any byte is stored)
         if law_type:
             valid_types = ['law', 'regulation', 'code', 'directive', 'decree']
             if law_type not in valid_types:
@@ -135,24 +131,7 @@ async def upload_legal_file(
                     message=f"Invalid law_type. Must be one of: {', '.join(valid_types)}"
                 )
         
-        # Step 4: Create upload directory
-        upload_dir = "uploads/legal_documents"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Step 5: Save file with unique name
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        logger.info(f"💾 Saved file: {file_path}")
-        
-        # Step 6: Calculate file hash for duplicate detection
-        file_hash = calculate_file_hash(file_path)
-        logger.info(f"🔐 File hash: {file_hash[:16]}...")
-        
-        # Step 7: Parse dates if provided
+        # Step 2: Parse dates if provided
         parsed_issue_date = None
         parsed_last_update = None
         
@@ -168,10 +147,39 @@ async def upload_legal_file(
             except ValueError:
                 return create_error_response(message="Invalid last_update format. Use YYYY-MM-DD")
         
-        # Step 8: Route to appropriate handler based on file type
+        # Step 3: Validate required metadata for non-JSON files
+        try:
+            filename = upload_filename(file, upload_id, current_user.sub)
+        except UploadRejected as e:
+            return upload_rejected_response(e)
+        if os.path.splitext(filename)[1].lower() != '.json' and not law_name:
+            return create_error_response(
+                message="law_name is required for non-JSON files",
+                errors=[{"field": "law_name", "message": "Law name is required"}]
+            )
+        
+        # Steps 4-6: Validate type and size, stream to disk (or assemble the
+        # resumable upload) while hashing, reject duplicates before the file is kept
         service = LegalLawsService(db)
+        try:
+            upload = await receive_upload(
+                file,
+                upload_id,
+                "uploads/legal_documents",
+                created_by=current_user.sub,
+                allowed_extensions=['.json', '.pdf', '.docx', '.doc', '.txt'],
+                expected_sha256=content_sha256,
+                duplicate_lookup=service.find_active_duplicate
+            )
+        except UploadRejected as e:
+            return upload_rejected_response(e)
+        
+        file_path = upload.path
+        file_hash = upload.sha256
+        logger.info(f"📄 Stored {upload.extension} upload {upload.filename}: {upload.size} bytes, hash {file_hash[:16]}...")
         
-        if file_extension == '.json':
+        # Step 7: Route to appropriate handler based on file type
+        if upload.extension == '.json':
             # Handle JSON files
             logger.info("🔧 Processing JSON file")
             
@@ -219,14 +227,7 @@ async def upload_legal_file(
         
         else:
             # Handle PDF, DOCX, TXT files
-            logger.info(f"🔧 Processing {file_extension.upper()} file")
-            
-            # Validate required metadata for non-JSON files
-            if not law_name:
-                return create_error_response(
-                    message="law_name is required for non-JSON files",
-                    errors=[{"field": "law_name", "message": "Law name is required"}]
-                )
+            logger.info(f"🔧 Processing {upload.extension.upper()} file")
             
             if not law_type:
                 law_type = "law"  # Default
@@ -247,7 +248,7 @@ async def upload_legal_file(
             result = await service.upload_and_parse_law(
                 file_path=file_path,
                 file_hash=file_hash,
-                original_filename=file.filename,
+                original_filename=upload.filename,
                 law_source_details=law_source_details,
                 uploaded_by=current_user.sub if current_user else 1,
                 use_ai=use_ai,
@@ -1065,6 +1066,131 @@ async def generate_embeddings_for_document(
         return JSONResponse(status_code=500, content=error_response.model_dump())
 
 
+@router.post("/vector-store/reconcile", response_model=ApiResponse)
+async def reconcile_vector_store(
+    repair: bool = Query(False, description="Re-embed missing chunks and delete orphaned vectors"),
+    resume: bool = Query(True, description="Continue from the last saved checkpoint"),
+    max_pages: Optional[int] = Query(None, ge=1, description="Stop after this many pages (resume later)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenData = Depends(require_super_admin)
+):
+    """
+    Reconcile SQL chunks with Chroma embeddings using streaming, paginated passes.
+    
+    **What it does:**
+    - Pages through SQL chunks in id order and checks each page in Chroma
+    - Pages through Chroma ids and checks each page in SQL
+    - Optionally re-embeds missing chunks and deletes orphaned vectors
+    - Saves a checkpoint after every page so long runs can be resumed
+    
+    **Returns:**
+    - Counters for synced, missing and repaired chunks, plus small id samples
+    """
+    try:
+        from ..services.legal.knowledge.vector_reconciliation_service import VectorReconciliationEngine
+        
+        engine = VectorReconciliationEngine(db)
+        report = await engine.reconcile(repair=repair, resume=resume, max_pages=max_pages)
+        
+        status = "completed" if report.completed else "paused at checkpoint"
+        return create_success_response(
+            message=f"Vector store reconciliation {status}",
+            data=report.to_dict()
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Vector store reconciliation failed: {e}", exc_info=True)
+        from fastapi.responses import JSONResponse
+        error_response = create_error_response(
+            message=f"Vector store reconciliation failed: {str(e)}"
+        )
+        return JSONResponse(status_code=500, content=error_response.model_dump())
+
+
+# State of the background corpus ingestion run (one at a time per process)
+_corpus_ingestion_state = {"running": False, "progress": None, "report": None, "error": None}
+
+
+class CorpusIngestionRequest(BaseModel):
+    """Request schema for bulk corpus ingestion."""
+    paths: Optional[List[str]] = Field(None, description="JSON files or directories (default: data_set/files and data_set/cases)")
+    embed: bool = Field(True, description="Embed new chunks after writing them")
+    resume: bool = Field(True, description="Skip files the manifest records as done")
+
+
+@router.post("/corpus/ingest", response_model=ApiResponse)
+async def start_corpus_ingestion(
+    request: Optional[CorpusIngestionRequest] = None,
+    current_user: TokenData = Depends(require_super_admin)
+):
+    """
+    Bulk-ingest the law and case JSON corpus in the background.
+
+    **What it does:**
+    - Parses files in worker processes and bulk-inserts them batch by batch
+    - Skips files already ingested (by content hash) and records failures per file
+    - Embeds all new chunks in one length-sorted pass with a single persist
+
+    Poll `GET /api/v1/laws/corpus/ingest/status` for progress.
+    """
+    import asyncio
+    from fastapi.responses import JSONResponse
+    from ..db.database import AsyncSessionLocal
+    from ..services.legal.ingestion.bulk_corpus_ingestion_service import (
+        DEFAULT_CORPUS_DIRS, BulkCorpusIngestionService
+    )
+
+    if _corpus_ingestion_state["running"]:
+        error_response = create_error_response(message="Corpus ingestion is already running")
+        return JSONResponse(status_code=409, content=error_response.model_dump())
+
+    request = request or CorpusIngestionRequest()
+    paths = request.paths or list(DEFAULT_CORPUS_DIRS)
+    _corpus_ingestion_state.update(running=True, progress=None, report=None, error=None)
+
+    def on_progress(stage: str, done: int, total: int) -> None:
+        _corpus_ingestion_state["progress"] = {"stage": stage, "done": done, "total": total}
+
+    async def run_ingestion():
+        try:
+            # The request session is closed once the response is sent
+            async with AsyncSessionLocal() as session:
+                service = BulkCorpusIngestionService(session, progress=on_progress, uploaded_by=current_user.sub)
+                report = await service.ingest(paths, embed=request.embed, resume=request.resume)
+                _corpus_ingestion_state["report"] = report.to_dict()
+        except Exception as e:
+            logger.error(f"❌ Background corpus ingestion failed: {e}", exc_info=True)
+            _corpus_ingestion_state["error"] = str(e)
+        finally:
+            _corpus_ingestion_state["running"] = False
+
+    asyncio.create_task(run_ingestion())
+    logger.info(f"🚀 Started background corpus ingestion for {paths}")
+
+    return create_success_response(
+        message="Corpus ingestion started in background",
+        data={"paths": paths, "embed": request.embed, "resume": request.resume, "status": "processing"}
+    )
+
+
+@router.get("/corpus/ingest/status", response_model=ApiResponse)
+async def get_corpus_ingestion_status(
+    current_user: TokenData = Depends(require_super_admin)
+):
+    """Progress of the current corpus ingestion run and per-status file counts from the manifest."""
+    from pathlib import Path as FilePath
+    from ..services.legal.ingestion.bulk_corpus_ingestion_service import DEFAULT_MANIFEST_PATH, IngestionManifest
+
+    manifest = IngestionManifest.load(FilePath(DEFAULT_MANIFEST_PATH))
+    return create_success_response(
+        message="Corpus ingestion status",
+        data={
+            **_corpus_ingestion_state,
+            "manifest": {"files": manifest.summary(), "updated_at": manifest.updated_at},
+        }
+    )
+
+
 @router.post("/query", response_model=ApiResponse)
 async def answer_query(
     query: str = Query(..., description="Search query or question"),
@@ -1396,8 +1522,8 @@ async def reparse_law(
     
     **Workflow:**
     1. Delete existing branches, chapters, articles, and chunks
-    2. Re-extract hierarchy from original PDF
-    3. Recreate all records with updated parsing
+    2. Re-extract hierarchy from original PDF, page by page (streamed)
+    3. Recreate articles in batches, then one chunk per article
     4. Update timestamps and status
     
     **Use Cases:**
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, UploadFile, Form, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, UploadFile, Form, HTTPException, BackgroundTasks, Header
+from fastapi.responses import JSONResponse
+from typing import Dict, Any, Optional
 import asyncio
 
 from app.services.knowledge.optimized_knowledge_service import (
@@ -9,19 +10,23 @@ from app.services.knowledge.optimized_knowledge_service import (
 )
 from app.schemas.response import ApiResponse, create_success_response, create_error_response
 from app.config.enhanced_logging import get_logger
+from app.utils.upload_ingestion import UploadRejected, find_knowledge_document_by_hash, ingest_upload
 
 router = APIRouter(prefix="/api/v1/rag", tags=["rag"])
 
 @router.post("/upload", response_model=ApiResponse)
 async def upload_file(
     background_tasks: BackgroundTasks,
-    file: UploadFile
+    file: UploadFile,
+    content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256", description="Optional SHA-256 of the file; duplicates are rejected before the body is read")
 ) -> ApiResponse[Dict[str, Any]]:
     """
     Upload a file for RAG processing with optimized performance.
     
     **Optimized File Upload for RAG**:
     - Uses streaming file processing to avoid memory overload
+    - Streams the upload to disk while hashing it; duplicates of an existing
+      document (same SHA-256) are rejected with 409, oversize files with 413
     - Implements incremental JSON parsing for large files
     - Processes embeddings in batches for memory efficiency
     - Returns immediately with background processing status
@@ -47,8 +52,21 @@ async def upload_file(
         
         logger.info(f"🚀 Starting optimized upload for file: {file.filename}")
         
-        # Read file content for background processing
-        file_content = await file.read()
+        # Stream to disk; the background task receives the path, not the bytes
+        try:
+            upload = await ingest_upload(
+                file,
+                "uploads/rag",
+                allowed_extensions=[".json"],
+                expected_sha256=content_sha256,
+                duplicate_lookup=find_knowledge_document_by_hash,
+            )
+        except UploadRejected as e:
+            error_response = create_error_response(
+                message=e.message,
+                errors=[{"field": e.field, "message": e.message}]
+            )
+            return JSONResponse(status_code=e.status_code, content=error_response.model_dump())
         
         # Generate task ID for tracking
         task_id = f"upload_{file.filename}_{asyncio.get_event_loop().time()}"
@@ -56,13 +74,15 @@ async def upload_file(
         # Add background task
         background_tasks.add_task(
             process_upload_background,
-            file_content,
+            upload.path,
             file.filename
         )
         
         response_data = {
             "filename": file.filename,
             "task_id": task_id,
+            "size": upload.size,
+            "sha256": upload.sha256,
             "status": "processing_started",
             "message": "File upload processing started in background"
         }
@@ -155,20 +175,23 @@ async def get_processing_status() -> ApiResponse[Dict[str, Any]]:
     logger = get_logger(__name__)
     
     try:
-        from app.services.knowledge.optimized_knowledge_service import model_manager
-        
-        # Get vectorstore status
-        vectorstore = model_manager.get_vectorstore()
+        from app.services.knowledge.optimized_knowledge_service import VECTORSTORE_PATH, model_manager
+        from app.services.legal.knowledge.index_statistics_service import get_index_statistics
+        from app.utils.lazy_loader import get_engine
         
-        # Get collection info
-        collection = vectorstore._collection
-        collection_count = collection.count() if collection else 0
+        # Collection info comes from the cached index statistics (no Chroma round-trip)
+        index_stats = get_index_statistics(persist_directory=VECTORSTORE_PATH)
+        if not index_stats.loaded:
+            index_stats.load_in_background(lambda: model_manager.get_vectorstore()._collection)
+        stats = index_stats.snapshot()
+        collection_count = stats["total_vectors"]
         
         status_data = {
             "system_status": "operational",
-            "models_initialized": model_manager._initialized,
-            "vectorstore_status": "connected",
+            "models_initialized": get_engine("rag_models").loaded,
+            "vectorstore_status": "connected" if stats["loaded"] else "loading",
             "total_documents": collection_count,
+            "index_statistics": stats,
             "embedding_model": "Omartificial-Intelligence-Space/GATE-AraBert-v1",
             "reranker_model": "Omartificial-Intelligence-Space/ARA-Reranker-V1",
             "chunk_size": 800,
@@ -4,10 +4,14 @@ Templates Router
 API endpoints for contract template management and generation.
 """
 
+import csv
+import io
+import json
 import os
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from ..db.database import get_db
 from ..utils.auth import get_current_user_id
@@ -15,13 +19,18 @@ from ..schemas.response import ApiResponse, create_success_response, create_erro
 from ..schemas.template_schemas import (
     TemplateVariablesResponse,
     GenerateContractRequest,
-    GenerateContractResponse
+    GenerateContractResponse,
+    BulkGenerateContractsRequest
 )
-from ..services.template_service import TemplateService
+from ..services.template_service import BulkValidationError, TemplateService
+from ..utils.file_serving import serve_file
+from ..utils.zip_stream import zip_stream
 from ..config.enhanced_logging import get_logger
 
 logger = get_logger(__name__)
 
+BULK_CSV_MAX_BYTES = int(os.getenv("BULK_CSV_MAX_MB", "5")) * 1024 * 1024
+
 router = APIRouter(
     prefix="/api/v1/templates",
     tags=["Templates"]
@@ -177,9 +186,148 @@ async def generate_contract(
         )
 
 
+async def _bulk_generate_response(
+    db: AsyncSession,
+    template_id: str,
+    owner_id: int,
+    rows: List[Any],
+    output: str,
+    filename_field: Optional[str]
+):
+    """Run a bulk generation and shape its result as download links or a streamed ZIP."""
+    try:
+        service = TemplateService(db)
+        result = await service.generate_contracts_bulk(
+            template_id=template_id,
+            owner_id=owner_id,
+            rows=rows,
+            filename_field=filename_field
+        )
+    except BulkValidationError as e:
+        logger.warning(f"Bulk contract rows rejected for template {template_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "success": False,
+                "message": str(e),
+                "data": None,
+                "errors": e.errors
+            }
+        )
+    except ValueError as e:
+        logger.warning(f"Validation error generating contracts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "success": False,
+                "message": str(e),
+                "data": None,
+                "errors": [{"field": None, "message": str(e)}]
+            }
+        )
+    except Exception as e:
+        logger.error(f"Bulk contract generation failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "success": False,
+                "message": "Failed to generate contracts",
+                "data": None,
+                "errors": [{"field": None, "message": str(e)}]
+            }
+        )
+    
+    files = [(item["filename"], item.pop("file_path")) for item in result["items"] if "file_path" in item]
+    if output != "zip":
+        return create_success_response(
+            message=f"Generated {result['generated']} of {result['total']} contracts",
+            data=result
+        )
+    
+    # The manifest maps archive entries to contract ids and lists failed rows
+    manifest = json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8")
+    return StreamingResponse(
+        zip_stream(files, extra=[("manifest.json", manifest)]),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="contracts_{result["batch_id"]}.zip"',
+            "X-Batch-Id": result["batch_id"],
+            "X-Contracts-Generated": str(result["generated"]),
+            "X-Contracts-Failed": str(result["failed"])
+        }
+    )
+
+
+@router.post("/{template_id}/generate-bulk", response_model=None)
+async def generate_contracts_bulk(
+    template_id: str,
+    request: BulkGenerateContractsRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Generate one contract per row of form data.
+    
+    All rows are validated first; if any is invalid nothing is generated and
+    the errors are returned per row. With output="links" the response lists a
+    download URL per contract; with output="zip" the contracts are streamed
+    back as one ZIP archive with a manifest.json.
+    """
+    return await _bulk_generate_response(
+        db, template_id, current_user_id, request.rows, request.output, request.filename_field
+    )
+
+
+@router.post("/{template_id}/generate-bulk/csv", response_model=None)
+async def generate_contracts_bulk_csv(
+    template_id: str,
+    file: UploadFile = File(..., description="CSV file with a header row of variable names"),
+    output: str = Form("links", description="'links' or 'zip'"),
+    filename_field: Optional[str] = Form(None, description="Variable whose value names each contract file"),
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Generate one contract per CSV row.
+    
+    The header row names the template variables; see /generate-bulk for the
+    validation and output options.
+    """
+    if output not in ("links", "zip"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "success": False,
+                "message": "output must be 'links' or 'zip'",
+                "data": None,
+                "errors": [{"field": "output", "message": "output must be 'links' or 'zip'"}]
+            }
+        )
+    
+    content = await file.read(BULK_CSV_MAX_BYTES + 1)
+    try:
+        if len(content) > BULK_CSV_MAX_BYTES:
+            raise ValueError(f"CSV file is larger than {BULK_CSV_MAX_BYTES // (1024 * 1024)} MB")
+        # utf-8-sig: spreadsheet exports often start with a byte order mark
+        rows = list(csv.DictReader(io.StringIO(content.decode("utf-8-sig"))))
+    except (UnicodeDecodeError, csv.Error, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "success": False,
+                "message": f"Invalid CSV file: {str(e)}",
+                "data": None,
+                "errors": [{"field": "file", "message": str(e)}]
+            }
+        )
+    
+    return await _bulk_generate_response(db, template_id, current_user_id, rows, output, filename_field)
+
+
 @router.get("/{template_id}/preview")
 async def preview_template(
     template_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
@@ -188,9 +336,6 @@ async def preview_template(
     
     Returns a PDF or HTML preview of the template showing its structure.
     """
-    from fastapi.responses import FileResponse, Response
-    import aiofiles
-    
     try:
         service = TemplateService(db)
         preview_path = await service.preview_template(template_id)
@@ -221,27 +366,8 @@ async def preview_template(
             media_type = "application/octet-stream"
             filename = f"template_preview_{template_id}"
         
-        # Read file content based on file type
-        if preview_path.endswith('.html') or preview_path.endswith('.htm'):
-            # Read HTML as text with UTF-8 encoding
-            async with aiofiles.open(preview_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-            # Convert to bytes for Response
-            content_bytes = content.encode('utf-8')
-        else:
-            # Read binary files (PDF, DOCX) as bytes
-            async with aiofiles.open(preview_path, 'rb') as f:
-                content_bytes = await f.read()
-        
-        # Return Response with inline Content-Disposition to display in browser
-        return Response(
-            content=content_bytes,
-            media_type=media_type,
-            headers={
-                "Content-Disposition": f'inline; filename="{filename}"',
-                "Cache-Control": "no-cache"
-            }
-        )
+        # Previews are cached files; serve them straight from disk, inline in the browser
+        return await serve_file(request, preview_path, media_type, filename=filename, inline=True)
         
     except ValueError as e:
         logger.warning(f"Template not found for preview: {template_id} - {str(e)}")
@@ -281,6 +407,7 @@ async def preview_template(
 @router.get("/contracts/{contract_id}/download")
 async def download_contract(
     contract_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
@@ -288,10 +415,8 @@ async def download_contract(
     Download generated contract (PDF or DOCX).
     
     Validates user owns the contract before serving.
-    Supports both PDF and DOCX file formats.
+    Supports both PDF and DOCX file formats, Range requests and conditional GET.
     """
-    from fastapi.responses import FileResponse
-    
     try:
         service = TemplateService(db)
         contract = await service.repository.get_contract_by_id(contract_id)
@@ -365,37 +490,16 @@ async def download_contract(
             media_type = "application/octet-stream"
             filename = f"contract_{contract_id}"
         
-        # Use Response with proper headers for download/inline viewing
-        import aiofiles
-        from fastapi.responses import Response
-        
-        try:
-            # Read file content
-            async with aiofiles.open(file_path, 'rb') as f:
-                file_content = await f.read()
-            
-            # Set appropriate Content-Disposition based on file type
-            # PDFs should display inline, DOCX should download
-            if file_path.endswith('.pdf'):
-                content_disposition = f'inline; filename="{filename}"'
-            else:
-                content_disposition = f'attachment; filename="{filename}"'
-            
-            return Response(
-                content=file_content,
-                media_type=media_type,
-                headers={
-                    "Content-Disposition": content_disposition,
-                    "Content-Length": str(len(file_content)),
-                    "Cache-Control": "private, max-age=3600"
-                }
-            )
-        except Exception as e:
-            logger.error(f"Error reading contract file {file_path}: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to read contract file: {str(e)}"
-            )
+        # PDFs should display inline, DOCX should download.
+        # Generated files never change, so clients may reuse them for an hour.
+        return await serve_file(
+            request,
+            file_path,
+            media_type,
+            filename=filename,
+            inline=file_path.endswith('.pdf'),
+            cache_control="private, max-age=3600"
+        )
         
     except HTTPException:
         raise
@@ -0,0 +1,149 @@
+"""
+Resumable Uploads Router
+
+Chunked upload protocol for large legal documents:
+
+1. ``POST /api/v1/uploads`` opens a session (filename, total size, optional SHA-256)
+2. ``PATCH /api/v1/uploads/{upload_id}`` with an ``Upload-Offset`` header sends
+   the next chunk as the raw request body; ``HEAD``/``GET`` report the offset
+   to resume from after a dropped connection
+3. The completed ``upload_id`` is submitted to ``/api/v1/laws/upload`` or
+   ``/api/v1/legal-cases/upload`` instead of a file, which finalises it
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+
+from ..schemas.response import ApiResponse, create_error_response, create_success_response
+from ..utils.auth import TokenData, get_current_user
+from ..utils.resumable_upload import UploadOffsetMismatch, UploadSession, upload_store
+from ..utils.upload_ingestion import UploadRejected
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/uploads", tags=["Uploads"])
+
+UPLOADABLE_EXTENSIONS = ['.json', '.pdf', '.docx', '.doc', '.txt']
+
+
+class CreateUploadRequest(BaseModel):
+    """Request schema for opening a resumable upload session."""
+    filename: str = Field(..., min_length=1, max_length=255, description="Original file name")
+    total_size: int = Field(..., gt=0, description="Size of the complete file in bytes")
+    sha256: Optional[str] = Field(None, min_length=64, max_length=64, description="SHA-256 of the complete file")
+
+
+def _offset_headers(session: UploadSession) -> dict:
+    return {"Upload-Offset": str(session.offset), "Upload-Length": str(session.total_size)}
+
+
+def _rejected(error: UploadRejected) -> JSONResponse:
+    error_response = create_error_response(
+        message=error.message,
+        errors=[{"field": error.field, "message": error.message}]
+    )
+    headers = {"Upload-Offset": str(error.expected)} if isinstance(error, UploadOffsetMismatch) else None
+    return JSONResponse(status_code=error.status_code, content=error_response.model_dump(), headers=headers)
+
+
+@router.post("", response_model=ApiResponse)
+async def create_upload(
+    request: CreateUploadRequest,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Open a resumable upload session; chunks are then sent with PATCH."""
+    try:
+        session = upload_store.create(
+            request.filename,
+            request.total_size,
+            created_by=current_user.sub,
+            sha256=request.sha256,
+            allowed_extensions=UPLOADABLE_EXTENSIONS
+        )
+    except UploadRejected as e:
+        return _rejected(e)
+
+    return JSONResponse(
+        status_code=201,
+        content=create_success_response(message="Upload session created", data=session.to_dict()).model_dump(),
+        headers={**_offset_headers(session), "Location": f"{router.prefix}/{session.upload_id}"}
+    )
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Offset to resume from, in the ``Upload-Offset`` header."""
+    try:
+        session = upload_store.get(upload_id, current_user.sub)
+    except UploadRejected as e:
+        return Response(status_code=e.status_code)
+    return Response(status_code=200, headers={**_offset_headers(session), "Cache-Control": "no-store"})
+
+
+@router.get("/{upload_id}", response_model=ApiResponse)
+async def get_upload_status(
+    upload_id: str,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Session status: bytes received, completeness and expiry."""
+    try:
+        session = upload_store.get(upload_id, current_user.sub)
+    except UploadRejected as e:
+        return _rejected(e)
+    return create_success_response(message="Upload session status", data=session.to_dict())
+
+
+@router.patch("/{upload_id}", response_model=ApiResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0, description="Offset of this chunk in the file"),
+    chunk_sha256: Optional[str] = Header(None, alias="X-Chunk-SHA256", description="SHA-256 of this chunk"),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Append the request body at ``Upload-Offset``.
+
+    The body is streamed straight to the staging area. A chunk is only
+    recorded once fully received, so after a dropped connection the client
+    resends from the offset reported by HEAD.
+    """
+    try:
+        session = await upload_store.append(
+            upload_id,
+            upload_offset,
+            request.stream(),
+            created_by=current_user.sub,
+            chunk_sha256=chunk_sha256
+        )
+    except UploadRejected as e:
+        return _rejected(e)
+
+    return JSONResponse(
+        status_code=200,
+        content=create_success_response(
+            message="Upload complete" if session.complete else "Chunk stored",
+            data=session.to_dict()
+        ).model_dump(),
+        headers=_offset_headers(session)
+    )
+
+
+@router.delete("/{upload_id}", response_model=ApiResponse)
+async def abort_upload(
+    upload_id: str,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Abort a session and delete its staged chunks."""
+    try:
+        upload_store.abort(upload_id, current_user.sub)
+    except UploadRejected as e:
+        return _rejected(e)
+    return create_success_response(message="Upload session aborted", data={"upload_id": upload_id})
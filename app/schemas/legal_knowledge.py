@@ -716,6 +716,12 @@ class RAGUploadResponse(BaseModel):
     status: str = Field(..., description="Processing status")
 
 
+
+class CaseFollowUpRequest(BaseModel):
+    """Schema for a follow-up question about a saved case analysis"""
+    question: str = Field(..., min_length=1, max_length=4000, description="Follow-up question about the case")
+
+
 # Update forward references
 ArticleStructure.model_rebuild()
 SectionStructure.model_rebuild()
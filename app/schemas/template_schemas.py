@@ -2,7 +2,7 @@
 Pydantic schemas for contract templates API.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 
 
@@ -36,3 +36,9 @@ class GenerateContractResponse(BaseModel):
     pdf_url: str = Field(..., description="URL to download/view the generated PDF")
     success: bool = Field(default=True, description="Operation success status")
 
+
+class BulkGenerateContractsRequest(BaseModel):
+    """Request schema for generating one contract per row from a template."""
+    rows: List[Dict[str, Any]] = Field(..., description="One object of form data per contract")
+    output: Literal["links", "zip"] = Field(default="links", description="'links' for per-contract download URLs, 'zip' for one archive")
+    filename_field: Optional[str] = Field(None, description="Variable whose value names each contract file (e.g. 'employee_name')")
@@ -0,0 +1,453 @@
+"""
+PDF rendering of saved case analyses.
+
+Building the reportlab report used to run on the event loop of the request:
+Arabic shaping and BiDi for every paragraph, font lookup and registration and
+style construction on every download, so one large analysis stalled every
+other request on the worker for hundreds of milliseconds. Here:
+
+- rendering runs in a spawned process pool (ANALYSIS_PDF_WORKERS); fonts are
+  registered and paragraph styles built once per worker process;
+- the report layout is computed by ``report_blocks``, a pure function of the
+  analysis fields, and reshaping goes through the shared, per-token memoised
+  ``arabic_text_processor``;
+- rendered files are kept under ANALYSIS_PDF_CACHE_DIR as
+  ``<analysis_id>-<content hash>.pdf``. The hash covers every field shown in
+  the report and RENDERER_VERSION, so an edited analysis or a layout change
+  renders again, and it doubles as the download's ETag. Documents are built
+  with reportlab's ``invariant`` flag, so a re-render produces the same bytes;
+- concurrent downloads of the same report share one render.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ...utils.arabic_text_processor import has_arabic, reorder_lines, shaping_available
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_PDF_CACHE_DIR = os.getenv("ANALYSIS_PDF_CACHE_DIR", "storage/analysis_pdf_cache")
+ANALYSIS_PDF_CACHE_MAX_MB = int(os.getenv("ANALYSIS_PDF_CACHE_MAX_MB", "256"))
+ANALYSIS_PDF_WORKERS = int(os.getenv("ANALYSIS_PDF_WORKERS", "2"))
+
+# Part of every cache key / ETag; bump whenever report_blocks or the styles change
+RENDERER_VERSION = "1"
+
+FONTS_DIR = Path(__file__).resolve().parents[2] / "fonts"
+BUNDLED_FONTS = [
+    "NotoSansArabic-Regular.ttf",
+    "NotoSansArabic.ttf",
+    "DejaVuSans.ttf",
+    "arial-unicode-ms.ttf",
+    "ARIALUNI.TTF",
+]
+SYSTEM_FONTS = {
+    "Windows": ['C:/Windows/Fonts/DejaVuSans.ttf', 'C:/Windows/Fonts/ARIALUNI.TTF', 'C:/Windows/Fonts/arialuni.ttf'],
+    "Linux": [
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        '/usr/share/fonts/TTF/DejaVuSans.ttf',
+        '/usr/share/fonts/DejaVuSans.ttf',
+    ],
+    "Other": ['/System/Library/Fonts/DejaVuSans.ttf', '/System/Library/Fonts/Supplemental/Arial Unicode.ttf'],
+}
+
+# (heading, sections that trigger the group, [(section, sub-heading or None)])
+# in the order the frontend displays them
+SECTION_GROUPS = [
+    ("1. Executive Summary", ["executive_summary"], [("executive_summary", None)]),
+    ("2. Detailed Legal Analysis", ["legal_analysis", "legal_status"], [
+        ("legal_status", "a. Current Legal Status"),
+        ("weak_points", "b. Weak Points in the Case"),
+        ("strong_points", "c. Strong Points in the Case"),
+        ("legal_basis", "d. Saudi Legal Basis"),
+        ("risk_analysis", "e. Legal Risk Analysis"),
+        ("obligations_rights", "f. Obligations and Rights"),
+    ]),
+    ("3. Practical Recommendations", [
+        "recommendations", "settlement_recommendations", "legal_action_recommendations", "protection_recommendations"
+    ], [
+        ("settlement_recommendations", "a. Settlement Recommendations"),
+        ("legal_action_recommendations", "b. Legal Action Recommendations"),
+        ("protection_recommendations", "c. Protection Recommendations"),
+        ("recommendations", None),
+    ]),
+    ("4. Information for Client/User", ["client_information", "simple_explanation", "next_steps"], [
+        ("simple_explanation", "a. Simple Explanation"),
+        ("next_steps", "b. Next Steps"),
+        ("client_information", None),
+    ]),
+    ("5. Advanced Analysis for Lawyers", ["legal_strategy", "legal_research", "professional_risks"], [
+        ("legal_strategy", "a. Legal Strategy"),
+        ("legal_research", "b. Required Legal Research"),
+        ("professional_risks", "c. Professional Risks"),
+    ]),
+    ("6. Quantitative Assessment", ["quantitative_assessment"], [("quantitative_assessment", None)]),
+    ("7. Legal References", ["legal_references"], [("legal_references", None)]),
+]
+
+# A block is ("para", style name, markup) or ("spacer", height in inches)
+Block = Tuple[Any, ...]
+
+_BOLD = re.compile(r'\*\*([^*]+?)\*\*')
+_BULLET = re.compile(r'^\s*[-*]\s+', re.MULTILINE)
+_FORMAT_TAG = re.compile(r'(<(?:b|br|/b|br/)[^>]*>)', re.IGNORECASE)
+_HEADER_MARKS = re.compile(r'^#+\s*')
+
+
+# ==================== TEXT PREPARATION ====================
+
+def process_arabic_text(text: Any) -> str:
+    """Shape and BiDi-reorder Arabic text, forcing right-to-left flow."""
+    if not text:
+        return ""
+    text_str = str(text)
+    if not has_arabic(text_str) or not shaping_available():
+        return text_str
+    # \u202E...\u202C: right-to-left override, so lines start at the right edge
+    return '\u202E' + reorder_lines(text_str) + '\u202C'
+
+
+def markdown_to_reportlab(text: str) -> str:
+    """Markdown bold and bullets to Paragraph markup, keeping line breaks like the frontend's <pre>."""
+    if not text:
+        return ""
+    text_str = _BULLET.sub('• ', _BOLD.sub(r'<b>\1</b>', text))
+    lines = []
+    for line in text_str.split('\n'):
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            lines.append("<br/>")
+    return '<br/>'.join(lines)
+
+
+def prepare_text_for_pdf(text: Any) -> str:
+    """Shaped, markdown-converted and escaped markup for one Paragraph."""
+    if not text:
+        return ""
+    markup = markdown_to_reportlab(process_arabic_text(text)).replace("&", "&amp;")
+    # Escape < and > everywhere except in the formatting tags produced above
+    pieces = _FORMAT_TAG.split(markup)
+    return ''.join(
+        piece if index % 2 else piece.replace("<", "&lt;").replace(">", "&gt;")
+        for index, piece in enumerate(pieces)
+    )
+
+
+def _has_text(value: Any) -> bool:
+    return bool(value) and bool(str(value).strip())
+
+
+# ==================== LAYOUT ====================
+
+def report_fields(analysis: Any) -> Dict[str, Any]:
+    """Everything the report shows, as plain data that can be hashed and sent to a worker."""
+    return {
+        "filename": analysis.filename,
+        "analysis_type": analysis.analysis_type,
+        "lawsuit_type": analysis.lawsuit_type,
+        "risk_score": analysis.risk_score,
+        "risk_label": analysis.risk_label,
+        "created_at": analysis.created_at.strftime('%Y-%m-%d %H:%M:%S') if analysis.created_at else "",
+        "analysis_data": analysis.analysis_data or {},
+    }
+
+
+def content_hash(fields: Dict[str, Any]) -> str:
+    payload = json.dumps([RENDERER_VERSION, shaping_available(), fields], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def report_blocks(fields: Dict[str, Any]) -> List[Block]:
+    """Layout of the analysis report."""
+    analysis_data = fields.get("analysis_data") or {}
+    sections = (analysis_data.get("analysis") or {}).get("sections") or {}
+    blocks: List[Block] = [("para", "title", "<b>Legal Case Analysis Report</b>"), ("spacer", 0.2)]
+
+    blocks += [
+        ("para", "normal", f"<b>File:</b> {prepare_text_for_pdf(fields.get('filename'))}"),
+        ("para", "normal", f"<b>Analysis Type:</b> {prepare_text_for_pdf(fields.get('analysis_type'))}"),
+        ("para", "normal", f"<b>Lawsuit Type:</b> {prepare_text_for_pdf(fields.get('lawsuit_type'))}"),
+        ("para", "normal", f"<b>Date:</b> {fields.get('created_at')}"),
+    ]
+    if fields.get("risk_score") is not None:
+        risk_label = prepare_text_for_pdf(fields.get("risk_label")) if fields.get("risk_label") else ""
+        blocks.append(("para", "normal", f"<b>Risk Score:</b> {fields['risk_score']}% ({risk_label})"))
+    blocks.append(("spacer", 0.2))
+
+    # The complete analysis comes first, as on the frontend, with its markdown headers
+    formatted = sections.get("formatted_analysis") or analysis_data.get("formatted_analysis")
+    if formatted:
+        blocks.append(("para", "heading", "<b>Complete Analysis</b>"))
+        pending: List[str] = []
+
+        def flush(spacer: bool) -> None:
+            text = '\n'.join(pending)
+            if text.strip():
+                blocks.append(("para", "normal", prepare_text_for_pdf(text)))
+                if spacer:
+                    blocks.append(("spacer", 0.05))
+            pending.clear()
+
+        for line in str(formatted).split('\n'):
+            stripped = line.strip()
+            if not stripped.startswith('##'):
+                pending.append(line)
+                continue
+            flush(spacer=True)
+            header = _HEADER_MARKS.sub('', stripped)
+            if header:
+                style = "normal" if stripped.startswith('####') else "heading" if stripped.startswith('###') else "title"
+                blocks.append(("para", style, f"<b>{prepare_text_for_pdf(header)}</b>"))
+                blocks.append(("spacer", 0.1))
+        flush(spacer=False)
+        blocks.append(("spacer", 0.2))
+
+    # Then the individual sections that have content
+    for heading, triggers, items in SECTION_GROUPS:
+        if not any(_has_text(sections.get(key)) for key in triggers):
+            continue
+        blocks.append(("para", "heading", f"<b>{heading}</b>"))
+        for key, label in items:
+            if not _has_text(sections.get(key)):
+                continue
+            if label:
+                blocks.append(("para", "normal", f"<b>{label}</b>"))
+            blocks.append(("para", "normal", prepare_text_for_pdf(sections[key])))
+            if label:
+                blocks.append(("spacer", 0.05))
+        blocks.append(("spacer", 0.1))
+    return blocks
+
+
+# ==================== RENDERING (worker processes) ====================
+
+_styles: Optional[Dict[str, Any]] = None
+
+
+def _register_font() -> Optional[str]:
+    """Register the first Arabic-capable font found; its name, or None."""
+    import platform
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    system = platform.system()
+    candidates = [FONTS_DIR / name for name in BUNDLED_FONTS] + [
+        Path(path) for path in SYSTEM_FONTS.get(system if system in SYSTEM_FONTS else "Other", [])
+    ]
+    for font_path in candidates:
+        if not font_path.exists():
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont("ArabicFont", str(font_path)))
+            logger.info(f"Registered Arabic font from {font_path}")
+            return "ArabicFont"
+        except Exception as e:
+            logger.warning(f"Failed to register font {font_path}: {e}")
+    logger.error("CRITICAL: No Arabic-supporting font found. Arabic text will display as rectangles in PDF.")
+    logger.error(f"Please download Noto Sans Arabic and place it in: {FONTS_DIR}")
+    return None
+
+
+def report_styles() -> Dict[str, Any]:
+    """Paragraph styles, built (and the font registered) once per process."""
+    global _styles
+    if _styles is None:
+        from reportlab.lib.enums import TA_RIGHT
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+        base_font = _register_font() or 'Helvetica'
+        sample = getSampleStyleSheet()
+        _styles = {
+            "title": ParagraphStyle(
+                'CustomTitle', parent=sample['Heading1'], fontName=base_font, fontSize=18,
+                textColor='#1f2937', spaceAfter=12, alignment=TA_RIGHT
+            ),
+            "heading": ParagraphStyle(
+                'CustomHeading', parent=sample['Heading2'], fontName=base_font, fontSize=14,
+                textColor='#374151', spaceAfter=8, spaceBefore=12, alignment=TA_RIGHT
+            ),
+            "normal": ParagraphStyle(
+                'CustomNormal', parent=sample['Normal'], fontName=base_font, fontSize=10,
+                textColor='#4b5563', spaceAfter=6, alignment=TA_RIGHT, leading=14
+            ),
+        }
+    return _styles
+
+
+def render_analysis_pdf(fields: Dict[str, Any]) -> bytes:
+    """Process-pool entry point: the report PDF for ``report_fields`` output."""
+    from io import BytesIO
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    styles = report_styles()
+    story = [
+        Spacer(1, block[1] * inch) if block[0] == "spacer" else Paragraph(block[2], styles[block[1]])
+        for block in report_blocks(fields)
+    ]
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        topMargin=0.5 * inch,
+        bottomMargin=0.5 * inch,
+        leftMargin=0.75 * inch,
+        rightMargin=0.75 * inch,  # RTL text aligns to this edge
+        invariant=1  # no timestamps or random IDs: the same fields give the same bytes
+    )
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _init_render_worker() -> None:
+    try:
+        report_styles()
+    except ImportError:
+        pass  # reported by the first render
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Shared process pool for PDF rendering (spawned workers, created on first use)."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=ANALYSIS_PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker,
+            )
+            logger.info(f"🧵 Started PDF render pool with {ANALYSIS_PDF_WORKERS} workers")
+        return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Shut the shared render pool down (a new one is created on next use)."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+
+# ==================== CACHE ====================
+
+class AnalysisPdfRenderer:
+    """Renders analysis reports off the event loop and keeps them on disk."""
+
+    def __init__(
+        self,
+        cache_dir: str = ANALYSIS_PDF_CACHE_DIR,
+        max_bytes: int = ANALYSIS_PDF_CACHE_MAX_MB * 1024 * 1024,
+        executor: Optional[Executor] = None,
+        render: Callable[[Dict[str, Any]], bytes] = render_analysis_pdf
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._executor = executor
+        self._render = render
+        self._pending: Dict[str, "asyncio.Future[Path]"] = {}
+        self.renders = 0
+        self.hits = 0
+
+    def path_for(self, analysis_id: int, digest: str) -> Path:
+        return self.cache_dir / f"{analysis_id}-{digest[:32]}.pdf"
+
+    async def get_pdf(self, analysis_id: int, fields: Dict[str, Any], digest: Optional[str] = None) -> Path:
+        """Path of the rendered report, rendering it if it is not cached."""
+        digest = digest or content_hash(fields)
+        path = self.path_for(analysis_id, digest)
+        if path.exists():
+            self.hits += 1
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return path
+
+        task = self._pending.get(path.name)
+        if task is None:
+            task = asyncio.ensure_future(self._render_to(path, analysis_id, fields))
+            self._pending[path.name] = task
+            task.add_done_callback(lambda _: self._pending.pop(path.name, None))
+        return await asyncio.shield(task)
+
+    async def _render_to(self, path: Path, analysis_id: int, fields: Dict[str, Any]) -> Path:
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(self._executor or get_render_pool(), self._render, fields)
+        except BrokenProcessPool:
+            if self._executor is not None:
+                raise
+            logger.warning("⚠️ PDF render pool broke, restarting it")
+            shutdown_render_pool()
+            data = await loop.run_in_executor(get_render_pool(), self._render, fields)
+        self.renders += 1
+        await asyncio.to_thread(self._store, path, analysis_id, data)
+        return path
+
+    def _store(self, path: Path, analysis_id: int, data: bytes) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        # Older renders of the same analysis are stale
+        for old in self.cache_dir.glob(f"{analysis_id}-*.pdf"):
+            if old != path:
+                old.unlink(missing_ok=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently served reports while the cache is over its limit."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, entry_path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            Path(entry_path).unlink(missing_ok=True)
+            size -= entry_size
+
+    def invalidate(self, analysis_id: int) -> None:
+        """Forget every rendered report of ``analysis_id``."""
+        if self.cache_dir.is_dir():
+            for path in self.cache_dir.glob(f"{analysis_id}-*.pdf"):
+                path.unlink(missing_ok=True)
+
+
+_renderer: Optional[AnalysisPdfRenderer] = None
+
+
+def get_analysis_pdf_renderer() -> AnalysisPdfRenderer:
+    """Process-wide renderer configured from the environment."""
+    global _renderer
+    if _renderer is None:
+        _renderer = AnalysisPdfRenderer()
+    return _renderer
@@ -0,0 +1,185 @@
+"""
+Service for caching AI analysis results.
+
+A case or contract analysis is a multi-minute Gemini call whose answer depends
+only on the uploaded bytes, the request parameters and the prompt. Identical
+requests (the same file re-uploaded, a user re-running an analysis) are
+answered from the ``analysis_result_cache`` table instead:
+
+- the key is the SHA-256 of every file's content, in upload order, plus the
+  analysis type, lawsuit type, requested result, normalised user context,
+  model and prompt version. Free-text fields are compared after whitespace
+  collapsing, case folding and Arabic normalisation, so trivially different
+  wording of the same request still hits;
+- analysis services bump their PROMPT_VERSION whenever the prompt or parsing
+  changes, which retires every earlier entry;
+- every lookup is counted per service in this process (hit, miss or failed
+  lookup), so the admin analytics can report the real hit rate; each row
+  also keeps its own lifetime hit count.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.case_analysis import AnalysisResultCache
+from ...utils.arabic_text_processor import normalize_arabic
+
+logger = logging.getLogger(__name__)
+
+# Lookups per service since process start: hits, misses and errors
+_lookup_counts: Dict[str, Counter] = defaultdict(Counter)
+_counting_since = datetime.utcnow()
+
+
+def content_sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def normalize_request_text(text: Optional[str]) -> str:
+    """Free-text request field as compared by the cache key."""
+    if not text:
+        return ""
+    return " ".join(normalize_arabic(text, letter_variants=True).casefold().split())
+
+
+def analysis_cache_key(
+    service: str,
+    file_hashes: List[str],
+    prompt_version: str,
+    model: str,
+    analysis_type: Optional[str] = None,
+    lawsuit_type: Optional[str] = None,
+    result_seeking: Optional[str] = None,
+    user_context: Optional[str] = None
+) -> str:
+    """Cache key of one analysis request."""
+    payload = json.dumps({
+        "service": service,
+        "files": list(file_hashes),
+        "prompt_version": prompt_version,
+        "model": model,
+        "analysis_type": analysis_type or "",
+        "lawsuit_type": normalize_request_text(lawsuit_type),
+        "result_seeking": normalize_request_text(result_seeking),
+        "user_context": normalize_request_text(user_context),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisResultCacheService:
+    """Database-backed cache of analysis results."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, cache_key: str, service: str) -> Optional[Dict[str, Any]]:
+        """Cached result data for ``cache_key`` (counting the lookup), or None."""
+        counts = _lookup_counts[service]
+        try:
+            result = await self.db.execute(
+                select(AnalysisResultCache.result_data).where(AnalysisResultCache.cache_key == cache_key)
+            )
+            data = result.scalar_one_or_none()
+            if data is None:
+                counts["misses"] += 1
+                return None
+            await self.db.execute(
+                update(AnalysisResultCache)
+                .where(AnalysisResultCache.cache_key == cache_key)
+                .values(hit_count=AnalysisResultCache.hit_count + 1, last_hit_at=datetime.utcnow())
+            )
+            await self.db.commit()
+        except Exception as e:
+            # A cache failure must never fail the analysis itself
+            logger.warning(f"⚠️ Analysis cache lookup failed: {e}")
+            await self.db.rollback()
+            counts["misses"] += 1
+            counts["errors"] += 1
+            return None
+        counts["hits"] += 1
+        logger.info(f"⚡ Analysis cache hit {cache_key[:12]}")
+        return copy.deepcopy(data)
+
+    async def put(
+        self,
+        cache_key: str,
+        service: str,
+        file_hashes: List[str],
+        prompt_version: str,
+        result_data: Dict[str, Any],
+        analysis_type: Optional[str] = None,
+        lawsuit_type: Optional[str] = None
+    ) -> None:
+        """Store a successful result; a concurrent identical request may already have stored it."""
+        self.db.add(AnalysisResultCache(
+            cache_key=cache_key,
+            service=service,
+            file_hashes=list(file_hashes),
+            analysis_type=analysis_type,
+            lawsuit_type=lawsuit_type,
+            prompt_version=prompt_version,
+            result_data=copy.deepcopy(result_data),
+            hit_count=0
+        ))
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not store analysis cache entry: {e}")
+            await self.db.rollback()
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counts per service.
+
+        Hits, misses and errors are the lookups made by this process since it
+        started (a failed lookup is also a miss); entries and stored_hits come
+        from the table and cover every process.
+        """
+        result = await self.db.execute(
+            select(
+                AnalysisResultCache.service,
+                func.count(AnalysisResultCache.id),
+                func.coalesce(func.sum(AnalysisResultCache.hit_count), 0)
+            ).group_by(AnalysisResultCache.service)
+        )
+        stored = {service: (int(entries), int(hits)) for service, entries, hits in result.all()}
+
+        by_service = {}
+        for service in sorted(set(stored) | set(_lookup_counts)):
+            entries, stored_hits = stored.get(service, (0, 0))
+            by_service[service] = _counts(_lookup_counts.get(service, Counter()), entries, stored_hits)
+        total = sum((_lookup_counts.get(service, Counter()) for service in by_service), Counter())
+        return {
+            **_counts(
+                total,
+                sum(counts["entries"] for counts in by_service.values()),
+                sum(counts["stored_hits"] for counts in by_service.values())
+            ),
+            "counting_since": _counting_since.isoformat(),
+            "by_service": by_service,
+        }
+
+
+def _counts(lookups: Counter, entries: int, stored_hits: int) -> Dict[str, Any]:
+    hits, misses = lookups["hits"], lookups["misses"]
+    total = hits + misses
+    return {
+        "lookups": total,
+        "hits": hits,
+        "misses": misses,
+        "errors": lookups["errors"],
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+        "entries": entries,
+        "stored_hits": stored_hits,
+    }
@@ -0,0 +1,327 @@
+"""
+Service for follow-up questions about an analysed case.
+
+A follow-up question used to mean a new full analysis. A conversation instead
+reuses what the analysis already established:
+
+- the context prefix is the case documents (their Gemini file handles, when
+  still live), the per-document summaries and the prior analysis. It is put
+  into a Gemini context cache once per conversation, so every question after
+  the first sends only the conversation delta. When caching is not possible
+  (prefix too small for the API, SDK error) the prefix is sent with the
+  question, which still avoids re-uploading the documents. A replaced cache
+  is deleted rather than left to run out its TTL. A cache that expires or
+  disappears early is dropped and the question asked again with the prefix
+  inline; if the API rejects a document's stored file, its handle
+  is forgotten and the question is asked on the summaries and analysis alone;
+- every turn not yet folded into the summary is sent verbatim. Once more
+  than CASE_CHAT_COMPACT_AFTER turns are kept, all but the last
+  CASE_CHAT_RECENT_TURNS are folded into a running summary, so the prompt
+  stays bounded however long the conversation runs and no turn is ever
+  left out of it.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.case_analysis import CaseAnalysis, CaseConversation
+from ...repositories.case_analysis_repository import CaseAnalysisRepository
+from ...utils.gemini_files import get_document_handles, is_file_reference_error
+from ...utils.rate_limiter import AsyncRateLimiter
+from ..legal.analysis.case_analysis_service import CASE_ANALYSIS_MODEL, get_analysis_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+CASE_CHAT_TIMEOUT_SECONDS = int(os.getenv("CASE_CHAT_TIMEOUT_SECONDS", "60"))
+CASE_CHAT_RECENT_TURNS = int(os.getenv("CASE_CHAT_RECENT_TURNS", "4"))
+CASE_CHAT_COMPACT_AFTER = int(os.getenv("CASE_CHAT_COMPACT_AFTER", "8"))
+CASE_CHAT_CONTEXT_CACHE_TTL_MINUTES = int(os.getenv("CASE_CHAT_CONTEXT_CACHE_TTL_MINUTES", "60"))
+CASE_CHAT_MAX_SUMMARY_CHARS = 6000
+
+# A cache this close to expiry is replaced rather than used for another question
+_CACHE_EXPIRY_MARGIN = timedelta(minutes=2)
+
+SYSTEM_INSTRUCTION = (
+    "أنت مستشار قانوني متخصص في الأنظمة واللوائح في المملكة العربية السعودية. "
+    "تجيب عن أسئلة المتابعة حول القضية المرفقة وتحليلها السابق بدقة وإيجاز، "
+    "وتستند إلى مستندات القضية والتحليل وتذكر المواد النظامية عند الحاجة. "
+    "إذا لم تكفِ المعلومات المتاحة للإجابة فاذكر ذلك صراحة ولا تفترض وقائع غير واردة."
+)
+
+
+class CaseConversationService:
+    """Follow-up Q&A sessions on saved case analyses."""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        api_key: Optional[str] = None,
+        rate_limiter: Optional[AsyncRateLimiter] = None
+    ):
+        self.db = db
+        self.repository = CaseAnalysisRepository(db)
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self._client = None
+        self._rate_limiter = rate_limiter
+
+    def _initialize_client(self):
+        """Initialize Gemini client if not already initialized."""
+        if not self._client:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key)
+
+    async def get_conversation(self, analysis_id: int, user_id: int) -> Optional[CaseConversation]:
+        """The conversation on ``analysis_id`` owned by ``user_id``, if any."""
+        result = await self.db.execute(
+            select(CaseConversation).where(
+                CaseConversation.analysis_id == analysis_id,
+                CaseConversation.user_id == user_id
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def ask(self, analysis_id: int, user_id: int, question: str) -> Dict[str, Any]:
+        """
+        Answer a follow-up question about a saved analysis.
+
+        Returns:
+            {"success", "message", "data": {"answer", "turn", "context_cached", ...}}
+        """
+        analysis = await self.repository.get_analysis_by_id(analysis_id, user_id)
+        if not analysis:
+            return {"success": False, "message": "Analysis not found", "data": None}
+
+        try:
+            self._initialize_client()
+        except Exception as e:
+            logger.error(f"Failed to initialize Gemini client: {e}")
+            return {"success": False, "message": f"AI service not available: {e}", "data": None}
+
+        conversation = await self.get_conversation(analysis_id, user_id)
+        if conversation is None:
+            conversation = CaseConversation(analysis_id=analysis_id, user_id=user_id, turns=[], turn_count=0)
+            self.db.add(conversation)
+
+        try:
+            answer, cache_name = await self._answer(
+                conversation, analysis, self._conversation_prompt(conversation, question)
+            )
+        except asyncio.TimeoutError:
+            return {"success": False, "message": "The follow-up question timed out. Please try again.", "data": None}
+        except Exception as e:
+            logger.error(f"Follow-up question on analysis {analysis_id} failed: {e}", exc_info=True)
+            return {"success": False, "message": f"AI answer failed: {e}", "data": None}
+        if not answer or not answer.strip():
+            return {"success": False, "message": "Gemini AI returned empty response", "data": None}
+
+        answer = answer.strip()
+        compacted = await self._record_turn(conversation, question, answer)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Another request started the conversation while this one was being answered
+            await self.db.rollback()
+            conversation = await self.get_conversation(analysis_id, user_id)
+            if cache_name and cache_name != conversation.context_cache_name:
+                await self._delete_context_cache(cache_name)
+            compacted = await self._record_turn(conversation, question, answer)
+            await self.db.commit()
+
+        logger.info(
+            f"💬 Answered follow-up {conversation.turn_count} on analysis {analysis_id} "
+            f"({'cached context' if cache_name else 'inline context'}{', compacted' if compacted else ''})"
+        )
+        return {
+            "success": True,
+            "message": "Follow-up question answered successfully",
+            "data": {
+                "conversation_id": conversation.id,
+                "analysis_id": analysis_id,
+                "question": question,
+                "answer": answer,
+                "turn": conversation.turn_count,
+                "context_cached": cache_name is not None,
+                "compacted": compacted
+            }
+        }
+
+    async def _record_turn(self, conversation: CaseConversation, question: str, answer: str) -> bool:
+        """Append a turn, folding older ones into the summary when over the limit; True if it compacted."""
+        turns = list(conversation.turns or []) + [{
+            "question": question,
+            "answer": answer,
+            "asked_at": datetime.utcnow().isoformat()
+        }]
+        compacted = False
+        if len(turns) > CASE_CHAT_COMPACT_AFTER:
+            older, turns = turns[:-CASE_CHAT_RECENT_TURNS], turns[-CASE_CHAT_RECENT_TURNS:]
+            conversation.summary = await self._compact(conversation.summary, older)
+            compacted = True
+        conversation.turns = turns
+        conversation.turn_count = (conversation.turn_count or 0) + 1
+        return compacted
+
+    async def _answer(
+        self, conversation: CaseConversation, analysis: CaseAnalysis, prompt: str
+    ) -> Tuple[str, Optional[str]]:
+        """Answer ``prompt`` over the case context; returns (answer, context cache used)."""
+        prefix = self._context_prefix(analysis)
+        cache_name = await self._context_cache(conversation, analysis, prefix)
+        if cache_name:
+            try:
+                return await self._generate([prompt], cache_name), cache_name
+            except Exception as e:
+                if not is_file_reference_error(e):
+                    raise
+                # Expired or deleted before its recorded expiry
+                logger.warning(f"⚠️ Context cache {cache_name} is gone, sending the context inline: {e}")
+                await self._drop_context_cache(conversation)
+
+        try:
+            return await self._generate(prefix + [prompt], None), None
+        except Exception as e:
+            if not (is_file_reference_error(e) and self._forget_documents(analysis)):
+                raise
+            logger.warning(f"⚠️ Gemini rejected a document of analysis {analysis.id}, answering without it: {e}")
+
+        # The context cache holds the rejected file as well
+        await self._drop_context_cache(conversation)
+        return await self._generate(self._context_prefix(analysis) + [prompt], None), None
+
+    def _forget_documents(self, analysis: CaseAnalysis) -> bool:
+        """Forget the file handles of the analysis' documents; True if any was in use."""
+        handles = get_document_handles()
+        forgotten = [
+            handles.forget(file.get("sha256"), file.get("mime_type"))
+            for file in (analysis.analysis_data or {}).get("files") or []
+        ]
+        return any(forgotten)
+
+    async def _drop_context_cache(self, conversation: CaseConversation) -> None:
+        """Make the next question build a new context cache."""
+        await self._delete_context_cache(conversation.context_cache_name)
+        conversation.context_cache_name = None
+        conversation.context_cache_expires_at = None
+
+    async def _delete_context_cache(self, name: Optional[str]) -> None:
+        """Delete a context cache that is being replaced; it is billed until its TTL otherwise."""
+        if not name:
+            return
+        try:
+            await asyncio.to_thread(self._client.caches.delete, name=name)
+        except Exception as e:
+            # Usually already expired
+            logger.debug(f"Context cache {name} not deleted: {e}")
+
+    def _context_prefix(self, analysis: CaseAnalysis) -> List[Any]:
+        """Documents, summaries and the prior analysis; identical for every question."""
+        data = analysis.analysis_data or {}
+        handles = get_document_handles()
+        prefix: List[Any] = []
+        for file in data.get("files") or []:
+            part = handles.existing_part(file.get("sha256"), file.get("mime_type"), client=self._client)
+            if part is not None:
+                prefix.append(part)
+
+        summaries = [
+            f"=== {document['filename']} ===\n{document['summary']}"
+            for document in data.get("documents") or [] if document.get("summary")
+        ]
+        if summaries:
+            prefix.append("ملخصات مستندات القضية:\n\n" + "\n\n".join(summaries))
+
+        analysis_text = analysis.raw_response or data.get("raw_response") or ""
+        prefix.append(
+            f"بيانات القضية: نوع الدعوى: {analysis.lawsuit_type}، النتيجة المطلوبة: {analysis.result_seeking or '-'}"
+            + (f"، معلومات إضافية: {analysis.user_context}" if analysis.user_context else "")
+            + f"\n\nالتحليل القانوني السابق للقضية ({analysis.filename}):\n\n{analysis_text}"
+        )
+        return prefix
+
+    async def _context_cache(
+        self, conversation: CaseConversation, analysis: CaseAnalysis, prefix: List[Any]
+    ) -> Optional[str]:
+        """Name of a live Gemini context cache holding ``prefix``, creating one if needed."""
+        now = datetime.now(timezone.utc)
+        expires_at = conversation.context_cache_expires_at
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at is not None and expires_at - now > _CACHE_EXPIRY_MARGIN:
+            # A failed attempt is remembered as an expiry without a name
+            return conversation.context_cache_name
+
+        await self._delete_context_cache(conversation.context_cache_name)
+        ttl_seconds = CASE_CHAT_CONTEXT_CACHE_TTL_MINUTES * 60
+        try:
+            cache = await asyncio.to_thread(
+                self._client.caches.create,
+                model=CASE_ANALYSIS_MODEL,
+                config={
+                    "contents": prefix,
+                    "system_instruction": SYSTEM_INSTRUCTION,
+                    "ttl": f"{ttl_seconds}s",
+                    "display_name": f"case-analysis-{analysis.id}"
+                }
+            )
+            name = cache.name
+            expires_at = getattr(cache, "expire_time", None) or now + timedelta(seconds=ttl_seconds)
+        except Exception as e:
+            logger.info(f"Context cache unavailable for analysis {analysis.id}, sending context inline: {e}")
+            name = None
+            expires_at = now + timedelta(seconds=ttl_seconds)
+        conversation.context_cache_name = name
+        conversation.context_cache_expires_at = expires_at
+        return name
+
+    def _conversation_prompt(self, conversation: CaseConversation, question: str) -> str:
+        parts = []
+        if conversation.summary:
+            parts.append(f"ملخص ما سبق من المحادثة:\n{conversation.summary}")
+        # Older turns are in the summary; compaction bounds how many are kept
+        turns = conversation.turns or []
+        if turns:
+            parts.append("آخر الأسئلة والأجوبة:\n" + "\n\n".join(
+                f"س: {turn['question']}\nج: {turn['answer']}" for turn in turns
+            ))
+        parts.append(f"سؤال المتابعة:\n{question}")
+        return "\n\n".join(parts)
+
+    async def _compact(self, summary: Optional[str], turns: List[Dict[str, Any]]) -> str:
+        """Fold ``turns`` into the running conversation summary."""
+        transcript = "\n\n".join(f"س: {turn['question']}\nج: {turn['answer']}" for turn in turns)
+        prompt = (
+            "لخص المحادثة التالية حول قضية قانونية في فقرات موجزة، مع الإبقاء على كل معلومة أو "
+            "استنتاج أو رقم أو مادة نظامية قد يحتاج إليها سؤال لاحق.\n\n"
+            + (f"الملخص السابق:\n{summary}\n\n" if summary else "")
+            + f"المحادثة:\n{transcript}"
+        )
+        try:
+            compacted = (await self._generate([prompt], None)).strip()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not summarise conversation, truncating instead: {e}")
+            compacted = ""
+        if not compacted:
+            compacted = "\n\n".join(filter(None, [summary, transcript]))[-CASE_CHAT_MAX_SUMMARY_CHARS:]
+        return compacted[:CASE_CHAT_MAX_SUMMARY_CHARS]
+
+    async def _generate(self, contents: List[Any], cache_name: Optional[str]) -> str:
+        """One Gemini request within the shared analysis budget."""
+        config = {"cached_content": cache_name} if cache_name else {"system_instruction": SYSTEM_INSTRUCTION}
+        async with self._rate_limiter or get_analysis_rate_limiter():
+            response = await asyncio.wait_for(
+                asyncio.to_thread(
+                    self._client.models.generate_content,
+                    model=CASE_ANALYSIS_MODEL,
+                    contents=contents,
+                    config=config
+                ),
+                timeout=CASE_CHAT_TIMEOUT_SECONDS
+            )
+        return getattr(response, "text", "") or ""
@@ -33,18 +33,13 @@ from pathlib import Path
 
 import ijson
 import aiofiles
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.cross_encoders import HuggingFaceCrossEncoder
-from langchain.retrievers.document_compressors import CrossEncoderReranker
-from google import genai
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...db.database import AsyncSessionLocal
 from ..query_log_service import QueryLogService
 from ...config.enhanced_logging import get_logger
+from ...utils.lazy_loader import lazy_proxy
+from ..legal.knowledge.index_statistics_service import get_index_statistics
 
 # ---------------------------------
 # Global Configuration and Constants
@@ -86,6 +81,13 @@ class GlobalModelManager:
         logger.info("🚀 Initializing global models for RAG system...")
         
         try:
+            # Heavy imports are deferred until the RAG engine is first used
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            from langchain_huggingface import HuggingFaceEmbeddings
+            from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+            from langchain.retrievers.document_compressors import CrossEncoderReranker
+            from google import genai
+            
             # Load Gemini API key
             self.gemini_api_key = os.getenv("GEMINI_API_KEY")
             if not self.gemini_api_key:
@@ -115,16 +117,22 @@ class GlobalModelManager:
             logger.error(f"❌ Failed to initialize global models: {e}")
             raise
     
-    def get_vectorstore(self) -> Chroma:
+    def get_vectorstore(self):
         """Get a Chroma vectorstore instance."""
-        return Chroma(
+        from langchain_community.vectorstores import Chroma
+        
+        vectorstore = Chroma(
             collection_name="legal_knowledge",
             embedding_function=self.embeddings,
             persist_directory=VECTORSTORE_PATH,
         )
+        get_index_statistics(persist_directory=VECTORSTORE_PATH).load_in_background(
+            lambda: vectorstore._collection
+        )
+        return vectorstore
 
-# Global instance
-model_manager = GlobalModelManager()
+# Global instance (built on first use, see app/config/engines.py)
+model_manager = lazy_proxy("rag_models")
 
 # ---------------------------------
 # Streaming File Processing
@@ -202,6 +210,8 @@ async def process_articles_batch(
     law_source_metadata: Dict[str, Any]
 ) -> tuple[List[str], List[Dict[str, Any]]]:
    
+    from langchain_core.documents import Document
+    
     logger = get_logger(__name__)
     
     texts = []
@@ -252,7 +262,7 @@ async def process_articles_batch(
 # Batch Vectorstore Operations
 # ---------------------------------
 async def add_texts_to_vectorstore_batch(
-    vectorstore: Chroma,
+    vectorstore,
     texts: List[str],
     metadatas: List[Dict[str, Any]],
     batch_size: int = BATCH_SIZE
@@ -271,10 +281,11 @@ async def add_texts_to_vectorstore_batch(
             logger.info(f"📊 Processing batch {i//batch_size + 1}: {len(batch_texts)} chunks")
             
             # Add batch to vectorstore
-            vectorstore.add_texts(texts=batch_texts, metadatas=batch_metadatas)
+            batch_ids = vectorstore.add_texts(texts=batch_texts, metadatas=batch_metadatas)
             
             # Persist after each batch
             vectorstore.persist()
+            get_index_statistics(persist_directory=VECTORSTORE_PATH).record_added(batch_ids or [], batch_metadatas)
             
             total_added += len(batch_texts)
             
@@ -297,13 +308,29 @@ async def process_upload_optimized(file) -> int:
     logger.info(f"🚀 Starting optimized processing for file: {file.filename}")
     
     temp_path = None
-    total_chunks = 0
     
     try:
-        # Step 1: Stream file to temporary location
+        # Stream file to temporary location
         temp_path = await stream_file_to_temp(file)
+        return await process_upload_file(temp_path)
         
-        # Step 2: Extract law source metadata (first pass)
+    finally:
+        # Cleanup temporary file
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.unlink(temp_path)
+                logger.info("🧹 Temporary file cleaned up")
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to cleanup temporary file: {e}")
+
+
+async def process_upload_file(temp_path: str) -> int:
+    """Chunk and embed a law JSON file already on disk; returns the chunk count."""
+    logger = get_logger(__name__)
+    total_chunks = 0
+    
+    try:
+        # Step 1: Extract law source metadata (first pass)
         logger.info("📋 Extracting law source metadata...")
         law_source_metadata = {}
         
@@ -325,10 +352,10 @@ async def process_upload_optimized(file) -> int:
         
         logger.info(f"📋 Law source: {law_source_metadata['name']}")
         
-        # Step 3: Initialize vectorstore
+        # Step 2: Initialize vectorstore
         vectorstore = model_manager.get_vectorstore()
         
-        # Step 4: Process articles in batches
+        # Step 3: Process articles in batches
         logger.info("🔄 Starting batch processing of articles...")
         
         articles_batch = []
@@ -367,45 +394,18 @@ async def process_upload_optimized(file) -> int:
     except Exception as e:
         logger.error(f"❌ Optimized processing failed: {e}")
         raise ValueError(f"Failed to process file: {e}")
-        
-    finally:
-        # Cleanup temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-                logger.info("🧹 Temporary file cleaned up")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to cleanup temporary file: {e}")
 
 # ---------------------------------
 # Background Task Processing
 # ---------------------------------
-async def process_upload_background(file_content: bytes, filename: str) -> Dict[str, Any]:
-
+async def process_upload_background(file_path: str, filename: str) -> Dict[str, Any]:
+    """Process an upload already streamed to ``file_path``; the file is removed afterwards."""
     logger = get_logger(__name__)
     logger.info(f"🔄 Starting background processing for: {filename}")
     
     try:
-        # Create a temporary UploadFile-like object
-        class TempUploadFile:
-            def __init__(self, content: bytes, filename: str):
-                self.content = content
-                self.filename = filename
-                self._position = 0
-            
-            async def read(self, size: int = -1) -> bytes:
-                if size == -1:
-                    result = self.content[self._position:]
-                    self._position = len(self.content)
-                else:
-                    result = self.content[self._position:self._position + size]
-                    self._position += len(result)
-                return result
-        
-        temp_file = TempUploadFile(file_content, filename)
-        
         # Process the file
-        chunks_count = await process_upload_optimized(temp_file)
+        chunks_count = await process_upload_file(file_path)
         
         result = {
             "status": "completed",
@@ -428,6 +428,12 @@ async def process_upload_background(file_content: bytes, filename: str) -> Dict[
         
         logger.error(f"❌ Background processing failed: {error_result}")
         return error_result
+        
+    finally:
+        try:
+            os.unlink(file_path)
+        except OSError:
+            pass
 
 # ---------------------------------
 # Query Processing (Ultra-Optimized with Timeout and Caching)
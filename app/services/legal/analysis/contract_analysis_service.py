@@ -1,26 +1,70 @@
 """
 Contract Analysis Service using Gemini AI.
 This service analyzes contracts by sending files directly to Gemini AI.
+With a ``result_cache``, re-analysing the same contract file is answered from
+the cache without calling Gemini.
+
+Contracts whose text can be read are analysed clause by clause instead: the
+text is split at its clause headings (contract_clauses), every clause is
+analysed concurrently within the shared analysis rate limit, and one small
+request over the clause headings looks for missing provisions. Per-clause
+findings are cached by normalised clause hash, so the standard clauses
+(confidentiality, governing law, termination, ...) that repeat across users'
+contracts only reach Gemini the first time they are seen. The findings are
+merged into the usual weak_points / risks / suggestions lists.
 """
 
 import os
+import json
 import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
-from google.genai import types
+from typing import Dict, Any, List, Optional, Tuple
+
+from ....utils.arabic_text_processor import arabic_ratio
+from ....utils.extraction_cache import extraction_key, get_extraction_cache
+from ....utils.gemini_files import get_document_handles
+from ....utils.lazy_loader import optional_import
+from ....utils.rate_limiter import AsyncRateLimiter
+from .case_analysis_service import get_analysis_rate_limiter
+from .contract_clauses import Clause, normalize_clause, split_clauses
+from ...case_analysis.analysis_result_cache_service import (
+    AnalysisResultCacheService, analysis_cache_key, content_sha256
+)
 
 logger = logging.getLogger(__name__)
 
+CONTRACT_ANALYSIS_MODEL = "gemini-2.0-flash-exp"
+CONTRACT_ANALYSIS_TIMEOUT_SECONDS = 300
+# Bump when the prompt or response parsing change; retires cached results
+PROMPT_VERSION = "2"
+
+# Clause-level analysis
+CONTRACT_CLAUSE_ANALYSIS = os.getenv("CONTRACT_CLAUSE_ANALYSIS", "true").lower() == "true"
+CONTRACT_CLAUSE_MIN_CLAUSES = int(os.getenv("CONTRACT_CLAUSE_MIN_CLAUSES", "3"))
+CONTRACT_CLAUSE_TIMEOUT_SECONDS = int(os.getenv("CONTRACT_CLAUSE_TIMEOUT_SECONDS", "120"))
+# Part of every clause cache key; bump whenever the clause or gap prompts change
+CLAUSE_PROMPT_VERSION = "1"
+FINDING_KEYS = ("weak_points", "risks", "suggestions")
+
 
 class ContractAnalysisService:
     """
     Service for analyzing contracts using Gemini AI.
-    Sends files directly to Gemini without manual text extraction.
+    Contracts with readable text are analysed clause by clause; scanned or
+    unstructured ones are sent to Gemini whole.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        result_cache: Optional[AnalysisResultCacheService] = None,
+        rate_limiter: Optional[AsyncRateLimiter] = None
+    ):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self._client = None
+        self._result_cache = result_cache
+        self._rate_limiter = rate_limiter
         self._initialize_client()
     
     def _initialize_client(self):
@@ -51,6 +95,20 @@ class ContractAnalysisService:
         Returns:
             Dict containing analysis results with weak_points, risks, and suggestions
         """
+        cache_key = None
+        if self._result_cache is not None:
+            file_hash = content_sha256(file_content)
+            cache_key = analysis_cache_key("contract", [file_hash], PROMPT_VERSION, CONTRACT_ANALYSIS_MODEL)
+            cached = await self._result_cache.get(cache_key, "contract")
+            if cached is not None:
+                return {"success": True, "message": "Contract analysis completed successfully", "data": cached}
+        
+        result = await self._analyze_contract(file_content, filename)
+        if cache_key and result.get("success") and result.get("data"):
+            await self._result_cache.put(cache_key, "contract", [file_hash], PROMPT_VERSION, result["data"])
+        return result
+    
+    async def _analyze_contract(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         try:
             if not self._client:
                 return {
@@ -78,6 +136,11 @@ class ContractAnalysisService:
             }
             mime_type = mime_type_map.get(file_ext, 'application/octet-stream')
             
+            if CONTRACT_CLAUSE_ANALYSIS:
+                clause_result = await self._analyze_by_clauses(file_content, file_ext, filename)
+                if clause_result is not None:
+                    return clause_result
+            
             # Create prompt for contract analysis
             prompt = self._create_contract_analysis_prompt()
             
@@ -106,17 +169,14 @@ class ContractAnalysisService:
             else:
                 # For PDF and TXT files, send directly to Gemini
                 if file_ext == 'pdf':
-                    file_part = types.Part.from_bytes(data=file_content, mime_type=mime_type)
+                    # Large files are uploaded once and referenced by URI
+                    file_part = await get_document_handles().part(file_content, mime_type, filename, client=self._client)
+                    if file_part is None:
+                        file_part = self._inline_part(file_content, mime_type)
                     content_parts = [file_part, prompt]
                 elif file_ext == 'txt':
                     # For TXT files, decode and send as text
-                    try:
-                        text_content = file_content.decode('utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            text_content = file_content.decode('utf-8-sig')  # Handle BOM
-                        except UnicodeDecodeError:
-                            text_content = file_content.decode('latin-1')  # Fallback
+                    text_content = self._decode_text(file_content)
                     
                     content_parts = [
                         f"Contract Content from {filename}:\n\n{text_content}",
@@ -131,16 +191,11 @@ class ContractAnalysisService:
             
             # Call Gemini API with timeout
             try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self._client.models.generate_content,
-                        model="gemini-2.0-flash-exp",
-                        contents=content_parts
-                    ),
-                    timeout=300  # 5 minutes timeout
+                analysis_text = await get_document_handles().with_inline_fallback(
+                    content_parts[0], file_content, mime_type,
+                    lambda part: self._generate([part, *content_parts[1:]], CONTRACT_ANALYSIS_TIMEOUT_SECONDS),
+                    lambda: self._inline_part(file_content, mime_type)
                 )
-                
-                analysis_text = getattr(response, "text", "")
                 if not analysis_text:
                     return {
                         "success": False,
@@ -182,6 +237,190 @@ class ContractAnalysisService:
                 "data": None
             }
     
+    async def _analyze_by_clauses(
+        self, file_content: bytes, file_ext: str, filename: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Clause-level analysis, or None when the contract should be analysed
+        whole (no readable text, too few clauses, every clause failed).
+        """
+        text = await self._contract_text(file_content, file_ext, filename)
+        clauses = split_clauses(text) if text else []
+        if len(clauses) < CONTRACT_CLAUSE_MIN_CLAUSES:
+            return None
+        
+        language = "Arabic" if arabic_ratio(text) >= 0.3 else "English"
+        logger.info(f"Analysing {filename} clause by clause ({len(clauses)} clauses, {language})")
+        
+        # Identical clauses within one contract are analysed once
+        unique: Dict[str, Clause] = {}
+        for clause in clauses:
+            unique.setdefault(clause.key, clause)
+        outcomes = dict(zip(unique, await asyncio.gather(*(
+            self._analyze_clause(clause, language) for clause in unique.values()
+        ))))
+        if all(findings is None for findings, _, _ in outcomes.values()):
+            logger.warning(f"⚠️ No clause of {filename} could be analysed, analysing it whole")
+            return None
+        gaps, _, gaps_error = await self._contract_gaps(clauses, language)
+        
+        merged = {key: [] for key in FINDING_KEYS}
+        seen = set()
+        clause_reports = []
+        for clause in clauses:
+            findings, cached, error = outcomes[clause.key]
+            report = {"index": clause.index, "title": clause.title, "cached": cached}
+            if findings is None:
+                clause_reports.append({**report, "error": error})
+                continue
+            clause_reports.append({**report, **findings})
+            for key in FINDING_KEYS:
+                for item in findings[key]:
+                    labelled = f"{clause.title}: {item}" if clause.title else item
+                    if (key, normalize_clause(item)) not in seen:
+                        seen.add((key, normalize_clause(item)))
+                        merged[key].append(labelled)
+        for key in FINDING_KEYS:
+            for item in (gaps or {}).get(key, []):
+                if (key, normalize_clause(item)) not in seen:
+                    seen.add((key, normalize_clause(item)))
+                    merged[key].append(item)
+        
+        failed = sum(1 for report in clause_reports if "error" in report)
+        cached = sum(1 for report in clause_reports if report["cached"])
+        logger.info(f"✅ Clause analysis of {filename}: {len(clauses)} clauses, {cached} from cache, {failed} failed")
+        return {
+            "success": True,
+            "message": "Contract analysis completed successfully",
+            "data": {
+                **merged,
+                "analysis_mode": "clauses",
+                "clauses": clause_reports,
+                "clause_stats": {
+                    "total": len(clauses),
+                    "cached": cached,
+                    "failed": failed,
+                    "missing_provisions_checked": gaps is not None,
+                    **({"missing_provisions_error": gaps_error} if gaps_error else {})
+                }
+            }
+        }
+    
+    async def _analyze_clause(self, clause: Clause, language: str) -> Tuple[Optional[Dict[str, List[str]]], bool, Optional[str]]:
+        """(findings, served from cache, error) for one clause."""
+        prompt = (
+            "You are a legal expert reviewing a single clause of a contract under Saudi Arabian law.\n"
+            "Identify weak points, legal or business risks and suggested improvements in THIS clause only.\n"
+            "If the clause is standard and raises no issue, return empty arrays.\n"
+            f"Write every item in {language}. Return ONLY valid JSON:\n"
+            '{"weak_points": [], "risks": [], "suggestions": []}\n\n'
+            f"Clause:\n{clause.text}"
+        )
+        return await self._cached_findings(
+            extraction_key(clause.key, None, "contract-clause", CLAUSE_PROMPT_VERSION,
+                           model=CONTRACT_ANALYSIS_MODEL, language=language),
+            prompt, f"clause {clause.index}"
+        )
+    
+    async def _contract_gaps(self, clauses: List[Clause], language: str) -> Tuple[Optional[Dict[str, List[str]]], bool, Optional[str]]:
+        """Findings about provisions the contract lacks, judged from its clause outline."""
+        outline = "\n".join(
+            f"- {clause.title or 'Preamble'}: {' '.join(clause.text.split())[:200]}" for clause in clauses
+        )
+        prompt = (
+            "You are a legal expert reviewing the outline of a contract under Saudi Arabian law.\n"
+            "The clauses themselves are reviewed separately. Report only what is MISSING from the contract "
+            "(for example dispute resolution, force majeure, termination, liability, payment terms) "
+            "and the risks this creates.\n"
+            f"Write every item in {language}. Return ONLY valid JSON:\n"
+            '{"weak_points": [], "risks": [], "suggestions": []}\n\n'
+            f"Contract outline:\n{outline}"
+        )
+        outline_hash = hashlib.sha256("\n".join(clause.key for clause in clauses).encode("utf-8")).hexdigest()
+        return await self._cached_findings(
+            extraction_key(outline_hash, None, "contract-gaps", CLAUSE_PROMPT_VERSION,
+                           model=CONTRACT_ANALYSIS_MODEL, language=language),
+            prompt, "missing provisions"
+        )
+    
+    async def _cached_findings(
+        self, cache_key: Optional[str], prompt: str, label: str
+    ) -> Tuple[Optional[Dict[str, List[str]]], bool, Optional[str]]:
+        cache = get_extraction_cache()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached), True, None
+        try:
+            text = await self._generate([prompt], CONTRACT_CLAUSE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return None, False, f"timed out after {CONTRACT_CLAUSE_TIMEOUT_SECONDS}s"
+        except Exception as e:
+            logger.warning(f"⚠️ Contract {label} analysis failed: {e}")
+            return None, False, str(e)
+        if not text:
+            return None, False, "Gemini AI returned empty response"
+        # Cache keys are shared across contracts: only a well-formed reply may be stored
+        parsed = self._parse_json_object(text)
+        if parsed is None or not all(isinstance(parsed.get(key), list) for key in FINDING_KEYS):
+            logger.warning(f"⚠️ Contract {label} analysis returned no findings JSON")
+            return None, False, "Gemini AI returned no valid findings JSON"
+        findings = {
+            key: [str(item).strip() for item in parsed[key] if str(item).strip()]
+            for key in FINDING_KEYS
+        }
+        cache.put(cache_key, json.dumps(findings, ensure_ascii=False))
+        return findings, False, None
+    
+    async def _contract_text(self, file_content: bytes, file_ext: str, filename: str) -> str:
+        """Text of the contract for clause analysis; '' when it cannot be read."""
+        if file_ext == 'txt':
+            return self._decode_text(file_content)
+        if file_ext in ['docx', 'doc']:
+            return await self._extract_text_from_docx(file_content, filename)
+        if file_ext == 'pdf':
+            return await asyncio.to_thread(self._extract_pdf_text, file_content)
+        return ''
+    
+    def _extract_pdf_text(self, file_content: bytes) -> str:
+        """Text layer of a PDF; scanned contracts have none and are analysed whole."""
+        fitz = optional_import("fitz")  # PyMuPDF
+        if fitz is None:
+            return ''
+        try:
+            with fitz.open(stream=file_content, filetype="pdf") as doc:
+                return "\n".join(page.get_text() for page in doc)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read PDF text layer: {e}")
+            return ''
+    
+    @staticmethod
+    def _decode_text(file_content: bytes) -> str:
+        try:
+            return file_content.decode('utf-8')
+        except UnicodeDecodeError:
+            try:
+                return file_content.decode('utf-8-sig')  # Handle BOM
+            except UnicodeDecodeError:
+                return file_content.decode('latin-1')  # Fallback
+    
+    @staticmethod
+    def _inline_part(file_content: bytes, mime_type: str) -> Any:
+        from google.genai import types
+        return types.Part.from_bytes(data=file_content, mime_type=mime_type)
+    
+    async def _generate(self, contents: List[Any], timeout: float) -> str:
+        """One Gemini request within the shared analysis budget."""
+        async with self._rate_limiter or get_analysis_rate_limiter():
+            response = await asyncio.wait_for(
+                asyncio.to_thread(
+                    self._client.models.generate_content,
+                    model=CONTRACT_ANALYSIS_MODEL,
+                    contents=contents
+                ),
+                timeout=timeout
+            )
+        return getattr(response, "text", "") or ""
+    
     def _create_contract_analysis_prompt(self) -> str:
         """
         Create a prompt for contract analysis that instructs Gemini to return JSON.
@@ -232,38 +471,14 @@ Now analyze the contract, detect its language, and return the JSON response in t
         Parse the Gemini response to extract JSON structure.
         Returns a dictionary with weak_points, risks, and suggestions.
         """
-        import json
-        import re
-        
-        # Try to parse as direct JSON
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-        
-        # Try to extract JSON from code blocks
-        try:
-            json_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', text)
-            if json_match:
-                return json.loads(json_match.group(1))
-        except (json.JSONDecodeError, AttributeError):
-            pass
-        
-        # Try to find JSON object in the text
-        try:
-            start_idx = text.find('{')
-            end_idx = text.rfind('}')
-            if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                json_str = text[start_idx:end_idx + 1]
-                parsed = json.loads(json_str)
-                # Ensure all required fields exist
-                return {
-                    "weak_points": parsed.get("weak_points", []),
-                    "risks": parsed.get("risks", []),
-                    "suggestions": parsed.get("suggestions", [])
-                }
-        except (json.JSONDecodeError, ValueError):
-            pass
+        parsed = self._parse_json_object(text)
+        if parsed is not None:
+            # Ensure all required fields exist
+            return {
+                "weak_points": parsed.get("weak_points", []),
+                "risks": parsed.get("risks", []),
+                "suggestions": parsed.get("suggestions", [])
+            }
         
         # Fallback: if JSON parsing fails, try to extract information from text
         logger.warning("Failed to parse JSON from Gemini response, using fallback parsing")
@@ -273,6 +488,29 @@ Now analyze the contract, detect its language, and return the JSON response in t
             "suggestions": self._extract_list_from_text(text, "suggestions", "suggestion")
         }
     
+    @staticmethod
+    def _parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+        """The JSON object in a Gemini reply: the whole text, a code block or the outermost braces."""
+        import re
+        
+        candidates = [text]
+        json_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', text)
+        if json_match:
+            candidates.append(json_match.group(1))
+        start_idx = text.find('{')
+        end_idx = text.rfind('}')
+        if start_idx != -1 and end_idx > start_idx:
+            candidates.append(text[start_idx:end_idx + 1])
+        
+        for candidate in candidates:
+            try:
+                parsed = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+        return None
+    
     def _extract_list_from_text(self, text: str, key: str, keyword: str) -> list:
         """Fallback: Extract list items from text when JSON parsing fails."""
         items = []
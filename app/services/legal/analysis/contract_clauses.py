@@ -0,0 +1,144 @@
+"""
+Contract clause segmentation.
+
+Contracts are split at their clause headings so each clause can be analysed
+on its own, concurrently, and its findings reused for every other contract
+that contains the same clause. Headings are recognised in the forms our
+users' contracts use:
+
+- "البند الأول: ..." / "المادة (3) ..." / "بند 4 - ..." and English
+  "Clause 2", "Article 3", "Section 4";
+- ordinal headings "أولاً:", "ثانياً -", ...;
+- only when none of the above occur, plain numbered lines "1. ...", "2) ...".
+
+Text before the first heading (title, parties, recitals) is the preamble.
+Clauses shorter than CLAUSE_MIN_CHARS are merged into their neighbour and
+longer than CLAUSE_MAX_CHARS are split at line boundaries.
+
+``clause_key`` hashes a clause after Arabic normalisation, digit folding and
+removal of its heading number and punctuation, so "البند الخامس: السرية" in
+one contract and "البند الثالث: السرية" in another hit the same cache entry.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ....utils.arabic_text_processor import normalize_arabic
+
+CLAUSE_MIN_CHARS = 80
+CLAUSE_MAX_CHARS = 6000
+
+_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '01234567890123456789')
+_ORDINALS = 'اولا|ثانيا|ثالثا|رابعا|خامسا|سادسا|سابعا|ثامنا|تاسعا|عاشرا'
+
+# Matched against the normalised line (letter variants folded, diacritics removed)
+_KEYWORD_HEADING = re.compile(
+    r'^(?:(?:البند|بند|الماده|ماده)\s*(?:رقم\s*)?[\(\[]?\s*[^\s:\-–.)\]]+[\)\]]?'
+    r'|(?:' + _ORDINALS + r')\s*[:\-–.)]'
+    r'|(?:clause|article|section)\s+[0-9ivxlc]+\b)',
+    re.IGNORECASE
+)
+_NUMBERED_HEADING = re.compile(r'^[0-9]{1,2}\s*[.)\-–]\s+\S')
+_HEADING_PREFIX = re.compile(
+    r'^\s*(?:(?:البند|بند|الماده|ماده)\s*(?:رقم\s*)?[\(\[]?\s*[^\s:\-–.)\]]+[\)\]]?'
+    r'|(?:' + _ORDINALS + r')'
+    r'|(?:clause|article|section)\s+[0-9ivxlc]+'
+    r'|[0-9]{1,2}(?=\s*[.)\-–]))\s*[:\-–.)]?',
+    re.IGNORECASE
+)
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+
+
+@dataclass
+class Clause:
+    """One clause of a contract; ``title`` is its heading line ('' for the preamble)."""
+
+    index: int
+    title: str
+    text: str
+
+    @property
+    def key(self) -> str:
+        return clause_key(self.text)
+
+
+def _normalize_line(line: str) -> str:
+    return ' '.join(normalize_arabic(line, letter_variants=True).translate(_DIGITS).split())
+
+
+def normalize_clause(text: str) -> str:
+    """Clause text as compared across contracts."""
+    normalized = normalize_arabic(text, letter_variants=True).translate(_DIGITS).casefold()
+    normalized = _HEADING_PREFIX.sub(' ', normalized.lstrip(), count=1)
+    return ' '.join(_PUNCTUATION.sub(' ', normalized).split())
+
+
+def clause_key(text: str) -> str:
+    return hashlib.sha256(normalize_clause(text).encode('utf-8')).hexdigest()
+
+
+def _heading_lines(lines: List[str]) -> List[int]:
+    normalized = [_normalize_line(line) for line in lines]
+    headings = [number for number, line in enumerate(normalized) if _KEYWORD_HEADING.match(line)]
+    if len(headings) < 2:
+        headings = [number for number, line in enumerate(normalized) if _NUMBERED_HEADING.match(line)]
+    return headings
+
+
+def _split_long(title: str, text: str, max_chars: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    chunks, current = [], ''
+    for line in text.splitlines(keepends=True):
+        if current and len(current) + len(line) > max_chars:
+            chunks.append(current)
+            current = ''
+        current += line
+    if current:
+        chunks.append(current)
+    # Later parts carry the heading so they still read as part of the clause
+    return [chunks[0]] + [f"{title}\n{chunk}" if title else chunk for chunk in chunks[1:]]
+
+
+def split_clauses(
+    text: str,
+    min_chars: int = CLAUSE_MIN_CHARS,
+    max_chars: int = CLAUSE_MAX_CHARS
+) -> List[Clause]:
+    """Split contract text into clauses in document order."""
+    lines = [line.rstrip() for line in (text or '').splitlines()]
+    headings = _heading_lines(lines)
+
+    sections: List[List[Optional[str]]] = []  # [title, text]
+    bounds = [0] + headings + [len(lines)]
+    for start, end in zip(bounds, bounds[1:]):
+        body = '\n'.join(lines[start:end]).strip()
+        if not body:
+            continue
+        title = lines[start].strip()[:120] if start in headings else ''
+        sections.append([title, body])
+
+    # Fold headings without a body and other fragments into the next clause
+    merged: List[List[Optional[str]]] = []
+    pending: Optional[List[Optional[str]]] = None
+    for title, body in sections:
+        if pending is not None:
+            title, body = pending[0] or title, f"{pending[1]}\n{body}"
+            pending = None
+        if len(body) < min_chars:
+            pending = [title, body]
+            continue
+        merged.append([title, body])
+    if pending is not None:
+        if merged:
+            merged[-1][1] = f"{merged[-1][1]}\n{pending[1]}"
+        else:
+            merged.append(pending)
+
+    clauses = []
+    for title, body in merged:
+        for chunk in _split_long(title, body, max_chars):
+            clauses.append(Clause(index=len(clauses) + 1, title=title, text=chunk))
+    return clauses
@@ -0,0 +1,613 @@
+"""
+Bulk Corpus Ingestion Service
+
+In-process replacement for data_set/batch_upload_laws.py, batch_upload_cases.py
+and batch_rag_upload.py, which push files one at a time over HTTP and pay for
+authentication, JSON re-serialisation and a separate embedding pass per file.
+
+Pipeline:
+1. Parse: JSON law and case files are parsed in worker processes into plain
+   row dicts, using the same row builders as the JSON upload endpoints.
+2. Write: rows are bulk-inserted (Core executemany) in one transaction per
+   batch of files; duplicates of already-uploaded JSON are skipped.
+3. Embed: every new chunk is embedded in one pass, sorted by length so each
+   model batch holds similarly sized texts, upserted into Chroma and
+   persisted once at the end.
+
+Progress is persisted to a manifest after every committed batch and after
+the embedding pass, so an interrupted run resumes where it stopped: files
+already written are not parsed again, and their chunks are embedded on the
+next run.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from contextlib import aclosing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....models.legal_knowledge import (
+    CaseSection, KnowledgeChunk, KnowledgeDocument, LawArticle, LawSource, LegalCase
+)
+from ....repositories.legal_knowledge_repository import LegalBulkRepository
+from ..knowledge.index_statistics_service import get_index_statistics
+from ..knowledge.legal_case_service import build_json_case_sections
+from ..knowledge.legal_laws_service import LegalLawsService, build_json_article_rows, json_upload_hash
+
+logger = logging.getLogger(__name__)
+
+BULK_INGEST_WORKERS = int(os.getenv("BULK_INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+BULK_INGEST_COMMIT_FILES = int(os.getenv("BULK_INGEST_COMMIT_FILES", "10"))
+BULK_EMBED_BATCH_SIZE = int(os.getenv("BULK_EMBED_BATCH_SIZE", "64"))
+DEFAULT_MANIFEST_PATH = os.getenv("BULK_INGEST_MANIFEST", "storage/bulk_ingestion_manifest.json")
+DEFAULT_CORPUS_DIRS = ("data_set/files", "data_set/cases")
+
+# Only this many document ids go into one IN (...) clause
+_ID_PAGE_SIZE = 500
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+# ==================== WORKER SIDE ====================
+
+def _load_json(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # Hand-edited case files sometimes carry JavaScript-style comments
+        stripped = re.sub(r'/\*.*?\*/', '', re.sub(r'^\s*//.*$', '', text, flags=re.MULTILINE), flags=re.DOTALL)
+        return json.loads(stripped)
+
+
+def parse_corpus_file(path: str) -> Dict[str, Any]:
+    """
+    Parse one corpus JSON file into insertable rows (runs in a worker process).
+
+    Returns a dict with ``kind`` 'law', 'case' or 'error'. Laws carry the law
+    source fields plus article/chunk rows; cases carry one entry per case with
+    its sections. Foreign keys are filled in by the writer.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = _load_json(f.read())
+    except Exception as e:
+        return {"path": path, "kind": "error", "error": f"Invalid JSON: {e}"}
+
+    if not isinstance(data, dict):
+        return {"path": path, "kind": "error", "error": "Top-level JSON value must be an object"}
+
+    content_hash = json_upload_hash(data)
+    processing_report = data.get("processing_report", {})
+
+    law_sources = data.get("law_sources")
+    if law_sources:
+        # Same rule as the JSON upload endpoint: the first law source is ingested
+        source = law_sources if isinstance(law_sources, dict) else law_sources[0]
+        if not isinstance(source, dict):
+            return {"path": path, "kind": "error", "error": f"Invalid law_sources format: {type(law_sources)}"}
+        article_rows, chunk_rows_per_article = build_json_article_rows(source.get("articles") or [])
+        return {
+            "path": path,
+            "kind": "law",
+            "content_hash": content_hash,
+            "processing_report": processing_report,
+            "source": {key: value for key, value in source.items() if key not in ("articles", "branches")},
+            "article_rows": article_rows,
+            "chunk_rows_per_article": chunk_rows_per_article,
+        }
+
+    legal_cases = data.get("legal_cases")
+    if legal_cases:
+        return {
+            "path": path,
+            "kind": "case",
+            "content_hash": content_hash,
+            "processing_report": processing_report,
+            "cases": [
+                {
+                    "fields": {key: value for key, value in case_data.items() if key != "sections"},
+                    "sections": build_json_case_sections(case_data),
+                }
+                for case_data in legal_cases
+            ],
+        }
+
+    return {"path": path, "kind": "error", "error": "No law_sources or legal_cases found"}
+
+
+# ==================== MANIFEST AND REPORT ====================
+
+@dataclass
+class IngestionManifest:
+    """
+    Per-file progress of bulk ingestion, keyed by file path.
+
+    Each entry holds the raw file ``sha256`` and a ``status``: 'inserted'
+    (rows committed, embeddings pending), 'embedded', 'skipped' (already in
+    the database) or 'failed'. A file whose bytes changed is ingested again.
+    """
+
+    files: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    updated_at: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: Path) -> "IngestionManifest":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(**json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable ingestion manifest {path}: {e}")
+            return cls()
+
+    def save(self, path: Path) -> None:
+        self.updated_at = datetime.utcnow().isoformat()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def is_done(self, path: str, sha256: str) -> bool:
+        entry = self.files.get(path)
+        return bool(entry) and entry.get("sha256") == sha256 and entry.get("status") in ("inserted", "embedded", "skipped")
+
+    def pending_document_ids(self) -> List[int]:
+        return [
+            document_id
+            for entry in self.files.values() if entry.get("status") == "inserted"
+            for document_id in entry.get("document_ids", [])
+        ]
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for entry in self.files.values():
+            counts[entry.get("status", "unknown")] = counts.get(entry.get("status", "unknown"), 0) + 1
+        return counts
+
+
+@dataclass
+class BulkIngestionReport:
+    """Counters produced by one bulk ingestion run."""
+
+    files_total: int = 0
+    files_resumed: int = 0
+    files_inserted: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    laws: int = 0
+    cases: int = 0
+    articles: int = 0
+    chunks: int = 0
+    chunks_embedded: int = 0
+    parse_seconds: float = 0.0
+    write_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    failures: List[Dict[str, str]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key in ("parse_seconds", "write_seconds", "embed_seconds"):
+            data[key] = round(data[key], 2)
+        return data
+
+
+# ==================== SERVICE ====================
+
+class BulkCorpusIngestionService:
+    """Parses, writes and embeds a directory tree of law and case JSON files."""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        vectorstore: Any = None,
+        manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH,
+        workers: int = BULK_INGEST_WORKERS,
+        commit_every: int = BULK_INGEST_COMMIT_FILES,
+        embed_batch_size: int = BULK_EMBED_BATCH_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        uploaded_by: int = 1,
+    ):
+        """
+        Args:
+            db: Async database session
+            vectorstore: LangChain Chroma vectorstore (defaults to the shared
+                one, loaded only when there is something to embed)
+            manifest_path: Where to persist progress (None disables resuming)
+            workers: Parser processes (1 parses in-process)
+            commit_every: Files written per transaction
+            embed_batch_size: Texts per embedding model call
+            progress: Called with (stage, done, total) as work completes
+            uploaded_by: User ID recorded on created documents
+        """
+        self.db = db
+        self._vectorstore = vectorstore
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.workers = max(1, workers)
+        self.commit_every = max(1, commit_every)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.progress = progress
+        self.uploaded_by = uploaded_by
+        self.bulk = LegalBulkRepository(db)
+        # Dates are parsed exactly as the JSON upload endpoints parse them
+        self._parse_date = LegalLawsService(db)._parse_date
+
+    # ---------------------------------
+    # Entry point
+    # ---------------------------------
+    async def ingest(
+        self,
+        paths: Iterable[str] = DEFAULT_CORPUS_DIRS,
+        embed: bool = True,
+        resume: bool = True,
+    ) -> BulkIngestionReport:
+        """Ingest every ``*.json`` file under ``paths``; see the module docstring."""
+        report = BulkIngestionReport()
+        manifest = self._load_manifest(resume)
+
+        files = discover_corpus_files(paths)
+        report.files_total = len(files)
+        todo = []
+        for path in files:
+            sha256 = _file_sha256(path)
+            if manifest.is_done(path, sha256):
+                report.files_resumed += 1
+            else:
+                todo.append((path, sha256))
+        logger.info(
+            f"📚 Bulk ingestion: {len(files)} files, {report.files_resumed} already done, {len(todo)} to ingest"
+        )
+
+        await self._parse_and_write(todo, manifest, report)
+        if embed:
+            await self._embed_pending(manifest, report)
+
+        logger.info(f"✅ Bulk ingestion finished: {report.to_dict()}")
+        return report
+
+    # ---------------------------------
+    # Parse + write
+    # ---------------------------------
+    async def _parse_and_write(self, todo: List[tuple], manifest: IngestionManifest, report: BulkIngestionReport) -> None:
+        if not todo:
+            return
+        hashes = dict(todo)
+        batch: List[Dict[str, Any]] = []
+        done = 0
+        parse_started = time.perf_counter()
+
+        # Closed right away if a write fails, so the worker pool is shut down with it
+        async with aclosing(self._parse_all([path for path, _ in todo])) as parsed_files:
+            async for parsed in parsed_files:
+                batch.append(parsed)
+                done += 1
+                self._report_progress("parse", done, len(todo))
+                if len(batch) >= self.commit_every:
+                    await self._write_batch(batch, hashes, manifest, report)
+                    batch = []
+        if batch:
+            await self._write_batch(batch, hashes, manifest, report)
+
+        report.parse_seconds = time.perf_counter() - parse_started - report.write_seconds
+
+    async def _parse_all(self, paths: List[str]):
+        """Yield parsed files as workers finish them."""
+        if self.workers == 1 or len(paths) == 1:
+            for path in paths:
+                yield await asyncio.to_thread(parse_corpus_file, path)
+            return
+
+        loop = asyncio.get_running_loop()
+        parsed_paths = set()
+        # Spawned: the endpoint runs this inside the server, whose threads may hold locks
+        pool = ProcessPoolExecutor(
+            max_workers=min(self.workers, len(paths)), mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            futures = [loop.run_in_executor(pool, parse_corpus_file, path) for path in paths]
+            for future in asyncio.as_completed(futures):
+                parsed = await future
+                parsed_paths.add(parsed["path"])
+                yield parsed
+        except BrokenProcessPool:
+            logger.warning("⚠️ Parser worker pool broke; parsing the remaining files on a thread")
+            for path in paths:
+                if path not in parsed_paths:
+                    yield await asyncio.to_thread(parse_corpus_file, path)
+        finally:
+            # Don't hold the event loop for queued files after a cancellation or failed write
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _write_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        hashes: Dict[str, str],
+        manifest: IngestionManifest,
+        report: BulkIngestionReport,
+    ) -> None:
+        """Write a batch of parsed files in one transaction, then checkpoint."""
+        started = time.perf_counter()
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            for parsed in batch:
+                path = parsed["path"]
+                entry = {"sha256": hashes.get(path), "kind": parsed["kind"]}
+                if parsed["kind"] == "error":
+                    entry.update(status="failed", error=parsed["error"])
+                elif await self._is_duplicate(parsed):
+                    entry.update(status="skipped", reason="duplicate")
+                elif parsed["kind"] == "law":
+                    entry.update(status="inserted", **await self._write_law(parsed))
+                else:
+                    entry.update(status="inserted", **await self._write_cases(parsed))
+                entries[path] = entry
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Bulk write of {len(batch)} files failed: {e}", exc_info=True)
+            # Retry one by one so a single bad file does not sink its batch
+            if len(batch) > 1:
+                for parsed in batch:
+                    await self._write_batch([parsed], hashes, manifest, report)
+                return
+            entries = {batch[0]["path"]: {
+                "sha256": hashes.get(batch[0]["path"]), "kind": batch[0]["kind"], "status": "failed", "error": str(e)
+            }}
+
+        # Counted only once committed
+        for path, entry in entries.items():
+            manifest.files[path] = entry
+            if entry["status"] == "inserted":
+                report.files_inserted += 1
+                if entry["kind"] == "law":
+                    report.laws += 1
+                    report.articles += entry["articles"]
+                else:
+                    report.cases += len(entry["case_ids"])
+                report.chunks += entry["chunks"]
+            elif entry["status"] == "skipped":
+                report.files_skipped += 1
+            else:
+                report.files_failed += 1
+                report.failures.append({"file": path, "error": entry.get("error", "")})
+        self._save_manifest(manifest)
+        report.write_seconds += time.perf_counter() - started
+
+    async def _is_duplicate(self, parsed: Dict[str, Any]) -> bool:
+        # JSON cases are stored with a per-case suffix on the content hash
+        file_hash = parsed["content_hash"] if parsed["kind"] == "law" else f"{parsed['content_hash']}_0"
+        result = await self.db.execute(
+            select(KnowledgeDocument.id).where(KnowledgeDocument.file_hash == file_hash).limit(1)
+        )
+        return result.first() is not None
+
+    async def _write_law(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        source = parsed["source"]
+        unique_hash = parsed["content_hash"]
+        [document_id] = await self.bulk.insert_rows_returning_ids(KnowledgeDocument, [{
+            "title": f"JSON Upload: {source.get('name', 'Unknown Law')}",
+            "category": "law",
+            "file_path": f"json_upload_{unique_hash[:8]}.json",
+            "file_extension": ".json",
+            "file_hash": unique_hash,
+            "source_type": "uploaded",
+            "status": "raw",
+            "uploaded_by": self.uploaded_by,
+            "document_metadata": {"source": "bulk_ingestion", "processing_report": parsed["processing_report"]},
+        }])
+        [law_source_id] = await self.bulk.insert_rows_returning_ids(LawSource, [{
+            "knowledge_document_id": document_id,
+            "name": source.get("name", "Unknown Law"),
+            "type": source.get("type", "law"),
+            "jurisdiction": source.get("jurisdiction"),
+            "issuing_authority": source.get("issuing_authority"),
+            "issue_date": self._parse_date(source.get("issue_date")),
+            "last_update": self._parse_date(source.get("last_update")),
+            "description": source.get("description"),
+            "source_url": source.get("source_url"),
+            "status": "raw",
+        }])
+
+        article_rows = parsed["article_rows"]
+        chunk_rows_per_article = parsed["chunk_rows_per_article"]
+        for row in article_rows:
+            row["law_source_id"] = law_source_id
+            row["source_document_id"] = document_id
+        for chunk_rows in chunk_rows_per_article:
+            for chunk in chunk_rows:
+                chunk["document_id"] = document_id
+                chunk["law_source_id"] = law_source_id
+        _, chunk_count = await self.bulk.insert_articles_with_chunks(article_rows, chunk_rows_per_article)
+        return {
+            "document_ids": [document_id],
+            "law_source_id": law_source_id,
+            "articles": len(article_rows),
+            "chunks": chunk_count,
+        }
+
+    async def _write_cases(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        unique_hash = parsed["content_hash"]
+        now = datetime.utcnow()
+        document_ids = await self.bulk.insert_rows_returning_ids(KnowledgeDocument, [
+            {
+                "title": f"JSON Upload: {case['fields'].get('title', 'Unknown Case')}",
+                "category": "case",
+                "file_path": f"json_upload_case_{unique_hash[:8]}_{index}.json",
+                "file_hash": f"{unique_hash}_{index}",
+                "source_type": "uploaded",
+                "status": "raw",
+                "uploaded_by": self.uploaded_by,
+                "document_metadata": {
+                    "source": "bulk_ingestion",
+                    "case_type": case["fields"].get("case_type"),
+                    "court_level": case["fields"].get("court_level"),
+                    "processing_report": parsed["processing_report"],
+                },
+            }
+            for index, case in enumerate(parsed["cases"])
+        ])
+        case_ids = await self.bulk.insert_rows_returning_ids(LegalCase, [
+            {
+                "document_id": document_id,
+                "case_number": case["fields"].get("case_number"),
+                "title": case["fields"].get("title", "Unknown Case"),
+                "description": case["fields"].get("description"),
+                "jurisdiction": case["fields"].get("jurisdiction"),
+                "court_name": case["fields"].get("court_name"),
+                "decision_date": self._parse_date(case["fields"].get("decision_date")),
+                "case_type": case["fields"].get("case_type"),
+                "court_level": case["fields"].get("court_level"),
+                "status": "raw",
+                "created_at": now,
+            }
+            for document_id, case in zip(document_ids, parsed["cases"])
+        ])
+
+        section_rows, chunk_rows = [], []
+        for document_id, case_id, case in zip(document_ids, case_ids, parsed["cases"]):
+            for chunk_index, (section_type, content, chunk_content) in enumerate(case["sections"]):
+                section_rows.append({
+                    "case_id": case_id, "section_type": section_type, "content": content, "created_at": now
+                })
+                chunk_rows.append({
+                    "document_id": document_id, "chunk_index": chunk_index, "content": chunk_content,
+                    "case_id": case_id, "verified_by_admin": False, "created_at": now
+                })
+        await self.bulk.insert_rows(CaseSection, section_rows)
+        await self.bulk.insert_rows(KnowledgeChunk, chunk_rows)
+        return {"document_ids": document_ids, "case_ids": case_ids, "chunks": len(chunk_rows)}
+
+    # ---------------------------------
+    # Embedding pass
+    # ---------------------------------
+    async def _embed_pending(self, manifest: IngestionManifest, report: BulkIngestionReport) -> None:
+        document_ids = manifest.pending_document_ids()
+        if not document_ids:
+            return
+        started = time.perf_counter()
+        from ..knowledge.document_parser_service import build_chunk_embedding_metadata
+
+        texts, metadatas, ids = [], [], []
+        for start in range(0, len(document_ids), _ID_PAGE_SIZE):
+            page = document_ids[start:start + _ID_PAGE_SIZE]
+            result = await self.db.execute(
+                select(KnowledgeChunk, KnowledgeDocument, LawSource, LawArticle)
+                .join(KnowledgeDocument, KnowledgeChunk.document_id == KnowledgeDocument.id)
+                .outerjoin(LawSource, KnowledgeChunk.law_source_id == LawSource.id)
+                .outerjoin(LawArticle, KnowledgeChunk.article_id == LawArticle.id)
+                .where(KnowledgeChunk.document_id.in_(page))
+            )
+            for chunk, document, law_source, article in result.all():
+                if not (chunk.content or "").strip():
+                    continue
+                texts.append(chunk.content)
+                metadatas.append(build_chunk_embedding_metadata(chunk, document, law_source, article))
+                ids.append(str(chunk.id))
+
+        vectorstore = self._get_vectorstore()
+        embedded = await self._embed_and_upsert(vectorstore, texts, metadatas, ids)
+        # The single commit of the whole pass
+        if hasattr(vectorstore, "persist"):
+            await asyncio.to_thread(vectorstore.persist)
+        get_index_statistics().record_added(ids, metadatas)
+
+        for start in range(0, len(document_ids), _ID_PAGE_SIZE):
+            page = document_ids[start:start + _ID_PAGE_SIZE]
+            await self.db.execute(
+                update(LawSource).where(LawSource.knowledge_document_id.in_(page)).values(status="processed")
+            )
+            await self.db.execute(
+                update(LegalCase).where(LegalCase.document_id.in_(page)).values(status="processed")
+            )
+        await self.db.commit()
+
+        for entry in manifest.files.values():
+            if entry.get("status") == "inserted":
+                entry["status"] = "embedded"
+        self._save_manifest(manifest)
+        report.chunks_embedded = embedded
+        report.embed_seconds = time.perf_counter() - started
+
+    async def _embed_and_upsert(self, vectorstore: Any, texts: List[str], metadatas: List[Dict], ids: List[str]) -> int:
+        """
+        Embed texts shortest-first in fixed-size batches and upsert each batch.
+
+        Sorting by length keeps every model batch homogeneous, so padding is
+        bounded by neighbouring lengths rather than by the longest article in
+        the corpus.
+        """
+        embeddings_model = getattr(vectorstore, "embeddings", None) or getattr(vectorstore, "_embedding_function")
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        done = 0
+        for start in range(0, len(order), self.embed_batch_size):
+            batch = order[start:start + self.embed_batch_size]
+            batch_texts = [texts[index] for index in batch]
+            vectors = await asyncio.to_thread(embeddings_model.embed_documents, batch_texts)
+            await asyncio.to_thread(
+                vectorstore._collection.upsert,
+                ids=[ids[index] for index in batch],
+                embeddings=vectors,
+                metadatas=[metadatas[index] for index in batch],
+                documents=batch_texts,
+            )
+            done += len(batch)
+            self._report_progress("embed", done, len(order))
+        return done
+
+    # ---------------------------------
+    # Helpers
+    # ---------------------------------
+    def _get_vectorstore(self) -> Any:
+        if self._vectorstore is None:
+            from ..knowledge.document_parser_service import vectorstore_manager
+            self._vectorstore = vectorstore_manager.get_vectorstore()
+        return self._vectorstore
+
+    def _load_manifest(self, resume: bool) -> IngestionManifest:
+        if not resume or self.manifest_path is None:
+            return IngestionManifest()
+        return IngestionManifest.load(self.manifest_path)
+
+    def _save_manifest(self, manifest: IngestionManifest) -> None:
+        if self.manifest_path is not None:
+            manifest.save(self.manifest_path)
+
+    def _report_progress(self, stage: str, done: int, total: int) -> None:
+        if self.progress is not None:
+            self.progress(stage, done, total)
+        if done == total or done % max(1, total // 10) == 0:
+            logger.info(f"📈 Bulk ingestion {stage}: {done}/{total}")
+
+
+def discover_corpus_files(paths: Iterable[str]) -> List[str]:
+    """All ``*.json`` files under the given files/directories, sorted and de-duplicated."""
+    found = set()
+    for path in paths:
+        candidate = Path(path)
+        if candidate.is_file() and candidate.suffix.lower() == ".json":
+            found.add(str(candidate))
+        elif candidate.is_dir():
+            found.update(str(child) for child in candidate.rglob("*.json"))
+    return sorted(found)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(1024 * 1024):
+            digest.update(data)
+    return digest.hexdigest()
@@ -7,8 +7,12 @@ Handles file upload, text extraction, section segmentation, and database storage
 
 import os
 import re
+import asyncio
 import hashlib
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, date
 from pathlib import Path
@@ -16,36 +20,53 @@ from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-# PDF/DOCX extraction
-try:
-    import fitz  # PyMuPDF
-except ImportError:
-    fitz = None
-
-try:
-    import pdfplumber
-except ImportError:
-    pdfplumber = None
-
-try:
-    from docx import Document as DocxDocument
-except ImportError:
-    DocxDocument = None
-
-# Enhanced PDF processor for better Arabic text extraction
-try:
-    from ....processors.enhanced_arabic_pdf_processor import EnhancedArabicPDFProcessor
-    ENHANCED_PDF_AVAILABLE = True
-except ImportError:
-    ENHANCED_PDF_AVAILABLE = False
-    logger.warning("EnhancedArabicPDFProcessor not available, using basic extraction")
-
 from ....models.legal_knowledge import (
     KnowledgeDocument, LegalCase, CaseSection, KnowledgeChunk
 )
+# PDF/DOCX libraries are imported on first extraction, not at application boot
+from ....utils.lazy_loader import optional_import
+from ....utils.arabic_text_processor import fix_arabic_text, needs_fixing, shaping_available
+from ....utils.extraction_cache import extraction_key, get_extraction_cache
+from ....utils.upload_ingestion import IngestedUpload
 
 logger = logging.getLogger(__name__)
 
+# Extraction worker processes for concurrent batch ingestion
+CASE_INGEST_WORKERS = int(os.getenv("CASE_INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# Extraction cache version of the case PDF/DOCX extractors; bump when their output changes
+CASE_EXTRACTOR_VERSION = "1"
+
+
+def _check_extracted_text(text: str) -> None:
+    """Reject extraction results too short to be a real case document."""
+    if not text or len(text) < 50:
+        raise ValueError(
+            f"Extracted text is too short ({len(text or '')} chars). "
+            "Possible causes:\n"
+            "  1. PDF is image-based (scanned) - Install Tesseract OCR for extraction\n"
+            "  2. PDF is mostly images with minimal text\n"
+            "  3. File is corrupted or password-protected\n"
+            "  4. Text extraction failed - check logs for details"
+        )
+
+
+def extract_case_file(file_path: str, upload_dir: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract, normalise and segment one stored case file.
+    
+    Module-level so it can run in a worker process: PyMuPDF extraction and
+    the Arabic fixing passes are CPU-bound and would otherwise block the
+    event loop. No database access happens here.
+    
+    Returns:
+        {'text_length': int, 'sections': {section_type: content}}
+    """
+    extractor = LegalCaseIngestionService(db=None, upload_dir=upload_dir)
+    text = extractor.extract_text(file_path, content_hash)
+    _check_extracted_text(text)
+    return {'text_length': len(text), 'sections': extractor.split_case_sections(text)}
+
 
 class LegalCaseIngestionService:
     """Service for ingesting legal cases from PDF/DOCX/TXT files."""
@@ -140,6 +161,15 @@ class LegalCaseIngestionService:
     # FILE UPLOAD AND HASH CALCULATION
     # =====================================================
     
+    async def find_duplicate(self, file_hash: str) -> Optional[KnowledgeDocument]:
+        """Existing KnowledgeDocument with this SHA-256, if any."""
+        result = await self.db.execute(
+            select(KnowledgeDocument).where(
+                KnowledgeDocument.file_hash == file_hash
+            ).limit(1)
+        )
+        return result.scalars().first()
+    
     async def save_uploaded_case_file(
         self,
         file_content: bytes,
@@ -164,19 +194,23 @@ class LegalCaseIngestionService:
         file_hash = hashlib.sha256(file_content).hexdigest()
         
         # Check for duplicates
-        duplicate_check = await self.db.execute(
-            select(KnowledgeDocument).where(
-                KnowledgeDocument.file_hash == file_hash
-            )
-        )
-        existing_doc = duplicate_check.scalar_one_or_none()
+        existing_doc = await self.find_duplicate(file_hash)
         
         if existing_doc:
             raise ValueError(
                 f"Duplicate file detected. Document already exists: {existing_doc.title} (ID: {existing_doc.id})"
             )
         
-        # Generate unique filename
+        file_path = self._store_case_file(file_content, file_hash, filename)
+        
+        knowledge_doc = await self.create_case_document(
+            file_path, file_hash, filename, len(file_content), uploaded_by
+        )
+        
+        return file_path, file_hash, knowledge_doc
+    
+    def _store_case_file(self, file_content: bytes, file_hash: str, filename: str) -> str:
+        """Write the file under a unique name in the upload directory."""
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         file_extension = Path(filename).suffix
         safe_filename = f"{timestamp}_{file_hash[:12]}{file_extension}"
@@ -187,12 +221,30 @@ class LegalCaseIngestionService:
             f.write(file_content)
         
         logger.info(f"Saved file to: {file_path}")
+        return str(file_path)
+    
+    async def create_case_document(
+        self,
+        file_path: str,
+        file_hash: str,
+        filename: str,
+        file_size: int,
+        uploaded_by: int
+    ) -> KnowledgeDocument:
+        """
+        Create the KnowledgeDocument record for a case file already on disk.
         
-        # Create KnowledgeDocument record
+        Args:
+            file_path: Where the file is stored
+            file_hash: SHA-256 of the file
+            filename: Original filename
+            file_size: Size in bytes
+            uploaded_by: User ID who uploaded the file
+        """
         knowledge_doc = KnowledgeDocument(
             title=Path(filename).stem,  # Use filename without extension as title
             category='case',
-            file_path=str(file_path),
+            file_path=file_path,
             file_hash=file_hash,
             source_type='uploaded',
             status='raw',
@@ -200,7 +252,7 @@ class LegalCaseIngestionService:
             uploaded_at=datetime.utcnow(),
             document_metadata={
                 'original_filename': filename,
-                'file_size': len(file_content),
+                'file_size': file_size,
                 'uploaded_by': uploaded_by,
                 'file_type': Path(filename).suffix.lower()
             }
@@ -211,18 +263,22 @@ class LegalCaseIngestionService:
         
         logger.info(f"Created KnowledgeDocument ID: {knowledge_doc.id}")
         
-        return str(file_path), file_hash, knowledge_doc
+        return knowledge_doc
     
     # =====================================================
     # TEXT EXTRACTION
     # =====================================================
     
-    def extract_text(self, file_path: str) -> str:
+    def extract_text(self, file_path: str, content_hash: Optional[str] = None) -> str:
         """
         Extract text from PDF, DOCX, or TXT file.
         
+        PDF pages and DOCX documents are served from the extraction cache when
+        this content was extracted before.
+        
         Args:
             file_path: Path to the file
+            content_hash: SHA-256 of the file content, if already known
             
         Returns:
             Extracted text as a single string
@@ -235,100 +291,62 @@ class LegalCaseIngestionService:
         file_extension = file_path.suffix.lower()
         
         if file_extension == '.pdf':
-            return self._extract_pdf_text(file_path)
+            return self._extract_pdf_text(file_path, content_hash)
         elif file_extension in ['.docx', '.doc']:
-            return self._extract_docx_text(file_path)
+            return get_extraction_cache().get_or_extract(
+                str(file_path), "case-docx", CASE_EXTRACTOR_VERSION,
+                lambda: self._extract_docx_text(file_path), content_hash=content_hash
+            )
         elif file_extension == '.txt':
             return self._extract_txt_text(file_path)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
     
-    def _extract_pdf_text(self, file_path: Path) -> str:
+    def _extract_pdf_text(self, file_path: Path, content_hash: Optional[str] = None) -> str:
         """
         Extract text from PDF using advanced dict extraction (from extract_arabic_pdf.py).
         This method properly handles Arabic text with full fixing and RTL processing.
         
         Args:
             file_path: Path to PDF file
+            content_hash: SHA-256 of the file content, if already known
             
         Returns:
             Extracted text with proper Arabic text direction
         """
         try:
+            fitz = optional_import("fitz")  # PyMuPDF
             if not fitz:
                 raise RuntimeError("PyMuPDF (fitz) not available")
             
+            cache = get_extraction_cache()
+            content_hash = content_hash or cache.content_hash(str(file_path))
             doc = fitz.open(str(file_path))
-            text = ""
+            parts = []
             
             # Save page count before processing
             total_pages = len(doc)
             logger.info(f"Starting advanced PDF extraction with dict method for {total_pages} pages")
             
             for page_num, page in enumerate(doc, 1):
-                try:
-                    logger.info(f"Processing page {page_num}/{total_pages} with dict extraction...")
-                    
-                    # Use get_text("dict") to get full structured text
-                    page_dict = page.get_text("dict")
-                    
-                    if not page_dict or "blocks" not in page_dict:
-                        logger.warning(f"No dict blocks found at page {page_num}")
-                        text += f"\n---EMPTY_PAGE_{page_num}---\n"
+                cache_key = extraction_key(
+                    content_hash, page_num, "case-pdf", CASE_EXTRACTOR_VERSION, shaping=shaping_available()
+                )
+                page_text = cache.get(cache_key)
+                if page_text is None:
+                    try:
+                        logger.info(f"Processing page {page_num}/{total_pages} with dict extraction...")
+                        page_text = self._extract_pdf_page(page, page_num)
+                    except Exception as page_e:
+                        logger.error(f"Error processing page {page_num}: {page_e}")
+                        parts.append(f"\n---ERROR_PAGE_{page_num}---\n")
                         continue
-                    
-                    blocks = page_dict["blocks"]
-                    logger.info(f"Page {page_num}: Found {len(blocks)} blocks in dict")
-                    
-                    # Process each block: blocks -> lines -> spans
-                    for block_num, block in enumerate(blocks):
-                        if "lines" not in block:
-                            text += "\n"
-                            continue
-                        
-                        lines = block["lines"]
-                        
-                        # Process each line
-                        for line_num, line in enumerate(lines):
-                            if "spans" not in line:
-                                text += "\n"
-                                continue
-                            
-                            spans = line["spans"]
-                            line_text = ""
-                            
-                            # Extract each span
-                            for span in spans:
-                                if "text" not in span:
-                                    continue
-                                
-                                span_text = span["text"]
-                                if span_text.strip():
-                                    line_text += span_text
-                            
-                            # Apply advanced Arabic fixing on each line
-                            if line_text.strip():
-                                # Always apply fixing for Arabic text from PDFs
-                                if self._needs_fixing(line_text):
-                                    # This does: clean artifacts + normalize + reshape + BiDi
-                                    fixed_line = self._fix_arabic_text(line_text)
-                                    text += fixed_line + "\n"
-                                else:
-                                    # For non-Arabic or already good text
-                                    text += line_text + "\n"
-                            else:
-                                text += "\n"
-                    
-                    # Add page separator
-                    text += "\n---PAGE_SEPARATOR---\n"
-                    
-                except Exception as page_e:
-                    logger.error(f"Error processing page {page_num}: {page_e}")
-                    text += f"\n---ERROR_PAGE_{page_num}---\n"
-                    continue
+                    cache.put(cache_key, page_text)
+                parts.append(page_text)
             
             # Close document before logging (to avoid accessing closed doc)
             doc.close()
+            text = "".join(parts)
             logger.info(f"✅ Extracted {len(text)} characters from {total_pages} pages using advanced dict extraction")
             return text
             
@@ -336,6 +354,52 @@ class LegalCaseIngestionService:
             logger.error(f"Advanced PDF extraction failed: {e}")
             raise RuntimeError(f"Failed to extract text from PDF: {str(e)}")
     
+    def _extract_pdf_page(self, page, page_num: int) -> str:
+        """
+        Text of one PyMuPDF page followed by the page separator.
+        
+        Walks blocks -> lines -> spans of ``get_text("dict")`` and applies
+        the Arabic fixing to every line that needs it.
+        """
+        page_dict = page.get_text("dict")
+        
+        if not page_dict or "blocks" not in page_dict:
+            logger.warning(f"No dict blocks found at page {page_num}")
+            return f"\n---EMPTY_PAGE_{page_num}---\n"
+        
+        blocks = page_dict["blocks"]
+        logger.info(f"Page {page_num}: Found {len(blocks)} blocks in dict")
+        
+        text = ""
+        for block in blocks:
+            if "lines" not in block:
+                text += "\n"
+                continue
+            
+            for line in block["lines"]:
+                if "spans" not in line:
+                    text += "\n"
+                    continue
+                
+                line_text = "".join(
+                    span["text"] for span in line["spans"] if "text" in span and span["text"].strip()
+                )
+                
+                # Apply advanced Arabic fixing on each line
+                if line_text.strip():
+                    # Always apply fixing for Arabic text from PDFs
+                    if needs_fixing(line_text):
+                        # This does: clean artifacts + normalize + reshape + BiDi
+                        text += fix_arabic_text(line_text) + "\n"
+                    else:
+                        # For non-Arabic or already good text
+                        text += line_text + "\n"
+                else:
+                    text += "\n"
+        
+        # Add page separator
+        return text + "\n---PAGE_SEPARATOR---\n"
+    
     def _extract_docx_text(self, file_path: Path) -> str:
         """
         Extract text from DOCX file.
@@ -346,14 +410,15 @@ class LegalCaseIngestionService:
         Returns:
             Extracted text
         """
-        if not DocxDocument:
+        docx = optional_import("docx")
+        if not docx:
             raise RuntimeError(
                 "python-docx not installed. "
                 "Install with: pip install python-docx"
             )
         
         try:
-            doc = DocxDocument(str(file_path))
+            doc = docx.Document(str(file_path))
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
             
             logger.info(f"Extracted {len(text)} characters from DOCX")
@@ -396,276 +461,6 @@ class LegalCaseIngestionService:
         except Exception as e:
             raise RuntimeError(f"Failed to extract text from TXT: {str(e)}")
     
-    # =====================================================
-    # ADVANCED ARABIC TEXT PROCESSING (from extract_arabic_pdf.py)
-    # =====================================================
-    
-    def _needs_fixing(self, text: str) -> bool:
-        """Enhanced detection of Arabic text that needs fixing - ALWAYS fix Arabic text in PDFs"""
-        if not text.strip():
-            return False
-
-        # Check for any Arabic characters
-        arabic_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        if arabic_chars == 0:
-            return False
-
-        # Check for fragmented words (average word length <= 2)
-        words = text.split()
-        if words:
-            avg_word_len = sum(len(w) for w in words) / len(words)
-            if avg_word_len <= 2:
-                return True
-
-        # Check for fragmented individual Arabic characters
-        fragmented_patterns = [
-            len(word) == 1 and '\u0600' <= word <= '\u06FF' for word in words
-        ]
-        if any(fragmented_patterns):
-            return True
-
-        # Check for artifacts (isolated Unicode characters)
-        artifacts = ['ﻢ', 'ﻪ', 'ﻆ', 'ﺍ', 'ﺕ', 'ﺏ', 'ﻞ', 'ﺝ', 'ﺡ', 'ﺥ', 'ﺩ', 'ﺫ', 'ﺭ', 'ﺯ', 'ﺱ', 'ﺵ', 'ﺹ', 'ﺽ', 'ﻁ', 'ﻅ', 'ﻉ', 'ﻍ', 'ﻑ', 'ﻕ', 'ﻙ', 'ﻝ', 'ﻡ', 'ﻥ', 'ﻩ', 'ﻭ', 'ﻱ']
-        if any(artifact in text for artifact in artifacts):
-            return True
-
-        # For PDFs, ALWAYS apply fixing if Arabic text is detected
-        arabic_ratio = arabic_chars / len(text.strip()) if text.strip() else 0
-        if arabic_ratio > 0.1:  # If 10% or more Arabic characters, fix it
-            return True
-
-        return False
-
-    def _clean_text_artifacts(self, text: str) -> str:
-        """Remove artifacts and clean up text formatting"""
-        if not text:
-            return text
-        
-        import unicodedata
-        
-        # Remove excessive spaces first
-        text = ' '.join(text.split())
-        
-        # COMPREHENSIVE Arabic Unicode artifact cleaning (expanded mapping)
-        artifacts_map = {
-            # Hamza forms
-            'ﺀ': 'ء', 'ﺁ': 'آ', 'ﺂ': 'آ', 
-            # Alef forms
-            'ﺍ': 'ا', 'ﺎ': 'ا', 'ﺃ': 'أ', 'ﺄ': 'أ', 'ﺇ': 'إ', 'ﺈ': 'إ', 'ﺁ': 'آ', 'ﺂ': 'آ',
-            # Alef with hamza
-            'ﺅ': 'ؤ', 'ﺆ': 'ؤ', 'ﺋ': 'ئ', 'ﺌ': 'ئ', 'ﺉ': 'ئ', 'ﺊ': 'ئ',
-            # Ba forms  
-            'ﺏ': 'ب', 'ﺐ': 'ب', 'ﺑ': 'ب', 'ﺒ': 'ب',
-            # Ta forms
-            'ﺕ': 'ت', 'ﺖ': 'ت', 'ﺗ': 'ت', 'ﺘ': 'ت', 'ﺓ': 'ة', 'ﺔ': 'ة',
-            # Tha forms
-            'ﺙ': 'ث', 'ﺚ': 'ث', 'ﺛ': 'ث', 'ﺜ': 'ث',
-            # Jeem forms
-            'ﺝ': 'ج', 'ﺞ': 'ج', 'ﺟ': 'ج', 'ﺠ': 'ج',
-            # Hha forms
-            'ﺡ': 'ح', 'ﺢ': 'ح', 'ﺣ': 'ح', 'ﺤ': 'ح',
-            # Kha forms
-            'ﺥ': 'خ', 'ﺦ': 'خ', 'ﺧ': 'خ', 'ﺨ': 'خ',
-            # Dal forms
-            'ﺩ': 'د', 'ﺪ': 'د',
-            # Thal forms
-            'ﺫ': 'ذ', 'ﺬ': 'ذ',
-            # Ra forms
-            'ﺭ': 'ر', 'ﺮ': 'ر',
-            # Zain forms
-            'ﺯ': 'ز', 'ﺰ': 'ز',
-            # Seen forms
-            'ﺱ': 'س', 'ﺲ': 'س', 'ﺳ': 'س', 'ﺴ': 'س',
-            # Sheen forms
-            'ﺵ': 'ش', 'ﺶ': 'ش', 'ﺷ': 'ش', 'ﺸ': 'ش',
-            # Sad forms
-            'ﺹ': 'ص', 'ﺺ': 'ص', 'ﺻ': 'ص', 'ﺼ': 'ص',
-            # Dad forms
-            'ﺽ': 'ض', 'ﺾ': 'ض', 'ﺿ': 'ض', 'ﻀ': 'ض',
-            # Taa forms
-            'ﻁ': 'ط', 'ﻂ': 'ط', 'ﻃ': 'ط', 'ﻄ': 'ط',
-            # Dhaa forms
-            'ﻅ': 'ظ', 'ﻆ': 'ظ', 'ﻇ': 'ظ', 'ﻈ': 'ظ',
-            # Ain forms
-            'ﻉ': 'ع', 'ﻊ': 'ع', 'ﻋ': 'ع', 'ﻌ': 'ع',
-            # Ghain forms
-            'ﻍ': 'غ', 'ﻎ': 'غ', 'ﻏ': 'غ', 'ﻐ': 'غ',
-            # Fa forms
-            'ﻑ': 'ف', 'ﻒ': 'ف', 'ﻓ': 'ف', 'ﻔ': 'ف',
-            # Qaf forms
-            'ﻕ': 'ق', 'ﻖ': 'ق', 'ﻗ': 'ق', 'ﻘ': 'ق',
-            # Kaf forms
-            'ﻙ': 'ك', 'ﻚ': 'ك', 'ﻛ': 'ك', 'ﻜ': 'ك',
-            # Lam forms
-            'ﻝ': 'ل', 'ﻞ': 'ل', 'ﻟ': 'ل', 'ﻠ': 'ل',
-            # Meem forms
-            'ﻡ': 'م', 'ﻢ': 'م', 'ﻣ': 'م', 'ﻤ': 'م',
-            # Noon forms
-            'ﻥ': 'ن', 'ﻦ': 'ن', 'ﻧ': 'ن', 'ﻨ': 'ن',
-            # Ha forms
-            'ﻩ': 'ه', 'ﻪ': 'ه', 'ﻫ': 'ه', 'ﻬ': 'ه',
-            # Waw forms
-            'ﻭ': 'و', 'ﻮ': 'و',
-            # Ya forms
-            'ﻱ': 'ي', 'ﻲ': 'ي', 'ﻳ': 'ي', 'ﻴ': 'ي',
-            # Lam-Alef ligatures
-            'ﻼ': 'لا', 'ﻻ': 'لا', 'ﻷ': 'لأ', 'ﻹ': 'لإ', 'ﻵ': 'لآ',
-        }
-        
-        # Apply character mapping
-        for artifact, correct_char in artifacts_map.items():
-            text = text.replace(artifact, correct_char)
-        
-        # Final cleanup: normalize Unicode (NFC form)
-        try:
-            text = unicodedata.normalize('NFC', text)
-        except:
-            pass
-        
-        return text
-
-    def _normalize_fragmented_arabic(self, text: str) -> str:
-        """Merge fragmented Arabic letters back into words"""
-        if not text.strip():
-            return text
-        
-        words = text.split()
-        current_word = ""
-        normalized_words = []
-        
-        for word in words:
-            word_clean = word.strip()
-            
-            if not word_clean:
-                continue
-                
-            # If this is a single Arabic character
-            if len(word_clean) == 1 and '\u0600' <= word_clean <= '\u06FF':
-                # Merge with current_word if it's building an Arabic word
-                if current_word and '\u0600' <= current_word[-1] <= '\u06FF':
-                    current_word += word_clean
-                else:
-                    if current_word:
-                        normalized_words.append(current_word)
-                    current_word = word_clean
-            
-            # If this is a number or English, separate it
-            elif word_clean.isdigit() or word_clean.isalpha() or word_clean in ['.', ',', ':', ';']:
-                if current_word:
-                    normalized_words.append(current_word)
-                    current_word = ""
-                normalized_words.append(word_clean)
-            
-            # If this is a longer word that contains Arabic
-            else:
-                arabic_chars = sum(1 for c in word_clean if '\u0600' <= c <= '\u06FF')
-                if arabic_chars > len(word_clean) * 0.7:  # Mostly Arabic word
-                    if current_word and '\u0600' <= current_word[-1] <= '\u06FF':
-                        current_word += word_clean
-                    else:
-                        if current_word:
-                            normalized_words.append(current_word)
-                            current_word = ""
-                        current_word = word_clean
-                else:  # Non-Arabic word
-                    if current_word:
-                        normalized_words.append(current_word)
-                        current_word = ""
-                    normalized_words.append(word_clean)
-        
-        # Add any remaining word
-        if current_word:
-            normalized_words.append(current_word)
-        
-        # Clean up artifacts and excessive spaces
-        normalized_text = ' '.join(normalized_words)
-        normalized_text = self._clean_text_artifacts(normalized_text)
-        
-        return normalized_text
-
-    def _fix_arabic_text(self, text: str) -> str:
-        """Comprehensive Arabic text fixing with proper RTL handling"""
-        try:
-            import arabic_reshaper
-            from bidi.algorithm import get_display
-        except ImportError:
-            logger.warning("Arabic text processing libraries not available")
-            return text
-        
-        if not text.strip():
-            return text
-        
-        # Step 1: Clean Unicode artifacts first
-        cleaned_text = self._clean_text_artifacts(text)
-        
-        # Step 2: Normalize fragmented text - merge broken letters into words
-        normalized = self._normalize_fragmented_arabic(cleaned_text)
-        
-        # Step 3: Apply reshaping to Arabic words
-        words = normalized.split()
-        fixed_words = []
-        
-        for word in words:
-            # Check if word contains Arabic characters
-            arabic_chars = sum(1 for c in word if '\u0600' <= c <= '\u06FF')
-            if arabic_chars > 0:
-                # Apply reshaping to connect Arabic letters properly
-                reshaped_word = arabic_reshaper.reshape(word)
-                fixed_words.append(reshaped_word)
-            else:
-                # Keep non-Arabic words as-is
-                fixed_words.append(word)
-        
-        # Step 4: Join words and apply BiDi algorithm (simple, no extra marks)
-        text_for_bidi = ' '.join(fixed_words)
-        
-        # Apply BiDi algorithm simply
-        try:
-            fixed_text = get_display(text_for_bidi)
-        except Exception as e:
-            logger.warning(f"BiDi processing error: {e}")
-            fixed_text = text_for_bidi
-        
-        return fixed_text
-
-    def _ensure_rtl_text_direction(self, text: str) -> str:
-        """Ensure Arabic text is displayed in proper RTL direction"""
-        if not text.strip():
-            return text
-        
-        # Check if text contains Arabic characters
-        arabic_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        if arabic_chars == 0:
-            return text
-        
-        # Split text into lines and process each line
-        lines = text.split('\n')
-        rtl_lines = []
-        
-        for line in lines:
-            if line.strip() and arabic_chars > 0:
-                # Split line into words and process each word
-                words = line.split()
-                processed_words = []
-                
-                for word in words:
-                    # Check if word contains Arabic
-                    word_arabic_chars = sum(1 for c in word if '\u0600' <= c <= '\u06FF')
-                    if word_arabic_chars > 0:
-                        # For Arabic words, apply RTL mark
-                        processed_word = '\u200F' + word + '\u200F'
-                        processed_words.append(processed_word)
-                    else:
-                        processed_words.append(word)
-                
-                # Rejoin words and add RTL mark to the entire line
-                processed_line = '\u202E' + ' '.join(processed_words) + '\u202C'
-                rtl_lines.append(processed_line)
-            else:
-                rtl_lines.append(line)
-        
-        return '\n'.join(rtl_lines)
-    
     # =====================================================
     # SECTION SEGMENTATION
     # =====================================================
@@ -825,84 +620,117 @@ class LegalCaseIngestionService:
         Returns:
             Dictionary with ingestion results
         """
+        file_path = None
         try:
             # Step 1: Save file and create KnowledgeDocument
             logger.info(f"Step 1: Saving uploaded file: {filename}")
             file_path, file_hash, knowledge_doc = await self.save_uploaded_case_file(
                 file_content, filename, uploaded_by
             )
+            return await self._process_case_document(file_path, file_hash, knowledge_doc, case_metadata)
             
-            # Step 2: Extract text from file
-            logger.info(f"Step 2: Extracting text from: {file_path}")
-            text = self.extract_text(file_path)
-            
-            if not text or len(text) < 50:
-                raise ValueError(
-                    f"Extracted text is too short ({len(text)} chars). "
-                    "Possible causes:\n"
-                    "  1. PDF is image-based (scanned) - Install Tesseract OCR for extraction\n"
-                    "  2. PDF is mostly images with minimal text\n"
-                    "  3. File is corrupted or password-protected\n"
-                    "  4. Text extraction failed - check logs for details"
-                )
-            
-            logger.info(f"Extracted {len(text)} characters")
-            
-            # Step 3: Split into sections
-            logger.info(f"Step 3: Splitting text into sections")
-            sections = self.split_case_sections(text)
+        except Exception as e:
+            return await self._ingestion_failed(e, file_path)
+    
+    async def ingest_stored_case_file(
+        self,
+        upload: IngestedUpload,
+        case_metadata: Dict[str, Any],
+        uploaded_by: int
+    ) -> Dict[str, Any]:
+        """
+        Complete pipeline for a case file already streamed to disk (multipart
+        or resumable upload); the duplicate check happened while receiving it.
+        
+        Args:
+            upload: The stored file with its hash and size
+            case_metadata: Dictionary containing case metadata
+            uploaded_by: User ID who uploaded the file
             
-            # Step 4: Save case and sections to database
-            logger.info(f"Step 4: Saving case and sections to database")
-            legal_case = await self.save_case_with_sections(
-                case_metadata, sections, knowledge_doc.id
+        Returns:
+            Dictionary with ingestion results
+        """
+        try:
+            logger.info(f"Step 1: Registering stored file: {upload.filename}")
+            knowledge_doc = await self.create_case_document(
+                upload.path, upload.sha256, upload.filename, upload.size, uploaded_by
             )
-            
-            # Keep status as 'raw' - will be updated to 'processed' after embeddings are generated
-            # Status stays 'raw' until /generate-embeddings endpoint is called
-            knowledge_doc.status = 'raw'
-            
-            # Keep LegalCase status as 'raw' too
-            legal_case.status = 'raw'
-            
-            # Commit transaction
-            await self.db.commit()
-            
-            logger.info(f"✅ Successfully ingested legal case ID: {legal_case.id}")
-            
-            # Return results
-            return {
-                'success': True,
-                'message': 'Legal case uploaded successfully',
-                'data': {
-                    'knowledge_document_id': knowledge_doc.id,
-                    'legal_case_id': legal_case.id,
-                    'case_number': legal_case.case_number,
-                    'title': legal_case.title,
-                    'file_path': file_path,
-                    'file_hash': file_hash,
-                    'text_length': len(text),
-                    'sections_found': [k for k, v in sections.items() if v],
-                    'sections_count': sum(1 for v in sections.values() if v)
-                }
-            }
+            return await self._process_case_document(upload.path, upload.sha256, knowledge_doc, case_metadata)
             
         except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Failed to ingest legal case: {str(e)}")
-            
-            # Clean up file if it was saved
-            try:
-                if 'file_path' in locals():
-                    os.remove(file_path)
-            except:
-                pass
-            
-            return {
-                'success': False,
-                'message': f'Failed to ingest legal case: {str(e)}',
-                'data': None
+            return await self._ingestion_failed(e, upload.path)
+    
+    async def _process_case_document(
+        self,
+        file_path: str,
+        file_hash: str,
+        knowledge_doc: KnowledgeDocument,
+        case_metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Steps 2-4 of the pipeline: extract, segment and save the case."""
+        # Step 2: Extract text from file
+        logger.info(f"Step 2: Extracting text from: {file_path}")
+        text = self.extract_text(file_path, file_hash)
+        _check_extracted_text(text)
+        
+        logger.info(f"Extracted {len(text)} characters")
+        
+        # Step 3: Split into sections
+        logger.info(f"Step 3: Splitting text into sections")
+        sections = self.split_case_sections(text)
+        
+        # Step 4: Save case and sections to database
+        logger.info(f"Step 4: Saving case and sections to database")
+        legal_case = await self.save_case_with_sections(
+            case_metadata, sections, knowledge_doc.id
+        )
+        
+        # Keep status as 'raw' - will be updated to 'processed' after embeddings are generated
+        # Status stays 'raw' until /generate-embeddings endpoint is called
+        knowledge_doc.status = 'raw'
+        
+        # Keep LegalCase status as 'raw' too
+        legal_case.status = 'raw'
+        
+        # Commit transaction
+        await self.db.commit()
+        
+        logger.info(f"✅ Successfully ingested legal case ID: {legal_case.id}")
+        
+        # Return results
+        return {
+            'success': True,
+            'message': 'Legal case uploaded successfully',
+            'data': {
+                'knowledge_document_id': knowledge_doc.id,
+                'legal_case_id': legal_case.id,
+                'case_number': legal_case.case_number,
+                'title': legal_case.title,
+                'file_path': file_path,
+                'file_hash': file_hash,
+                'text_length': len(text),
+                'sections_found': [k for k, v in sections.items() if v],
+                'sections_count': sum(1 for v in sections.values() if v)
             }
+        }
+    
+    async def _ingestion_failed(self, error: Exception, file_path: Optional[str]) -> Dict[str, Any]:
+        """Roll back, remove the stored file and report the failure."""
+        await self.db.rollback()
+        logger.error(f"Failed to ingest legal case: {str(error)}")
+        
+        # Clean up file if it was saved
+        try:
+            if file_path:
+                os.remove(file_path)
+        except:
+            pass
+        
+        return {
+            'success': False,
+            'message': f'Failed to ingest legal case: {str(error)}',
+            'data': None
+        }
     
     # =====================================================
     # BATCH INGESTION
@@ -911,7 +739,9 @@ class LegalCaseIngestionService:
     async def ingest_multiple_cases(
         self,
         cases_data: List[Dict[str, Any]],
-        uploaded_by: int
+        uploaded_by: int,
+        concurrent: bool = False,
+        max_workers: int = CASE_INGEST_WORKERS
     ) -> Dict[str, Any]:
         """
         Ingest multiple legal cases in batch.
@@ -922,10 +752,16 @@ class LegalCaseIngestionService:
                 - filename: str
                 - case_metadata: dict
             uploaded_by: User ID who uploaded the files
+            concurrent: Extract files in parallel worker processes (see
+                ``_ingest_cases_concurrently``) instead of one after another
+            max_workers: Worker processes for concurrent mode
             
         Returns:
-            Dictionary with batch ingestion results
+            Dictionary with batch ingestion results, one entry per file in input order
         """
+        if concurrent:
+            return await self._ingest_cases_concurrently(cases_data, uploaded_by, max_workers)
+        
         results = {
             'total': len(cases_data),
             'successful': 0,
@@ -943,17 +779,142 @@ class LegalCaseIngestionService:
                 uploaded_by=uploaded_by
             )
             
-            if result['success']:
-                results['successful'] += 1
-            else:
-                results['failed'] += 1
-            
-            results['cases'].append({
-                'filename': case_data['filename'],
-                'success': result['success'],
-                'message': result['message'],
-                'data': result['data']
-            })
+            self._add_batch_result(results, case_data['filename'], result)
         
         return results
-
+    
+    async def _ingest_cases_concurrently(
+        self,
+        cases_data: List[Dict[str, Any]],
+        uploaded_by: int,
+        max_workers: int
+    ) -> Dict[str, Any]:
+        """
+        Concurrent batch ingestion.
+        
+        1. Files are hashed, checked for duplicates (in the database and within
+           the batch) and stored on disk.
+        2. Extraction, Arabic normalisation and section splitting run in a
+           process pool (``extract_case_file``), so the event loop stays free.
+        3. This coroutine is the single writer: as each extraction finishes it
+           creates the document, case and sections and commits them, so one
+           failed file never rolls back another.
+        """
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(cases_data)
+        pending: Dict[int, str] = {}
+        batch_hashes: Dict[int, str] = {}
+        seen_hashes = set()
+        
+        for index, case_data in enumerate(cases_data):
+            file_hash = hashlib.sha256(case_data['file_content']).hexdigest()
+            existing_doc = await self.find_duplicate(file_hash)
+            if existing_doc or file_hash in seen_hashes:
+                duplicate_of = f"{existing_doc.title} (ID: {existing_doc.id})" if existing_doc else "an earlier file in this batch"
+                outcomes[index] = await self._ingestion_failed(
+                    ValueError(f"Duplicate file detected. Document already exists: {duplicate_of}"), None
+                )
+                continue
+            seen_hashes.add(file_hash)
+            batch_hashes[index] = file_hash
+            try:
+                pending[index] = self._store_case_file(case_data['file_content'], file_hash, case_data['filename'])
+            except Exception as e:
+                outcomes[index] = await self._ingestion_failed(e, None)
+        
+        if pending:
+            workers = max(1, min(max_workers, len(pending)))
+            logger.info(f"📚 Extracting {len(pending)} case files with {workers} worker process(es)")
+            loop = asyncio.get_running_loop()
+            # Spawned: forking the server would copy its threads' held locks into the workers
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                async def extract(index: int) -> Tuple[int, Any]:
+                    try:
+                        return index, await loop.run_in_executor(
+                            pool, extract_case_file, pending[index], str(self.upload_dir), batch_hashes[index]
+                        )
+                    except BrokenProcessPool:
+                        # A crashed worker takes the pool down; finish this file on a thread
+                        logger.warning(f"⚠️ Extraction pool broke; extracting {pending[index]} in-process")
+                        try:
+                            return index, await asyncio.to_thread(
+                                extract_case_file, pending[index], str(self.upload_dir), batch_hashes[index]
+                            )
+                        except Exception as e:
+                            return index, e
+                    except Exception as e:
+                        return index, e
+                
+                for done, next_result in enumerate(asyncio.as_completed([extract(index) for index in pending]), 1):
+                    index, extracted = await next_result
+                    outcomes[index] = await self._write_extracted_case(
+                        cases_data[index], pending[index], batch_hashes[index], extracted, uploaded_by
+                    )
+                    logger.info(f"Processed case {done}/{len(pending)}: {cases_data[index]['filename']}")
+            finally:
+                # Don't hold the event loop for queued files after a cancellation or failed write
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        results = {
+            'total': len(cases_data),
+            'successful': 0,
+            'failed': 0,
+            'cases': []
+        }
+        for case_data, outcome in zip(cases_data, outcomes):
+            self._add_batch_result(results, case_data['filename'], outcome)
+        return results
+    
+    async def _write_extracted_case(
+        self,
+        case_data: Dict[str, Any],
+        file_path: str,
+        file_hash: str,
+        extracted: Any,
+        uploaded_by: int
+    ) -> Dict[str, Any]:
+        """Persist one extraction result (or report its failure) in its own transaction."""
+        try:
+            if isinstance(extracted, Exception):
+                raise extracted
+            knowledge_doc = await self.create_case_document(
+                file_path, file_hash, case_data['filename'], len(case_data['file_content']), uploaded_by
+            )
+            sections = extracted['sections']
+            legal_case = await self.save_case_with_sections(
+                case_data['case_metadata'], sections, knowledge_doc.id
+            )
+            await self.db.commit()
+        except Exception as e:
+            return await self._ingestion_failed(e, file_path)
+        
+        logger.info(f"✅ Successfully ingested legal case ID: {legal_case.id}")
+        return {
+            'success': True,
+            'message': 'Legal case uploaded successfully',
+            'data': {
+                'knowledge_document_id': knowledge_doc.id,
+                'legal_case_id': legal_case.id,
+                'case_number': legal_case.case_number,
+                'title': legal_case.title,
+                'file_path': file_path,
+                'file_hash': file_hash,
+                'text_length': extracted['text_length'],
+                'sections_found': [k for k, v in sections.items() if v],
+                'sections_count': sum(1 for v in sections.values() if v)
+            }
+        }
+    
+    @staticmethod
+    def _add_batch_result(results: Dict[str, Any], filename: str, result: Dict[str, Any]) -> None:
+        if result['success']:
+            results['successful'] += 1
+        else:
+            results['failed'] += 1
+        
+        results['cases'].append({
+            'filename': filename,
+            'success': result['success'],
+            'message': result['message'],
+            'data': result['data']
+        })
@@ -24,14 +24,6 @@ from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, delete
 from sqlalchemy.orm import selectinload
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-try:
-    from langchain_chroma import Chroma
-except ImportError:
-    from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from google import genai
 
 from ....models.legal_knowledge import (
     KnowledgeDocument, LawSource, LawArticle, KnowledgeChunk,
@@ -41,6 +33,8 @@ from ....schemas.document_upload import (
     LawSourceSummary, LawArticleSummary, KnowledgeChunkSummary,
     BulkOperationResult, DocumentProcessingStats
 )
+from ....utils.lazy_loader import lazy_proxy
+from .index_statistics_service import get_index_statistics
 
 logger = logging.getLogger(__name__)
 
@@ -83,6 +77,15 @@ class VectorstoreManager:
         logger.info("🚀 Initializing VectorstoreManager...")
         
         try:
+            # Heavy imports are deferred until the vectorstore engine is first used
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            try:
+                from langchain_chroma import Chroma
+            except ImportError:
+                from langchain_community.vectorstores import Chroma
+            from langchain_huggingface import HuggingFaceEmbeddings
+            from google import genai
+            
             # Initialize Gemini client
             logger.info("🤖 Initializing Gemini client...")
             self.gemini_api_key = os.getenv("GEMINI_API_KEY")
@@ -109,6 +112,11 @@ class VectorstoreManager:
                 persist_directory=VECTORSTORE_PATH,
             )
             
+            # Build cached index statistics off the request path
+            get_index_statistics(persist_directory=VECTORSTORE_PATH).load_in_background(
+                lambda: self.vectorstore._collection
+            )
+            
             # Initialize text splitter
             self.text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=CHUNK_SIZE,
@@ -121,7 +129,7 @@ class VectorstoreManager:
             logger.error(f"❌ Failed to initialize VectorstoreManager: {e}")
             raise
     
-    def get_vectorstore(self) -> Chroma:
+    def get_vectorstore(self):
         """Get Chroma vectorstore instance."""
         return self.vectorstore
     
@@ -129,7 +137,7 @@ class VectorstoreManager:
         """Get embeddings instance."""
         return self.embeddings
     
-    def get_text_splitter(self) -> RecursiveCharacterTextSplitter:
+    def get_text_splitter(self):
         """Get text splitter instance."""
         return self.text_splitter
     
@@ -137,8 +145,50 @@ class VectorstoreManager:
         """Get Gemini client instance."""
         return self.gemini_client
 
-# Global instance
-vectorstore_manager = VectorstoreManager()
+# Global instance (built on first use, see app/config/engines.py)
+vectorstore_manager = lazy_proxy("vectorstore")
+
+def build_chunk_embedding_metadata(
+    chunk: KnowledgeChunk,
+    document: Optional[KnowledgeDocument],
+    law_source: Optional[LawSource] = None,
+    article: Optional[LawArticle] = None
+) -> Dict[str, Any]:
+    """
+    Build the Chroma metadata stored alongside a chunk's embedding.
+    
+    Shared by embedding generation and vector reconciliation so re-embedded
+    chunks carry exactly the same metadata as the originals.
+    """
+    chunk_metadata = {
+        "document_id": chunk.document_id,
+        "chunk_id": chunk.id,
+        "chunk_index": chunk.chunk_index,
+        "tokens_count": chunk.tokens_count or 0,
+        "document_title": document.title if document else "",
+        "document_category": document.category if document else "",
+    }
+    
+    # Add law source metadata if available
+    if law_source:
+        chunk_metadata.update({
+            "law_source_id": law_source.id,
+            "law_name": law_source.name,
+            "law_type": law_source.type,
+            "jurisdiction": law_source.jurisdiction or "",
+            "issuing_authority": law_source.issuing_authority or "",
+        })
+    
+    # Add article metadata if available
+    if article:
+        chunk_metadata.update({
+            "article_id": article.id,
+            "article_number": article.article_number or "",
+            "article_title": article.title or "",
+        })
+    
+    return chunk_metadata
+
 
 # ---------------------------------
 # Dual Database Operations Manager
@@ -153,6 +203,7 @@ class DualDatabaseManager:
         self.db = db_session
         self.vectorstore = vectorstore_manager.get_vectorstore()
         self.text_splitter = vectorstore_manager.get_text_splitter()
+        self.index_stats = get_index_statistics(persist_directory=VECTORSTORE_PATH)
     
     async def add_chunk_to_both_databases(
         self,
@@ -179,6 +230,7 @@ class DualDatabaseManager:
                 metadatas=[chroma_metadata],
                 ids=[str(chunk.id)]  # Use SQL ID as Chroma ID for synchronization
             )
+            self.index_stats.record_added([str(chunk.id)], [chroma_metadata])
             
             # Persist Chroma changes
             self.vectorstore.persist()
@@ -221,6 +273,7 @@ class DualDatabaseManager:
                 metadatas=[chroma_metadata],
                 ids=[str(chunk_id)]
             )
+            self.index_stats.record_added([str(chunk_id)], [chroma_metadata])
             self.vectorstore.persist()
             
             logger.info(f"✅ Chunk {chunk_id} updated in both databases")
@@ -245,6 +298,7 @@ class DualDatabaseManager:
             # Delete from Chroma vectorstore
             self.vectorstore.delete(ids=[str(chunk_id)])
             self.vectorstore.persist()
+            self.index_stats.record_deleted([str(chunk_id)])
             
             logger.info(f"✅ Chunk {chunk_id} deleted from both databases")
             return True
@@ -270,6 +324,7 @@ class DualDatabaseManager:
             if chunk_ids:
                 self.vectorstore.delete(ids=chunk_ids)
                 self.vectorstore.persist()
+                self.index_stats.record_deleted(chunk_ids)
             
             # Delete document from SQL (cascade will handle chunks)
             document = await self.db.get(KnowledgeDocument, document_id)
@@ -323,40 +378,24 @@ class DualDatabaseManager:
         
         return chroma_metadata
     
-    async def sync_database_states(self) -> Dict[str, int]:
+    async def sync_database_states(self, repair: bool = False) -> Dict[str, Any]:
         """
         Synchronize SQL and Chroma databases.
+
+        Streams both stores page by page through the reconciliation engine
+        instead of loading every chunk and every Chroma id into memory.
+
+        Args:
+            repair: Re-embed missing chunks and delete orphaned vectors
+
         Returns statistics about synchronization.
         """
         try:
-            stats = {
-                "sql_chunks": 0,
-                "chroma_chunks": 0,
-                "missing_in_chroma": 0,
-                "missing_in_sql": 0,
-                "synced": 0
-            }
-            
-            # Get all chunks from SQL
-            sql_result = await self.db.execute(select(KnowledgeChunk))
-            sql_chunks = sql_result.scalars().all()
-            stats["sql_chunks"] = len(sql_chunks)
-            
-            # Get all chunks from Chroma
-            chroma_collection = self.vectorstore._collection
-            chroma_chunks = chroma_collection.get()
-            stats["chroma_chunks"] = len(chroma_chunks.get("ids", []))
-            
-            # Find missing chunks
-            sql_ids = {str(chunk.id) for chunk in sql_chunks}
-            chroma_ids = set(chroma_chunks.get("ids", []))
-            
-            missing_in_chroma = sql_ids - chroma_ids
-            missing_in_sql = chroma_ids - sql_ids
-            
-            stats["missing_in_chroma"] = len(missing_in_chroma)
-            stats["missing_in_sql"] = len(missing_in_sql)
-            stats["synced"] = len(sql_ids & chroma_ids)            
+            from .vector_reconciliation_service import VectorReconciliationEngine
+
+            engine = VectorReconciliationEngine(self.db, self.vectorstore, checkpoint_path=None)
+            report = await engine.reconcile(repair=repair, resume=False)
+            stats = report.to_dict()
             logger.info(f"📊 Database sync stats: {stats}")
             return stats
             
@@ -1095,17 +1134,20 @@ class DocumentUploadService:
             logger.error(f"❌ Error deleting document {document_id}: {e}")
             return False
     
-    async def sync_databases(self) -> Dict[str, Any]:
+    async def sync_databases(self, repair: bool = False) -> Dict[str, Any]:
         """
         Synchronize SQL and Chroma databases.
         
+        Args:
+            repair: Re-embed missing chunks and delete orphaned vectors
+        
         Returns:
             Dictionary with synchronization statistics
         """
         logger.info("🔄 Synchronizing SQL and Chroma databases")
         
         try:
-            stats = await self.dual_db_manager.sync_database_states()
+            stats = await self.dual_db_manager.sync_database_states(repair=repair)
             
             logger.info(f"✅ Database synchronization completed: {stats}")
             return {
@@ -1141,9 +1183,9 @@ class DocumentUploadService:
             )
             sql_row = sql_stats.first()
             
-            # Get Chroma database status
-            chroma_collection = self.dual_db_manager.vectorstore._collection
-            chroma_count = chroma_collection.count()
+            # Get Chroma database status from the cached index statistics
+            index_stats = self.dual_db_manager.index_stats.snapshot()
+            chroma_count = index_stats["total_vectors"]
             
             return {
                 "sql_database": {
@@ -1153,7 +1195,11 @@ class DocumentUploadService:
                     "chunks": sql_row.chunks or 0
                 },
                 "chroma_database": {
-                    "chunks": chroma_count
+                    "chunks": chroma_count,
+                    "is_empty": index_stats["is_empty"],
+                    "last_modified": index_stats["last_modified"],
+                    "index_size_bytes": index_stats["index_size_bytes"],
+                    "statistics_loaded": index_stats["loaded"]
                 },
                 "synchronization": {
                     "sql_chunks": sql_row.chunks or 0,
@@ -1255,32 +1301,7 @@ class DocumentUploadService:
                 article = articles_dict.get(chunk.article_id) if chunk.article_id else None
                 
                 # Prepare metadata for Chroma
-                chunk_metadata = {
-                    "document_id": chunk.document_id,
-                    "chunk_id": chunk.id,
-                    "chunk_index": chunk.chunk_index,
-                    "tokens_count": chunk.tokens_count or 0,
-                    "document_title": document.title,
-                    "document_category": document.category,
-                }
-                
-                # Add law source metadata if available
-                if chunk_law_source:
-                    chunk_metadata.update({
-                        "law_source_id": chunk_law_source.id,
-                        "law_name": chunk_law_source.name,
-                        "law_type": chunk_law_source.type,
-                        "jurisdiction": chunk_law_source.jurisdiction or "",
-                        "issuing_authority": chunk_law_source.issuing_authority or "",
-                    })
-                
-                # Add article metadata if available
-                if article:
-                    chunk_metadata.update({
-                        "article_id": article.id,
-                        "article_number": article.article_number or "",
-                        "article_title": article.title or "",
-                    })
+                chunk_metadata = build_chunk_embedding_metadata(chunk, document, chunk_law_source, article)
                 
                 texts.append(chunk_text)
                 metadatas.append(chunk_metadata)
@@ -1304,6 +1325,7 @@ class DocumentUploadService:
             
             # Persist Chroma changes
             self.dual_db_manager.vectorstore.persist()
+            self.dual_db_manager.index_stats.record_added(chunk_ids, metadatas)
             
             logger.info(f"✅ Successfully generated embeddings for {len(texts)} chunks")
             
@@ -1382,21 +1404,18 @@ class DocumentUploadService:
                     "message": "Gemini API key not configured"
                 }
             
-            # Check if Chroma collection has any data
-            logger.info("📊 Checking Chroma collection...")
-            try:
-                chroma_collection = self.dual_db_manager.vectorstore._collection
-                peek_result = chroma_collection.peek(limit=1)
-                if peek_result and 'ids' in peek_result and len(peek_result['ids']) == 0:
-                    logger.warning("⚠️ Chroma collection is empty")
-                    return {
-                        "success": False,
-                        "query": query,
-                        "answer": "لا توجد مستندات في قاعدة البيانات. يرجى رفع المستندات القانونية أولاً.",
-                        "message": "No documents in database"
-                    }
-            except Exception as peek_error:
-                logger.warning(f"⚠️ Could not check Chroma collection: {peek_error}")
+            # Check if Chroma collection has any data (cached; unknown while statistics
+            # are still loading, in which case we just search). A cached "empty" is
+            # confirmed with a count, since other processes may have added vectors.
+            index_stats = self.dual_db_manager.index_stats
+            if index_stats.is_empty and index_stats.confirm_empty(self.dual_db_manager.vectorstore._collection):
+                logger.warning("⚠️ Chroma collection is empty")
+                return {
+                    "success": False,
+                    "query": query,
+                    "answer": "لا توجد مستندات في قاعدة البيانات. يرجى رفع المستندات القانونية أولاً.",
+                    "message": "No documents in database"
+                }
             
             # Step 1: Perform similarity search
             logger.info("🔍 Performing similarity search...")
@@ -0,0 +1,311 @@
+"""
+Index Statistics Service - Cached Chroma collection statistics
+
+Keeps an in-memory view of what the vector index contains (total vectors,
+vectors per document and per law, emptiness, last modification time and
+on-disk size) so request handlers never have to `peek()` or `count()` the
+Chroma collection.
+
+The view is built by paging through the collection's metadata in a
+background thread and kept current by the code paths that add or delete
+vectors (`record_added` / `record_deleted`). Other processes (the corpus
+ingestion CLI, a second worker) write to the same collection without going
+through this object, so the view is also rebuilt every
+INDEX_STATS_REFRESH_SECONDS, and a cached "empty" is confirmed with
+`collection.count()` before callers act on it.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "legal_knowledge"
+DEFAULT_PERSIST_DIRECTORY = "./chroma_store"
+LOAD_PAGE_SIZE = int(os.getenv("INDEX_STATS_LOAD_PAGE_SIZE", "1000"))
+REFRESH_SECONDS = float(os.getenv("INDEX_STATS_REFRESH_SECONDS", "300"))
+
+# (document key, law key) recorded for every vector id
+_EntryKeys = Tuple[Optional[str], Optional[str]]
+
+
+def _document_key(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not metadata:
+        return None
+    value = metadata.get("document_id")
+    return str(value) if value not in (None, "") else None
+
+
+def _law_key(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not metadata:
+        return None
+    # Law-document chunks carry the law source id; RAG uploads only carry the law name
+    value = metadata.get("law_source_id") or metadata.get("law_name")
+    return str(value) if value not in (None, "") else None
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+class IndexStatistics:
+    """Thread-safe, incrementally maintained statistics for one Chroma collection."""
+
+    def __init__(
+        self,
+        collection_name: str,
+        persist_directory: Optional[str] = None,
+        refresh_seconds: float = REFRESH_SECONDS
+    ):
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _EntryKeys] = {}
+        self._per_document: Counter = Counter()
+        self._per_law: Counter = Counter()
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._loading = False
+        self._load_error: Optional[str] = None
+        self._collection_provider: Optional[Callable[[], Any]] = None
+        self._added_during_load: Dict[str, _EntryKeys] = {}
+        self._deleted_during_load: set = set()
+        self._last_modified: Optional[datetime] = None
+        self._size_bytes: Optional[int] = None
+        self._size_dirty = True
+
+    # ==================== LOADING ====================
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def stale(self) -> bool:
+        """Whether the last load is older than the refresh interval."""
+        return (
+            self._loaded
+            and self.refresh_seconds > 0
+            and time.monotonic() - self._loaded_at >= self.refresh_seconds
+        )
+
+    def load_from_collection(self, collection: Any, page_size: int = LOAD_PAGE_SIZE) -> None:
+        """
+        Build the statistics by paging through the collection's metadata.
+
+        Only ids and metadata are fetched (no documents or embeddings), one
+        page at a time.
+        """
+        entries: Dict[str, _EntryKeys] = {}
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+            ids = page.get("ids", []) if page else []
+            if not ids:
+                break
+            metadatas = page.get("metadatas") or [None] * len(ids)
+            for vector_id, metadata in zip(ids, metadatas):
+                entries[vector_id] = (_document_key(metadata), _law_key(metadata))
+            offset += len(ids)
+
+        with self._lock:
+            if not self._loaded:
+                # Writes recorded before the first load
+                for vector_id, keys in self._entries.items():
+                    entries.setdefault(vector_id, keys)
+            # Merge writes that raced with the page scan
+            entries.update(self._added_during_load)
+            for vector_id in self._deleted_during_load:
+                entries.pop(vector_id, None)
+            self._added_during_load = {}
+            self._deleted_during_load = set()
+            self._entries = entries
+            self._per_document = Counter(doc for doc, _ in entries.values() if doc is not None)
+            self._per_law = Counter(law for _, law in entries.values() if law is not None)
+            self._loaded = True
+            self._loaded_at = time.monotonic()
+            self._load_error = None
+            self._size_dirty = True
+            if self._last_modified is None and self.persist_directory and os.path.isdir(self.persist_directory):
+                self._last_modified = datetime.utcfromtimestamp(os.path.getmtime(self.persist_directory))
+        logger.info(f"📊 Index statistics loaded for '{self.collection_name}': {len(entries)} vectors")
+
+    def load_in_background(
+        self,
+        collection_provider: Optional[Callable[[], Any]] = None,
+        force: bool = False
+    ) -> None:
+        """
+        Load the statistics in a daemon thread unless loading, or loaded and fresh.
+
+        Args:
+            collection_provider: Returns the Chroma collection; called in the thread.
+                Remembered for later refreshes; omit it to reuse the last one.
+            force: Reload even if the statistics are fresh
+        """
+        with self._lock:
+            if collection_provider is not None:
+                self._collection_provider = collection_provider
+            provider = self._collection_provider
+            if provider is None or self._loading or (self._loaded and not (force or self.stale)):
+                return
+            self._loading = True
+
+        def worker() -> None:
+            try:
+                self.load_from_collection(provider())
+            except Exception as e:
+                self._load_error = f"{type(e).__name__}: {e}"
+                # Wait a full interval before retrying a failed refresh
+                self._loaded_at = time.monotonic()
+                logger.warning(f"⚠️ Could not load index statistics for '{self.collection_name}': {e}")
+            finally:
+                with self._lock:
+                    self._loading = False
+                    self._added_during_load = {}
+                    self._deleted_during_load = set()
+
+        threading.Thread(target=worker, name=f"index-stats-{self.collection_name}", daemon=True).start()
+
+    # ==================== UPDATES ====================
+
+    def record_added(self, ids: Iterable[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Record vectors written to the collection (re-adding an id replaces it)."""
+        ids = [str(vector_id) for vector_id in ids]
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            for vector_id, metadata in zip(ids, metadatas):
+                self._remove_entry(vector_id)
+                self._deleted_during_load.discard(vector_id)
+                doc, law = _document_key(metadata), _law_key(metadata)
+                self._entries[vector_id] = (doc, law)
+                if self._loading:
+                    self._added_during_load[vector_id] = (doc, law)
+                if doc is not None:
+                    self._per_document[doc] += 1
+                if law is not None:
+                    self._per_law[law] += 1
+            self._touch()
+
+    def record_deleted(self, ids: Iterable[str]) -> None:
+        """Record vectors removed from the collection."""
+        with self._lock:
+            for vector_id in ids:
+                self._remove_entry(str(vector_id))
+                self._added_during_load.pop(str(vector_id), None)
+                if self._loading or not self._loaded:
+                    self._deleted_during_load.add(str(vector_id))
+            self._touch()
+
+    def _remove_entry(self, vector_id: str) -> None:
+        previous = self._entries.pop(vector_id, None)
+        if previous is None:
+            return
+        doc, law = previous
+        for counter, key in ((self._per_document, doc), (self._per_law, law)):
+            if key is not None:
+                counter[key] -= 1
+                if counter[key] <= 0:
+                    del counter[key]
+
+    def _touch(self) -> None:
+        self._last_modified = datetime.utcnow()
+        self._size_dirty = True
+
+    # ==================== READS ====================
+
+    @property
+    def total_vectors(self) -> int:
+        return len(self._entries)
+
+    @property
+    def is_empty(self) -> Optional[bool]:
+        """True/False once loaded, None while the statistics are still unknown."""
+        if not self._loaded:
+            return None
+        self.load_in_background()
+        return not self._entries
+
+    def confirm_empty(self, collection: Any) -> bool:
+        """
+        Check a cached "empty" against the collection before acting on it.
+
+        A non-zero `count()` means another process has written vectors; the
+        statistics are then rebuilt in the background.
+        """
+        try:
+            count = collection.count()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not count '{self.collection_name}', trusting cached statistics: {e}")
+            return True
+        if not count:
+            return True
+        logger.info(f"📊 '{self.collection_name}' has {count} vectors written elsewhere, reloading statistics")
+        self.load_in_background(lambda: collection, force=True)
+        return False
+
+    def count_for_document(self, document_id: Any) -> int:
+        return self._per_document.get(str(document_id), 0)
+
+    def count_for_law(self, law_key: Any) -> int:
+        return self._per_law.get(str(law_key), 0)
+
+    def index_size_bytes(self) -> Optional[int]:
+        """On-disk size of the persist directory, recomputed only after changes."""
+        if not self.persist_directory or not os.path.isdir(self.persist_directory):
+            return None
+        if self._size_dirty or self._size_bytes is None:
+            self._size_bytes = _directory_size(self.persist_directory)
+            self._size_dirty = False
+        return self._size_bytes
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serialisable view of the statistics (starts a refresh when stale)."""
+        self.load_in_background()
+        with self._lock:
+            per_document = dict(self._per_document)
+            per_law = dict(self._per_law)
+            total = len(self._entries)
+        return {
+            "collection": self.collection_name,
+            "loaded": self._loaded,
+            "loading": self._loading,
+            "stale": self.stale,
+            "load_error": self._load_error,
+            "total_vectors": total,
+            "is_empty": self.is_empty,
+            "documents": per_document,
+            "laws": per_law,
+            "last_modified": self._last_modified.isoformat() if self._last_modified else None,
+            "index_size_bytes": self.index_size_bytes(),
+        }
+
+
+_STATISTICS: Dict[str, IndexStatistics] = {}
+_STATISTICS_LOCK = threading.Lock()
+
+
+def get_index_statistics(
+    collection_name: str = DEFAULT_COLLECTION,
+    persist_directory: Optional[str] = DEFAULT_PERSIST_DIRECTORY,
+) -> IndexStatistics:
+    """Return the shared statistics object for a collection."""
+    with _STATISTICS_LOCK:
+        stats = _STATISTICS.get(collection_name)
+        if stats is None:
+            stats = IndexStatistics(collection_name, persist_directory)
+            _STATISTICS[collection_name] = stats
+        return stats
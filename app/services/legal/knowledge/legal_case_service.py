@@ -8,7 +8,7 @@ Provides clean separation between routes and data access.
 import logging
 import json
 import hashlib
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -46,6 +46,30 @@ def _format_case_chunk_content(section_type: str, content: str) -> str:
     return f"**{label}**\n\n{content}"
 
 
+VALID_SECTION_TYPES = ["summary", "facts", "arguments", "ruling", "legal_basis"]
+
+
+def build_json_case_sections(case_data: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """
+    (section_type, content, chunk content) for each section of a JSON case.
+    
+    Pure function shared by the JSON upload and bulk ingestion; unknown
+    section types fall back to 'summary'.
+    """
+    sections = []
+    for section_data in case_data.get("sections", []):
+        section_type = section_data.get("section_type", "summary")
+        content = section_data.get("content", "")
+        
+        # Validate section_type
+        if section_type not in VALID_SECTION_TYPES:
+            logger.warning(f"Invalid section_type '{section_type}', defaulting to 'summary'")
+            section_type = "summary"
+        
+        sections.append((section_type, content, _format_case_chunk_content(section_type, content)))
+    return sections
+
+
 class LegalCaseService:
     """Service for managing legal cases."""
 
@@ -521,19 +545,9 @@ class LegalCaseService:
                 created_case_ids.append(legal_case.id)
                 
                 # Process case sections
-                sections_data = case_data.get("sections", [])
                 chunk_index = 0
                 
-                for section_data in sections_data:
-                    section_type = section_data.get("section_type", "summary")
-                    content = section_data.get("content", "")
-                    
-                    # Validate section_type
-                    valid_types = ["summary", "facts", "arguments", "ruling", "legal_basis"]
-                    if section_type not in valid_types:
-                        logger.warning(f"Invalid section_type '{section_type}', defaulting to 'summary'")
-                        section_type = "summary"
-                    
+                for section_type, content, chunk_content in build_json_case_sections(case_data):
                     # Create CaseSection
                     case_section = CaseSection(
                         case_id=legal_case.id,
@@ -547,7 +561,6 @@ class LegalCaseService:
                     total_sections += 1
                     
                     # Create KnowledgeChunk for the section with section type included
-                    chunk_content = _format_case_chunk_content(section_type, content)
                     chunk = KnowledgeChunk(
                         document_id=knowledge_doc.id,
                         chunk_index=chunk_index,
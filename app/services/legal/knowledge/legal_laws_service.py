@@ -3,9 +3,10 @@ import logging
 import json
 import hashlib
 import os
-from typing import Dict, Any, List, Optional
+import re
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy import select, func, or_, and_, delete
+from sqlalchemy import select, func, or_, and_, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
 
@@ -14,7 +15,9 @@ from ....models.legal_knowledge import (
     KnowledgeDocument, KnowledgeChunk
 )
 from ....processors.hierarchical_document_processor import HierarchicalDocumentProcessor
+from ....repositories.legal_knowledge_repository import LegalBulkRepository
 from ....parsers.parser_orchestrator import ParserOrchestrator
+from .index_statistics_service import get_index_statistics
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +76,73 @@ def _split_to_segments(text: str, seg_chars: int = 1200, overlap: int = 150) ->
     return segments
 
 
+def json_upload_hash(json_data: Any) -> str:
+    """Content hash identifying a JSON upload, independent of key order and formatting."""
+    json_content = json.dumps(json_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(json_content.encode('utf-8')).hexdigest()
+
+
+def build_json_article_rows(
+    articles_data: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+    """
+    LawArticle rows and, per article, KnowledgeChunk rows for a JSON law's
+    direct ``articles`` list.
+    
+    Pure function (no database, picklable output) so bulk ingestion can run
+    it in worker processes. Foreign keys (law_source_id, source_document_id,
+    document_id) are left for the caller to fill in; chunk_index runs across
+    the whole law.
+    """
+    article_rows: List[Dict[str, Any]] = []
+    chunk_rows_per_article: List[List[Dict[str, Any]]] = []
+    chunk_index = 0
+    for article_data in articles_data:
+        # Extract article content - handle both 'text' and 'content' field names
+        article_content = article_data.get("text") or article_data.get("content", "")
+        
+        # Extract article number
+        article_number = article_data.get("article") or article_data.get("article_number", "")
+        
+        # Extract title (default to empty string if not present)
+        article_title = article_data.get("title", "")
+        
+        # Extract order_index - try to extract from article number if not provided
+        order_index = article_data.get("order_index")
+        if order_index is None:
+            # Try to extract number from article number for ordering
+            match = re.search(r'\d+', article_number)
+            if match:
+                order_index = int(match.group())
+            else:
+                order_index = len(article_rows)
+        
+        now = datetime.utcnow()
+        article_rows.append({
+            "article_number": article_number,
+            "title": article_title,
+            "content": article_content,
+            "order_index": order_index,
+            "created_at": now
+        })
+        
+        # Split article content into segments
+        segment_rows = []
+        for seg in _split_to_segments(article_content):
+            seg_content = _format_chunk_content(article_title, seg, article_number)
+            segment_rows.append({
+                "chunk_index": chunk_index,
+                "content": seg_content,
+                "tokens_count": len(seg_content.split()),
+                "verified_by_admin": False,
+                "created_at": now
+            })
+            chunk_index += 1
+        chunk_rows_per_article.append(segment_rows)
+    
+    return article_rows, chunk_rows_per_article
+
+
 class LegalLawsService:
     """Service for managing legal laws with complete hierarchy support."""
 
@@ -82,6 +152,21 @@ class LegalLawsService:
         self.hierarchical_processor = HierarchicalDocumentProcessor(db)
         self.parser = ParserOrchestrator(self.hierarchical_processor)
     
+    async def find_active_duplicate(self, file_hash: str) -> Optional[KnowledgeDocument]:
+        """
+        KnowledgeDocument with this hash that still backs a law source.
+        
+        Documents whose law was deleted are not duplicates: upload_and_parse_law
+        cleans them up and accepts the re-upload.
+        """
+        result = await self.db.execute(
+            select(KnowledgeDocument)
+            .join(LawSource, LawSource.knowledge_document_id == KnowledgeDocument.id)
+            .where(KnowledgeDocument.file_hash == file_hash)
+            .limit(1)
+        )
+        return result.scalars().first()
+    
     def _get_file_extension(self, filename_or_path: str) -> str:
         """Extract file extension from filename or path."""
         if not filename_or_path:
@@ -124,8 +209,7 @@ class LegalLawsService:
             processing_report = json_data.get("processing_report", {})
             
             # Generate unique hash for JSON upload based on content
-            json_content = json.dumps(json_data, sort_keys=True, ensure_ascii=False)
-            unique_hash = hashlib.sha256(json_content.encode('utf-8')).hexdigest()
+            unique_hash = json_upload_hash(json_data)
             
             # Check for duplicate before creating document
             duplicate_check = await self.db.execute(
@@ -156,6 +240,7 @@ class LegalLawsService:
                                 vectorstore = vectorstore_manager.get_vectorstore()
                                 if vectorstore:
                                     vectorstore.delete(ids=chunk_ids)
+                                    get_index_statistics().record_deleted(chunk_ids)
                                     logger.info(f"✅ Cleaned up {len(chunk_ids)} orphaned chunks from Chroma")
                             except Exception as chroma_error:
                                 logger.warning(f"⚠️ Failed to clean up Chroma chunks: {chroma_error}")
@@ -240,64 +325,27 @@ class LegalLawsService:
             total_articles = 0
             chunk_index = 0
             
-            # Check if it has branches structure (hierarchical)
-            branches_data = law_source_data.get("branches", [])
-        
             # Check if it has direct articles structure
             if law_source_data.get("articles"):
                 logger.info(f"📄 Processing direct articles structure")
-                articles_data = law_source_data.get("articles", [])
-                for article_data in articles_data:
-                    # Extract article content - handle both 'text' and 'content' field names
-                    article_content = article_data.get("text") or article_data.get("content", "")
-                    
-                    # Extract article number
-                    article_number = article_data.get("article") or article_data.get("article_number", "")
-                    
-                    # Extract title (default to empty string if not present)
-                    article_title = article_data.get("title", "")
-                    
-                    # Extract order_index - try to extract from article number if not provided
-                    order_index = article_data.get("order_index")
-                    if order_index is None:
-                        # Try to extract number from article number for ordering
-                        import re
-                        match = re.search(r'\d+', article_number)
-                        if match:
-                            order_index = int(match.group())
-                        else:
-                            order_index = total_articles
-                    
-                    # Create article directly under law source
-                    article = LawArticle(
-                        law_source_id=law_source.id,
-                        article_number=article_number,
-                        title=article_title,
-                        content=article_content,
-                        order_index=order_index,
-                        source_document_id=knowledge_doc.id,
-                        created_at=datetime.utcnow()
-                    )
-                    self.db.add(article)
-                    await self.db.flush()
-                    total_articles += 1
-                    
-                    # Split article content into segments
-                    segments = _split_to_segments(article.content)
-                    for seg in segments:
-                        seg_content = _format_chunk_content(article.title, seg, article.article_number)
-                        chunk = KnowledgeChunk(
-                            document_id=knowledge_doc.id,
-                            chunk_index=chunk_index,
-                            content=seg_content,
-                            tokens_count=len(seg_content.split()),
-                            law_source_id=law_source.id,
-                            article_id=article.id,
-                            verified_by_admin=False,
-                            created_at=datetime.utcnow()
-                        )
-                        self.db.add(chunk)
-                        chunk_index += 1
+                article_rows, chunk_rows_per_article = build_json_article_rows(
+                    law_source_data.get("articles", [])
+                )
+                for row in article_rows:
+                    row["law_source_id"] = law_source.id
+                    row["source_document_id"] = knowledge_doc.id
+                for chunk_rows in chunk_rows_per_article:
+                    for chunk in chunk_rows:
+                        chunk["document_id"] = knowledge_doc.id
+                        chunk["law_source_id"] = law_source.id
+                total_articles = len(article_rows)
+                chunk_index = sum(len(chunk_rows) for chunk_rows in chunk_rows_per_article)
+                
+                # One executemany per batch for articles and chunks; the law
+                # source above already holds the write lock for id allocation
+                await LegalBulkRepository(self.db).insert_articles_with_chunks(
+                    article_rows, chunk_rows_per_article
+                )
             
             # Commit all changes
             await self.db.commit()
@@ -430,6 +478,7 @@ class LegalLawsService:
                                 vectorstore = vectorstore_manager.get_vectorstore()
                                 if vectorstore:
                                     vectorstore.delete(ids=chunk_ids)
+                                    get_index_statistics().record_deleted(chunk_ids)
                                     logger.info(f"✅ Cleaned up {len(chunk_ids)} orphaned chunks from Chroma")
                             except Exception as chroma_error:
                                 logger.warning(f"⚠️ Failed to clean up Chroma chunks: {chroma_error}")
@@ -1000,6 +1049,7 @@ class LegalLawsService:
                     
                     if vectorstore:
                         vectorstore.delete(ids=chunk_ids)
+                        get_index_statistics().record_deleted(chunk_ids)
                         logger.info(f"✅ Deleted {len(chunk_ids)} chunks from Chroma vectorstore")
                     else:
                         logger.warning("⚠️ Vectorstore not available, skipping Chroma deletion")
@@ -1125,10 +1175,15 @@ class LegalLawsService:
                     "source_url": law.source_url
                 }
                 
-                parsing_result = await self.hierarchical_processor.process_document(
+                # Stream the document: pages are parsed as they are extracted and
+                # articles are written in batches, so memory stays flat on long laws.
+                # Articles and chunks are committed together below
+                parsing_result = await self.hierarchical_processor.process_document_streaming(
                     file_path=file_path,
                     law_source_details=law_source_details,
-                    uploaded_by=law.knowledge_document.uploaded_by
+                    uploaded_by=law.knowledge_document.uploaded_by,
+                    law_source_id=law.id,
+                    commit=False
                 )
                 
                 if not parsing_result.get("success"):
@@ -1138,42 +1193,8 @@ class LegalLawsService:
                         "data": None
                     }
                 
-                hierarchy = parsing_result.get("data", {}).get("hierarchy", {})
-                
-                # Recreate hierarchy (extract articles directly from structure)
-                chunk_index = 0
-                branches_data = hierarchy.get("branches", [])
-                
-                for branch_data in branches_data:
-                    for chapter_data in branch_data.get("chapters", []):
-                        for article_data in chapter_data.get("articles", []):
-                            article = LawArticle(
-                                law_source_id=law.id,
-                                article_number=article_data.get("article_number"),
-                                title=article_data.get("title"),
-                                content=article_data.get("content"),
-                                keywords=article_data.get("keywords", []),
-                                order_index=article_data.get("order_index", 0),
-                                source_document_id=law.knowledge_document_id,
-                                created_at=datetime.utcnow()
-                            )
-                            self.db.add(article)
-                            await self.db.flush()
-                            
-                            # Create KnowledgeChunk with title included
-                            chunk_content = _format_chunk_content(article.title, article.content)
-                            chunk = KnowledgeChunk(
-                                document_id=law.knowledge_document_id,
-                                chunk_index=chunk_index,
-                                content=chunk_content,
-                                tokens_count=len(chunk_content.split()),
-                                law_source_id=law.id,
-                                article_id=article.id,
-                                verified_by_admin=False,
-                                created_at=datetime.utcnow()
-                            )
-                            self.db.add(chunk)
-                            chunk_index += 1
+                structure_stats = parsing_result["data"]["law_source"]["structure_stats"]
+                chunk_count = await self._chunk_stored_articles(law)
                 
                 law.status = 'processed'
                 law.updated_at = datetime.utcnow()
@@ -1183,7 +1204,10 @@ class LegalLawsService:
                 
                 return {
                     "success": True,
-                    "message": f"Law reparsed successfully. Created {len(branches_data)} branches, {chunk_index} articles.",
+                    "message": (
+                        f"Law reparsed successfully. Created {structure_stats['chapters']} chapters, "
+                        f"{structure_stats['articles']} articles, {chunk_count} chunks."
+                    ),
                     "data": None
                 }
                 
@@ -1205,6 +1229,49 @@ class LegalLawsService:
                 "data": None
             }
 
+    async def _chunk_stored_articles(self, law: LawSource) -> int:
+        """
+        Create one KnowledgeChunk (title included) per stored article of a law.
+        
+        Articles are read back in pages of the bulk batch size, in document
+        order, so a streamed law is never loaded into memory at once.
+        """
+        await self.db.execute(
+            update(LawArticle)
+            .where(LawArticle.law_source_id == law.id)
+            .values(source_document_id=law.knowledge_document_id)
+        )
+        
+        bulk = LegalBulkRepository(self.db)
+        chunk_count = 0
+        last_order = -1
+        while True:
+            result = await self.db.execute(
+                select(LawArticle.id, LawArticle.title, LawArticle.content, LawArticle.order_index)
+                .where(LawArticle.law_source_id == law.id, LawArticle.order_index > last_order)
+                .order_by(LawArticle.order_index)
+                .limit(bulk.batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return chunk_count
+            
+            chunk_rows = []
+            for article_id, title, content, _order_index in rows:
+                chunk_content = _format_chunk_content(title, content)
+                chunk_rows.append({
+                    "document_id": law.knowledge_document_id,
+                    "chunk_index": chunk_count + len(chunk_rows),
+                    "content": chunk_content,
+                    "tokens_count": len(chunk_content.split()),
+                    "law_source_id": law.id,
+                    "article_id": article_id,
+                    "verified_by_admin": False
+                })
+            await bulk.insert_rows(KnowledgeChunk, chunk_rows)
+            chunk_count += len(chunk_rows)
+            last_order = rows[-1][3]
+
     async def analyze_law_with_ai(
         self,
         law_id: int,
@@ -0,0 +1,347 @@
+"""
+Vector Reconciliation Service - Streaming SQL ↔ Chroma consistency checks
+
+Walks the SQL `knowledge_chunks` table and the Chroma collection in bounded,
+id-ordered pages instead of loading every row and every Chroma id at once.
+
+Two streaming passes are made:
+1. SQL pass: keyset-paginated chunk ids (ordered by id); each page is probed in
+   Chroma by id to find chunks whose embeddings are missing.
+2. Chroma pass: offset-paginated Chroma ids (ids only, no documents/metadata);
+   each page is probed in SQL to find orphaned vectors.
+
+Memory is bounded by the page size. Progress is saved to a checkpoint file so a
+background reconciler can resume where it stopped, and drift can optionally be
+repaired by re-embedding missing chunks and deleting orphans.
+
+Only numeric Chroma ids are chunk ids. Other services write UUID-keyed vectors
+into the same collection; those are counted as foreign and never deleted.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....models.legal_knowledge import KnowledgeChunk, KnowledgeDocument, LawSource, LawArticle
+from .index_statistics_service import get_index_statistics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = int(os.getenv("VECTOR_RECONCILE_PAGE_SIZE", "500"))
+DEFAULT_CHECKPOINT_PATH = os.getenv(
+    "VECTOR_RECONCILE_CHECKPOINT", "storage/vector_reconciliation_checkpoint.json"
+)
+
+# Chunks are only expected in Chroma once their law source has been embedded
+EMBEDDED_STATUSES = ("processed", "indexed")
+
+
+@dataclass
+class ReconciliationCheckpoint:
+    """Resumable position of a reconciliation run."""
+
+    sql_after_id: int = 0
+    chroma_offset: int = 0
+    phase: str = "sql"  # 'sql' -> 'chroma' -> 'done'
+    updated_at: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: Path) -> "ReconciliationCheckpoint":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(**json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable reconciliation checkpoint {path}: {e}")
+            return cls()
+
+    def save(self, path: Path) -> None:
+        self.updated_at = datetime.utcnow().isoformat()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class ReconciliationReport:
+    """Counters produced by one reconciliation run."""
+
+    sql_chunks: int = 0
+    chroma_chunks: int = 0
+    synced: int = 0
+    missing_in_chroma: int = 0
+    missing_in_sql: int = 0
+    foreign_vectors: int = 0
+    pending_embedding: int = 0
+    requeued: int = 0
+    orphans_deleted: int = 0
+    pages_processed: int = 0
+    completed: bool = False
+    sample_missing_in_chroma: List[int] = field(default_factory=list)
+    sample_missing_in_sql: List[str] = field(default_factory=list)
+    sample_foreign_vectors: List[str] = field(default_factory=list)
+
+    SAMPLE_LIMIT = 20
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class VectorReconciliationEngine:
+    """
+    Streams both stores page by page, diffs them and optionally repairs drift.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        vectorstore: Any = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+    ):
+        """
+        Args:
+            db: Async database session
+            vectorstore: LangChain Chroma vectorstore (defaults to the shared one)
+            page_size: Number of ids handled per page in each store
+            checkpoint_path: Where to persist progress (None disables checkpoints)
+        """
+        if vectorstore is None:
+            from .document_parser_service import vectorstore_manager
+            vectorstore = vectorstore_manager.get_vectorstore()
+
+        self.db = db
+        self.vectorstore = vectorstore
+        self.collection = vectorstore._collection
+        self.page_size = max(1, page_size)
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+
+    # ==================== PAGE ITERATORS ====================
+
+    async def iter_sql_pages(self, after_id: int = 0) -> AsyncIterator[List[tuple]]:
+        """
+        Yield pages of (chunk_id, expected_in_chroma) ordered by chunk id.
+
+        Uses keyset pagination (id > last_id) so every page is an index range scan.
+        """
+        last_id = after_id
+        while True:
+            result = await self.db.execute(
+                select(KnowledgeChunk.id, LawSource.status)
+                .outerjoin(LawSource, KnowledgeChunk.law_source_id == LawSource.id)
+                .where(KnowledgeChunk.id > last_id)
+                .order_by(KnowledgeChunk.id)
+                .limit(self.page_size)
+            )
+            rows = result.all()
+            if not rows:
+                return
+            yield [(row[0], row[1] in EMBEDDED_STATUSES) for row in rows]
+            last_id = rows[-1][0]
+
+    # ==================== PROBES ====================
+
+    async def _existing_chroma_ids(self, ids: List[str]) -> Set[str]:
+        """Return which of the given ids exist in Chroma."""
+        if not ids:
+            return set()
+        found = await asyncio.to_thread(self.collection.get, ids=ids, include=[])
+        return set(found.get("ids", [])) if found else set()
+
+    async def _existing_sql_ids(self, ids: List[str]) -> Set[str]:
+        """Return which of the given Chroma ids have a matching SQL chunk."""
+        numeric_ids = [int(chroma_id) for chroma_id in ids if chroma_id.isdigit()]
+        if not numeric_ids:
+            return set()
+        result = await self.db.execute(
+            select(KnowledgeChunk.id).where(KnowledgeChunk.id.in_(numeric_ids))
+        )
+        return {str(chunk_id) for chunk_id in result.scalars().all()}
+
+    # ==================== REPAIR ====================
+
+    async def _requeue_missing(self, chunk_ids: List[int]) -> int:
+        """Re-embed chunks that should be in Chroma but are not."""
+        from .document_parser_service import build_chunk_embedding_metadata
+
+        result = await self.db.execute(
+            select(KnowledgeChunk, KnowledgeDocument, LawSource, LawArticle)
+            .join(KnowledgeDocument, KnowledgeChunk.document_id == KnowledgeDocument.id)
+            .outerjoin(LawSource, KnowledgeChunk.law_source_id == LawSource.id)
+            .outerjoin(LawArticle, KnowledgeChunk.article_id == LawArticle.id)
+            .where(KnowledgeChunk.id.in_(chunk_ids))
+        )
+
+        texts, metadatas, ids = [], [], []
+        for chunk, document, law_source, article in result.all():
+            if not (chunk.content or "").strip():
+                continue
+            texts.append(chunk.content)
+            metadatas.append(build_chunk_embedding_metadata(chunk, document, law_source, article))
+            ids.append(str(chunk.id))
+
+        if not texts:
+            return 0
+
+        await asyncio.to_thread(self.vectorstore.add_texts, texts=texts, metadatas=metadatas, ids=ids)
+        if hasattr(self.vectorstore, "persist"):
+            await asyncio.to_thread(self.vectorstore.persist)
+        get_index_statistics().record_added(ids, metadatas)
+        logger.info(f"🔁 Re-embedded {len(ids)} chunks missing from Chroma")
+        return len(ids)
+
+    async def _delete_orphans(self, ids: List[str]) -> int:
+        """Delete Chroma vectors that have no SQL chunk."""
+        if not ids:
+            return 0
+        await asyncio.to_thread(self.collection.delete, ids=ids)
+        get_index_statistics().record_deleted(ids)
+        logger.info(f"🗑️ Deleted {len(ids)} orphaned vectors from Chroma")
+        return len(ids)
+
+    # ==================== MAIN LOOP ====================
+
+    def _load_checkpoint(self, resume: bool) -> ReconciliationCheckpoint:
+        if resume and self.checkpoint_path:
+            checkpoint = ReconciliationCheckpoint.load(self.checkpoint_path)
+            if checkpoint.phase != "done":
+                return checkpoint
+        return ReconciliationCheckpoint()
+
+    def _save_checkpoint(self, checkpoint: ReconciliationCheckpoint) -> None:
+        if self.checkpoint_path:
+            checkpoint.save(self.checkpoint_path)
+
+    async def reconcile(
+        self,
+        repair: bool = False,
+        resume: bool = True,
+        max_pages: Optional[int] = None,
+    ) -> ReconciliationReport:
+        """
+        Run (or continue) a streaming reconciliation.
+
+        Args:
+            repair: Re-embed missing chunks and delete orphaned vectors
+            resume: Continue from the saved checkpoint instead of starting over
+            max_pages: Stop after this many pages (the checkpoint keeps the position)
+
+        Returns:
+            ReconciliationReport with counters for the pages processed in this run
+        """
+        report = ReconciliationReport()
+        checkpoint = self._load_checkpoint(resume)
+        logger.info(f"🔄 Vector reconciliation starting at {asdict(checkpoint)} (repair={repair})")
+
+        def budget_exhausted() -> bool:
+            return max_pages is not None and report.pages_processed >= max_pages
+
+        # Pass 1: SQL -> Chroma
+        if checkpoint.phase == "sql":
+            async for page in self.iter_sql_pages(checkpoint.sql_after_id):
+                if budget_exhausted():
+                    return report
+
+                expected_ids = [chunk_id for chunk_id, expected in page if expected]
+                present = await self._existing_chroma_ids([str(chunk_id) for chunk_id in expected_ids])
+                missing = [chunk_id for chunk_id in expected_ids if str(chunk_id) not in present]
+
+                report.sql_chunks += len(page)
+                report.pending_embedding += len(page) - len(expected_ids)
+                report.synced += len(present)
+                report.missing_in_chroma += len(missing)
+                room = ReconciliationReport.SAMPLE_LIMIT - len(report.sample_missing_in_chroma)
+                report.sample_missing_in_chroma.extend(missing[:max(room, 0)])
+
+                if repair and missing:
+                    report.requeued += await self._requeue_missing(missing)
+
+                checkpoint.sql_after_id = page[-1][0]
+                report.pages_processed += 1
+                self._save_checkpoint(checkpoint)
+
+            checkpoint.phase = "chroma"
+            checkpoint.chroma_offset = 0
+            self._save_checkpoint(checkpoint)
+
+        # Pass 2: Chroma -> SQL
+        if checkpoint.phase == "chroma":
+            offset = checkpoint.chroma_offset
+            while True:
+                if budget_exhausted():
+                    return report
+
+                # Chroma's client is synchronous: keep its calls off the event loop
+                page = await asyncio.to_thread(
+                    self.collection.get, limit=self.page_size, offset=offset, include=[]
+                )
+                ids = page.get("ids", []) if page else []
+                if not ids:
+                    break
+
+                # Non-numeric ids belong to other writers of this collection
+                chunk_ids = [chroma_id for chroma_id in ids if chroma_id.isdigit()]
+                foreign = [chroma_id for chroma_id in ids if not chroma_id.isdigit()]
+                present = await self._existing_sql_ids(chunk_ids)
+                orphans = [chroma_id for chroma_id in chunk_ids if chroma_id not in present]
+
+                report.chroma_chunks += len(chunk_ids)
+                report.foreign_vectors += len(foreign)
+                report.missing_in_sql += len(orphans)
+                room = ReconciliationReport.SAMPLE_LIMIT - len(report.sample_missing_in_sql)
+                report.sample_missing_in_sql.extend(orphans[:max(room, 0)])
+                room = ReconciliationReport.SAMPLE_LIMIT - len(report.sample_foreign_vectors)
+                report.sample_foreign_vectors.extend(foreign[:max(room, 0)])
+
+                deleted = await self._delete_orphans(orphans) if repair else 0
+                report.orphans_deleted += deleted
+
+                # Deleted vectors shift the remaining ones back by the same amount
+                offset += len(ids) - deleted
+                checkpoint.chroma_offset = offset
+                report.pages_processed += 1
+                self._save_checkpoint(checkpoint)
+
+            checkpoint.phase = "done"
+            self._save_checkpoint(checkpoint)
+
+        report.completed = True
+        logger.info(f"📊 Vector reconciliation finished: {report.to_dict()}")
+        return report
+
+
+async def run_reconciliation_forever(
+    interval_seconds: float,
+    repair: bool = False,
+    pages_per_cycle: int = 20,
+) -> None:
+    """
+    Background loop that reconciles a bounded number of pages per cycle.
+
+    Each cycle opens its own DB session, resumes from the checkpoint and
+    processes at most `pages_per_cycle` pages, so memory and DB load stay flat.
+    """
+    from ....db.database import AsyncSessionLocal
+
+    logger.info(f"🔁 Background vector reconciliation every {interval_seconds}s (repair={repair})")
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                engine = VectorReconciliationEngine(db)
+                await engine.reconcile(repair=repair, resume=True, max_pages=pages_per_cycle)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Background vector reconciliation cycle failed: {e}")
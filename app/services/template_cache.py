@@ -0,0 +1,197 @@
+"""
+Caches for contract template rendering.
+
+Every preview and generation used to reload the template's variables JSON,
+re-read and re-parse its file and, for previews, render and convert the very
+same placeholder document again. Here:
+
+- ``CompiledTemplate`` holds what a template needs for rendering: its parsed
+  variables, required fields and preview placeholders, the file's bytes and,
+  for HTML templates, the compiled Jinja2 template. Compiled templates are
+  kept in memory (TEMPLATE_CACHE_SIZE, least recently used first out);
+- rendered previews are kept on disk under TEMPLATE_PREVIEW_CACHE_DIR, so
+  previewing a template again serves a static file. Only PDFs and the
+  output of HTML templates are stored: the stand-in rendered when a DOCX
+  preview fails to convert to PDF is not, so a passing conversion failure
+  isn't served for the life of the version.
+
+Both are keyed by template id and version. The version hashes the row's
+``updated_at``, its format and variables and the template file's mtime and
+size, so updating a template (row or file) makes the old entries
+unreachable; ``invalidate`` also removes them.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "64"))
+TEMPLATE_PREVIEW_CACHE_DIR = os.getenv("TEMPLATE_PREVIEW_CACHE_DIR", "./storage/template_previews")
+
+PREVIEW_EXTENSIONS = (".pdf", ".html")
+
+
+@dataclass
+class CompiledTemplate:
+    """A template parsed once for repeated rendering."""
+
+    template_id: str
+    version: str
+    format: str
+    file_path: str
+    source: bytes
+    variables: List[Dict[str, Any]]
+    required_fields: List[str]
+    preview_data: Dict[str, Any]
+    jinja: Any = field(default=None, repr=False)
+
+
+def _variables(template: Any) -> List[Dict[str, Any]]:
+    variables = template.variables
+    if isinstance(variables, str):
+        variables = json.loads(variables)
+    return [var if isinstance(var, dict) else dict(var) for var in variables or []]
+
+
+def _placeholder(var: Dict[str, Any]) -> Any:
+    """Default value if provided, otherwise a placeholder based on type."""
+    if var.get("default"):
+        return var["default"]
+    var_type = var.get("type", "text")
+    if var_type == "date":
+        return "YYYY-MM-DD"
+    if var_type == "number":
+        return "0"
+    return "---"
+
+
+def template_version(template: Any) -> str:
+    """Changes whenever the template row or its file changes."""
+    try:
+        stat = os.stat(template.file_path)
+        file_stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        file_stamp = "missing"
+    stamp = template.updated_at or template.created_at
+    payload = json.dumps(
+        [str(stamp), template.format, template.file_path, file_stamp, template.variables],
+        sort_keys=True, default=str, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_template(template: Any, version: str) -> CompiledTemplate:
+    """Read and parse ``template`` (blocking: file I/O and Jinja2 compilation)."""
+    if not os.path.exists(template.file_path):
+        raise FileNotFoundError(f"Template file not found at: {template.file_path}")
+    with open(template.file_path, "rb") as f:
+        source = f.read()
+
+    variables = _variables(template)
+    compiled = CompiledTemplate(
+        template_id=template.id,
+        version=version,
+        format=template.format,
+        file_path=template.file_path,
+        source=source,
+        variables=variables,
+        required_fields=[var.get("name") for var in variables if var.get("required", False)],
+        preview_data={var["name"]: _placeholder(var) for var in variables if var.get("name")},
+    )
+    if template.format == "html":
+        from jinja2 import Environment, FileSystemLoader
+        env = Environment(loader=FileSystemLoader(os.path.dirname(template.file_path)))
+        compiled.jinja = env.from_string(source.decode("utf-8"))
+    return compiled
+
+
+class TemplateCache:
+    """Compiled templates in memory, rendered previews on disk."""
+
+    def __init__(self, max_entries: int = TEMPLATE_CACHE_SIZE, preview_dir: str = TEMPLATE_PREVIEW_CACHE_DIR):
+        self.max_entries = max_entries
+        self.preview_dir = Path(preview_dir)
+        self._compiled: "OrderedDict[Tuple[str, str], CompiledTemplate]" = OrderedDict()
+        self.hits = 0
+        self.compiles = 0
+        self.preview_hits = 0
+        self.preview_renders = 0
+
+    async def get(self, template: Any) -> CompiledTemplate:
+        """The compiled form of ``template``'s current version."""
+        version = await asyncio.to_thread(template_version, template)
+        key = (template.id, version)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            self.hits += 1
+            return compiled
+
+        compiled = await asyncio.to_thread(compile_template, template, version)
+        self.compiles += 1
+        # Older versions of the template are unreachable now
+        for stale in [k for k in self._compiled if k[0] == template.id]:
+            del self._compiled[stale]
+        self._compiled[key] = compiled
+        while len(self._compiled) > self.max_entries:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def _preview_stem(self, compiled: CompiledTemplate) -> str:
+        return f"{compiled.template_id}-{compiled.version}"
+
+    def cached_preview(self, compiled: CompiledTemplate) -> Optional[str]:
+        """Path of the stored preview of this template version, if any."""
+        for extension in PREVIEW_EXTENSIONS:
+            path = self.preview_dir / (self._preview_stem(compiled) + extension)
+            if path.exists():
+                self.preview_hits += 1
+                return str(path)
+        return None
+
+    def store_preview(self, compiled: CompiledTemplate, rendered_path: str) -> str:
+        """Move a freshly rendered preview into the cache; its cached path."""
+        self.preview_dir.mkdir(parents=True, exist_ok=True)
+        target = self.preview_dir / (self._preview_stem(compiled) + Path(rendered_path).suffix.lower())
+        os.replace(rendered_path, target)
+        self.preview_renders += 1
+        for old in self.preview_dir.glob(f"{compiled.template_id}-*"):
+            if old != target:
+                old.unlink(missing_ok=True)
+        return str(target)
+
+    def invalidate(self, template_id: str) -> None:
+        """Drop the compiled form and stored previews of ``template_id``."""
+        for key in [key for key in self._compiled if key[0] == template_id]:
+            del self._compiled[key]
+        if self.preview_dir.is_dir():
+            for path in self.preview_dir.glob(f"{template_id}-*"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "compiled_templates": len(self._compiled),
+            "hits": self.hits,
+            "compiles": self.compiles,
+            "preview_hits": self.preview_hits,
+            "preview_renders": self.preview_renders,
+        }
+
+
+_cache: Optional[TemplateCache] = None
+
+
+def get_template_cache() -> TemplateCache:
+    """Process-wide template cache configured from the environment."""
+    global _cache
+    if _cache is None:
+        _cache = TemplateCache()
+    return _cache
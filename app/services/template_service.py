@@ -4,7 +4,10 @@ Contract Template Service for business logic.
 This service handles template retrieval and contract generation.
 """
 
+import asyncio
+import io
 import os
+import time
 import uuid
 import tempfile
 import json
@@ -15,23 +18,38 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..repositories.template_repository import TemplateRepository
 from ..models.contract_template import ContractTemplate, Contract
 from ..schemas.template_schemas import TemplateVariable, TemplateVariablesResponse
+from .template_cache import CompiledTemplate, TemplateCache, get_template_cache
 from ..config.enhanced_logging import get_logger
+from ..utils.office_conversion import ConversionError, get_conversion_pool
 
 logger = get_logger(__name__)
 
+BULK_CONTRACT_MAX_ROWS = int(os.getenv("BULK_CONTRACT_MAX_ROWS", "1000"))
+BULK_CONTRACT_CONCURRENCY = int(os.getenv("BULK_CONTRACT_CONCURRENCY", "4"))
+
+
+class BulkValidationError(ValueError):
+    """Rows of a bulk generation request failed validation; ``errors`` lists them per row."""
+    
+    def __init__(self, message: str, errors: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.errors = errors
+
 
 class TemplateService:
     """Service for contract template operations."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, template_cache: Optional[TemplateCache] = None):
         """
         Initialize template service.
         
         Args:
             db: Database session
+            template_cache: Compiled template and preview cache (process-wide by default)
         """
         self.db = db
         self.repository = TemplateRepository(db)
+        self.template_cache = template_cache or get_template_cache()
         self.storage_path = Path(os.getenv("CONTRACT_STORAGE_PATH", "./storage/generated"))
         self.storage_path.mkdir(parents=True, exist_ok=True)
     
@@ -41,6 +59,8 @@ class TemplateService:
         
         For DOCX templates, tries to generate PDF via LibreOffice/docx2pdf.
         If PDF conversion fails, generates an HTML preview instead.
+        Previews are cached on disk per template version, so repeated
+        previews of an unchanged template are served from the cache.
         
         Args:
             template_id: Template UUID string
@@ -60,56 +80,32 @@ class TemplateService:
         if not template.is_active:
             raise ValueError(f"Template {template_id} is not active")
         
-        # Create placeholder data
-        variables_data = template.variables
-        if isinstance(variables_data, str):
-            import json
-            variables_data = json.loads(variables_data)
-        
-        preview_data: Dict[str, Any] = {}
-        for var in variables_data:
-            var_name = var.get("name") if isinstance(var, dict) else getattr(var, "name", "")
-            if var_name:
-                # Use default value if provided, otherwise placeholder
-                default = var.get("default") if isinstance(var, dict) else getattr(var, "default", None)
-                var_type = var.get("type") if isinstance(var, dict) else getattr(var, "type", "text")
-                
-                if default:
-                    preview_data[var_name] = default
-                else:
-                    # Use placeholder based on type
-                    if var_type == "date":
-                        preview_data[var_name] = "YYYY-MM-DD"
-                    elif var_type == "number":
-                        preview_data[var_name] = "0"
-                    elif var_type == "textarea":
-                        preview_data[var_name] = "---"
-                    else:
-                        preview_data[var_name] = "---"
-        
         # Generate preview using same logic as regular generation
         try:
+            compiled = await self.template_cache.get(template)
+            cached_path = self.template_cache.cached_preview(compiled)
+            if cached_path:
+                logger.info(f"Serving cached preview for template {template_id}: {cached_path}")
+                return cached_path
+            
+            preview_data = dict(compiled.preview_data)
             logger.info(f"Generating preview for template {template_id}, format: {template.format}")
             if template.format == "docx":
                 try:
                     # Try to generate PDF
-                    pdf_path = await self._generate_from_docx(template, preview_data)
-                    if os.path.exists(pdf_path):
-                        logger.info(f"Preview PDF generated successfully: {pdf_path}")
-                        return pdf_path
-                    else:
+                    pdf_path = await self._generate_from_docx(compiled, preview_data, docx_fallback=False)
+                    if not os.path.exists(pdf_path):
                         raise FileNotFoundError(f"PDF not generated at {pdf_path}")
+                    logger.info(f"Preview PDF generated successfully: {pdf_path}")
                 except (RuntimeError, FileNotFoundError) as e:
                     # If PDF conversion fails, generate HTML preview instead
                     logger.warning(f"PDF conversion failed for preview: {str(e)}. Generating HTML preview instead.")
-                    html_path = await self._generate_html_preview_from_docx(template, preview_data)
-                    if os.path.exists(html_path):
-                        logger.info(f"Preview HTML generated successfully: {html_path}")
-                        return html_path
-                    else:
-                        raise FileNotFoundError(f"HTML preview not generated at {html_path}")
+                    pdf_path = await self._generate_html_preview_from_docx(template, compiled, preview_data)
+                    if not os.path.exists(pdf_path):
+                        raise FileNotFoundError(f"HTML preview not generated at {pdf_path}")
+                    logger.info(f"Preview HTML generated successfully: {pdf_path}")
             elif template.format == "html":
-                pdf_path = await self._generate_from_html(template, preview_data)
+                pdf_path = await self._generate_from_html(compiled, preview_data)
             else:
                 raise ValueError(f"Unsupported template format: {template.format}")
             
@@ -119,7 +115,10 @@ class TemplateService:
                 raise FileNotFoundError(f"Generated preview file not found at: {pdf_path}")
             
             logger.info(f"Preview generated successfully: {pdf_path}")
-            return pdf_path
+            if Path(pdf_path).suffix.lower() != ".pdf" and template.format != "html":
+                # A stand-in for a failed conversion; it may work next time
+                return pdf_path
+            return self.template_cache.store_preview(compiled, pdf_path)
             
         except FileNotFoundError as e:
             logger.error(f"File not found during preview generation: {str(e)}")
@@ -131,6 +130,7 @@ class TemplateService:
     async def _generate_html_preview_from_docx(
         self,
         template: ContractTemplate,
+        compiled: CompiledTemplate,
         filled_data: Dict[str, Any]
     ) -> str:
         """
@@ -140,13 +140,9 @@ class TemplateService:
         """
         try:
             from docx import Document
-            from jinja2 import Template
             
             # Load DOCX and extract text
-            if not os.path.exists(template.file_path):
-                raise FileNotFoundError(f"Template file not found: {template.file_path}")
-            
-            doc = Document(template.file_path)
+            doc = await asyncio.to_thread(Document, io.BytesIO(compiled.source))
             paragraphs_text = []
             
             for paragraph in doc.paragraphs:
@@ -308,17 +304,9 @@ class TemplateService:
             raise ValueError(f"Template {template_id} is not active")
         
         # Validate required fields
-        variables_data = template.variables
-        if isinstance(variables_data, str):
-            variables_data = json.loads(variables_data)
-        
-        required_fields = [
-            var.get("name") for var in variables_data
-            if var.get("required", False)
-        ]
-        
+        compiled = await self.template_cache.get(template)
         missing_fields = [
-            field for field in required_fields
+            field for field in compiled.required_fields
             if field not in filled_data or not filled_data.get(field)
         ]
         
@@ -328,9 +316,9 @@ class TemplateService:
         # Generate contract based on format
         try:
             if template.format == "docx":
-                pdf_path = await self._generate_from_docx(template, filled_data)
+                pdf_path = await self._generate_from_docx(compiled, filled_data)
             elif template.format == "html":
-                pdf_path = await self._generate_from_html(template, filled_data)
+                pdf_path = await self._generate_from_html(compiled, filled_data)
             else:
                 raise ValueError(f"Unsupported template format: {template.format}")
             
@@ -386,17 +374,157 @@ class TemplateService:
             logger.error(f"Failed to generate contract: {str(e)}")
             raise RuntimeError(f"Contract generation failed: {str(e)}")
     
+    async def generate_contracts_bulk(
+        self,
+        template_id: str,
+        owner_id: int,
+        rows: List[Dict[str, Any]],
+        filename_field: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate one contract per row of data from a single template.
+        
+        Every row is validated before anything is rendered; rows are then
+        rendered concurrently (DOCX conversions share the LibreOffice pool)
+        and all contract records are inserted with one commit.
+        
+        Args:
+            template_id: Template UUID string
+            owner_id: User ID who owns the contracts
+            rows: One dict of form data per contract
+            filename_field: Variable whose value names each contract's file
+            
+        Returns:
+            Dict with batch_id, counts and one item per row: row, contract_id,
+            download_url, file_type, filename and file_path, or row and error
+            
+        Raises:
+            ValueError: If template not found
+            BulkValidationError: If any row is invalid (nothing is generated)
+        """
+        template = await self.repository.get_template_by_id(template_id)
+        if not template:
+            raise ValueError(f"Template {template_id} not found")
+        
+        if not template.is_active:
+            raise ValueError(f"Template {template_id} is not active")
+        
+        if template.format not in ("docx", "html"):
+            raise ValueError(f"Unsupported template format: {template.format}")
+        
+        compiled = await self.template_cache.get(template)
+        rows = self._validate_bulk_rows(compiled, rows)
+        
+        semaphore = asyncio.Semaphore(BULK_CONTRACT_CONCURRENCY)
+        
+        async def render(filled_data: Dict[str, Any]) -> str:
+            async with semaphore:
+                if template.format == "docx":
+                    return await self._generate_from_docx(compiled, filled_data)
+                return await self._generate_from_html(compiled, filled_data)
+        
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(render(row) for row in rows), return_exceptions=True)
+        
+        base_url = os.getenv("BACKEND_URL", "http://localhost:8000")
+        batch_id = str(uuid.uuid4())
+        items: List[Dict[str, Any]] = []
+        records: List[Dict[str, Any]] = []
+        for number, (row, outcome) in enumerate(zip(rows, outcomes), start=1):
+            if isinstance(outcome, Exception):
+                logger.error(f"Bulk contract row {number} of batch {batch_id} failed: {str(outcome)}")
+                items.append({"row": number, "error": str(outcome)})
+                continue
+            contract_id = str(uuid.uuid4())
+            file_path = os.path.abspath(str(outcome))
+            file_type = Path(file_path).suffix.lower().lstrip(".")
+            label = "".join(
+                c for c in str(row.get(filename_field) or "") if c.isalnum() or c in (' ', '-', '_')
+            ).strip().replace(' ', '_')[:80] if filename_field else ""
+            records.append({
+                "id": contract_id,
+                "template_id": template_id,
+                "owner_id": owner_id,
+                "filled_data": row,
+                "pdf_path": file_path,
+                "status": "generated"
+            })
+            items.append({
+                "row": number,
+                "contract_id": contract_id,
+                "download_url": f"{base_url}/api/v1/templates/contracts/{contract_id}/download",
+                "file_type": file_type,
+                "filename": f"{number:04d}_{label or 'contract'}.{file_type}",
+                "file_path": file_path
+            })
+        
+        try:
+            await self.repository.create_contracts(records)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            for record in records:
+                Path(record["pdf_path"]).unlink(missing_ok=True)
+            logger.error(f"Failed to store bulk contracts: {str(e)}")
+            raise RuntimeError(f"Bulk contract generation failed: {str(e)}")
+        
+        logger.info(
+            f"Generated {len(records)}/{len(rows)} contracts from template {template_id} "
+            f"in {time.perf_counter() - started:.1f}s (batch {batch_id})"
+        )
+        return {
+            "batch_id": batch_id,
+            "template_id": template_id,
+            "total": len(rows),
+            "generated": len(records),
+            "failed": len(rows) - len(records),
+            "items": items
+        }
+    
+    def _validate_bulk_rows(self, compiled: CompiledTemplate, rows: List[Any]) -> List[Dict[str, Any]]:
+        """Check every row against the template variables; cleaned rows, or BulkValidationError."""
+        if not rows:
+            raise BulkValidationError("No rows to generate", [])
+        if len(rows) > BULK_CONTRACT_MAX_ROWS:
+            raise BulkValidationError(f"Too many rows: {len(rows)} (maximum {BULK_CONTRACT_MAX_ROWS})", [])
+        
+        known_fields = {var.get("name") for var in compiled.variables}
+        errors: List[Dict[str, Any]] = []
+        cleaned: List[Dict[str, Any]] = []
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                errors.append({"row": number, "field": None, "message": "Row must be an object of field values"})
+                continue
+            # CSV cells arrive as strings; blank cells count as missing
+            row = {
+                key: value.strip() if isinstance(value, str) else value
+                for key, value in row.items() if key in known_fields
+            }
+            row = {key: value for key, value in row.items() if value not in (None, "")}
+            for field in compiled.required_fields:
+                if not row.get(field):
+                    errors.append({"row": number, "field": field, "message": f"Missing required field: {field}"})
+            cleaned.append(row)
+        
+        if errors:
+            rows_with_errors = len({error["row"] for error in errors})
+            raise BulkValidationError(f"{rows_with_errors} of {len(rows)} rows are invalid", errors)
+        return cleaned
+    
     async def _generate_from_docx(
         self,
-        template: ContractTemplate,
-        filled_data: Dict[str, Any]
+        compiled: CompiledTemplate,
+        filled_data: Dict[str, Any],
+        docx_fallback: bool = True
     ) -> str:
         """
         Generate PDF from DOCX template using docxtpl.
         
         Args:
-            template: ContractTemplate model
+            compiled: Compiled DOCX template
             filled_data: User-provided form data
+            docx_fallback: Return the filled DOCX when PDF conversion fails;
+                if False the conversion error is raised
             
         Returns:
             Path to generated PDF
@@ -405,13 +533,35 @@ class TemplateService:
         Install with: pip install docxtpl
         Falls back to python-docx for basic text replacement if not available.
         """
+        # Rendering parses and writes the document; keep it off the event loop
+        temp_docx_path = await asyncio.to_thread(self._render_docx, compiled, filled_data)
+        
+        # Convert DOCX to PDF using LibreOffice (or alternative)
+        try:
+            pdf_path = await self._convert_docx_to_pdf(temp_docx_path)
+            # Clean up temp DOCX if PDF conversion succeeded
+            os.unlink(temp_docx_path)
+            return pdf_path
+        except RuntimeError as e:
+            if not docx_fallback:
+                os.unlink(temp_docx_path)
+                raise
+            # PDF conversion failed - return DOCX as fallback
+            logger.warning(f"PDF conversion failed, returning DOCX file instead: {str(e)}")
+            # Keep the DOCX file and return its path
+            # Rename to a proper location instead of temp
+            docx_filename = f"{uuid.uuid4()}.docx"
+            docx_path = self.storage_path / docx_filename
+            import shutil
+            shutil.move(temp_docx_path, str(docx_path))
+            logger.info(f"Generated DOCX file at: {docx_path}")
+            return str(docx_path)
+    
+    def _render_docx(self, compiled: CompiledTemplate, filled_data: Dict[str, Any]) -> str:
+        """Fill a DOCX template into a temporary DOCX file (blocking); its path."""
         try:
             from docxtpl import DocxTemplate
             
-            # Check if file exists
-            if not os.path.exists(template.file_path):
-                raise FileNotFoundError(f"Template file not found at: {template.file_path}")
-            
             # Process Arabic text in filled_data if needed
             processed_data = {}
             for key, value in filled_data.items():
@@ -432,45 +582,18 @@ class TemplateService:
                 else:
                     processed_data[key] = value
             
-            # Load DOCX template
-            doc = DocxTemplate(template.file_path)
+            # A rendered DocxTemplate cannot be rendered again; load a fresh one from the cached bytes
+            doc = DocxTemplate(io.BytesIO(compiled.source))
             
             # Render with processed data
             doc.render(processed_data)
             
-            # Save to temp DOCX
-            temp_docx = tempfile.NamedTemporaryFile(
-                suffix=".docx",
-                delete=False,
-                dir=self.storage_path
-            )
-            doc.save(temp_docx.name)
-            temp_docx.close()
-            
-            # Convert DOCX to PDF using LibreOffice (or alternative)
-            try:
-                pdf_path = await self._convert_docx_to_pdf(temp_docx.name)
-                # Clean up temp DOCX if PDF conversion succeeded
-                os.unlink(temp_docx.name)
-                return pdf_path
-            except RuntimeError as e:
-                # PDF conversion failed - return DOCX as fallback
-                logger.warning(f"PDF conversion failed, returning DOCX file instead: {str(e)}")
-                # Keep the DOCX file and return its path
-                # Rename to a proper location instead of temp
-                docx_filename = f"{uuid.uuid4()}.docx"
-                docx_path = self.storage_path / docx_filename
-                import shutil
-                shutil.move(temp_docx.name, str(docx_path))
-                logger.info(f"Generated DOCX file at: {docx_path}")
-                return str(docx_path)
-            
         except ImportError:
             # Fallback: use python-docx if docxtpl not available
             logger.warning("docxtpl not available, using basic python-docx")
             from docx import Document
             
-            doc = Document(template.file_path)
+            doc = Document(io.BytesIO(compiled.source))
             
             # Simple text replacement (for basic templates)
             for paragraph in doc.paragraphs:
@@ -478,40 +601,27 @@ class TemplateService:
                     for key, value in filled_data.items():
                         if f"{{{{{key}}}}}" in run.text:
                             run.text = run.text.replace(f"{{{{{key}}}}}", str(value))
-            
-            # Save and convert
-            temp_docx = tempfile.NamedTemporaryFile(
-                suffix=".docx",
-                delete=False,
-                dir=self.storage_path
-            )
-            doc.save(temp_docx.name)
-            temp_docx.close()
-            
-            try:
-                pdf_path = await self._convert_docx_to_pdf(temp_docx.name)
-                os.unlink(temp_docx.name)
-                return pdf_path
-            except RuntimeError as e:
-                # PDF conversion failed - return DOCX as fallback
-                logger.warning(f"PDF conversion failed, returning DOCX file instead: {str(e)}")
-                docx_filename = f"{uuid.uuid4()}.docx"
-                docx_path = self.storage_path / docx_filename
-                import shutil
-                shutil.move(temp_docx.name, str(docx_path))
-                logger.info(f"Generated DOCX file at: {docx_path}")
-                return str(docx_path)
+        
+        # Save to temp DOCX
+        temp_docx = tempfile.NamedTemporaryFile(
+            suffix=".docx",
+            delete=False,
+            dir=self.storage_path
+        )
+        doc.save(temp_docx.name)
+        temp_docx.close()
+        return temp_docx.name
     
     async def _generate_from_html(
         self,
-        template: ContractTemplate,
+        compiled: CompiledTemplate,
         filled_data: Dict[str, Any]
     ) -> str:
         """
         Generate PDF from HTML template using Jinja2 + WeasyPrint.
         
         Args:
-            template: ContractTemplate model
+            compiled: Compiled HTML template
             filled_data: User-provided form data
             
         Returns:
@@ -521,24 +631,16 @@ class TemplateService:
         Install with: pip install weasyprint
         Falls back to HTML file generation if not available.
         """
+        rendered_html = compiled.jinja.render(**filled_data)
+        
         try:
-            from jinja2 import Environment, FileSystemLoader, Template
             from weasyprint import HTML
             
-            # Load HTML template
-            with open(template.file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            # Render with Jinja2
-            env = Environment(loader=FileSystemLoader(os.path.dirname(template.file_path)))
-            jinja_template = env.from_string(html_content)
-            rendered_html = jinja_template.render(**filled_data)
-            
             # Generate PDF
             pdf_filename = f"{uuid.uuid4()}.pdf"
             pdf_path = self.storage_path / pdf_filename
             
-            HTML(string=rendered_html).write_pdf(str(pdf_path))
+            await asyncio.to_thread(HTML(string=rendered_html).write_pdf, str(pdf_path))
             
             return str(pdf_path)
             
@@ -546,14 +648,6 @@ class TemplateService:
             # Fallback: Generate HTML file (user can print to PDF)
             logger.warning("WeasyPrint not available, generating HTML file")
             
-            from jinja2 import Environment, Template
-            
-            with open(template.file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            template_obj = Template(html_content)
-            rendered_html = template_obj.render(**filled_data)
-            
             html_filename = f"{uuid.uuid4()}.html"
             html_path = self.storage_path / html_filename
             
@@ -563,11 +657,15 @@ class TemplateService:
             # Return HTML path (frontend can handle conversion)
             return str(html_path)
     
+    def invalidate_template_cache(self, template_id: str) -> None:
+        """Drop the cached compiled template and previews after a template changes."""
+        self.template_cache.invalidate(template_id)
+    
     async def _convert_docx_to_pdf(self, docx_path: str) -> str:
         """
         Convert DOCX file to PDF.
         
-        Uses LibreOffice command line if available, otherwise uses docx2pdf or returns DOCX path.
+        Uses the LibreOffice conversion pool if LibreOffice is installed, otherwise docx2pdf.
         
         Args:
             docx_path: Path to DOCX file
@@ -575,9 +673,7 @@ class TemplateService:
         Returns:
             Path to PDF file
         """
-        import subprocess
         import platform
-        import asyncio
         
         # Ensure docx_path is a string and normalize path separators
         docx_path = str(docx_path).replace('/', os.sep)
@@ -586,51 +682,15 @@ class TemplateService:
         docx_path_obj = Path(docx_path)
         pdf_path = str(docx_path_obj.with_suffix('.pdf'))
         
-        # Determine LibreOffice command based on OS
-        if platform.system() == "Windows":
-            libreoffice_cmds = [
-                r"C:\Program Files\LibreOffice\program\soffice.exe",
-                r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
-                "soffice",
-            ]
-        else:
-            libreoffice_cmds = ["libreoffice", "soffice"]
-        
-        # Try LibreOffice conversion
-        for cmd in libreoffice_cmds:
+        # Try the shared pool of running LibreOffice instances
+        conversion_pool = get_conversion_pool()
+        if conversion_pool is not None:
             try:
-                result = subprocess.run(
-                    [
-                        cmd,
-                        "--headless",
-                        "--convert-to", "pdf",
-                        "--outdir", str(self.storage_path),
-                        docx_path
-                    ],
-                    check=True,
-                    timeout=60,
-                    capture_output=True,
-                    text=True
-                )
-                
-                # LibreOffice outputs PDF to outdir with same base name
-                expected_pdf = Path(self.storage_path) / Path(docx_path).stem
-                expected_pdf = expected_pdf.with_suffix(".pdf")
-                
-                if os.path.exists(str(expected_pdf)):
-                    logger.info(f"Successfully converted DOCX to PDF: {expected_pdf}")
-                    return str(expected_pdf)
-                elif os.path.exists(pdf_path):
-                    logger.info(f"Successfully converted DOCX to PDF: {pdf_path}")
-                    return pdf_path
-                    
-            except FileNotFoundError:
-                continue  # Try next command
-            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
-                logger.warning(f"LibreOffice conversion failed with {cmd}: {str(e)}")
-                if hasattr(e, 'stderr') and e.stderr:
-                    logger.warning(f"LibreOffice stderr: {e.stderr}")
-                continue  # Try next command
+                converted = await conversion_pool.convert(docx_path, str(self.storage_path))
+                logger.info(f"Successfully converted DOCX to PDF: {converted}")
+                return converted
+            except ConversionError as e:
+                logger.warning(f"LibreOffice conversion failed: {str(e)}")
         
         # Try docx2pdf as fallback (Python library)
         # Run in executor since convert() is blocking
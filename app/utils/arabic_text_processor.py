@@ -0,0 +1,318 @@
+"""
+Arabic Text Normalisation
+
+One implementation of the Arabic clean-up passes used by the PDF processor,
+the document processor and legal case ingestion:
+
+- ``clean_text_artifacts``: presentation-form glyphs (U+FB50-U+FDFF,
+  U+FE70-U+FEFF) back to base letters through a single ``str.translate``
+  table built from the Unicode compatibility decompositions
+- ``normalize_fragmented_arabic``: merges letters that PDF extraction split
+  into separate tokens
+- ``fix_arabic_text`` / ``ensure_rtl_text_direction``: shaping and BiDi
+  reordering for display, with reshaping memoised per token
+- ``normalize_arabic``: diacritics, tatweel and (optionally) alef / yaa /
+  taa-marbuta variants removed through composed translate tables
+
+Arabic-character counts use the UTF-8 lead bytes of the Arabic block
+(0xD8-0xDB), so a ratio is one C-level pass instead of a Python generator.
+arabic_reshaper and python-bidi are optional; without them text is returned
+unshaped.
+"""
+
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from .lazy_loader import optional_import
+
+logger = logging.getLogger(__name__)
+
+# Arabic presentation forms -> base letters. Isolated forms of the harakat
+# decompose to "space + mark"; the space is dropped so marks stay on their letter.
+PRESENTATION_FORMS_TABLE = {
+    cp: unicodedata.normalize('NFKC', chr(cp)).lstrip(' ')
+    for cp in list(range(0xFB50, 0xFE00)) + list(range(0xFE70, 0xFF00))
+    if unicodedata.normalize('NFKC', chr(cp)) != chr(cp)
+}
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic annotation marks
+DIACRITICS_TABLE = dict.fromkeys(
+    list(range(0x0610, 0x061B)) + list(range(0x064B, 0x0660)) + [0x0670] + list(range(0x06D6, 0x06EE))
+)
+TATWEEL_TABLE = {0x0640: None}
+LETTER_VARIANTS_TABLE = {
+    ord('أ'): 'ا', ord('إ'): 'ا', ord('آ'): 'ا', ord('ٱ'): 'ا',
+    ord('ى'): 'ي', ord('ة'): 'ه',
+}
+
+# Isolated glyph forms whose presence marks text as broken PDF output
+ARTIFACT_CHARS = frozenset('ﻢﻪﻆﺍﺕﺏﻞﺝﺡﺥﺩﺫﺭﺯﺱﺵﺹﺽﻁﻅﻉﻍﻑﻕﻙﻝﻡﻥﻩﻭﻱ')
+
+_ARABIC_LEAD_BYTES = (b'\xd8', b'\xd9', b'\xda', b'\xdb')
+_ARABIC_CHAR_REGEX = re.compile('[\u0600-\u06FF]')
+_ARTIFACT_REGEX = re.compile('[' + ''.join(sorted(ARTIFACT_CHARS)) + ']')
+_SINGLE_ARABIC_TOKEN_REGEX = re.compile(r'(?:^|\s)[\u0600-\u06FF](?=\s|$)')
+_FRAGMENT_PUNCTUATION = frozenset(['.', ',', ':', ';'])
+
+RESHAPE_CACHE_SIZE = 65536
+
+
+# ==================== DETECTION ====================
+
+def arabic_char_count(text: str) -> int:
+    """Number of characters in the Arabic block U+0600-U+06FF."""
+    if not text:
+        return 0
+    encoded = text.encode('utf-8', 'surrogatepass')
+    return sum(encoded.count(lead) for lead in _ARABIC_LEAD_BYTES)
+
+
+def arabic_ratio(text: str) -> float:
+    """Share of Arabic characters in the stripped text (0.0 for blank text)."""
+    stripped = text.strip() if text else ''
+    return arabic_char_count(stripped) / len(stripped) if stripped else 0.0
+
+
+def has_arabic(text: str) -> bool:
+    return bool(text) and _ARABIC_CHAR_REGEX.search(text) is not None
+
+
+def needs_fixing(text: str) -> bool:
+    """
+    Whether extracted text should go through ``fix_arabic_text``.
+
+    True for any line with Arabic that is fragmented (short or single-letter
+    tokens), carries presentation-form artifacts, or is at least 10% Arabic.
+    """
+    stripped = text.strip() if text else ''
+    if not stripped:
+        return False
+    arabic_chars = arabic_char_count(stripped)
+    if arabic_chars == 0:
+        return False
+    if arabic_chars / len(stripped) > 0.1:
+        return True
+
+    words = stripped.split()
+    if sum(map(len, words)) / len(words) <= 2:
+        return True
+    return (
+        _SINGLE_ARABIC_TOKEN_REGEX.search(stripped) is not None
+        or _ARTIFACT_REGEX.search(stripped) is not None
+    )
+
+
+# ==================== NORMALISATION ====================
+
+def _char_class(code_points) -> "re.Pattern":
+    """Compiled character class matching any of ``code_points`` (ranges collapsed)."""
+    ranges = []
+    for cp in sorted(code_points):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return re.compile('[' + ''.join(
+        re.escape(chr(start)) if start == end else f'{re.escape(chr(start))}-{re.escape(chr(end))}'
+        for start, end in ranges
+    ) + ']')
+
+
+@lru_cache(maxsize=8)
+def _composed_table(diacritics: bool, tatweel: bool, letter_variants: bool) -> Tuple[Dict[int, object], "re.Pattern"]:
+    """Translate table for the enabled passes, plus a regex matching any of its keys."""
+    extra: Dict[int, object] = {}
+    if diacritics:
+        extra.update(DIACRITICS_TABLE)
+    if tatweel:
+        extra.update(TATWEEL_TABLE)
+    if letter_variants:
+        extra.update(LETTER_VARIANTS_TABLE)
+    # Presentation forms decompose first, so e.g. a glyph-encoded alef with hamza folds too
+    table: Dict[int, object] = {cp: base.translate(extra) for cp, base in PRESENTATION_FORMS_TABLE.items()}
+    table.update(extra)
+    return table, _char_class(table)
+
+
+_PRESENTATION_FORMS_REGEX = _char_class(PRESENTATION_FORMS_TABLE)
+
+
+def normalize_arabic(
+    text: str,
+    diacritics: bool = True,
+    tatweel: bool = True,
+    letter_variants: bool = False
+) -> str:
+    """
+    Presentation forms to base letters and, optionally, remove diacritics and
+    tatweel and fold alef/yaa/taa-marbuta variants, in a single translate pass.
+
+    Letter folding is lossy and meant for matching, not for stored text.
+    """
+    if not text:
+        return text
+    table, pattern = _composed_table(diacritics, tatweel, letter_variants)
+    # The regex scan runs in C; dict-driven translate is only paid when needed
+    return text.translate(table) if pattern.search(text) else text
+
+
+def clean_text_artifacts(text: str) -> str:
+    """Collapse whitespace, map presentation-form glyphs to letters, NFC-normalise."""
+    if not text:
+        return text
+    text = ' '.join(text.split())
+    if _PRESENTATION_FORMS_REGEX.search(text):
+        text = text.translate(PRESENTATION_FORMS_TABLE)
+    return text if unicodedata.is_normalized('NFC', text) else unicodedata.normalize('NFC', text)
+
+
+def normalize_fragmented_arabic(text: str) -> str:
+    """Merge fragmented Arabic letters back into words, then clean artifacts."""
+    if not text.strip():
+        return text
+
+    current_word = ""
+    normalized_words = []
+
+    for word in text.split():
+        if len(word) == 1 and '\u0600' <= word <= '\u06FF':
+            joins = True
+        elif word.isdigit() or word.isalpha() or word in _FRAGMENT_PUNCTUATION:
+            # Whole words (Arabic letters are alphabetic too), numbers and punctuation stand alone
+            joins = False
+        else:
+            joins = arabic_char_count(word) > len(word) * 0.7
+
+        if joins:
+            if current_word and '\u0600' <= current_word[-1] <= '\u06FF':
+                current_word += word
+            else:
+                if current_word:
+                    normalized_words.append(current_word)
+                current_word = word
+        else:
+            if current_word:
+                normalized_words.append(current_word)
+                current_word = ""
+            normalized_words.append(word)
+
+    if current_word:
+        normalized_words.append(current_word)
+
+    return clean_text_artifacts(' '.join(normalized_words))
+
+
+# ==================== SHAPING AND DIRECTION ====================
+
+def _shaping_libraries() -> Tuple[object, object]:
+    """(arabic_reshaper, bidi.algorithm) or (None, None) when not installed."""
+    reshaper = optional_import("arabic_reshaper")
+    bidi = optional_import("bidi.algorithm")
+    if reshaper is None or bidi is None:
+        return None, None
+    return reshaper, bidi
+
+
+def shaping_available() -> bool:
+    """Whether fix_arabic_text reshapes (the output differs when it cannot)."""
+    return _shaping_libraries()[0] is not None
+
+
+@lru_cache(maxsize=RESHAPE_CACHE_SIZE)
+def reshape_token(token: str) -> str:
+    """Contextual shaping of one token; legal text repeats a small vocabulary."""
+    reshaper, _ = _shaping_libraries()
+    return reshaper.reshape(token) if reshaper is not None else token
+
+
+def fix_arabic_text(text: str, pad_rtl: bool = False) -> str:
+    """
+    Clean, de-fragment, reshape and BiDi-reorder a line for display.
+
+    Args:
+        text: Line of extracted text
+        pad_rtl: Wrap predominantly (>50%) Arabic lines in narrow no-break
+            spaces before reordering, as the PDF processor does
+    """
+    if not text.strip():
+        return text
+
+    reshaper, bidi = _shaping_libraries()
+    if reshaper is None:
+        logger.warning("Arabic text processing libraries not available")
+        return text
+
+    normalized = normalize_fragmented_arabic(clean_text_artifacts(text))
+    text_for_bidi = ' '.join(
+        reshape_token(word) if has_arabic(word) else word for word in normalized.split()
+    )
+
+    try:
+        if pad_rtl and arabic_ratio(text_for_bidi) > 0.5:
+            return bidi.get_display('\u202F' + text_for_bidi + '\u202F')
+        return bidi.get_display(text_for_bidi)
+    except Exception as e:
+        logger.warning(f"BiDi processing error: {e}")
+        return text_for_bidi
+
+
+def ensure_rtl_text_direction(text: str) -> str:
+    """
+    Wrap Arabic words in RLM marks and non-empty lines in an RLO...PDF
+    embedding, when the text contains any Arabic at all.
+    """
+    if not text.strip() or not has_arabic(text):
+        return text
+
+    rtl_lines = []
+    for line in text.split('\n'):
+        if line.strip():
+            words = ('\u200F' + word + '\u200F' if has_arabic(word) else word for word in line.split())
+            rtl_lines.append('\u202E' + ' '.join(words) + '\u202C')
+        else:
+            rtl_lines.append(line)
+    return '\n'.join(rtl_lines)
+
+
+def reorder_lines(text: str) -> str:
+    """Shape and BiDi-reorder each line that contains Arabic."""
+    reshaper, bidi = _shaping_libraries()
+    if reshaper is None or not has_arabic(text):
+        return text
+    lines = []
+    for line in text.split('\n'):
+        if has_arabic(line):
+            shaped = ' '.join(reshape_token(word) if has_arabic(word) else word for word in line.split(' '))
+            lines.append(bidi.get_display(shaped))
+        else:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+class ArabicTextProcessor:
+    """Document-level helpers used by the document processor's cleaning pipeline."""
+
+    @staticmethod
+    def is_arabic_text(text: str, threshold: float = 0.3) -> bool:
+        """Whether at least ``threshold`` of the non-space characters are Arabic."""
+        if not text:
+            return False
+        letters = len(text) - sum(text.count(space) for space in (' ', '\n', '\t', '\r'))
+        return letters > 0 and arabic_char_count(text) / letters >= threshold
+
+    @staticmethod
+    def process_bidirectional_text(text: str) -> str:
+        """Shape and reorder Arabic lines for display."""
+        return reorder_lines(text)
+
+    @staticmethod
+    def preprocess_arabic_text(text: str) -> str:
+        """
+        Line-preserving clean-up: presentation forms, diacritics and tatweel
+        removed and whitespace collapsed per line, then BiDi processing.
+        """
+        lines = (' '.join(normalize_arabic(line).split()) for line in text.split('\n'))
+        return reorder_lines(unicodedata.normalize('NFC', '\n'.join(lines)))
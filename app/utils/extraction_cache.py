@@ -0,0 +1,233 @@
+"""
+Extraction Cache
+
+Text extracted from an upload depends only on the file's bytes and on the
+extractor, yet the same file is routinely extracted again: re-uploads,
+re-analysis, bulk re-ingestion and the several processors that each read it.
+Tesseract at 300 dpi costs seconds per page, so results are kept on disk:
+
+- entries are keyed by the SHA-256 of the file content, the page index, the
+  extractor name and version and the settings that change its output (dpi,
+  psm, language, ...). Any change simply misses; extractors bump their
+  version constant when their logic changes;
+- text is stored zlib-compressed under ``<root>/<key[:2]>/<key>.z`` and
+  written to a temporary file that is renamed into place, so OCR process-pool
+  workers and concurrent requests share the directory without locking;
+- the directory is bounded by EXTRACTION_CACHE_MAX_MB. When a write takes it
+  over the limit, the least recently used entries (mtime, refreshed on every
+  hit) are evicted down to 90% of it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "storage/extraction_cache")
+EXTRACTION_CACHE_MAX_MB = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "512"))
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+
+# zlib level 6 compresses Arabic page text ~4x at several hundred MB/s
+_COMPRESSION_LEVEL = 6
+_EVICT_TO = 0.9
+_SUFFIX = ".z"
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's content, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(1024 * 1024):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def extraction_key(
+    content_hash: Optional[str],
+    page: Optional[int],
+    extractor: str,
+    version: str,
+    **settings: Any
+) -> Optional[str]:
+    """
+    Cache key for one page (or, with ``page=None``, a whole document).
+
+    Returns None without a content hash, which the cache treats as "do not cache".
+    """
+    if not content_hash:
+        return None
+    payload = json.dumps([content_hash, page, extractor, version, settings], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded on-disk cache of extracted text."""
+
+    def __init__(
+        self,
+        root: str = EXTRACTION_CACHE_DIR,
+        max_bytes: int = EXTRACTION_CACHE_MAX_MB * 1024 * 1024,
+        enabled: bool = EXTRACTION_CACHE_ENABLED
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{_SUFFIX}"
+
+    def content_hash(self, file_path: str) -> Optional[str]:
+        """Content hash of ``file_path``, or None when caching is off or the file is unreadable."""
+        if not self.enabled:
+            return None
+        try:
+            return file_sha256(str(file_path))
+        except OSError as e:
+            logger.debug(f"Extraction cache: cannot hash {file_path}: {e}")
+            return None
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        """Cached text for ``key``, or None on a miss."""
+        if not self.enabled or key is None:
+            return None
+        path = self._path(key)
+        try:
+            text = zlib.decompress(path.read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, zlib.error, UnicodeDecodeError) as e:
+            logger.warning(f"⚠️ Dropping unreadable extraction cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by another process in the meantime
+        self.hits += 1
+        return text
+
+    def put(self, key: Optional[str], text: str) -> None:
+        """Store ``text`` under ``key``, evicting old entries if the cache is over its limit."""
+        if not self.enabled or key is None:
+            return
+        data = zlib.compress(text.encode("utf-8"), _COMPRESSION_LEVEL)
+        if len(data) > self.max_bytes * (1 - _EVICT_TO):
+            return  # would evict a large part of the cache for a single entry
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write extraction cache entry: {e}")
+            return
+
+        with self._lock:
+            self.writes += 1
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def get_or_extract(
+        self,
+        file_path: str,
+        extractor: str,
+        version: str,
+        extract: Callable[[], str],
+        content_hash: Optional[str] = None,
+        **settings: Any
+    ) -> str:
+        """Whole-document text from the cache, or from ``extract()`` (non-empty results are stored)."""
+        key = extraction_key(content_hash or self.content_hash(file_path), None, extractor, version, **settings)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        text = extract()
+        if text:
+            self.put(key, text)
+        return text
+
+    def _entries(self):
+        """(path, size, mtime) of every entry currently on disk."""
+        if not self.root.is_dir():
+            return
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache is under 90% of its limit."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * _EVICT_TO
+        removed = 0
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            removed += 1
+        self._size = size
+        self.evictions += removed
+        if removed:
+            logger.info(f"🧹 Extraction cache evicted {removed} entries ({size / 1024 / 1024:.1f} MB kept)")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Process-wide extraction cache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
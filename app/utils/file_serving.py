@@ -0,0 +1,202 @@
+"""
+Shared file-serving layer for downloads.
+
+Contracts, template previews and analysis PDFs used to be read into memory
+and returned whole, with no validators, so every retry or re-open re-sent
+the full file. ``serve_file`` instead:
+
+- sends a strong ETag derived from the file's SHA-256, or from a content
+  hash the caller already has, and a Last-Modified date. Hashes are
+  computed in a worker thread and memoised per file version (path, inode,
+  size, mtime), so a file is read for hashing once;
+- answers If-None-Match and, when it is absent, If-Modified-Since with
+  304 Not Modified (RFC 9110 13.1);
+- honours Range and If-Range, so an interrupted download resumes where it
+  stopped (single and multipart ranges, 416 for unsatisfiable ones);
+- transmits without copying through userspace when the ASGI server offers
+  it: ``http.response.pathsend`` (Hypercorn, Granian) for whole files and
+  ``http.response.zerocopysend`` (an fd the server hands to sendfile) for
+  whole files and single ranges. Servers without either extension, uvicorn
+  included, get the file in chunks read off the event loop.
+"""
+
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+FILE_ETAG_CACHE_SIZE = int(os.getenv("FILE_ETAG_CACHE_SIZE", "4096"))
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_etags: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+_etags_lock = threading.Lock()
+
+
+# ==================== VALIDATORS ====================
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(headers: Any, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Whether the client's copy is current: If-None-Match wins,
+    If-Modified-Since is only consulted when it is absent.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: W/"x" matches "x"
+        return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole-second precision
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_etag(path: str, stat_result: os.stat_result) -> str:
+    """Strong ETag of the file's content (blocking on first use of a file version)."""
+    key = (os.path.realpath(path), stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+    with _etags_lock:
+        etag = _etags.get(key)
+        if etag is not None:
+            _etags.move_to_end(key)
+            return etag
+    etag = f'"{_sha256_file(path)[:32]}"'
+    with _etags_lock:
+        _etags[key] = etag
+        while len(_etags) > FILE_ETAG_CACHE_SIZE:
+            _etags.popitem(last=False)
+    return etag
+
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    """Content-Disposition with an ASCII fallback and the RFC 5987 UTF-8 name."""
+    stem, extension = os.path.splitext(filename)
+    stem = "".join(c for c in stem if c.isascii() and (c.isalnum() or c in " ._-")).strip()
+    fallback = (stem or "download") + "".join(c for c in extension if (c.isascii() and c.isalnum()) or c == ".")
+    return f"{'inline' if inline else 'attachment'}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+# ==================== RESPONSE ====================
+
+class ZeroCopyFileResponse(FileResponse):
+    """FileResponse that also uses the ASGI zero-copy send extension when offered."""
+
+    _zerocopy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _send_zerocopy(self, send: Send, offset: int, count: int) -> None:
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file,
+                "offset": offset,
+                "count": count,
+                "more_body": False,
+            })
+        finally:
+            file.close()
+
+    async def _handle_simple(self, send: Send, send_header_only: bool, send_pathsend: bool) -> None:
+        if not self._zerocopy or send_header_only or send_pathsend:
+            return await super()._handle_simple(send, send_header_only, send_pathsend)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await self._send_zerocopy(send, 0, int(self.headers["content-length"]))
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if not self._zerocopy or send_header_only:
+            return await super()._handle_single_range(send, start, end, file_size, send_header_only)
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        await self._send_zerocopy(send, start, end - start)
+
+
+async def serve_file(
+    request: Request,
+    path: str,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+    inline: bool = False,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = "private, no-cache"
+) -> Response:
+    """
+    Response serving ``path`` with validators, conditional GET and ranges.
+
+    Args:
+        request: The incoming request (for conditional and Range headers)
+        path: File to serve
+        media_type: Content type (guessed from the name if omitted)
+        filename: Download name for Content-Disposition
+        inline: Display in the browser rather than download
+        etag: Quoted strong ETag when the caller already knows a content hash
+        last_modified: Overrides the file's mtime as Last-Modified
+        cache_control: Cache-Control header; the default lets clients keep the
+            file but revalidate it on every use
+
+    Raises:
+        FileNotFoundError: If ``path`` is not a regular file
+    """
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except OSError as e:
+        raise FileNotFoundError(f"File not found: {path}") from e
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(f"Not a file: {path}")
+
+    if etag is None:
+        etag = await anyio.to_thread.run_sync(file_etag, path, stat_result)
+    if last_modified is None:
+        last_modified = datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename, inline)
+    return ZeroCopyFileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
@@ -0,0 +1,288 @@
+"""
+Reusable Gemini file handles.
+
+Sending a PDF inline (``types.Part.from_bytes``) re-transmits the whole
+document with every request, and the same multi-MB case file is sent again
+for each summary, analysis type and follow-up question. The Gemini file API
+instead stores an upload for 48 hours and lets prompts reference it by URI.
+
+``DocumentHandleManager`` uploads each document once, keyed by the SHA-256 of
+its content and its MIME type, and hands out ``file_data`` parts for it:
+
+- concurrent requests for the same document share one upload;
+- a handle is reused until it is within GEMINI_FILE_REFRESH_MARGIN_MINUTES of
+  its expiry, then uploaded again, so a long analysis never starts on a file
+  that is about to disappear;
+- documents under GEMINI_FILE_HANDLE_MIN_KB are not worth the extra round
+  trip and, like any upload failure, make ``part`` return None so callers fall
+  back to inline bytes;
+- when a request is rejected because the API no longer knows a stored file
+  (deleted or expired before its recorded expiry, another project),
+  ``with_inline_fallback`` forgets the handle and retries once inline, so one
+  lost upload cannot fail every request for that document until it expires.
+
+Handles are tracked per process and belong to the project of GEMINI_API_KEY.
+``LocalFileBackend`` stands in for the file API in tests and offline work.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+GEMINI_FILE_HANDLES_ENABLED = os.getenv("GEMINI_FILE_HANDLES_ENABLED", "true").lower() == "true"
+GEMINI_FILE_HANDLE_MIN_KB = int(os.getenv("GEMINI_FILE_HANDLE_MIN_KB", "256"))
+GEMINI_FILE_REFRESH_MARGIN_MINUTES = int(os.getenv("GEMINI_FILE_REFRESH_MARGIN_MINUTES", "60"))
+GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS = int(os.getenv("GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS", "120"))
+
+# The file API keeps uploads for 48 hours
+GEMINI_FILE_TTL_SECONDS = 48 * 3600
+
+T = TypeVar("T")
+
+
+def is_file_reference_error(error: BaseException) -> bool:
+    """Whether a Gemini API error is a 404/403: a referenced resource is gone or not ours."""
+    code = getattr(error, "code", None)
+    status = str(getattr(error, "status", "") or "")
+    return code in (403, 404) or status in ("NOT_FOUND", "PERMISSION_DENIED")
+
+
+def references_file(part: Any) -> bool:
+    """Whether a content part points at an uploaded file rather than carrying data."""
+    if isinstance(part, dict):
+        return "file_data" in part
+    return getattr(part, "file_data", None) is not None
+
+
+@dataclass
+class DocumentHandle:
+    """An uploaded document that prompts can reference by URI."""
+
+    content_hash: str
+    name: str
+    uri: str
+    mime_type: str
+    size: int
+    expires_at: float  # epoch seconds
+
+    def usable(self, margin_seconds: float) -> bool:
+        return self.expires_at - time.time() > margin_seconds
+
+
+class GeminiFileBackend:
+    """Uploads through the Gemini file API of a ``genai.Client``."""
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def upload(self, content: bytes, mime_type: str, display_name: str, content_hash: str) -> DocumentHandle:
+        from google.genai import types
+        uploaded = self.client.files.upload(
+            file=io.BytesIO(content),
+            config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name[:128])
+        )
+        # PDFs are normally ACTIVE at once; wait out the occasional PROCESSING state
+        deadline = time.monotonic() + GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS
+        while _state(uploaded) == "PROCESSING":
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Gemini file {uploaded.name} still processing")
+            time.sleep(1)
+            uploaded = self.client.files.get(name=uploaded.name)
+        if _state(uploaded) == "FAILED":
+            raise RuntimeError(f"Gemini could not process uploaded file {uploaded.name}")
+
+        expiration = getattr(uploaded, "expiration_time", None)
+        return DocumentHandle(
+            content_hash=content_hash,
+            name=uploaded.name,
+            uri=uploaded.uri,
+            mime_type=uploaded.mime_type or mime_type,
+            size=len(content),
+            expires_at=expiration.timestamp() if expiration else time.time() + GEMINI_FILE_TTL_SECONDS
+        )
+
+    def part(self, handle: DocumentHandle) -> Any:
+        from google.genai import types
+        return types.Part.from_uri(file_uri=handle.uri, mime_type=handle.mime_type)
+
+    def delete(self, handle: DocumentHandle) -> None:
+        self.client.files.delete(name=handle.name)
+
+
+def _state(uploaded: Any) -> str:
+    state = getattr(uploaded, "state", None)
+    return str(getattr(state, "name", state or "ACTIVE"))
+
+
+class LocalFileBackend:
+    """File API stand-in that keeps "uploads" in a local directory."""
+
+    def __init__(self, root: str, ttl_seconds: float = GEMINI_FILE_TTL_SECONDS) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.uploads = 0
+
+    def upload(self, content: bytes, mime_type: str, display_name: str, content_hash: str) -> DocumentHandle:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.uploads += 1
+        path = self.root / f"{content_hash}-{self.uploads}"
+        path.write_bytes(content)
+        return DocumentHandle(
+            content_hash=content_hash,
+            name=f"files/{path.name}",
+            uri=path.resolve().as_uri(),
+            mime_type=mime_type,
+            size=len(content),
+            expires_at=time.time() + self.ttl_seconds
+        )
+
+    def part(self, handle: DocumentHandle) -> Dict[str, Any]:
+        return {"file_data": {"file_uri": handle.uri, "mime_type": handle.mime_type}}
+
+    def delete(self, handle: DocumentHandle) -> None:
+        (self.root / handle.name.split("/", 1)[1]).unlink(missing_ok=True)
+
+
+class DocumentHandleManager:
+    """Uploads each document once and hands out parts referencing it."""
+
+    def __init__(
+        self,
+        backend: Optional[Any] = None,
+        min_bytes: int = GEMINI_FILE_HANDLE_MIN_KB * 1024,
+        refresh_margin_seconds: float = GEMINI_FILE_REFRESH_MARGIN_MINUTES * 60,
+        enabled: bool = GEMINI_FILE_HANDLES_ENABLED
+    ) -> None:
+        self.backend = backend
+        self.min_bytes = min_bytes
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.enabled = enabled
+        self.uploads = 0
+        self.reuses = 0
+        self.failures = 0
+        self.rejected = 0
+        self._handles: Dict[Tuple[str, str], DocumentHandle] = {}
+        self._pending: Dict[Tuple[str, str], "asyncio.Task[DocumentHandle]"] = {}
+
+    async def part(self, content: bytes, mime_type: str, display_name: str, client: Any = None) -> Optional[Any]:
+        """
+        A content part referencing ``content`` through the file API, or None
+        when it should be sent inline (small, disabled, no client, upload failed).
+        """
+        if not self.enabled or len(content) < self.min_bytes:
+            return None
+        backend = self.backend or (GeminiFileBackend(client) if client is not None else None)
+        if backend is None:
+            return None
+        try:
+            handle = await self.handle(content, mime_type, display_name, backend)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"⚠️ File upload of {display_name} failed, sending it inline: {e}")
+            return None
+        return backend.part(handle)
+
+    async def handle(self, content: bytes, mime_type: str, display_name: str, backend: Any) -> DocumentHandle:
+        """The live handle for ``content``, uploading it if there is none."""
+        key = (hashlib.sha256(content).hexdigest(), mime_type)
+        self._prune()
+        handle = self._handles.get(key)
+        if handle is not None and handle.usable(self.refresh_margin_seconds):
+            self.reuses += 1
+            return handle
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._upload(key, content, display_name, backend))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.reuses += 1
+        # Shielded: one caller being cancelled must not abort the shared upload
+        return await asyncio.shield(task)
+
+    async def _upload(self, key: Tuple[str, str], content: bytes, display_name: str, backend: Any) -> DocumentHandle:
+        started = time.perf_counter()
+        handle = await asyncio.to_thread(backend.upload, content, key[1], display_name, key[0])
+        self._handles[key] = handle
+        self.uploads += 1
+        logger.info(
+            f"📤 Uploaded {display_name} ({len(content) / 1024 / 1024:.1f} MB) as {handle.name} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return handle
+
+    def existing_part(self, content_hash: str, mime_type: str, client: Any = None) -> Optional[Any]:
+        """A part for a document uploaded earlier whose handle is still live, else None."""
+        backend = self.backend or (GeminiFileBackend(client) if client is not None else None)
+        handle = self._handles.get((content_hash, mime_type))
+        if backend is None or handle is None or not handle.usable(self.refresh_margin_seconds):
+            return None
+        self.reuses += 1
+        return backend.part(handle)
+
+    def invalidate(self, content: bytes, mime_type: str) -> None:
+        """Forget the handle for ``content``, e.g. after the API reported it missing."""
+        self.forget(hashlib.sha256(content).hexdigest(), mime_type)
+
+    def forget(self, content_hash: str, mime_type: str) -> bool:
+        """Forget the handle for a document by content hash; True if there was one."""
+        return self._handles.pop((content_hash, mime_type), None) is not None
+
+    async def with_inline_fallback(
+        self,
+        part: Any,
+        content: bytes,
+        mime_type: str,
+        request: Callable[[Any], Awaitable[T]],
+        inline_part: Callable[[], Any]
+    ) -> T:
+        """
+        ``request(part)``, retried once with ``inline_part()`` if the API
+        rejects the file ``part`` references; the handle is forgotten first,
+        so later requests upload the document again.
+        """
+        try:
+            return await request(part)
+        except Exception as e:
+            if not (references_file(part) and is_file_reference_error(e)):
+                raise
+            self.invalidate(content, mime_type)
+            self.rejected += 1
+            logger.warning(f"⚠️ Gemini rejected a stored file, retrying with the document inline: {e}")
+        return await request(inline_part())
+
+    def _prune(self) -> None:
+        now = time.time()
+        for key in [key for key, handle in self._handles.items() if handle.expires_at <= now]:
+            del self._handles[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "handles": len(self._handles),
+            "uploads": self.uploads,
+            "reuses": self.reuses,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "bytes_referenced": sum(handle.size for handle in self._handles.values()),
+        }
+
+
+_manager: Optional[DocumentHandleManager] = None
+
+
+def get_document_handles() -> DocumentHandleManager:
+    """Process-wide document handle manager configured from the environment."""
+    global _manager
+    if _manager is None:
+        _manager = DocumentHandleManager()
+    return _manager
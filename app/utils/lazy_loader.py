@@ -0,0 +1,234 @@
+"""
+Lazy loading utilities for heavy engines (ML models, vector stores, OCR/PDF toolkits).
+
+Importing torch, transformers, langchain, chromadb, PyMuPDF or Tesseract bindings
+costs seconds to tens of seconds. This module lets services declare those
+dependencies as named engines that are only built on first use, and lets the
+application optionally warm them up in the background after it starts serving.
+
+Usage:
+    engine = register_engine("vectorstore", "app.services...:VectorstoreManager")
+    vectorstore_manager = lazy_proxy("vectorstore")   # module-level, costs nothing
+    vectorstore_manager.get_vectorstore()             # first access builds the engine
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from ..config.enhanced_logging import get_logger
+
+logger = get_logger(__name__)
+
+EngineFactory = Union[str, Callable[[], Any]]
+
+
+def resolve_factory(factory: EngineFactory) -> Callable[[], Any]:
+    """
+    Resolve a factory given either as a callable or as a "module:attribute" string.
+
+    String factories keep the heavy module out of the import graph until the
+    engine is actually requested.
+    """
+    if callable(factory):
+        return factory
+
+    module_name, _, attribute = factory.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Invalid engine factory path: {factory!r} (expected 'module:attribute')")
+
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+class LazyEngine:
+    """A named, thread-safe, build-once holder for an expensive object."""
+
+    def __init__(self, name: str, factory: EngineFactory, description: str = ""):
+        self.name = name
+        self.description = description
+        self._factory = factory
+        self._instance: Any = None
+        self._loaded = False
+        self._loading = False
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Any:
+        """Return the engine instance, building it on first call."""
+        if self._loaded:
+            return self._instance
+
+        with self._lock:
+            if self._loaded:
+                return self._instance
+
+            self._loading = True
+            start = time.perf_counter()
+            logger.info(f"⏳ Loading engine '{self.name}'...")
+            try:
+                instance = resolve_factory(self._factory)()
+            except Exception as e:
+                self._error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Failed to load engine '{self.name}': {self._error}")
+                raise
+            finally:
+                self._loading = False
+
+            self._instance = instance
+            self._load_seconds = time.perf_counter() - start
+            self._loaded_at = time.time()
+            self._error = None
+            self._loaded = True
+            logger.info(f"✅ Engine '{self.name}' loaded in {self._load_seconds:.2f}s")
+            return instance
+
+    def reset(self) -> None:
+        """Drop the cached instance so the next access rebuilds it."""
+        with self._lock:
+            self._instance = None
+            self._loaded = False
+            self._error = None
+            self._load_seconds = None
+            self._loaded_at = None
+
+    def status(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable snapshot of this engine's state."""
+        return {
+            "description": self.description,
+            "loaded": self._loaded,
+            "loading": self._loading,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+        }
+
+
+class LazyProxy:
+    """
+    Attribute-forwarding stand-in for a module-level singleton.
+
+    Existing call sites such as ``vectorstore_manager.get_vectorstore()`` keep
+    working unchanged; the engine is only built on the first attribute access.
+    """
+
+    __slots__ = ("_engine_name",)
+
+    def __init__(self, engine_name: str):
+        object.__setattr__(self, "_engine_name", engine_name)
+
+    def _resolve(self) -> Any:
+        return get_engine(object.__getattribute__(self, "_engine_name")).get()
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._resolve(), item)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        setattr(self._resolve(), key, value)
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, "_engine_name")
+        engine = _ENGINES.get(name)
+        state = "loaded" if engine and engine.loaded else "not loaded"
+        return f"<LazyProxy engine={name!r} ({state})>"
+
+
+_ENGINES: Dict[str, LazyEngine] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register_engine(name: str, factory: EngineFactory, description: str = "") -> LazyEngine:
+    """
+    Register a lazily built engine. Registering an existing name returns the
+    existing engine so modules can declare their engines idempotently.
+    """
+    with _REGISTRY_LOCK:
+        engine = _ENGINES.get(name)
+        if engine is None:
+            engine = LazyEngine(name, factory, description)
+            _ENGINES[name] = engine
+        return engine
+
+
+def get_engine(name: str) -> LazyEngine:
+    """Look up a registered engine by name."""
+    if name not in _ENGINES:
+        # Make sure the default catalog has been registered
+        from ..config import engines  # noqa: F401
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise KeyError(f"Unknown engine: {name!r}. Registered: {sorted(_ENGINES)}")
+
+
+def lazy_proxy(name: str) -> LazyProxy:
+    """Return a proxy that builds the named engine on first attribute access."""
+    return LazyProxy(name)
+
+
+def registered_engines() -> List[str]:
+    """Names of all registered engines."""
+    return sorted(_ENGINES)
+
+
+def engines_status() -> Dict[str, Dict[str, Any]]:
+    """Status snapshot of every registered engine."""
+    return {name: engine.status() for name, engine in sorted(_ENGINES.items())}
+
+
+async def warm_up_engines(names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+    """
+    Build engines in worker threads so the event loop keeps serving requests.
+
+    Args:
+        names: Engines to warm up (defaults to every registered engine)
+
+    Returns:
+        Mapping of engine name to whether it loaded successfully
+    """
+    targets = list(names) if names is not None else registered_engines()
+    results: Dict[str, bool] = {}
+
+    for name in targets:
+        try:
+            engine = get_engine(name)
+        except KeyError as e:
+            logger.warning(f"⚠️ Skipping warm-up: {e}")
+            results[name] = False
+            continue
+
+        try:
+            await asyncio.to_thread(engine.get)
+            results[name] = True
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up of engine '{name}' failed: {e}")
+            results[name] = False
+
+    logger.info(f"🔥 Engine warm-up finished: {results}")
+    return results
+
+
+_OPTIONAL_MODULES: Dict[str, Any] = {}
+
+
+def optional_import(module_name: str) -> Optional[Any]:
+    """
+    Import an optional dependency on demand, caching the result.
+
+    Returns None (and remembers it) when the module is not installed.
+    """
+    if module_name not in _OPTIONAL_MODULES:
+        try:
+            _OPTIONAL_MODULES[module_name] = importlib.import_module(module_name)
+        except ImportError:
+            logger.warning(f"Optional dependency '{module_name}' is not installed")
+            _OPTIONAL_MODULES[module_name] = None
+    return _OPTIONAL_MODULES[module_name]
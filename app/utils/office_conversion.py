@@ -0,0 +1,320 @@
+"""
+DOCX to PDF conversion through a pool of long-lived headless office processes.
+
+Running ``soffice --headless --convert-to pdf`` per document cold-starts
+LibreOffice (several seconds, more on first use of a profile) for every
+contract and preview, and two such runs sharing the default user profile
+fail on its lock. ``OfficeConversionPool`` instead keeps OFFICE_POOL_SIZE
+workers, each owning one office instance with its own profile directory:
+
+- with the ``uno`` bindings installed (the ``python3-uno`` package), a worker
+  starts ``soffice`` once, listening on a local socket, and converts documents
+  by loading them into that running instance;
+- without them, a worker runs ``soffice --convert-to`` per document against
+  its own, already initialised profile, which still avoids profile creation
+  and lock contention between concurrent conversions.
+
+Jobs go through a queue and complete asynchronously, so callers never block
+the event loop. A worker whose office process died or stopped responding is
+restarted before it takes the next job. ``stats()`` reports queue depth,
+latency and restart counts.
+
+Workers only need ``start``, ``alive``, ``convert`` and ``stop``; tests pass
+a factory for a local fake instead of ``SofficeWorker``.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .lazy_loader import optional_import
+
+logger = logging.getLogger(__name__)
+
+OFFICE_POOL_SIZE = int(os.getenv("OFFICE_POOL_SIZE", "2"))
+OFFICE_CONVERSION_TIMEOUT_SECONDS = int(os.getenv("OFFICE_CONVERSION_TIMEOUT_SECONDS", "60"))
+OFFICE_STARTUP_TIMEOUT_SECONDS = int(os.getenv("OFFICE_STARTUP_TIMEOUT_SECONDS", "30"))
+OFFICE_PROFILE_ROOT = os.getenv("OFFICE_PROFILE_ROOT", os.path.join(tempfile.gettempdir(), "office-pool"))
+OFFICE_BINARY = os.getenv("OFFICE_BINARY", "")
+
+OFFICE_BINARY_CANDIDATES = [
+    "soffice",
+    "libreoffice",
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+]
+
+# Latencies kept for the percentiles in stats()
+_LATENCY_WINDOW = 200
+
+
+class ConversionError(RuntimeError):
+    """A document could not be converted."""
+
+
+def find_office_binary() -> Optional[str]:
+    """Path of the LibreOffice executable, or None when it is not installed."""
+    for candidate in ([OFFICE_BINARY] if OFFICE_BINARY else []) + OFFICE_BINARY_CANDIDATES:
+        found = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if found:
+            return found
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SofficeWorker:
+    """One headless LibreOffice instance with its own user profile."""
+
+    def __init__(self, index: int, binary: str, profile_root: str = OFFICE_PROFILE_ROOT) -> None:
+        self.index = index
+        self.binary = binary
+        self.profile_dir = Path(profile_root) / f"worker-{index}"
+        self.uno = optional_import("uno")
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop: Any = None
+
+    @property
+    def _profile_url(self) -> str:
+        return self.profile_dir.resolve().as_uri()
+
+    def start(self) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if self.uno is None:
+            return  # one process per conversion, sharing this worker's profile
+        port = _free_port()
+        self._process = subprocess.Popen(
+            [
+                self.binary,
+                f"-env:UserInstallation={self._profile_url}",
+                "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck",
+                f"--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        local = self.uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.monotonic() + OFFICE_STARTUP_TIMEOUT_SECONDS
+        while True:
+            try:
+                context = resolver.resolve(f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise ConversionError(f"Office worker {self.index} did not start")
+                time.sleep(0.25)
+        self._desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        logger.info(f"📄 Office worker {self.index} listening on port {port} (pid {self._process.pid})")
+
+    def alive(self) -> bool:
+        if self.uno is None:
+            return True
+        return self._process is not None and self._process.poll() is None and self._desktop is not None
+
+    def convert(self, source: str, output_dir: str, timeout: float) -> str:
+        target = Path(output_dir) / (Path(source).stem + ".pdf")
+        if self.uno is None:
+            try:
+                subprocess.run(
+                    [
+                        self.binary,
+                        f"-env:UserInstallation={self._profile_url}",
+                        "--headless", "--norestore",
+                        "--convert-to", "pdf",
+                        "--outdir", str(output_dir),
+                        str(source),
+                    ],
+                    check=True, timeout=timeout, capture_output=True, text=True
+                )
+            except subprocess.CalledProcessError as e:
+                raise ConversionError(f"LibreOffice failed: {e.stderr or e}") from e
+            except subprocess.TimeoutExpired as e:
+                raise ConversionError(f"LibreOffice timed out after {timeout}s") from e
+        else:
+            document = self._desktop.loadComponentFromURL(
+                self.uno.systemPathToFileUrl(os.path.abspath(source)), "_blank", 0, (self._property("Hidden", True),)
+            )
+            if document is None:
+                raise ConversionError(f"LibreOffice could not open {source}")
+            try:
+                document.storeToURL(
+                    self.uno.systemPathToFileUrl(os.path.abspath(target)),
+                    (self._property("FilterName", "writer_pdf_Export"),)
+                )
+            finally:
+                document.close(True)
+        if not target.exists():
+            raise ConversionError(f"LibreOffice produced no PDF for {source}")
+        return str(target)
+
+    def _property(self, name: str, value: Any) -> Any:
+        prop = self.uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name, prop.Value = name, value
+        return prop
+
+    def stop(self) -> None:
+        self._desktop = None
+        if self._process is not None:
+            self._process.kill()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+            self._process = None
+
+
+class _Job:
+    __slots__ = ("source", "output_dir", "future", "queued_at")
+
+    def __init__(self, source: str, output_dir: str, future: "asyncio.Future[str]") -> None:
+        self.source = source
+        self.output_dir = output_dir
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class OfficeConversionPool:
+    """Queue of conversions served by long-lived office workers."""
+
+    def __init__(
+        self,
+        worker_factory: Callable[[int], Any],
+        size: int = OFFICE_POOL_SIZE,
+        timeout_seconds: float = OFFICE_CONVERSION_TIMEOUT_SECONDS
+    ) -> None:
+        self.worker_factory = worker_factory
+        self.size = max(1, size)
+        self.timeout_seconds = timeout_seconds
+        self.workers: List[Any] = []
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.in_flight = 0
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._waits: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._queue: Optional["asyncio.Queue[_Job]"] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    async def convert(self, source: str, output_dir: str) -> str:
+        """Convert ``source`` to PDF in ``output_dir``; the PDF's path."""
+        self._ensure_started()
+        future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Job(str(source), str(output_dir), future))
+        return await future
+
+    def _ensure_started(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self.workers = [self.worker_factory(index) for index in range(self.size)]
+        self._tasks = [asyncio.create_task(self._serve(worker)) for worker in self.workers]
+        logger.info(f"📄 Started office conversion pool with {self.size} workers")
+
+    async def _serve(self, worker: Any) -> None:
+        started = False
+        while True:
+            job = await self._queue.get()
+            self._waits.append(time.perf_counter() - job.queued_at)
+            self.in_flight += 1
+            try:
+                if started and not worker.alive():
+                    self.restarts += 1
+                    logger.warning(f"⚠️ Office worker {worker.index} died, restarting it")
+                    await asyncio.to_thread(worker.stop)
+                    started = False
+                if not started:
+                    await asyncio.to_thread(worker.start)
+                    started = True
+                result = await asyncio.wait_for(
+                    asyncio.to_thread(worker.convert, job.source, job.output_dir, self.timeout_seconds),
+                    timeout=self.timeout_seconds
+                )
+            except Exception as e:
+                self.failed += 1
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if timed_out:
+                    e = ConversionError(f"Conversion of {Path(job.source).name} timed out")
+                elif not isinstance(e, ConversionError):
+                    e = ConversionError(f"Conversion of {Path(job.source).name} failed: {e}")
+                # A hung or crashed instance is replaced before the next job
+                if started and (timed_out or not worker.alive()):
+                    self.restarts += 1
+                    logger.warning(f"⚠️ Office worker {worker.index} stopped responding, restarting it")
+                    await asyncio.to_thread(worker.stop)
+                    started = False
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.completed += 1
+                self._latencies.append(time.perf_counter() - job.queued_at)
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(values: List[float], fraction: float) -> Optional[float]:
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(len(values) * fraction))], 3)
+
+        return {
+            "workers": len(self.workers),
+            "alive": sum(1 for worker in self.workers if worker.alive()),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "latency_p50_seconds": percentile(latencies, 0.5),
+            "latency_p95_seconds": percentile(latencies, 0.95),
+            "queue_wait_avg_seconds": round(sum(self._waits) / len(self._waits), 3) if self._waits else None,
+        }
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for worker in self.workers:
+            await asyncio.to_thread(worker.stop)
+        self._tasks = []
+        self._queue = None
+
+
+_pool: Optional[OfficeConversionPool] = None
+
+
+def get_conversion_pool() -> Optional[OfficeConversionPool]:
+    """Process-wide conversion pool, or None when LibreOffice is not installed."""
+    global _pool
+    if _pool is None:
+        binary = find_office_binary()
+        if binary is None:
+            return None
+        _pool = OfficeConversionPool(lambda index: SofficeWorker(index, binary))
+    return _pool
+
+
+async def shutdown_conversion_pool() -> None:
+    """Stop the shared pool's office processes (a new pool is created on next use)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
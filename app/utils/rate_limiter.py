@@ -0,0 +1,53 @@
+"""
+Async rate limiting for external model APIs.
+
+``AsyncRateLimiter`` bounds both how many calls are in flight and how fast
+new calls start, so fanning a document out into many concurrent requests
+stays inside the provider's per-minute quota instead of tripping 429s:
+
+    limiter = AsyncRateLimiter(max_concurrency=4, requests_per_minute=30)
+    async with limiter:
+        await call_model(...)
+
+Starts are spaced evenly (60 / requests_per_minute seconds apart) rather than
+allowed in bursts, which is what per-minute quotas tolerate best.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """Concurrency cap plus an evenly spaced start rate (0 requests/minute = unlimited)."""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float = 0) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._next_start = 0.0
+        self.in_flight = 0
+        self.started = 0
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        await self._semaphore.acquire()
+        if self.interval:
+            # Reserve the next start slot before sleeping so waiters queue in order
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self.interval
+            if start_at > now:
+                try:
+                    await asyncio.sleep(start_at - now)
+                except BaseException:
+                    self._semaphore.release()
+                    raise
+        self.in_flight += 1
+        self.started += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
@@ -0,0 +1,185 @@
+"""
+Shared upload ingestion.
+
+Streams an uploaded file to disk in fixed-size chunks while computing its
+SHA-256 and size on the fly, so no upload is ever held in memory as one bytes
+object and no file is re-read just to hash it. Limits are enforced as early
+as possible (declared size before reading, running size while reading), and
+duplicates are detected before the file is moved into its final location:
+up front when the client declares the hash (``X-Content-SHA256``), otherwise
+as soon as the last chunk has been hashed.
+
+Downstream processors receive an ``IngestedUpload`` carrying the file path,
+never the file's bytes.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import aiofiles
+from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+
+DuplicateLookup = Callable[[str], Awaitable[Optional[Any]]]
+
+
+class UploadRejected(ValueError):
+    """The upload was refused; ``status_code`` is the HTTP status to answer with."""
+
+    status_code = 400
+
+    def __init__(self, message: str, field: str = "file"):
+        super().__init__(message)
+        self.message = message
+        self.field = field
+
+
+class UploadTooLarge(UploadRejected):
+    status_code = 413
+
+
+class DuplicateUpload(UploadRejected):
+    """A document with the same content hash already exists."""
+
+    status_code = 409
+
+    def __init__(self, sha256: str, existing: Any):
+        super().__init__(f"Duplicate file detected: this document has already been uploaded (hash {sha256[:16]}...)")
+        self.sha256 = sha256
+        self.existing = existing
+
+
+@dataclass
+class IngestedUpload:
+    """An upload written to disk, with the metadata computed while streaming it."""
+
+    path: str
+    filename: str
+    extension: str
+    size: int
+    sha256: str
+
+    def discard(self) -> None:
+        """Remove the stored file (e.g. when downstream processing fails)."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def file_extension(filename: str) -> str:
+    return os.path.splitext(filename or "")[1].lower()
+
+
+async def find_knowledge_document_by_hash(sha256: str) -> Optional[Any]:
+    """Default duplicate lookup: a KnowledgeDocument with this file_hash, if any."""
+    from ..db.database import AsyncSessionLocal
+    from ..models.legal_knowledge import KnowledgeDocument
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(KnowledgeDocument).where(KnowledgeDocument.file_hash == sha256).limit(1)
+        )
+        return result.scalars().first()
+
+
+async def ingest_upload(
+    upload: Any,
+    destination_dir: str,
+    *,
+    allowed_extensions: Optional[Iterable[str]] = None,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    expected_sha256: Optional[str] = None,
+    duplicate_lookup: Optional[DuplicateLookup] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> IngestedUpload:
+    """
+    Stream an upload into ``destination_dir`` under a unique name.
+
+    Args:
+        upload: FastAPI ``UploadFile`` (or anything with ``filename`` and an
+            async ``read(size)``)
+        destination_dir: Directory the file ends up in (created if missing)
+        allowed_extensions: Accepted lowercase extensions, e.g. ``['.pdf']``
+        max_bytes: Size limit; checked against the declared size before
+            reading and against the running size while reading
+        expected_sha256: Hash declared by the client; lets duplicates be
+            rejected before any byte is read, and is verified at the end
+        duplicate_lookup: Async callable returning the existing document for a
+            hash (or None); a hit raises DuplicateUpload
+
+    Raises:
+        UploadRejected / UploadTooLarge / DuplicateUpload (all ValueError)
+    """
+    filename = getattr(upload, "filename", None) or ""
+    if not filename:
+        raise UploadRejected("File is required")
+
+    extension = file_extension(filename)
+    if allowed_extensions is not None and extension not in allowed_extensions:
+        raise UploadRejected(
+            f"File type '{extension}' not supported. Allowed: {', '.join(allowed_extensions)}"
+        )
+
+    declared_size = getattr(upload, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise UploadTooLarge(_too_large_message(declared_size, max_bytes))
+
+    if expected_sha256:
+        expected_sha256 = expected_sha256.strip().lower()
+        await _check_duplicate(expected_sha256, duplicate_lookup)
+
+    os.makedirs(destination_dir, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=destination_dir, suffix=".part")
+    os.close(temp_fd)
+
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(_too_large_message(size, max_bytes))
+                sha256.update(chunk)
+                await out.write(chunk)
+
+        digest = sha256.hexdigest()
+        if expected_sha256 and digest != expected_sha256:
+            raise UploadRejected(f"Checksum mismatch: declared {expected_sha256[:16]}..., received {digest[:16]}...")
+        if not expected_sha256:
+            await _check_duplicate(digest, duplicate_lookup)
+
+        final_path = os.path.join(destination_dir, f"{uuid.uuid4()}{extension}")
+        os.replace(temp_path, final_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    logger.info(f"💾 Stored upload {filename} ({size} bytes, sha256 {digest[:16]}...) at {final_path}")
+    return IngestedUpload(path=final_path, filename=filename, extension=extension, size=size, sha256=digest)
+
+
+async def _check_duplicate(sha256: str, duplicate_lookup: Optional[DuplicateLookup]) -> None:
+    if duplicate_lookup is None:
+        return
+    existing = await duplicate_lookup(sha256)
+    if existing is not None:
+        logger.warning(f"⚠️ Duplicate upload rejected: hash {sha256[:16]}...")
+        raise DuplicateUpload(sha256, existing)
+
+
+def _too_large_message(size: int, max_bytes: int) -> str:
+    return f"File too large ({size / (1024 * 1024):.1f}MB). Maximum size is {max_bytes / (1024 * 1024):.0f}MB."
@@ -0,0 +1,69 @@
+"""
+ZIP archives streamed while they are written.
+
+``zipfile`` can write to a non-seekable stream (it then records sizes in data
+descriptors after each member), so an archive of hundreds of generated
+contracts can be sent as it is built instead of being assembled in memory or
+in a temporary file first. ``zip_stream`` is a plain generator: handed to
+``StreamingResponse`` it runs in the threadpool, off the event loop.
+"""
+
+import zipfile
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+ZIP_CHUNK_SIZE = 256 * 1024
+
+
+class _ChunkSink:
+    """Write-only file object collecting what zipfile writes."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(
+    files: Iterable[Tuple[str, str]],
+    extra: Optional[Iterable[Tuple[str, bytes]]] = None,
+    chunk_size: int = ZIP_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of ``files`` ((name in archive, path on disk)) followed
+    by ``extra`` in-memory members ((name, bytes)).
+
+    Generated PDFs barely compress, so members are stored, not deflated.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for arcname, path in files:
+            with open(path, "rb") as source, archive.open(arcname, mode="w") as member:
+                while True:
+                    block = source.read(chunk_size)
+                    if not block:
+                        break
+                    member.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+        for arcname, content in extra or []:
+            archive.writestr(arcname, content, compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for the shared Arabic normalisation module.
+
+Builds a line corpus from the laws in data_set/files in three shapes that
+text extraction produces: clean Unicode text, text with letters replaced by
+PDF presentation-form glyphs, and letter-fragmented text. Each public pass of
+app.utils.arabic_text_processor is timed line by line (the way the processors
+call it) and reported in MB/s of UTF-8 input. Shaping passes are skipped when
+arabic_reshaper / python-bidi are not installed.
+
+Usage:
+    python benchmarks/arabic_normalization_benchmark.py
+    python benchmarks/arabic_normalization_benchmark.py --repeat 5 --files data_set/files
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils import arabic_text_processor as arabic_text  # noqa: E402
+
+
+def _iter_article_texts(data):
+    sources = data.get("law_sources", data) if isinstance(data, dict) else data
+    for source in sources if isinstance(sources, list) else [sources]:
+        if not isinstance(source, dict):
+            continue
+        for article in source.get("articles", []):
+            yield str(article.get("text", ""))
+
+
+def build_corpus(files_dir: Path):
+    """Clean, glyph-encoded and fragmented lines from the law corpus."""
+    clean = []
+    for path in sorted(files_dir.glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for text in _iter_article_texts(data):
+            clean.extend(line for line in text.split("\n") if line.strip())
+
+    glyphs = {}
+    for code_point, base in arabic_text.PRESENTATION_FORMS_TABLE.items():
+        if len(base) == 1:
+            glyphs.setdefault(base, []).append(chr(code_point))
+    rng = random.Random(0)
+    encoded = [
+        "".join(rng.choice(glyphs[c]) if c in glyphs and rng.random() < 0.5 else c for c in line)
+        for line in clean
+    ]
+    fragmented = [" ".join(line[:60]) for line in clean[::4]]
+    return {"clean": clean, "glyph-encoded": encoded, "fragmented": fragmented}
+
+
+def throughput(function, lines, repeat):
+    """Best-of-N MB/s of UTF-8 input for calling ``function`` on every line."""
+    megabytes = sum(len(line.encode("utf-8")) for line in lines) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            function(line)
+        best = min(best, time.perf_counter() - start)
+    return megabytes / best if best else float("inf")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Arabic normalisation throughput")
+    parser.add_argument("--files", default=str(PROJECT_ROOT / "data_set" / "files"), help="Directory of law JSON files")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(Path(args.files))
+    passes = [
+        ("arabic_ratio", arabic_text.arabic_ratio),
+        ("needs_fixing", arabic_text.needs_fixing),
+        ("clean_text_artifacts", arabic_text.clean_text_artifacts),
+        ("normalize_arabic", arabic_text.normalize_arabic),
+        ("normalize_arabic(letters)", lambda line: arabic_text.normalize_arabic(line, letter_variants=True)),
+        ("normalize_fragmented_arabic", arabic_text.normalize_fragmented_arabic),
+        ("ensure_rtl_text_direction", arabic_text.ensure_rtl_text_direction),
+    ]
+    shaping = arabic_text._shaping_libraries()[0] is not None
+    if shaping:
+        passes.append(("fix_arabic_text", arabic_text.fix_arabic_text))
+
+    print("=" * 72)
+    print("⚡ Arabic normalisation throughput (MB/s of UTF-8 input)")
+    print("=" * 72)
+    sizes = ", ".join(
+        f"{name}: {len(lines)} lines / {sum(len(l.encode('utf-8')) for l in lines) / 1e6:.2f} MB"
+        for name, lines in corpus.items()
+    )
+    print(f"Corpus:  {sizes}")
+    print(f"{'pass':<30}" + "".join(f"{name:>14}" for name in corpus))
+    for label, function in passes:
+        print(f"{label:<30}" + "".join(f"{throughput(function, lines, args.repeat):>14.1f}" for lines in corpus.values()))
+    if shaping:
+        info = arabic_text.reshape_token.cache_info()
+        print(f"Reshape cache: {info.hits} hits / {info.misses} misses")
+    else:
+        print("fix_arabic_text skipped: arabic_reshaper / python-bidi not installed")
+    print("=" * 72)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Peak-memory benchmark for OCR page rendering.
+
+Compares, in fresh interpreter processes, the peak resident set size (RSS) of:
+- legacy:    convert_from_path(pdf, dpi) rasterising every page at once
+- streaming: iter_page_images() rendering one page at a time
+
+With --ocr the full extract_text_ocr pipeline (bounded queue + OCR workers) is
+measured as well.
+
+Usage:
+    python benchmarks/ocr_memory_benchmark.py path/to/scanned.pdf
+    python benchmarks/ocr_memory_benchmark.py path/to/scanned.pdf --dpi 300 --ocr
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, resource, sys, time
+from app.processors import enhanced_arabic_pdf_processor as pdf
+
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+pages = 0
+if MODE == "legacy":
+    images = pdf.pdf_toolkit().convert_from_path(PDF_PATH, dpi=DPI)
+    pages = len(images)
+    for image in images:
+        image.load()
+elif MODE == "streaming":
+    for _, image in pdf.iter_page_images(PDF_PATH, DPI):
+        image.load()
+        pages += 1
+else:
+    pdf.OCR_DPI = DPI
+    text = pdf.EnhancedArabicPDFProcessor().extract_text_ocr(PDF_PATH)
+    pages = text.count(pdf.PAGE_SEPARATOR)
+print("__RESULT__" + json.dumps({
+    "pages": pages,
+    "seconds": time.perf_counter() - start,
+    "baseline_kb": baseline_kb,
+    "peak_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def run_probe(mode: str, pdf_path: str, dpi: int) -> dict:
+    """Run one measurement in a fresh interpreter and return its result."""
+    code = f"MODE = {mode!r}\nPDF_PATH = {pdf_path!r}\nDPI = {dpi!r}\n" + PROBE
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    raise RuntimeError(f"Probe '{mode}' failed:\n{completed.stderr[-2000:]}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark peak RSS of OCR page rendering")
+    parser.add_argument("pdf", help="PDF file to render (ideally a long scanned document)")
+    parser.add_argument("--dpi", type=int, default=300, help="Render resolution")
+    parser.add_argument("--ocr", action="store_true", help="Also measure the full streaming OCR pipeline")
+    args = parser.parse_args()
+
+    pdf_path = str(Path(args.pdf).resolve())
+    modes = ["legacy", "streaming"] + (["ocr"] if args.ocr else [])
+
+    print("=" * 60)
+    print(f"🧠 OCR rendering memory benchmark ({Path(pdf_path).name}, {args.dpi} dpi)")
+    print("=" * 60)
+    print(f"{'mode':<12}{'pages':>7}{'seconds':>10}{'peak RSS MB':>14}{'delta MB':>11}")
+    for mode in modes:
+        try:
+            result = run_probe(mode, pdf_path, args.dpi)
+        except RuntimeError as e:
+            print(f"{mode:<12} ❌ {str(e).splitlines()[-1][:60]}")
+            continue
+        peak_mb = result["peak_kb"] / 1024
+        delta_mb = (result["peak_kb"] - result["baseline_kb"]) / 1024
+        print(f"{mode:<12}{result['pages']:>7}{result['seconds']:>10.2f}{peak_mb:>14.1f}{delta_mb:>11.1f}")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Parity and speed benchmark for the Arabic legal line recogniser.
+
+Builds a line corpus from the laws in data_set/files (article headings plus
+their text, split into lines), adds chapter/section/article headings in both
+standard Arabic and PDF presentation-form glyphs, then runs the legacy
+ArabicLegalPatternRecognizer and the CompiledArabicLegalPatternRecognizer over
+every line. Any difference in the returned LineAnalysis is reported and makes
+the script exit non-zero.
+
+Usage:
+    python benchmarks/pattern_recognizer_benchmark.py
+    python benchmarks/pattern_recognizer_benchmark.py --repeat 5 --files data_set/files
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.processors.hierarchical_document_processor import (  # noqa: E402
+    ArabicLegalPatternRecognizer,
+    CompiledArabicLegalPatternRecognizer,
+)
+
+
+def _iter_articles(data):
+    """Yield article dicts from the law JSON layouts used in data_set/files."""
+    sources = data.get("law_sources", data) if isinstance(data, dict) else data
+    for source in sources if isinstance(sources, list) else [sources]:
+        if not isinstance(source, dict):
+            continue
+        yield from source.get("articles", [])
+        for branch in source.get("branches", []):
+            yield from branch.get("articles", [])
+            for chapter in branch.get("chapters", []):
+                yield from chapter.get("articles", [])
+
+
+def build_corpus(files_dir: Path):
+    """Lines as they would come out of text extraction of our laws."""
+    lines = []
+    for path in sorted(files_dir.glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for article in _iter_articles(data):
+            lines.append(str(article.get("article", "")))
+            text = str(article.get("text", ""))
+            lines.extend(part.strip() for part in re.split(r"(?<=[.:؛])\s+|\n", text) if part.strip())
+            lines.append("")
+
+    # Headings exactly as the legacy patterns describe them (glyph-encoded and standard)
+    legacy = ArabicLegalPatternRecognizer()
+    for pattern in legacy.chapter_patterns + legacy.section_patterns + legacy.article_patterns:
+        if not any(char in pattern for char in "\\.^$*+?{}[]()|"):
+            lines.append(pattern)
+            lines.append(f"{pattern} أحكام عامة")
+    for ordinal in ["الأول", "الثاني", "الحادي عشر", "5"]:
+        lines.append(f"الباب {ordinal} التعريفات")
+        lines.append(f"الفصل {ordinal}")
+    lines.extend(["م. 12 يعاقب", "مادة رقم 7", "المادة: 15/2", "المادة ١٢", "أولاً: الأحكام", "أ- يلتزم", "1) التعريف"])
+    return lines
+
+
+def time_recognizer(recognizer, lines, repeat):
+    """Best-of-N wall time for analysing every line, plus the last results."""
+    best = float("inf")
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [recognizer.analyze_line(line, number) for number, line in enumerate(lines, 1)]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs compiled line recogniser")
+    parser.add_argument("--files", default=str(PROJECT_ROOT / "data_set" / "files"), help="Directory of law JSON files")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    lines = build_corpus(Path(args.files))
+    legacy_seconds, legacy_results = time_recognizer(ArabicLegalPatternRecognizer(), lines, args.repeat)
+    compiled_seconds, compiled_results = time_recognizer(CompiledArabicLegalPatternRecognizer(), lines, args.repeat)
+
+    mismatches = [
+        (legacy, compiled) for legacy, compiled in zip(legacy_results, compiled_results) if legacy != compiled
+    ]
+    by_type = {}
+    for result in compiled_results:
+        by_type[result.element_type.value] = by_type.get(result.element_type.value, 0) + 1
+
+    print("=" * 60)
+    print("⚡ Line recogniser benchmark")
+    print("=" * 60)
+    print(f"Lines:           {len(lines)}")
+    print(f"Element types:   {by_type}")
+    print(f"Legacy:          {legacy_seconds * 1000:.1f} ms ({len(lines) / legacy_seconds:,.0f} lines/s)")
+    print(f"Compiled:        {compiled_seconds * 1000:.1f} ms ({len(lines) / compiled_seconds:,.0f} lines/s)")
+    print(f"Speedup:         {legacy_seconds / compiled_seconds:.1f}x")
+    print(f"Parity:          {'✅ identical' if not mismatches else f'❌ {len(mismatches)} mismatches'}")
+    for legacy, compiled in mismatches[:10]:
+        print(f"   line {legacy.line_number}: {legacy.content[:40]!r}")
+        print(f"      legacy:   {legacy.element_type.value} {legacy.metadata}")
+        print(f"      compiled: {compiled.element_type.value} {compiled.metadata}")
+    print("=" * 60)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Startup-time benchmark for the FastAPI application.
+
+Measures, in fresh interpreter processes, how long `import app.main` takes and
+which heavy libraries end up loaded at boot. With --warmup it also measures how
+long each lazily loaded engine takes to build.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 5 --warmup
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = [
+    "torch", "transformers", "sentence_transformers", "langchain", "langchain_core",
+    "chromadb", "fitz", "pytesseract", "pdf2image", "easyocr", "google.genai",
+    "arabic_reshaper", "bidi", "reportlab", "docxtpl",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+import_seconds = time.perf_counter() - start
+result = {
+    "import_seconds": import_seconds,
+    "heavy_modules_loaded": [m for m in HEAVY if m in sys.modules],
+    "engines": {},
+}
+if WARMUP:
+    from app.utils.lazy_loader import get_engine, registered_engines
+    for name in registered_engines():
+        t = time.perf_counter()
+        try:
+            get_engine(name).get()
+            result["engines"][name] = {"ok": True, "seconds": time.perf_counter() - t}
+        except Exception as e:
+            result["engines"][name] = {"ok": False, "seconds": time.perf_counter() - t, "error": str(e)}
+print("__RESULT__" + json.dumps(result))
+"""
+
+
+def run_probe(warmup: bool) -> dict:
+    """Run one cold import in a fresh interpreter and return its measurements."""
+    code = f"HEAVY = {HEAVY_MODULES!r}\nWARMUP = {warmup!r}\n" + PROBE
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "WARMUP_ENGINES": ""},
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    raise RuntimeError(f"Probe failed:\n{completed.stderr[-2000:]}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark application cold-start time")
+    parser.add_argument("--runs", type=int, default=3, help="Number of cold imports to measure")
+    parser.add_argument("--warmup", action="store_true", help="Also measure engine build times")
+    args = parser.parse_args()
+
+    results = [run_probe(warmup=False) for _ in range(args.runs)]
+    timings = [r["import_seconds"] for r in results]
+
+    print("=" * 60)
+    print("🚀 Application cold-start benchmark")
+    print("=" * 60)
+    print(f"Runs:            {args.runs}")
+    print(f"Import (median): {statistics.median(timings):.3f}s")
+    print(f"Import (min):    {min(timings):.3f}s")
+    print(f"Import (max):    {max(timings):.3f}s")
+    heavy = results[-1]["heavy_modules_loaded"]
+    print(f"Heavy modules loaded at boot: {', '.join(heavy) if heavy else 'none ✅'}")
+
+    if args.warmup:
+        warm = run_probe(warmup=True)
+        print("-" * 60)
+        print("Engine build times:")
+        for name, info in warm["engines"].items():
+            state = "✅" if info["ok"] else f"❌ {info.get('error', '')[:80]}"
+            print(f"   {name:<14} {info['seconds']:.3f}s {state}")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
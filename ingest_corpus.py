@@ -0,0 +1,73 @@
+"""
+Bulk-ingest the law and case JSON corpus directly into the database and Chroma.
+
+Replaces running data_set/batch_upload_laws.py, batch_upload_cases.py and
+batch_rag_upload.py against a live server. Progress is kept in a manifest, so
+re-running the command after an interruption picks up where it stopped.
+
+Usage:
+    python ingest_corpus.py                          # data_set/files and data_set/cases
+    python ingest_corpus.py data_set/files --workers 4
+    python ingest_corpus.py --no-embed               # write rows now, embed on a later run
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.db.database import AsyncSessionLocal, engine
+from app.services.legal.ingestion.bulk_corpus_ingestion_service import (
+    BULK_INGEST_WORKERS,
+    DEFAULT_CORPUS_DIRS,
+    DEFAULT_MANIFEST_PATH,
+    BulkCorpusIngestionService,
+)
+
+
+def _print_progress(stage: str, done: int, total: int) -> None:
+    print(f"\r  {stage:<6} {done}/{total}", end="\n" if done == total else "", flush=True)
+
+
+async def ingest_corpus(args: argparse.Namespace) -> int:
+    print("=" * 60)
+    print("📚 Bulk corpus ingestion")
+    print("=" * 60)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            service = BulkCorpusIngestionService(
+                db,
+                manifest_path=args.manifest,
+                workers=args.workers,
+                progress=_print_progress,
+            )
+            report = await service.ingest(args.paths, embed=not args.no_embed, resume=not args.no_resume)
+    finally:
+        await engine.dispose()
+
+    print("\n📊 Summary:")
+    for key, value in report.to_dict().items():
+        if key != "failures":
+            print(f"  {key}: {value}")
+    if report.failures:
+        print(f"\n❌ {len(report.failures)} file(s) failed:")
+        for failure in report.failures:
+            print(f"  - {failure['file']}: {failure['error']}")
+    return 1 if report.failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-ingest law and case JSON files")
+    parser.add_argument("paths", nargs="*", default=list(DEFAULT_CORPUS_DIRS),
+                        help="JSON files or directories to ingest (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=BULK_INGEST_WORKERS, help="Parser processes")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH, help="Progress manifest path")
+    parser.add_argument("--no-embed", action="store_true", help="Only write rows; skip the embedding pass")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore the manifest and re-check every file")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(ingest_corpus(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.case_analysis.analysis_pdf_renderer import (
+    AnalysisPdfRenderer, content_hash, report_blocks, report_fields
+)
+
+
+def make_analysis(**sections):
+    return SimpleNamespace(
+        filename="claim.pdf",
+        analysis_type="case-analysis",
+        lawsuit_type="labor",
+        risk_score=40,
+        risk_label="medium",
+        created_at=datetime(2026, 3, 1, 9, 30),
+        analysis_data={"analysis": {"sections": sections}},
+    )
+
+
+def test_report_blocks_follow_the_frontend_order() -> None:
+    fields = report_fields(make_analysis(
+        formatted_analysis="## Overview\nClaim for <unpaid> wages & **overtime**\n### Facts\n- first\n- second",
+        executive_summary="Summary",
+        legal_status="Pending",
+        strong_points="Signed contract",
+        legal_references="Labor Law art. 90",
+        weak_points="  ",
+    ))
+    markup = [block[2] for block in report_blocks(fields) if block[0] == "para"]
+
+    assert markup[:6] == [
+        "<b>Legal Case Analysis Report</b>",
+        "<b>File:</b> claim.pdf",
+        "<b>Analysis Type:</b> case-analysis",
+        "<b>Lawsuit Type:</b> labor",
+        "<b>Date:</b> 2026-03-01 09:30:00",
+        "<b>Risk Score:</b> 40% (medium)",
+    ]
+    assert markup[6:10] == [
+        "<b>Complete Analysis</b>",
+        "<b>Overview</b>",
+        "Claim for &lt;unpaid&gt; wages &amp; <b>overtime</b>",
+        "<b>Facts</b>",
+    ]
+    assert markup[10] == "• first<br/>• second"
+    headings = [text for text in markup if text[3:4].isdigit()]
+    assert headings == [
+        "<b>1. Executive Summary</b>",
+        "<b>2. Detailed Legal Analysis</b>",
+        "<b>7. Legal References</b>",
+    ]
+    assert markup.index("<b>c. Strong Points in the Case</b>") == markup.index("Signed contract") - 1
+    # Blank weak points are left out
+    assert "<b>b. Weak Points in the Case</b>" not in markup
+
+
+def test_renders_once_per_content_and_shares_concurrent_renders(tmp_path) -> None:
+    calls = []
+    lock = threading.Lock()
+
+    def render(fields):
+        with lock:
+            calls.append(fields["analysis_data"]["analysis"]["sections"]["executive_summary"])
+        time.sleep(0.05)
+        return b"%PDF-" + fields["analysis_data"]["analysis"]["sections"]["executive_summary"].encode()
+
+    async def scenario():
+        renderer = AnalysisPdfRenderer(str(tmp_path), executor=ThreadPoolExecutor(2), render=render)
+        first = report_fields(make_analysis(executive_summary="v1"))
+        paths = await asyncio.gather(*(renderer.get_pdf(7, first) for _ in range(3)))
+        again = await renderer.get_pdf(7, first)
+
+        edited = report_fields(make_analysis(executive_summary="v2"))
+        edited_path = await renderer.get_pdf(7, edited)
+        return renderer, paths, again, edited_path, content_hash(first) != content_hash(edited)
+
+    renderer, paths, again, edited_path, hash_changed = asyncio.run(scenario())
+
+    assert calls == ["v1", "v2"]
+    assert len(set(paths)) == 1 and again == paths[0] and renderer.hits == 1
+    assert hash_changed and edited_path != paths[0]
+    # The edited analysis replaced the stale render on disk
+    assert not paths[0].exists() and edited_path.read_bytes() == b"%PDF-v2"
+
+    renderer.invalidate(7)
+    assert list(tmp_path.glob("7-*.pdf")) == []
+
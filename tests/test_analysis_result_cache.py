@@ -0,0 +1,118 @@
+import asyncio
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  registers every table on Base
+from app.db.database import Base
+from app.services.case_analysis import analysis_result_cache_service as cache_module
+from app.services.case_analysis.analysis_result_cache_service import (
+    AnalysisResultCacheService, analysis_cache_key
+)
+from app.services.legal.analysis import case_analysis_service as case_module
+from app.services.legal.analysis.case_analysis_service import CaseAnalysisService
+from app.services.legal.analysis.contract_analysis_service import ContractAnalysisService
+from app.utils.rate_limiter import AsyncRateLimiter
+
+ANALYSIS = """### 1. ملخص تنفيذي شامل (Executive Summary)
+مطالبة عامل بأجور متأخرة.
+
+### 6. التقييم الكمي
+درجة المخاطر: 40
+"""
+CONTRACT = '{"weak_points": ["مدة العقد غير محددة"], "risks": [], "suggestions": []}'
+
+
+class FakeModels:
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, model, contents):
+        self.calls += 1
+        return SimpleNamespace(text=self.text)
+
+
+class FakeContractService(ContractAnalysisService):
+    def _initialize_client(self):
+        pass
+
+
+def test_cache_key_normalises_free_text() -> None:
+    key = analysis_cache_key("case", ["a"], "1", "m", "case-analysis", "labor", "استرداد الأجور", "العامل  أحمد\n")
+    assert key == analysis_cache_key("case", ["a"], "1", "m", "case-analysis", "Labor ", "استرداد الاجور", "العامل أحمد")
+    assert len({
+        key,
+        analysis_cache_key("case", ["b"], "1", "m", "case-analysis", "labor", "استرداد الأجور", "العامل أحمد"),
+        analysis_cache_key("case", ["a", "b"], "1", "m", "case-analysis", "labor", "استرداد الأجور", "العامل أحمد"),
+        analysis_cache_key("case", ["a"], "2", "m", "case-analysis", "labor", "استرداد الأجور", "العامل أحمد"),
+        analysis_cache_key("case", ["a"], "1", "m", "contract-review", "labor", "استرداد الأجور", "العامل أحمد"),
+        analysis_cache_key("case", ["a"], "1", "m", "case-analysis", "labor", "استرداد الأجور", "العامل محمد"),
+        analysis_cache_key("contract", ["a"], "1", "m", "case-analysis", "labor", "استرداد الأجور", "العامل أحمد"),
+    }) == 7
+
+
+def test_identical_requests_are_answered_from_the_cache(monkeypatch) -> None:
+    monkeypatch.setattr(cache_module, "_lookup_counts", defaultdict(Counter))
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        results = []
+        models = FakeModels(ANALYSIS)
+        for filename, context in [("claim.txt", "عقد عمل"), ("copy.txt", " عقد  عمل "), ("claim.txt", "عقد عمل")]:
+            async with session_factory() as db:
+                service = CaseAnalysisService(
+                    api_key="test", rate_limiter=AsyncRateLimiter(2), result_cache=AnalysisResultCacheService(db)
+                )
+                service._client = SimpleNamespace(models=models)
+                results.append(await service.analyze_case_bundle(
+                    [{"filename": filename, "content": "نص الدعوى".encode("utf-8")}],
+                    "case-analysis", "labor", "استرداد الأجور", context
+                ))
+            if len(results) == 2:
+                monkeypatch.setattr(case_module, "PROMPT_VERSION", "2")
+        case_calls = models.calls
+
+        contract_models = FakeModels(CONTRACT)
+        contracts = []
+        for _ in range(2):
+            async with session_factory() as db:
+                service = FakeContractService(api_key="test", result_cache=AnalysisResultCacheService(db))
+                service._client = SimpleNamespace(models=contract_models)
+                contracts.append(await service.analyze_contract("بنود العقد".encode("utf-8"), "contract.txt"))
+
+        # A lookup that fails is a miss too
+        broken_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with async_sessionmaker(broken_engine)() as db:
+            assert await AnalysisResultCacheService(db).get("missing-table", "contract") is None
+        await broken_engine.dispose()
+
+        async with session_factory() as db:
+            stats = await AnalysisResultCacheService(db).get_stats()
+        await engine.dispose()
+        return results, case_calls, contracts, contract_models.calls, stats
+
+    results, case_calls, contracts, contract_calls, stats = asyncio.run(scenario())
+
+    first, second, new_prompt = results
+    assert all(result["success"] for result in results)
+    # Only the first request and the one after the prompt version bump reach Gemini
+    assert case_calls == 2
+    assert (first["data"]["cached"], second["data"]["cached"], new_prompt["data"]["cached"]) == (False, True, False)
+    assert second["data"]["analysis"] == first["data"]["analysis"]
+    assert second["data"]["filename"] == "copy.txt"
+
+    assert contract_calls == 1
+    assert contracts[0] == contracts[1]
+    assert contracts[1]["data"]["weak_points"] == ["مدة العقد غير محددة"]
+
+    assert (stats["lookups"], stats["hits"], stats["misses"], stats["errors"]) == (6, 2, 4, 1)
+    assert (stats["entries"], stats["stored_hits"]) == (3, 2)
+    case, contract = stats["by_service"]["case"], stats["by_service"]["contract"]
+    assert (case["hits"], case["misses"], case["hit_rate"]) == (1, 2, 0.333)
+    assert (contract["hits"], contract["misses"], contract["errors"], contract["hit_rate"]) == (1, 2, 1, 0.333)
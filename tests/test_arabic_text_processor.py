@@ -0,0 +1,50 @@
+from app.utils.arabic_text_processor import (
+    ArabicTextProcessor,
+    arabic_char_count,
+    arabic_ratio,
+    clean_text_artifacts,
+    ensure_rtl_text_direction,
+    needs_fixing,
+    normalize_arabic,
+    normalize_fragmented_arabic,
+)
+
+
+def test_detection() -> None:
+    assert arabic_char_count("المادة 5 Article") == 6
+    assert arabic_char_count("") == 0
+    assert arabic_ratio("  نص  ") == 1.0
+    assert arabic_ratio("   ") == 0.0
+
+    assert needs_fixing("يسري هذا النظام")
+    # Mostly Latin, but with a stray single Arabic letter from a broken font
+    assert needs_fixing("ب Article 12 of the labour law applies")
+    assert not needs_fixing("Article 12 of the labour law applies")
+    assert not needs_fixing("   ")
+
+
+def test_presentation_forms_and_tables() -> None:
+    # Glyph-encoded "يسمى هذا النظام" as broken PDF fonts emit it, including alef maksura forms
+    assert clean_text_artifacts("ﻱﺴمﻰ   هﺫا ﺍلﻦظﺎﻡ") == "يسمى هذا النظام"
+    assert clean_text_artifacts("لا ﻻ") == "لا لا"
+
+    assert normalize_arabic("المـــادةُ الأُولى") == "المادة الأولى"
+    assert normalize_arabic("المـادة", tatweel=False) == "المـادة"
+    assert normalize_arabic("إلى الأولى مدة", letter_variants=True) == "الي الاولي مده"
+    # Glyph forms fold through the same passes
+    assert normalize_arabic("ﺃ", letter_variants=True) == "ا"
+
+
+def test_fragment_merging_and_direction() -> None:
+    assert normalize_fragmented_arabic("ا ل م ا د ة 12") == "المادة 12"
+    assert normalize_fragmented_arabic("نظام العمل") == "نظام العمل"
+
+    marked = ensure_rtl_text_direction("نظام 12\n\nlaw")
+    assert marked.split("\n") == ["\u202E\u200Fنظام\u200F 12\u202C", "", "\u202Elaw\u202C"]
+    assert ensure_rtl_text_direction("only latin") == "only latin"
+
+
+def test_document_helpers() -> None:
+    assert ArabicTextProcessor.is_arabic_text("المادة الأولى من النظام")
+    assert not ArabicTextProcessor.is_arabic_text("Article one of the law, المادة")
+    assert ArabicTextProcessor.preprocess_arabic_text("Article  one\n\nsecond   line") == "Article one\n\nsecond line"
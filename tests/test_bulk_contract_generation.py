@@ -0,0 +1,111 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  registers every table on Base
+from app.db.database import Base
+from app.models.contract_template import Contract, ContractTemplate
+from app.services.template_cache import TemplateCache
+from app.services.template_service import BulkValidationError, TemplateService
+from app.utils.zip_stream import zip_stream
+
+VARIABLES = [
+    {"name": "employee_name", "label": "Employee", "type": "text", "required": True},
+    {"name": "salary", "label": "Salary", "type": "number", "required": True},
+    {"name": "start_date", "label": "Start", "type": "date"},
+]
+
+
+def test_rows_are_validated_up_front_and_stored_in_one_batch(tmp_path, monkeypatch) -> None:
+    template_file = tmp_path / "employment.docx"
+    template_file.write_bytes(b"template")
+    rendered = []
+
+    async def fake_generate(self, compiled, filled_data):
+        rendered.append(filled_data["employee_name"])
+        await asyncio.sleep(0.01)
+        if filled_data["employee_name"] == "Broken":
+            raise RuntimeError("conversion failed")
+        path = self.storage_path / f"{filled_data['employee_name']}.pdf"
+        path.write_bytes(f"%PDF {filled_data['employee_name']} {filled_data['salary']}".encode())
+        return str(path)
+
+    monkeypatch.setattr(TemplateService, "_generate_from_docx", fake_generate)
+    monkeypatch.setenv("CONTRACT_STORAGE_PATH", str(tmp_path / "generated"))
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add(ContractTemplate(
+                id="tpl", title="Employment", file_path=str(template_file), format="docx", variables=VARIABLES
+            ))
+            await db.commit()
+
+        cache = TemplateCache(preview_dir=str(tmp_path / "previews"))
+        async with session_factory() as db:
+            with pytest.raises(BulkValidationError) as rejected:
+                await TemplateService(db, template_cache=cache).generate_contracts_bulk("tpl", 1, [
+                    {"employee_name": "Sara", "salary": "9000"},
+                    {"employee_name": "  ", "salary": "7000"},
+                    "not a row",
+                ])
+        rendered_after_rejection = list(rendered)
+
+        statements = []
+        event.listen(
+            engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement.split()[0].upper())
+        )
+        rows = [{"employee_name": f"Employee {i}", "salary": str(5000 + i), "extra": "ignored"} for i in range(30)]
+        rows.append({"employee_name": "Broken", "salary": "1"})
+        async with session_factory() as db:
+            result = await TemplateService(db, template_cache=cache).generate_contracts_bulk(
+                "tpl", 1, rows, filename_field="employee_name"
+            )
+        async with session_factory() as db:
+            stored = (await db.execute(select(func.count()).select_from(Contract))).scalar()
+            sample = (await db.execute(select(Contract).where(Contract.id == result["items"][0]["contract_id"]))).scalar_one()
+        await engine.dispose()
+        return rejected.value, rendered_after_rejection, result, stored, sample, statements
+
+    rejected, rendered_after_rejection, result, stored, sample, statements = asyncio.run(scenario())
+
+    assert rendered_after_rejection == []
+    assert str(rejected) == "2 of 3 rows are invalid"
+    assert [(error["row"], error["field"]) for error in rejected.errors] == [(2, "employee_name"), (3, None)]
+
+    assert (result["total"], result["generated"], result["failed"], stored) == (31, 30, 1, 30)
+    assert result["items"][-1] == {"row": 31, "error": "conversion failed"}
+    first = result["items"][0]
+    assert first["filename"] == "0001_Employee_0.pdf" and first["file_type"] == "pdf"
+    assert first["download_url"].endswith(f"/api/v1/templates/contracts/{first['contract_id']}/download")
+    assert sample.filled_data == {"employee_name": "Employee 0", "salary": "5000"} and sample.owner_id == 1
+    # Thirty contracts, one INSERT statement
+    assert statements.count("INSERT") == 1
+
+
+def test_zip_stream_builds_a_valid_archive_incrementally(tmp_path) -> None:
+    first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    first.write_bytes(b"A" * 300_000)
+    second.write_bytes(b"B" * 10)
+
+    chunks = list(zip_stream(
+        [("0001_a.pdf", str(first)), ("0002_b.pdf", str(second))],
+        extra=[("manifest.json", json.dumps({"generated": 2}).encode())],
+        chunk_size=64 * 1024
+    ))
+
+    assert len(chunks) > 3
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["0001_a.pdf", "0002_b.pdf", "manifest.json"]
+    assert archive.read("0001_a.pdf") == first.read_bytes()
+    assert json.loads(archive.read("manifest.json")) == {"generated": 2}
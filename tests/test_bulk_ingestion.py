@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.models.legal_knowledge import KnowledgeChunk, LawArticle, LawSource, LegalCase
+from app.services.legal.ingestion.bulk_corpus_ingestion_service import BulkCorpusIngestionService
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.ids = []
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        assert len(ids) == len(embeddings) == len(metadatas) == len(documents)
+        self.ids.extend(ids)
+
+
+class FakeVectorstore:
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+        self._collection = FakeCollection()
+        self.persist_calls = 0
+
+    def persist(self):
+        self.persist_calls += 1
+
+
+def _write_corpus(root):
+    laws, cases = root / "files", root / "cases"
+    laws.mkdir()
+    cases.mkdir()
+    (laws / "labour.json").write_text(json.dumps({"law_sources": [{
+        "name": "نظام العمل",
+        "type": "law",
+        "issue_date": "2005-09-27",
+        "articles": [
+            {"article": "1", "title": "التسمية", "text": "يسمى هذا النظام نظام العمل."},
+            {"article": "2", "title": "التعريفات", "text": "يقصد بالألفاظ والعبارات الآتية المعاني المبينة أمامها " * 3},
+            {"article": "3", "text": "العمل حق للمواطن."},
+        ],
+    }]}, ensure_ascii=False), encoding="utf-8")
+    (cases / "case.json").write_text(json.dumps({"legal_cases": [{
+        "case_number": "123/1445",
+        "title": "دعوى أجور",
+        "sections": [
+            {"section_type": "summary", "content": "مطالبة بأجور متأخرة."},
+            {"section_type": "ruling", "content": "إلزام صاحب العمل بالدفع."},
+        ],
+    }]}, ensure_ascii=False), encoding="utf-8")
+    (laws / "broken.json").write_text("{not json", encoding="utf-8")
+    return [str(laws), str(cases)]
+
+
+def test_bulk_ingestion_writes_embeds_and_resumes(tmp_path) -> None:
+    paths = _write_corpus(tmp_path)
+    manifest_path = str(tmp_path / "manifest.json")
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'corpus.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        vectorstore = FakeVectorstore()
+        try:
+            # Interrupted run: rows are written, embedding is left for later
+            async with session_factory() as db:
+                service = BulkCorpusIngestionService(db, vectorstore, manifest_path=manifest_path, workers=1)
+                first = await service.ingest(paths, embed=False)
+            assert vectorstore.embeddings.batches == []
+
+            async with session_factory() as db:
+                service = BulkCorpusIngestionService(
+                    db, vectorstore, manifest_path=manifest_path, workers=1, embed_batch_size=2
+                )
+                resumed = await service.ingest(paths)
+                counts = {
+                    model.__name__: await db.scalar(select(func.count()).select_from(model))
+                    for model in (LawSource, LawArticle, LegalCase, KnowledgeChunk)
+                }
+                statuses = (await db.execute(select(LawSource.status).union_all(select(LegalCase.status)))).scalars().all()
+
+            # Without the manifest, already-ingested files are detected as duplicates
+            async with session_factory() as db:
+                service = BulkCorpusIngestionService(db, vectorstore, manifest_path=manifest_path, workers=1)
+                fresh = await service.ingest(paths, resume=False)
+            return first, resumed, fresh, counts, statuses, vectorstore
+        finally:
+            await engine.dispose()
+
+    first, resumed, fresh, counts, statuses, vectorstore = asyncio.run(scenario())
+
+    assert (first.files_total, first.files_inserted, first.files_failed) == (3, 2, 1)
+    assert (first.laws, first.cases, first.articles, first.chunks) == (1, 1, 3, 5)
+    assert "Invalid JSON" in first.failures[0]["error"]
+
+    # Resumed run parses nothing new; only the failed file is retried
+    assert (resumed.files_resumed, resumed.files_inserted, resumed.files_failed) == (2, 0, 1)
+    assert counts == {"LawSource": 1, "LawArticle": 3, "LegalCase": 1, "KnowledgeChunk": 5}
+    assert statuses == ["processed", "processed"]
+
+    # All chunks embedded shortest-first in batches, persisted once
+    assert resumed.chunks_embedded == 5
+    embedded = [text for batch in vectorstore.embeddings.batches for text in batch]
+    assert [len(batch) for batch in vectorstore.embeddings.batches] == [2, 2, 1]
+    assert [len(text) for text in embedded] == sorted(len(text) for text in embedded)
+    assert len(set(vectorstore._collection.ids)) == 5
+    assert vectorstore.persist_calls == 1
+
+    assert (fresh.files_skipped, fresh.files_inserted, fresh.chunks_embedded) == (2, 0, 0)
+    assert vectorstore.persist_calls == 1
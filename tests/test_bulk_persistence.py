@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.models.legal_knowledge import KnowledgeChunk, KnowledgeDocument, LawArticle
+from app.repositories.legal_knowledge_repository import LegalBulkRepository
+from app.services.legal.knowledge.legal_laws_service import LegalLawsService
+
+
+def _law(article_count):
+    return {
+        "law_sources": {
+            "name": "نظام تجريبي",
+            "type": "law",
+            "articles": [
+                {"article": str(i), "title": f"عنوان {i}", "text": f"نص المادة رقم {i}. " * (1 + i % 150)}
+                for i in range(1, article_count + 1)
+            ],
+        }
+    }
+
+
+def test_json_upload_uses_a_handful_of_statements() -> None:
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        statements = []
+        event.listen(
+            engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement.split()[0].upper())
+        )
+
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            result = await LegalLawsService(db).upload_json_law_structure(_law(1000))
+        inserts = statements.count("INSERT")
+
+        async with session_factory() as db:
+            articles = (await db.execute(select(func.count(LawArticle.id)))).scalar()
+            chunks = (await db.execute(select(KnowledgeChunk))).scalars().all()
+            article_numbers = dict((await db.execute(select(LawArticle.id, LawArticle.article_number))).all())
+        await engine.dispose()
+        return result, inserts, articles, chunks, article_numbers
+
+    result, inserts, articles, chunks, article_numbers = asyncio.run(scenario())
+
+    assert result["success"] is True
+    assert articles == 1000
+    assert len(chunks) == result["data"]["statistics"]["total_chunks"] > 1000
+    # document + law source + one executemany per 500-row batch of articles and chunks
+    assert inserts <= 2 + 2 + (len(chunks) + 499) // 500
+    # Every chunk points at the article it was cut from
+    for chunk in chunks:
+        assert chunk.content.startswith(f"المادة {article_numbers[chunk.article_id]}")
+
+
+def test_id_allocation_requires_the_write_lock() -> None:
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            bulk = LegalBulkRepository(db)
+            # Nothing written yet: another writer could take the same ids
+            with pytest.raises(RuntimeError, match="already written"):
+                await bulk.allocate_ids(LawArticle, 3)
+
+            document = KnowledgeDocument(title="doc", category="law", file_path="x.json", file_hash="h")
+            db.add(document)
+            await db.flush()
+            ids = await bulk.allocate_ids(LawArticle, 3)
+            await db.rollback()
+        await engine.dispose()
+        return ids
+
+    assert asyncio.run(scenario()) == [1, 2, 3]
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.legal.analysis.case_analysis_service import CaseAnalysisService
+from app.utils.rate_limiter import AsyncRateLimiter
+
+ANALYSIS = """### 1. ملخص تنفيذي شامل (Executive Summary)
+مطالبة عامل بأجور متأخرة ومكافأة نهاية الخدمة.
+
+### 6. التقييم الكمي
+درجة المخاطر: 35
+"""
+
+
+class FakeModels:
+    def __init__(self, delay):
+        self.delay = delay
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents):
+        document, prompt = contents
+        with self.lock:
+            self.prompts.append(document)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if document.startswith("ملخصات"):
+                return SimpleNamespace(text=ANALYSIS)
+            time.sleep(self.delay)
+            if "exhibit" in document:
+                raise RuntimeError("503 UNAVAILABLE")
+            return SimpleNamespace(text=f"نوع المستند: {document.split(':')[0][-12:]}")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _service(models, concurrency):
+    service = CaseAnalysisService(api_key="test", rate_limiter=AsyncRateLimiter(concurrency))
+    service._client = SimpleNamespace(models=models)
+    return service
+
+
+def test_bundle_is_summarised_concurrently_and_reduced(tmp_path) -> None:
+    files = [
+        {"filename": name, "content": f"نص {name}".encode("utf-8")}
+        for name in ("claim.txt", "response.txt", "judgment.txt", "exhibit.txt")
+    ] + [{"filename": "scan.png", "content": b"\x89PNG"}]
+    models = FakeModels(delay=0.3)
+
+    started = time.perf_counter()
+    result = asyncio.run(_service(models, concurrency=4).analyze_case_bundle(
+        files, "case-analysis", "labor", "استرداد الأجور"
+    ))
+    elapsed = time.perf_counter() - started
+
+    assert result["success"], result["message"]
+    # Four 0.3 s summaries overlap: close to the slowest file, not their sum
+    assert elapsed < 0.9
+    assert models.max_active == 4
+
+    data = result["data"]
+    assert data["filename"] == "claim.txt"
+    assert data["analysis"]["risk_score"] == 35
+    assert data["analysis"]["full_analysis"] == ANALYSIS
+    assert [(doc["filename"], doc["summarized"]) for doc in data["documents"]] == [
+        ("claim.txt", True), ("response.txt", True), ("judgment.txt", True), ("exhibit.txt", False), ("scan.png", False)
+    ]
+    assert "503" in data["documents"][3]["error"] and "Unsupported" in data["documents"][4]["error"]
+
+    # The reduce request only sees the briefs of the summarised files, in upload order
+    bundle = models.prompts[-1]
+    assert "(3 من 5 مستندات)" in bundle
+    assert bundle.index("claim.txt") < bundle.index("response.txt") < bundle.index("judgment.txt")
+    assert "exhibit.txt" not in bundle
+
+
+def test_budget_limits_concurrent_requests() -> None:
+    files = [{"filename": f"part{n}.txt", "content": b"text"} for n in range(4)]
+    models = FakeModels(delay=0.05)
+
+    result = asyncio.run(_service(models, concurrency=2).analyze_case_bundle(
+        files, "case-analysis", "civil", "تعويض"
+    ))
+
+    assert result["success"]
+    assert models.max_active == 2
+    assert len(models.prompts) == 5
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  registers every table on Base
+from app.db.database import Base
+from app.models.case_analysis import CaseAnalysis
+from app.services.case_analysis import case_conversation_service as conversation_module
+from app.services.case_analysis.case_conversation_service import CaseConversationService
+from app.utils import gemini_files
+from app.utils.gemini_files import DocumentHandleManager, LocalFileBackend
+from app.utils.rate_limiter import AsyncRateLimiter
+
+PDF = b"%PDF-1.7 " + bytes(range(256)) * 8
+
+
+class FakeModels:
+    def __init__(self):
+        self.requests = []
+
+    def generate_content(self, model, contents, config):
+        self.requests.append((contents, config))
+        if contents[-1].startswith("لخص"):
+            return SimpleNamespace(text="ملخص: سئل عن مكافأة نهاية الخدمة")
+        return SimpleNamespace(text=f"جواب {len(self.requests)}")
+
+
+class FakeCaches:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+
+    def create(self, model, config):
+        self.created.append(config)
+        if self.fail:
+            raise RuntimeError("400 INVALID_ARGUMENT: cached content is too small")
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}", expire_time=None)
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+def _conversation(tmp_path, monkeypatch, caches, questions, models=None):
+    manager = DocumentHandleManager(LocalFileBackend(str(tmp_path)), min_bytes=1024)
+    monkeypatch.setattr(gemini_files, "_manager", manager)
+    models = models or FakeModels()
+
+    async def scenario():
+        await manager.part(PDF, "application/pdf", "claim.pdf")  # uploaded during the analysis
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            analysis = CaseAnalysis(
+                user_id=1, filename="claim.pdf", analysis_type="case-analysis", lawsuit_type="labor",
+                result_seeking="استرداد الأجور", raw_response="التحليل: للعامل الحق في الأجور المتأخرة",
+                analysis_data={"files": [{
+                    "filename": "claim.pdf", "sha256": hashlib.sha256(PDF).hexdigest(), "mime_type": "application/pdf"
+                }]}
+            )
+            db.add(analysis)
+            await db.commit()
+            analysis_id = analysis.id
+
+        results = []
+        for question in questions:
+            # Every question is its own request with its own session
+            async with session_factory() as db:
+                service = CaseConversationService(db, api_key="test", rate_limiter=AsyncRateLimiter(2))
+                service._client = SimpleNamespace(models=models, caches=caches)
+                results.append(await service.ask(analysis_id, 1, question))
+        async with session_factory() as db:
+            conversation = await CaseConversationService(db).get_conversation(analysis_id, 1)
+            assert await CaseConversationService(db).ask(analysis_id + 1, 1, "؟") == {
+                "success": False, "message": "Analysis not found", "data": None
+            }
+        await engine.dispose()
+        return results, conversation
+
+    results, conversation = asyncio.run(scenario())
+    return results, conversation, models
+
+
+def test_follow_ups_send_only_the_delta_and_compact_old_turns(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(conversation_module, "CASE_CHAT_COMPACT_AFTER", 3)
+    monkeypatch.setattr(conversation_module, "CASE_CHAT_RECENT_TURNS", 2)
+    caches = FakeCaches()
+    questions = ["ما مدة التقادم؟", "وماذا عن المكافأة؟", "هل يحق الاستئناف؟", "ما الخطوة التالية؟"]
+    results, conversation, models = _conversation(tmp_path, monkeypatch, caches, questions)
+
+    assert all(result["success"] for result in results)
+    assert [result["data"]["turn"] for result in results] == [1, 2, 3, 4]
+    assert all(result["data"]["context_cached"] for result in results)
+
+    # The documents and the analysis are cached once, by file handle rather than bytes
+    assert len(caches.created) == 1
+    prefix = caches.created[0]["contents"]
+    assert prefix[0]["file_data"]["file_uri"].startswith("file://")
+    assert "للعامل الحق في الأجور" in prefix[-1]
+
+    answers = [(contents, config) for contents, config in models.requests if not contents[-1].startswith("لخص")]
+    assert all(config == {"cached_content": "cachedContents/1"} and len(contents) == 1 for contents, config in answers)
+    assert "س: ما مدة التقادم؟\nج: جواب 1" in answers[1][0][0]
+    assert answers[3][0][0].endswith("سؤال المتابعة:\nما الخطوة التالية؟")
+
+    # The fourth turn went over the limit: the oldest two were folded into the summary
+    assert results[3]["data"]["compacted"] and not any(result["data"]["compacted"] for result in results[:3])
+    assert conversation.summary == "ملخص: سئل عن مكافأة نهاية الخدمة"
+    assert [turn["question"] for turn in conversation.turns] == questions[2:]
+    assert conversation.turn_count == 4
+
+
+def test_turns_stay_in_the_prompt_until_they_are_summarised(tmp_path, monkeypatch) -> None:
+    questions = ["ما مدة التقادم؟", "والمكافأة؟", "هل يحق الاستئناف؟", "ما الخطوة التالية؟", "ماذا قلت عن التقادم؟"]
+    results, conversation, models = _conversation(tmp_path, monkeypatch, FakeCaches(), questions)
+
+    assert not any(result["data"]["compacted"] for result in results)
+    # With the default limits the first turn is no longer among the recent ones, but was never summarised
+    assert "س: ما مدة التقادم؟\nج: جواب 1" in models.requests[-1][0][0]
+    assert len(conversation.turns) == 5
+
+
+def test_context_is_sent_inline_when_it_cannot_be_cached(tmp_path, monkeypatch) -> None:
+    caches = FakeCaches(fail=True)
+    results, conversation, models = _conversation(tmp_path, monkeypatch, caches, ["ما مدة التقادم؟", "والمكافأة؟"])
+
+    assert all(result["success"] and not result["data"]["context_cached"] for result in results)
+    assert len(caches.created) == 1  # the failure is remembered until the would-be expiry
+    for contents, config in models.requests:
+        assert "system_instruction" in config
+        assert contents[0]["file_data"]["mime_type"] == "application/pdf"
+        assert len(contents) == 3
+    assert conversation.context_cache_name is None
+
+
+class FileNotFoundApiError(Exception):
+    code = 404
+    status = "NOT_FOUND"
+
+
+class RejectingModels(FakeModels):
+    def generate_content(self, model, contents, config):
+        if any(isinstance(part, dict) and "file_data" in part for part in contents):
+            self.requests.append((contents, config))
+            raise FileNotFoundApiError("404 NOT_FOUND: File files/abc does not exist")
+        return super().generate_content(model, contents, config)
+
+
+def test_a_rejected_document_file_is_dropped_from_the_context(tmp_path, monkeypatch) -> None:
+    results, conversation, models = _conversation(
+        tmp_path, monkeypatch, FakeCaches(fail=True), ["ما مدة التقادم؟", "والمكافأة؟"], RejectingModels()
+    )
+
+    assert all(result["success"] for result in results)
+    rejected, answered, second = models.requests
+    assert "file_data" in rejected[0][0]
+    # Asked again on the summaries and analysis; the handle is gone for later questions too
+    assert len(answered[0]) == 2 and len(second[0]) == 2
+    assert gemini_files.get_document_handles().stats()["handles"] == 0
+
+
+class ExpiredCacheError(Exception):
+    code = 403
+    status = "PERMISSION_DENIED"
+
+
+class ExpiringCacheModels(FakeModels):
+    def generate_content(self, model, contents, config):
+        if config.get("cached_content") == "cachedContents/1":
+            self.requests.append((contents, config))
+            raise ExpiredCacheError("403 PERMISSION_DENIED: CachedContent not found (or permission denied)")
+        return super().generate_content(model, contents, config)
+
+
+def test_an_expired_context_cache_is_dropped_and_the_context_sent_inline(tmp_path, monkeypatch) -> None:
+    caches = FakeCaches()
+    results, conversation, models = _conversation(
+        tmp_path, monkeypatch, caches, ["ما مدة التقادم؟", "والمكافأة؟"], ExpiringCacheModels()
+    )
+
+    assert all(result["success"] for result in results)
+    assert [result["data"]["context_cached"] for result in results] == [False, True]
+    expired, inline, cached = models.requests
+    # The documents are still sent by file handle, and the next question builds a fresh cache
+    assert inline[0][0]["file_data"]["mime_type"] == "application/pdf" and "cached_content" not in inline[1]
+    assert len(caches.created) == 2 and cached[1] == {"cached_content": "cachedContents/2"}
+    assert conversation.context_cache_name == "cachedContents/2" and caches.deleted == ["cachedContents/1"]
+
+
+def test_a_cache_about_to_expire_is_deleted_when_replaced(tmp_path, monkeypatch) -> None:
+    # A TTL inside the expiry margin makes every question replace the cache
+    monkeypatch.setattr(conversation_module, "CASE_CHAT_CONTEXT_CACHE_TTL_MINUTES", 1)
+    caches = FakeCaches()
+    results, conversation, models = _conversation(tmp_path, monkeypatch, caches, ["ما مدة التقادم؟", "والمكافأة؟"])
+
+    assert all(result["data"]["context_cached"] for result in results)
+    assert len(caches.created) == 2 and caches.deleted == ["cachedContents/1"]
+    assert conversation.context_cache_name == "cachedContents/2"
+
+
+def test_concurrent_first_questions_share_one_conversation(tmp_path, monkeypatch) -> None:
+    get_conversation = CaseConversationService.get_conversation
+    lookups = []
+
+    async def stale_lookup(self, analysis_id, user_id):
+        lookups.append(analysis_id)
+        if len(lookups) == 2:
+            # The second question read before the first one committed
+            return None
+        return await get_conversation(self, analysis_id, user_id)
+
+    monkeypatch.setattr(CaseConversationService, "get_conversation", stale_lookup)
+    caches = FakeCaches()
+    results, conversation, models = _conversation(tmp_path, monkeypatch, caches, ["ما مدة التقادم؟", "والمكافأة؟"])
+
+    assert all(result["success"] for result in results)
+    assert results[0]["data"]["conversation_id"] == results[1]["data"]["conversation_id"]
+    assert [turn["question"] for turn in conversation.turns] == ["ما مدة التقادم؟", "والمكافأة؟"]
+    assert conversation.turn_count == 2 and results[1]["data"]["turn"] == 2
+    # The losing request's cache is not the conversation's: it is deleted
+    assert conversation.context_cache_name == "cachedContents/1" and caches.deleted == ["cachedContents/2"]
@@ -0,0 +1,68 @@
+import asyncio
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.models.legal_knowledge import CaseSection, KnowledgeDocument, LegalCase
+from app.services.legal.ingestion.legal_case_ingestion_service import LegalCaseIngestionService
+
+
+def _case_text(number):
+    return (
+        f"ملخص القضية رقم {number}: مطالبة عامل بمستحقات نهاية الخدمة.\n"
+        "الوقائع\nتقدم المدعي بدعوى ضد صاحب العمل لعدم صرف أجوره.\n"
+        "حكمت المحكمة بإلزام المدعى عليه بدفع المستحقات.\n"
+    ).encode("utf-8")
+
+
+def _case(filename, content, title):
+    return {"file_content": content, "filename": filename, "case_metadata": {"title": title, "decision_date": "2024-01-15"}}
+
+
+def test_concurrent_ingestion_reports_each_file(tmp_path) -> None:
+    upload_dir = str(tmp_path / "cases")
+    cases = [
+        _case("first.txt", _case_text(1), "القضية الأولى"),
+        _case("short.txt", "نص قصير".encode("utf-8"), "قصيرة"),
+        _case("second.txt", _case_text(2), "القضية الثانية"),
+        _case("again.txt", _case_text(1), "مكررة"),
+        _case("scan.png", b"\x89PNG" + b"0" * 100, "صورة"),
+    ]
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                service = LegalCaseIngestionService(db, upload_dir=upload_dir)
+                results = await service.ingest_multiple_cases(cases, uploaded_by=1, concurrent=True, max_workers=2)
+                counts = [
+                    await db.scalar(select(func.count()).select_from(model))
+                    for model in (KnowledgeDocument, LegalCase, CaseSection)
+                ]
+            return results, counts
+        finally:
+            await engine.dispose()
+
+    results, counts = asyncio.run(scenario())
+
+    assert (results["total"], results["successful"], results["failed"]) == (5, 2, 3)
+    assert [case["filename"] for case in results["cases"]] == [case["filename"] for case in cases]
+    assert [case["success"] for case in results["cases"]] == [True, False, True, False, False]
+    assert "too short" in results["cases"][1]["message"]
+    assert "Duplicate" in results["cases"][3]["message"]
+    assert "Unsupported file format" in results["cases"][4]["message"]
+
+    first = results["cases"][0]["data"]
+    assert {"summary", "facts", "ruling"} <= set(first["sections_found"])
+    assert first["legal_case_id"] != results["cases"][2]["data"]["legal_case_id"]
+
+    # Only the successful files keep rows and stored copies
+    assert counts[:2] == [2, 2]
+    assert counts[2] == first["sections_count"] + results["cases"][2]["data"]["sections_count"]
+    assert sorted(os.listdir(upload_dir)) == sorted(
+        os.path.basename(results["cases"][index]["data"]["file_path"]) for index in (0, 2)
+    )
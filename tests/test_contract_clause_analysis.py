@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.legal.analysis.contract_analysis_service import ContractAnalysisService
+from app.services.legal.analysis.contract_clauses import clause_key, split_clauses
+from app.utils import extraction_cache
+from app.utils.extraction_cache import ExtractionCache
+from app.utils.rate_limiter import AsyncRateLimiter
+
+CONFIDENTIALITY = "يلتزم الطرف الثاني بالمحافظة على سرية جميع المعلومات التي يطلع عليها بحكم هذا العقد وعدم إفشائها للغير."
+GOVERNING_LAW = "يخضع هذا العقد لأنظمة المملكة العربية السعودية وتختص محاكم الرياض بالفصل في أي نزاع ينشأ عنه بين الطرفين."
+PREAMBLE = "عقد تقديم خدمات\nإنه في يوم الأحد تم الاتفاق بين كل من شركة الأفق والسيد أحمد على ما يلي وفق الشروط الآتية المتفق عليها"
+
+
+def _contract(subject, numbering):
+    first, second, third = numbering
+    return (
+        f"{PREAMBLE}\n"
+        f"البند {first}: موضوع العقد\n{subject}\n"
+        f"البند {second}: السرية\n{CONFIDENTIALITY}\n"
+        f"البند {third}\nالقانون الواجب التطبيق\n{GOVERNING_LAW}\n"
+    )
+
+
+def test_clauses_are_split_at_headings_and_keyed_without_numbering() -> None:
+    subject = "يقدم الطرف الثاني خدمات الاستشارات التقنية للطرف الأول وفقاً للمواصفات المرفقة بهذا العقد."
+    clauses = split_clauses(_contract(subject, ("الأول", "الثاني", "الثالث")))
+    assert [clause.title for clause in clauses] == ["", "البند الأول: موضوع العقد", "البند الثاني: السرية", "البند الثالث"]
+    assert clauses[3].text.endswith(GOVERNING_LAW)
+
+    renumbered = split_clauses(_contract(subject, ("1", "(5)", "السابع")))
+    assert [clause.key for clause in renumbered] == [clause.key for clause in clauses]
+    assert clause_key("Clause 7. Confidentiality\nThe parties shall keep all information confidential.") == \
+        clause_key("Article 2 - Confidentiality\nThe parties shall keep all information confidential.")
+
+    # Short fragments fold into their neighbour; oversized clauses are split on lines
+    assert len(split_clauses("البند 1\nقصير\nالبند 2\n" + "نص طويل للبند الثاني\n" * 10)) == 1
+    long_clause = split_clauses(
+        "البند 1: الالتزامات\n" + "التزام تفصيلي من التزامات الطرف الثاني\n" * 300 + f"البند 2: السرية\n{CONFIDENTIALITY}",
+        max_chars=2000
+    )
+    assert [clause.title for clause in long_clause][-2:] == ["البند 1: الالتزامات", "البند 2: السرية"]
+    assert len(long_clause) > 3 and all(clause.title == "البند 1: الالتزامات" for clause in long_clause[:-1])
+    assert all(len(clause.text) <= 2100 for clause in long_clause)
+
+
+class FakeModels:
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents):
+        prompt = contents[0]
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.05)
+            if "outline" in prompt:
+                findings = {"weak_points": ["لا يوجد بند للقوة القاهرة"], "risks": [], "suggestions": ["إضافة بند القوة القاهرة"]}
+            elif "سرية" in prompt:
+                findings = {"weak_points": ["مدة الالتزام بالسرية غير محددة"], "risks": [], "suggestions": []}
+            elif "ترجمة" in prompt:
+                raise RuntimeError("503 UNAVAILABLE")
+            elif "البند" in prompt:
+                findings = {"weak_points": [], "risks": ["نطاق الخدمات غير محدد"], "suggestions": []}
+            else:
+                findings = {"weak_points": [], "risks": [], "suggestions": []}
+            return SimpleNamespace(text="```json\n" + json.dumps(findings, ensure_ascii=False) + "\n```")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class FakeContractService(ContractAnalysisService):
+    def _initialize_client(self):
+        pass
+
+
+def _analyze(models, text):
+    service = FakeContractService(api_key="test", rate_limiter=AsyncRateLimiter(4))
+    service._client = SimpleNamespace(models=models)
+    return asyncio.run(service.analyze_contract(text.encode("utf-8"), "contract.txt"))
+
+
+def test_only_novel_clauses_reach_gemini(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(extraction_cache, "_cache", ExtractionCache(str(tmp_path)))
+
+    first_models = FakeModels()
+    first = _analyze(first_models, _contract(
+        "يقدم الطرف الثاني خدمات الاستشارات التقنية للطرف الأول وفقاً للمواصفات المرفقة بهذا العقد.",
+        ("الأول", "الثاني", "الثالث")
+    ))
+    assert first["success"]
+    data = first["data"]
+    assert len(first_models.prompts) == 5  # four clauses and the missing-provisions check
+    assert first_models.max_active > 1
+    assert data["weak_points"] == ["البند الثاني: السرية: مدة الالتزام بالسرية غير محددة", "لا يوجد بند للقوة القاهرة"]
+    assert data["risks"] == ["البند الأول: موضوع العقد: نطاق الخدمات غير محدد"]  # repeated findings are merged
+    assert data["suggestions"] == ["إضافة بند القوة القاهرة"]
+    assert data["clause_stats"] == {"total": 4, "cached": 0, "failed": 0, "missing_provisions_checked": True}
+
+    # Another user's contract: same standard clauses under other numbers, one new and one failing clause
+    second_models = FakeModels()
+    second = _analyze(second_models, _contract(
+        "يقدم الطرف الثاني خدمات ترجمة الوثائق القانونية للطرف الأول خلال مدة لا تتجاوز عشرة أيام.",
+        ("1", "5", "السابع")
+    ))
+    assert second["success"]
+    clause_prompts = [prompt for prompt in second_models.prompts if "outline" not in prompt]
+    assert len(clause_prompts) == 1 and "ترجمة" in clause_prompts[0]
+    reports = second["data"]["clauses"]
+    assert [report["cached"] for report in reports] == [True, False, True, True]
+    assert "503" in reports[1]["error"]
+    assert second["data"]["weak_points"][0] == "البند 5: السرية: مدة الالتزام بالسرية غير محددة"
+    assert second["data"]["clause_stats"]["failed"] == 1
+
+
+def test_unstructured_contract_is_analysed_whole(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(extraction_cache, "_cache", ExtractionCache(str(tmp_path)))
+    models = FakeModels()
+    result = _analyze(models, "اتفق الطرفان على توريد مواد البناء خلال شهر مقابل مبلغ مائة ألف ريال.")
+    assert result["success"] and "analysis_mode" not in result["data"]
+    assert len(models.prompts) == 1
+
+
+class MalformedModels(FakeModels):
+    def generate_content(self, model, contents):
+        prompt = contents[0]
+        if "السرية" in prompt and "outline" not in prompt:
+            self.prompts.append(prompt)
+            return SimpleNamespace(text="Weak points:\n- The confidentiality term is not set")
+        if "الواجب التطبيق" in prompt and "outline" not in prompt:
+            self.prompts.append(prompt)
+            return SimpleNamespace(text='["no issues"]')
+        return super().generate_content(model, contents)
+
+
+def test_unparsable_clause_findings_are_not_cached(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(extraction_cache, "_cache", ExtractionCache(str(tmp_path)))
+    contract = _contract(
+        "يقدم الطرف الثاني خدمات الاستشارات التقنية للطرف الأول وفقاً للمواصفات المرفقة بهذا العقد.",
+        ("الأول", "الثاني", "الثالث")
+    )
+
+    result = _analyze(MalformedModels(), contract)
+    assert result["success"]
+    reports = result["data"]["clauses"]
+    assert [bool(report.get("error")) for report in reports] == [False, False, True, True]
+    assert result["data"]["clause_stats"]["failed"] == 2
+
+    # A later contract asks again instead of inheriting the bad replies
+    models = FakeModels()
+    again = _analyze(models, contract)
+    assert [report["cached"] for report in again["data"]["clauses"]] == [True, True, False, False]
+    assert again["data"]["weak_points"][0] == "البند الثاني: السرية: مدة الالتزام بالسرية غير محددة"
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.legal.analysis.case_analysis_service import CaseAnalysisService
+from app.utils import gemini_files
+from app.utils.gemini_files import DocumentHandleManager, LocalFileBackend
+from app.utils.rate_limiter import AsyncRateLimiter
+
+PDF = b"%PDF-1.7 " + bytes(range(256)) * 8
+
+
+class SlowBackend(LocalFileBackend):
+    def upload(self, content, mime_type, display_name, content_hash):
+        time.sleep(0.05)
+        return super().upload(content, mime_type, display_name, content_hash)
+
+
+def test_documents_are_uploaded_once_until_near_expiry(tmp_path) -> None:
+    backend = SlowBackend(str(tmp_path))
+    manager = DocumentHandleManager(backend, min_bytes=1024, refresh_margin_seconds=600)
+
+    async def scenario():
+        parts = await asyncio.gather(*(manager.part(PDF, "application/pdf", "claim.pdf") for _ in range(5)))
+        other = await manager.part(PDF + b"v2", "application/pdf", "claim-v2.pdf")
+        small = await manager.part(b"%PDF tiny", "application/pdf", "tiny.pdf")
+        return parts, other, small
+
+    parts, other, small = asyncio.run(scenario())
+    assert backend.uploads == 2 and manager.uploads == 2 and manager.reuses == 4
+    assert all(part == parts[0] for part in parts)
+    assert parts[0]["file_data"]["mime_type"] == "application/pdf" and other != parts[0]
+    assert small is None  # small documents stay inline
+
+    # Within the refresh margin of its expiry the document is uploaded again
+    for handle in manager._handles.values():
+        handle.expires_at = time.time() + 60
+    refreshed = asyncio.run(manager.part(PDF, "application/pdf", "claim.pdf"))
+    assert backend.uploads == 3 and refreshed != parts[0]
+
+
+class FailingBackend(LocalFileBackend):
+    def upload(self, content, mime_type, display_name, content_hash):
+        raise RuntimeError("503 UNAVAILABLE")
+
+
+def test_upload_failure_falls_back_to_inline(tmp_path) -> None:
+    manager = DocumentHandleManager(FailingBackend(str(tmp_path)), min_bytes=0)
+    assert asyncio.run(manager.part(PDF, "application/pdf", "claim.pdf")) is None
+    assert manager.failures == 1
+    # Without a backend or a client there is nothing to upload through
+    assert asyncio.run(DocumentHandleManager(min_bytes=0).part(PDF, "application/pdf", "claim.pdf")) is None
+
+
+class RecordingModels:
+    def __init__(self):
+        self.parts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents):
+        with self.lock:
+            self.parts.append(contents[0])
+        return SimpleNamespace(text="### 6. التقييم الكمي\nدرجة المخاطر: 20")
+
+
+def test_analysis_types_reuse_one_upload(tmp_path, monkeypatch) -> None:
+    backend = LocalFileBackend(str(tmp_path))
+    monkeypatch.setattr(gemini_files, "_manager", DocumentHandleManager(backend, min_bytes=1024))
+    models = RecordingModels()
+    service = CaseAnalysisService(api_key="test", rate_limiter=AsyncRateLimiter(2))
+    service._client = SimpleNamespace(models=models)
+
+    async def scenario():
+        for analysis_type in ("case-analysis", "contract-review"):
+            result = await service.analyze_case(PDF, "claim.pdf", analysis_type, "labor", "استرداد الأجور")
+            assert result["success"], result["message"]
+
+    asyncio.run(scenario())
+    assert backend.uploads == 1
+    assert len(models.parts) == 2 and models.parts[0] == models.parts[1]
+    assert models.parts[0]["file_data"]["file_uri"].startswith("file://")
+
+
+class FileNotFoundApiError(Exception):
+    code = 404
+    status = "NOT_FOUND"
+
+
+class RejectingModels:
+    """Rejects any request referencing an uploaded file, as Gemini does once it is gone."""
+
+    def __init__(self):
+        self.parts = []
+
+    def generate_content(self, model, contents):
+        self.parts.append(contents[0])
+        if isinstance(contents[0], dict) and "file_data" in contents[0]:
+            raise FileNotFoundApiError("404 NOT_FOUND: File files/abc does not exist")
+        return SimpleNamespace(text="### 6. التقييم الكمي\nدرجة المخاطر: 20")
+
+
+def test_rejected_file_is_forgotten_and_sent_inline(tmp_path, monkeypatch) -> None:
+    backend = LocalFileBackend(str(tmp_path))
+    manager = DocumentHandleManager(backend, min_bytes=1024)
+    monkeypatch.setattr(gemini_files, "_manager", manager)
+    models = RejectingModels()
+    service = CaseAnalysisService(api_key="test", rate_limiter=AsyncRateLimiter(2))
+    service._client = SimpleNamespace(models=models)
+    monkeypatch.setattr(service, "_make_part", lambda content, mime_type: {"inline_data": len(content)})
+
+    result = asyncio.run(service.analyze_case(PDF, "claim.pdf", "case-analysis", "labor", "استرداد الأجور"))
+
+    assert result["success"], result["message"]
+    assert "file_data" in models.parts[0] and models.parts[1] == {"inline_data": len(PDF)}
+    assert manager.rejected == 1 and manager.stats()["handles"] == 0
+    # The next request uploads the document again instead of reusing the dead handle
+    asyncio.run(manager.part(PDF, "application/pdf", "claim.pdf"))
+    assert backend.uploads == 2
+
+
+def test_other_errors_are_not_retried(tmp_path) -> None:
+    manager = DocumentHandleManager(LocalFileBackend(str(tmp_path)), min_bytes=0)
+    calls = []
+
+    async def request(part):
+        calls.append(part)
+        raise FileNotFoundApiError("404 NOT_FOUND: model not found")
+
+    async def scenario():
+        part = await manager.part(PDF, "application/pdf", "claim.pdf")
+        # An inline part cannot have been rejected as a stored file
+        try:
+            await manager.with_inline_fallback({"inline_data": 1}, PDF, "application/pdf", request, lambda: None)
+        except FileNotFoundApiError:
+            pass
+        try:
+            await manager.with_inline_fallback(part, PDF, "application/pdf", request, lambda: {"inline_data": 1})
+        except FileNotFoundApiError:
+            pass
+        return part
+
+    part = asyncio.run(scenario())
+    # Only the stored file is retried inline, and only once
+    assert calls == [{"inline_data": 1}, part, {"inline_data": 1}]
+    assert manager.rejected == 1
@@ -0,0 +1,146 @@
+import os
+from types import SimpleNamespace
+
+from app.processors import enhanced_arabic_pdf_processor as pdf_module
+from app.processors.enhanced_arabic_pdf_processor import EnhancedArabicPDFProcessor
+from app.services.legal.ingestion import legal_case_ingestion_service as case_module
+from app.utils import extraction_cache
+from app.utils.extraction_cache import ExtractionCache, extraction_key
+
+DIGITAL_PAGE = "المادة الأولى: يسمى هذا النظام نظام العمل ويعمل به بعد تسعين يوما من تاريخ نشره"
+
+
+def test_keys_round_trip_and_eviction(tmp_path) -> None:
+    cache = ExtractionCache(str(tmp_path), max_bytes=10_000)
+    key = extraction_key("abc", 1, "pdf-ocr", "1", dpi=300, psm=(4, 11), language="ara")
+
+    assert cache.get(key) is None
+    cache.put(key, DIGITAL_PAGE * 3)
+    assert cache.get(key) == DIGITAL_PAGE * 3
+    assert (cache.hits, cache.misses, cache.writes) == (1, 1, 1)
+
+    # Every part of the key separates entries; no content hash means no caching
+    assert key == extraction_key("abc", 1, "pdf-ocr", "1", language="ara", psm=(4, 11), dpi=300)
+    assert len({
+        key,
+        extraction_key("abd", 1, "pdf-ocr", "1", dpi=300, psm=(4, 11), language="ara"),
+        extraction_key("abc", 2, "pdf-ocr", "1", dpi=300, psm=(4, 11), language="ara"),
+        extraction_key("abc", 1, "pdf-ocr", "2", dpi=300, psm=(4, 11), language="ara"),
+        extraction_key("abc", 1, "pdf-ocr", "1", dpi=200, psm=(4, 11), language="ara"),
+        extraction_key("abc", 1, "pdf-ocr", "1", dpi=300, psm=(6,), language="ara"),
+        extraction_key("abc", 1, "pdf-ocr", "1", dpi=300, psm=(4, 11), language="eng"),
+    }) == 7
+    assert extraction_key(None, 1, "pdf-ocr", "1") is None
+
+    # Incompressible entries of ~900 bytes: the cache keeps itself under its limit
+    # and evicts the least recently used ones first
+    keys = [extraction_key("abc", page, "pdf-direct", "1") for page in range(30)]
+    for number, page_key in enumerate(keys):
+        cache.put(page_key, os.urandom(450).hex())
+        os.utime(cache._path(page_key), (number, number))
+        cache.get(keys[0])  # keeps the first page hot
+    assert cache.stats()["size_bytes"] <= 10_000
+    assert cache.evictions > 0
+    assert cache.get(keys[0]) is not None and cache.get(keys[1]) is None and cache.get(keys[-1]) is not None
+
+
+class CountingProcessor(EnhancedArabicPDFProcessor):
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.direct_calls = []
+        self.ocr_requests = []
+
+    def _extract_page_direct(self, page, page_num):
+        self.direct_calls.append(page_num)
+        return self.pages[page_num - 1] + "\n", self.pages[page_num - 1]
+
+    def _ocr_pages(self, pdf_path, page_numbers, language):
+        self.ocr_requests.extend(page_numbers)
+        return {page_num: f"نص مستخرج ضوئيا للصفحة {page_num}\n" for page_num in page_numbers}
+
+
+def test_pdf_pages_are_extracted_and_ocrd_once(tmp_path, monkeypatch) -> None:
+    pages = [DIGITAL_PAGE, "", DIGITAL_PAGE]
+    pdf_path = tmp_path / "law.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 law")
+    fake_fitz = SimpleNamespace(open=lambda path: type("Doc", (list,), {"close": lambda self: None})(range(3)))
+    monkeypatch.setattr(pdf_module, "pdf_toolkit", lambda: SimpleNamespace(fitz=fake_fitz))
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(extraction_cache, "_cache", cache)
+
+    first = CountingProcessor(pages)
+    first_result = first.extract_pdf_text(str(pdf_path))
+    second = CountingProcessor(pages)
+    assert second.extract_pdf_text(str(pdf_path)) == first_result == (first_result[0], "Hybrid")
+    assert (first.direct_calls, first.ocr_requests) == ([1, 2, 3], [2])
+    assert (second.direct_calls, second.ocr_requests) == ([], [])
+
+    # The streaming path shares the same entries; another language only re-runs OCR
+    streamed = CountingProcessor(pages)
+    assert [page_num for page_num, _ in streamed.iter_pdf_pages(str(pdf_path))] == [1, 2, 3]
+    assert (streamed.direct_calls, streamed.ocr_requests) == ([], [])
+    english = CountingProcessor(pages)
+    english.extract_pdf_text(str(pdf_path), language="en")
+    assert (english.direct_calls, english.ocr_requests) == ([], [2])
+
+    # Different content is a different document
+    pdf_path.write_bytes(b"%PDF-1.7 amended law")
+    amended = CountingProcessor(pages)
+    amended.extract_pdf_text(str(pdf_path))
+    assert (amended.direct_calls, amended.ocr_requests) == ([1, 2, 3], [2])
+
+
+class FakeCasePage:
+    def __init__(self, text, calls):
+        self.text = text
+        self.calls = calls
+
+    def get_text(self, mode):
+        self.calls.append(self.text)
+        return {"blocks": [{"lines": [{"spans": [{"text": self.text}]}]}]}
+
+
+def test_case_pdf_extraction_uses_the_cache(tmp_path, monkeypatch) -> None:
+    calls = []
+    texts = ["Article one of the labour law", "Article two of the labour law"]
+    fake_fitz = SimpleNamespace(open=lambda path: type("Doc", (list,), {"close": lambda self: None})(
+        FakeCasePage(text, calls) for text in texts
+    ))
+    monkeypatch.setattr(case_module, "optional_import", lambda name: fake_fitz)
+    monkeypatch.setattr(extraction_cache, "_cache", ExtractionCache(str(tmp_path / "cache")))
+    pdf_path = tmp_path / "case.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 case")
+
+    service = case_module.LegalCaseIngestionService(db=None, upload_dir=str(tmp_path))
+    first = service.extract_text(str(pdf_path))
+    assert calls == texts
+    assert service.extract_text(str(pdf_path)) == first
+    assert calls == texts
+    assert first.count("---PAGE_SEPARATOR---") == 2
+
+
+def test_whole_document_ocr_is_not_cached_after_a_page_failure(tmp_path, monkeypatch) -> None:
+    pdf_path = tmp_path / "scan.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 scan")
+    monkeypatch.setattr(extraction_cache, "_cache", ExtractionCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(pdf_module, "iter_page_images", lambda path, dpi: iter([(1, "img-1"), (2, "img-2")]))
+    failures = {2}
+
+    def fake_ocr(self, image, page_num, tesseract_lang):
+        if page_num in failures:
+            raise MemoryError("out of memory")
+        return f"نص الصفحة {page_num}\n"
+
+    monkeypatch.setattr(EnhancedArabicPDFProcessor, "_ocr_image", fake_ocr)
+    processor = EnhancedArabicPDFProcessor()
+
+    degraded = processor.extract_text_ocr(str(pdf_path))
+    assert "---ERROR_PAGE_2---" in degraded
+
+    # The failure was temporary: the next call OCRs again and caches the full text
+    failures.clear()
+    recovered = processor.extract_text_ocr(str(pdf_path))
+    assert "ERROR_PAGE" not in recovered and "نص الصفحة 2" in recovered
+    failures.add(2)
+    assert processor.extract_text_ocr(str(pdf_path)) == recovered
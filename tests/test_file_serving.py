@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.file_serving import ZeroCopyFileResponse, http_date, not_modified, serve_file
+
+CONTENT = bytes(range(256)) * 40
+
+
+def make_client(path):
+    app = FastAPI()
+
+    @app.get("/file")
+    async def download(request: Request):
+        return await serve_file(request, str(path), "application/pdf", filename="عقد عمل.pdf")
+
+    return TestClient(app)
+
+
+def test_full_download_has_strong_validators_and_revalidates(tmp_path) -> None:
+    path = tmp_path / "contract.pdf"
+    path.write_bytes(CONTENT)
+    client = make_client(path)
+
+    response = client.get("/file")
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and response.content == CONTENT
+    assert etag == f'"{hashlib.sha256(CONTENT).hexdigest()[:32]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-disposition"] == (
+        "attachment; filename=\"download.pdf\"; filename*=UTF-8''%D8%B9%D9%82%D8%AF%20%D8%B9%D9%85%D9%84.pdf"
+    )
+
+    assert client.get("/file", headers={"If-None-Match": etag}).status_code == 304
+    revalidated = client.get("/file", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    # Changed content gets a new ETag
+    path.write_bytes(CONTENT[::-1])
+    changed = client.get("/file", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_range_requests_resume_downloads(tmp_path) -> None:
+    path = tmp_path / "contract.pdf"
+    path.write_bytes(CONTENT)
+    client = make_client(path)
+    etag = client.get("/file").headers["etag"]
+
+    partial = client.get("/file", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206 and partial.content == CONTENT[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    resumed = client.get("/file", headers={"Range": "bytes=10000-", "If-Range": etag})
+    assert resumed.status_code == 206 and resumed.content == CONTENT[10000:]
+    # A stale If-Range validator gets the whole file
+    stale = client.get("/file", headers={"Range": "bytes=10000-", "If-Range": '"stale"'})
+    assert stale.status_code == 200 and stale.content == CONTENT
+
+    assert client.get("/file", headers={"Range": f"bytes={len(CONTENT) + 1}-"}).status_code == 416
+
+
+def test_zero_copy_extension_hands_the_file_to_the_server(tmp_path) -> None:
+    path = tmp_path / "contract.pdf"
+    path.write_bytes(CONTENT)
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            file = message["file"]
+            file.seek(message["offset"])
+            message = dict(message, body=file.read(message["count"]))
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    def scope(headers):
+        return {
+            "type": "http", "method": "GET", "path": "/", "headers": headers,
+            "extensions": {"http.response.zerocopysend": {}},
+        }
+
+    async def scenario():
+        await ZeroCopyFileResponse(str(path))(scope([]), receive, send)
+        await ZeroCopyFileResponse(str(path))(scope([(b"range", b"bytes=5-9")]), receive, send)
+
+    asyncio.run(scenario())
+    full, ranged = messages[1], messages[3]
+    assert messages[0]["status"] == 200 and full["body"] == CONTENT and full["count"] == len(CONTENT)
+    assert messages[2]["status"] == 206 and (ranged["offset"], ranged["body"]) == (5, CONTENT[5:10])
+
+
+def test_conditional_get() -> None:
+    modified = datetime(2026, 3, 1, 9, 30, 15, 500000, tzinfo=timezone.utc)
+    etag = '"abc"'
+
+    assert not_modified({"if-none-match": '"xyz", W/"abc"'}, etag, modified)
+    assert not_modified({"if-none-match": "*"}, etag, modified)
+    assert not not_modified({"if-none-match": '"xyz"'}, etag, modified)
+    # If-None-Match takes precedence over a matching If-Modified-Since
+    assert not not_modified({"if-none-match": '"xyz"', "if-modified-since": http_date(modified)}, etag, modified)
+
+    assert http_date(modified) == "Sun, 01 Mar 2026 09:30:15 GMT"
+    assert not_modified({"if-modified-since": http_date(modified)}, etag, modified)
+    assert not not_modified({"if-modified-since": "Sun, 01 Mar 2026 09:30:14 GMT"}, etag, modified)
+    assert not not_modified({"if-modified-since": "yesterday"}, etag, modified)
+    assert not not_modified({}, etag, modified)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from app.parsers import ai_gemini_parser as parser_module
+from app.parsers.ai_gemini_parser import GeminiParser, page_windows
+from app.utils import extraction_cache
+from app.utils.extraction_cache import ExtractionCache
+from app.utils.rate_limiter import AsyncRateLimiter
+
+PAGE_COUNT = 45
+ARABIC_DIGITS = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
+
+
+def _article_text(page):
+    return f"نص المادة {page} من نظام العمل كاملا"
+
+
+class FakeModels:
+    """Answers each page window with the articles on its pages (one per page, ten per chapter)."""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.failed_once = False
+
+    def generate_content(self, model, contents):
+        first, last = map(int, contents[0].split("-"))
+        with self.lock:
+            self.calls.append((first, last))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.02)
+            if first == 19 and not self.failed_once:
+                self.failed_once = True
+                raise RuntimeError("429 RESOURCE_EXHAUSTED")
+            return SimpleNamespace(text=json.dumps(self._window(first, last), ensure_ascii=False))
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    @staticmethod
+    def _window(first, last):
+        chapters = {}
+        for page in range(first, last + 1):
+            chapter = (page - 1) // 10 + 1
+            # Headings sit on a chapter's first page; a window starting mid-chapter cannot see it
+            heading_seen = (page - 1) % 10 == 0
+            entry = chapters.setdefault(chapter, {
+                "chapter_number": str(chapter) if heading_seen else None,
+                "chapter_name": f"الفصل {chapter}" if heading_seen else None,
+                "articles": [],
+            })
+            content = _article_text(page)
+            if page == last and last != PAGE_COUNT:
+                content = content[:12]  # article runs past the window's last page
+            number = str(page).translate(ARABIC_DIGITS) if first > 1 else str(page)
+            entry["articles"].append({"article_number": number, "content": content, "keywords": [f"k{page}"]})
+        branch = {"branch_number": "1" if first == 1 else None, "branch_name": "أحكام عامة" if first == 1 else None}
+        return {
+            "law_sources": [{"name": "نظام العمل", "type": "law", "branches": [{**branch, "chapters": list(chapters.values())}]}],
+            "processing_report": {"warnings": [f"window {first}"], "structure_confidence": 0.9},
+        }
+
+
+class WindowParser(GeminiParser):
+    def __init__(self, models, limiter):
+        super().__init__(api_key="test", rate_limiter=limiter)
+        self._client = SimpleNamespace(models=models)
+
+    def _open_pdf(self, file_path):
+        return SimpleNamespace(pages=list(range(PAGE_COUNT)))
+
+    def _window_bytes(self, reader, first, last):
+        return f"{first}-{last}".encode()
+
+    def _make_part(self, content, mime):
+        return content.decode()
+
+
+def test_page_windows_overlap() -> None:
+    assert page_windows(45, 20, 2) == [(1, 20), (19, 38), (37, 45)]
+    assert page_windows(20, 20, 2) == [(1, 20)]
+    assert page_windows(3, 1, 5) == [(1, 1), (2, 2), (3, 3)]
+
+
+def test_large_pdf_is_parsed_in_windows_merged_and_cached(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(extraction_cache, "_cache", ExtractionCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(parser_module, "GEMINI_RETRY_BACKOFF_SECONDS", 0)
+    pdf_path = tmp_path / "labour.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 labour law")
+
+    models = FakeModels()
+    result = asyncio.run(WindowParser(models, AsyncRateLimiter(2)).parse(str(pdf_path), {"name": "نظام العمل"}))
+
+    assert result["success"], result["message"]
+    assert sorted(set(models.calls)) == [(1, 20), (19, 38), (37, 45)]
+    assert models.calls.count((19, 38)) == 2  # retried after the rate-limit error
+    assert models.max_active <= 2
+
+    branches = result["data"]["hierarchy"]["branches"]
+    assert [(branch["branch_number"], branch["order_index"]) for branch in branches] == [("1", 1)]
+    chapters = branches[0]["chapters"]
+    assert [chapter["chapter_number"] for chapter in chapters] == ["1", "2", "3", "4", "5"]
+    articles = [article for chapter in chapters for article in chapter["articles"]]
+    assert [article["article_number"] for article in articles[:20]] == [str(page) for page in range(1, 21)]
+    assert [article["article_number"] for article in articles[20:]] == [str(page).translate(ARABIC_DIGITS) for page in range(21, 46)]
+    # Seam articles keep the full text from the window where they were complete
+    assert all(article["content"] == _article_text(page) for page, article in enumerate(articles, 1))
+    assert [article["order_index"] for article in chapters[1]["articles"]] == list(range(1, 11))
+    assert articles[19]["keywords"] == ["k20"]
+
+    report = result["data"]["processing_report"]
+    assert report["total_articles"] == 45 and report["warnings"] == ["window 1", "window 19", "window 37"]
+    assert result["data"]["law_source"]["name"] == "نظام العمل"
+
+    # Same file and prompt version: no Gemini calls at all
+    again_models = FakeModels()
+    again = asyncio.run(WindowParser(again_models, AsyncRateLimiter(2)).parse(str(pdf_path), {"name": "نظام العمل"}))
+    assert again_models.calls == []
+    assert again["data"]["hierarchy"] == result["data"]["hierarchy"]
+    assert all(window["cached"] for window in again["data"]["processing_report"]["windows"])
+
+    monkeypatch.setattr(parser_module, "PROMPT_VERSION", "2")
+    asyncio.run(WindowParser(again_models, AsyncRateLimiter(2)).parse(str(pdf_path), {"name": "نظام العمل"}))
+    assert sorted(set(again_models.calls)) == [(1, 20), (19, 38), (37, 45)]
+
+
+def test_rate_limiter_spaces_starts() -> None:
+    async def scenario():
+        limiter = AsyncRateLimiter(max_concurrency=5, requests_per_minute=1200)  # one start per 50 ms
+        starts = []
+
+        async def call():
+            async with limiter:
+                starts.append(time.monotonic())
+
+        await asyncio.gather(*(call() for _ in range(4)))
+        return starts
+
+    starts = asyncio.run(scenario())
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
@@ -0,0 +1,92 @@
+import time
+
+from app.services.legal.knowledge.index_statistics_service import IndexStatistics
+
+
+class FakeCollection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get(self, limit, offset, include):
+        page = self.rows[offset:offset + limit]
+        return {"ids": [r[0] for r in page], "metadatas": [r[1] for r in page]}
+
+
+def test_load_counts_documents_and_laws() -> None:
+    stats = IndexStatistics("test")
+    assert stats.is_empty is None
+
+    stats.load_from_collection(FakeCollection([
+        ("1", {"document_id": 1, "law_source_id": 7}),
+        ("2", {"document_id": 1, "law_source_id": 7}),
+        ("3", {"document_id": 2, "law_name": "نظام العمل"}),
+    ]), page_size=2)
+
+    assert stats.is_empty is False
+    assert stats.total_vectors == 3
+    assert stats.count_for_document(1) == 2
+    assert stats.count_for_law(7) == 2
+    assert stats.count_for_law("نظام العمل") == 1
+
+
+def test_incremental_updates_keep_counts_consistent() -> None:
+    stats = IndexStatistics("test")
+    stats.load_from_collection(FakeCollection([]))
+    assert stats.is_empty is True
+
+    stats.record_added(["10", "11"], [{"document_id": 5}, {"document_id": 5}])
+    stats.record_added(["10"], [{"document_id": 6}])
+    assert stats.count_for_document(5) == 1
+    assert stats.count_for_document(6) == 1
+
+    stats.record_deleted(["10", "11", "missing"])
+    snapshot = stats.snapshot()
+    assert snapshot["total_vectors"] == 0
+    assert snapshot["documents"] == {}
+    assert snapshot["last_modified"] is not None
+
+
+class CountingCollection(FakeCollection):
+    def count(self):
+        return len(self.rows)
+
+
+def _wait_until_loaded(stats) -> None:
+    for _ in range(200):
+        if not stats.snapshot()["loading"]:
+            return
+        time.sleep(0.01)
+
+
+def test_writes_from_other_processes_are_picked_up() -> None:
+    collection = CountingCollection([])
+    stats = IndexStatistics("test", refresh_seconds=3600)
+    stats.load_in_background(lambda: collection)
+    _wait_until_loaded(stats)
+    assert stats.is_empty is True
+
+    # Another process ingests a corpus straight into the collection
+    collection.rows = [("1", {"document_id": 1}), ("2", {"document_id": 1})]
+    assert stats.is_empty is True
+    assert stats.confirm_empty(collection) is False
+    _wait_until_loaded(stats)
+    assert stats.is_empty is False and stats.count_for_document(1) == 2
+    assert stats.confirm_empty(CountingCollection([])) is True
+
+
+def test_stale_statistics_are_rebuilt() -> None:
+    collection = CountingCollection([("1", {"document_id": 1})])
+    stats = IndexStatistics("test", refresh_seconds=0.05)
+    stats.load_in_background(lambda: collection)
+    _wait_until_loaded(stats)
+    assert stats.total_vectors == 1 and not stats.stale
+
+    # "1" deleted elsewhere, "2" added elsewhere
+    collection.rows = [("2", {"document_id": 2})]
+    time.sleep(0.06)
+    assert stats.stale
+    stats.snapshot()
+    _wait_until_loaded(stats)
+
+    assert stats.count_for_document(1) == 0 and stats.count_for_document(2) == 1
+    assert not stats.stale
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.utils.lazy_loader import LazyEngine, LazyProxy, register_engine, warm_up_engines, engines_status
+
+
+class CountingFactory:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"value": 42}
+
+
+def test_engine_builds_once() -> None:
+    factory = CountingFactory()
+    engine = LazyEngine("test-once", factory)
+
+    assert engine.loaded is False
+    assert engine.get() == {"value": 42}
+    assert engine.get() is engine.get()
+    assert factory.calls == 1
+    assert engine.status()["loaded"] is True
+
+
+def test_proxy_defers_until_attribute_access() -> None:
+    factory = CountingFactory()
+    register_engine("test-proxy", factory)
+    proxy = LazyProxy("test-proxy")
+
+    assert factory.calls == 0
+    assert proxy.get("value") == 42
+    assert factory.calls == 1
+
+
+def test_string_factory_and_warm_up() -> None:
+    register_engine("test-string", "collections:OrderedDict")
+
+    results = asyncio.run(warm_up_engines(["test-string", "does-not-exist"]))
+
+    assert results == {"test-string": True, "does-not-exist": False}
+    assert engines_status()["test-string"]["loaded"] is True
+
+
+def test_failed_engine_reports_error() -> None:
+    def broken():
+        raise RuntimeError("boom")
+
+    register_engine("test-broken", broken)
+    results = asyncio.run(warm_up_engines(["test-broken"]))
+
+    assert results == {"test-broken": False}
+    assert "boom" in engines_status()["test-broken"]["error"]
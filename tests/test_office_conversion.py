@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.utils.office_conversion import ConversionError, OfficeConversionPool
+
+
+class FakeOfficeWorker:
+    """Writes a stub PDF; a source named crash-*.docx kills the "office process"."""
+
+    starts = 0
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, index):
+        self.index = index
+        self.running = False
+
+    def start(self):
+        FakeOfficeWorker.starts += 1
+        self.running = True
+
+    def alive(self):
+        return self.running
+
+    def convert(self, source, output_dir, timeout):
+        with self.lock:
+            FakeOfficeWorker.active += 1
+            FakeOfficeWorker.peak = max(FakeOfficeWorker.peak, FakeOfficeWorker.active)
+        try:
+            time.sleep(0.02)
+            if Path(source).name.startswith("crash"):
+                self.running = False
+                raise RuntimeError("office process exited")
+            target = Path(output_dir) / (Path(source).stem + ".pdf")
+            target.write_bytes(b"%PDF-1.4 " + Path(source).read_bytes())
+            return str(target)
+        finally:
+            with self.lock:
+                FakeOfficeWorker.active -= 1
+
+    def stop(self):
+        self.running = False
+
+
+def test_pool_converts_concurrently_and_restarts_crashed_workers(tmp_path) -> None:
+    sources = []
+    for name in ["a", "b", "c", "crash-d", "e", "f"]:
+        path = tmp_path / f"{name}.docx"
+        path.write_bytes(name.encode())
+        sources.append(str(path))
+
+    async def scenario():
+        pool = OfficeConversionPool(FakeOfficeWorker, size=2)
+        results = await asyncio.gather(
+            *(pool.convert(source, str(tmp_path)) for source in sources), return_exceptions=True
+        )
+        stats = pool.stats()
+        await pool.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+
+    assert isinstance(results[3], ConversionError)
+    converted = [result for result in results if not isinstance(result, Exception)]
+    assert [Path(path).read_bytes() for path in converted] == [b"%PDF-1.4 " + n for n in [b"a", b"b", b"c", b"e", b"f"]]
+    # Two long-lived workers served six jobs; the crashed one was started again
+    assert FakeOfficeWorker.peak == 2
+    assert FakeOfficeWorker.starts == 3
+    assert (stats["completed"], stats["failed"], stats["restarts"], stats["queued"]) == (5, 1, 1, 0)
+    assert stats["workers"] == 2 and stats["latency_p95_seconds"] is not None
+
+
+def test_hung_conversion_times_out() -> None:
+    class HangingWorker(FakeOfficeWorker):
+        def convert(self, source, output_dir, timeout):
+            time.sleep(0.3)
+            return source
+
+    async def scenario():
+        pool = OfficeConversionPool(HangingWorker, size=1, timeout_seconds=0.1)
+        with pytest.raises(ConversionError, match="timed out"):
+            await pool.convert("contract.docx", "/tmp")
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["failed"] == 1 and stats["restarts"] == 1
@@ -0,0 +1,37 @@
+from app.processors.hierarchical_document_processor import (
+    ArabicLegalPatternRecognizer,
+    CompiledArabicLegalPatternRecognizer,
+    ElementType,
+)
+
+
+def test_compiled_recognizer_matches_legacy() -> None:
+    legacy = ArabicLegalPatternRecognizer()
+    compiled = CompiledArabicLegalPatternRecognizer()
+    lines = [
+        "",
+        "الباب الأول أحكام عامة",
+        "الفصل الثاني",
+        "المادة 12",
+        "مادة رقم 7",
+        "م. 12 يعاقب بالحبس",
+        "أولاً: التعريفات",
+        "أ- يلتزم المقاول بما يلي",
+        "1) التعريف",
+        "يسري هذا النظام على جميع العقود",
+    ]
+    # Glyph-encoded headings exactly as the legacy patterns list them
+    lines += [p for p in legacy.chapter_patterns + legacy.article_patterns
+              if not any(char in p for char in "\\.^$*+?{}[]()|")]
+
+    for number, line in enumerate(lines, 1):
+        assert compiled.analyze_line(line, number) == legacy.analyze_line(line, number), line
+
+
+def test_compiled_recognizer_element_types() -> None:
+    recognizer = CompiledArabicLegalPatternRecognizer()
+
+    assert recognizer.analyze_line("الباب الأول", 1).element_type == ElementType.CHAPTER
+    assert recognizer.analyze_line("المادة 5", 2).element_type == ElementType.ARTICLE
+    assert recognizer.analyze_line("نص عادي بدون عنوان", 3).element_type == ElementType.CONTENT
+    assert recognizer.analyze_line("   ", 4).element_type == ElementType.IGNORE
@@ -0,0 +1,138 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from app.processors import enhanced_arabic_pdf_processor as pdf_module
+from app.processors.enhanced_arabic_pdf_processor import EnhancedArabicPDFProcessor, score_page_text
+
+DIGITAL_PAGE = "المادة الأولى: يسمى هذا النظام نظام العمل ويعمل به بعد تسعين يوما من تاريخ نشره"
+
+
+def test_scores_separate_digital_from_scanned_pages() -> None:
+    assert score_page_text(DIGITAL_PAGE) > pdf_module.PAGE_QUALITY_THRESHOLD
+    assert score_page_text("") == 0.0
+    assert score_page_text("  12  ") == 0.0
+    assert score_page_text("���  " * 10) < pdf_module.PAGE_QUALITY_THRESHOLD
+    assert score_page_text("ا ل م ا د ة ا ل أ و ل ى " * 5) < pdf_module.PAGE_QUALITY_THRESHOLD
+
+
+class FakeDoc(list):
+    def close(self) -> None:
+        pass
+
+
+class PageProcessor(EnhancedArabicPDFProcessor):
+    """Serves canned direct text per page and records which pages were OCR'd."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.ocr_requests = []
+
+    def _extract_page_direct(self, page, page_num):
+        return self.pages[page_num - 1] + "\n", self.pages[page_num - 1]
+
+    def _ocr_pages(self, pdf_path, page_numbers, language):
+        self.ocr_requests.extend(page_numbers)
+        return {page_num: f"نص مستخرج ضوئيا للصفحة {page_num}\n" for page_num in page_numbers}
+
+
+def _run(monkeypatch, pages):
+    fake_fitz = SimpleNamespace(open=lambda path: FakeDoc(range(len(pages))))
+    monkeypatch.setattr(pdf_module, "pdf_toolkit", lambda: SimpleNamespace(fitz=fake_fitz))
+    processor = PageProcessor(pages)
+    text, method = processor.extract_pdf_text("doc.pdf")
+    return processor, text, method
+
+
+def test_digital_document_skips_ocr(monkeypatch) -> None:
+    processor, text, method = _run(monkeypatch, [DIGITAL_PAGE] * 3)
+
+    assert method == "Direct"
+    assert processor.ocr_requests == []
+    assert text.count(pdf_module.PAGE_SEPARATOR) == 3
+
+
+def test_only_poor_pages_are_ocrd_and_merged_in_order(monkeypatch) -> None:
+    processor, text, method = _run(monkeypatch, [DIGITAL_PAGE, "", DIGITAL_PAGE])
+
+    assert method == "Hybrid"
+    assert processor.ocr_requests == [2]
+    first, second, third = text.split(pdf_module.PAGE_SEPARATOR)[:3]
+    assert "نظام العمل" in first and "نظام العمل" in third
+    assert "للصفحة 2" in second
+
+
+def _pdf2image_toolkit(page_count, calls):
+    def broken_open(path):
+        raise RuntimeError("no PyMuPDF")
+
+    def convert_from_path(path, dpi, first_page, last_page):
+        calls.append((first_page, last_page))
+        return [f"image-{n}" for n in range(first_page, last_page + 1)]
+
+    return SimpleNamespace(
+        fitz=SimpleNamespace(open=broken_open),
+        convert_from_path=convert_from_path,
+        pdfinfo_from_path=lambda path: {"Pages": page_count},
+    )
+
+
+def test_renderer_falls_back_to_small_pdf2image_windows(monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(pdf_module, "pdf_toolkit", lambda: _pdf2image_toolkit(5, calls))
+    monkeypatch.setattr(pdf_module, "RENDER_WINDOW", 2)
+
+    rendered = list(pdf_module.iter_page_images("doc.pdf"))
+    assert [page_num for page_num, _ in rendered] == [1, 2, 3, 4, 5]
+    assert calls == [(1, 2), (3, 4), (5, 5)]
+
+    calls.clear()
+    rendered = list(pdf_module.iter_page_images("doc.pdf", page_numbers=[2, 3, 5]))
+    assert [image for _, image in rendered] == ["image-2", "image-3", "image-5"]
+    assert calls == [(2, 3), (5, 5)]
+
+
+def test_streaming_ocr_keeps_page_order(monkeypatch) -> None:
+    monkeypatch.setattr(pdf_module, "pdf_toolkit", lambda: _pdf2image_toolkit(6, []))
+    monkeypatch.setattr(pdf_module, "OCR_MAX_WORKERS", 3)
+    monkeypatch.setattr(pdf_module, "OCR_QUEUE_SIZE", 1)
+
+    processor = EnhancedArabicPDFProcessor()
+    monkeypatch.setattr(processor, "_ocr_image", lambda image, page_num, lang: None if page_num == 4 else f"{image}\n")
+
+    pages = processor.extract_text_ocr("doc.pdf").split(pdf_module.PAGE_SEPARATOR)
+    assert pages[:6] == ["image-1\n", "image-2\n", "image-3\n", "\n---NO_OCR_PAGE_4---\n", "image-5\n", "image-6\n"]
+
+
+class ReversePool:
+    """Executor stand-in that finishes the OCR pages in reverse order once all are submitted."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.futures = {}
+
+    def submit(self, fn, pdf_path, page_num, language):
+        self.futures[page_num] = Future()
+        if len(self.futures) == self.expected:
+            for number in sorted(self.futures, reverse=True):
+                self.futures[number].set_result(f"نص الصفحة {number} بعد التعرف الضوئي\n")
+        return self.futures[page_num]
+
+
+def test_iter_pdf_pages_yields_in_order_while_ocr_is_pending(monkeypatch) -> None:
+    pages = [DIGITAL_PAGE, "", DIGITAL_PAGE, ""]
+    fake_fitz = SimpleNamespace(open=lambda path: FakeDoc(range(len(pages))))
+    monkeypatch.setattr(pdf_module, "pdf_toolkit", lambda: SimpleNamespace(fitz=fake_fitz))
+    monkeypatch.setattr(pdf_module, "OCR_MAX_WORKERS", 2)
+    pool = ReversePool(expected=2)
+    monkeypatch.setattr(pdf_module, "get_ocr_pool", lambda: pool)
+
+    iterator = PageProcessor(pages).iter_pdf_pages("doc.pdf")
+
+    # Page 1 is handed out before the later pages are even read
+    assert next(iterator)[0] == 1
+    assert pool.futures == {}
+    rest = list(iterator)
+
+    assert [page_num for page_num, _ in rest] == [2, 3, 4]
+    assert "الصفحة 2" in rest[0][1] and "نظام العمل" in rest[1][1] and "الصفحة 4" in rest[2][1]
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.utils.resumable_upload import (
+    ResumableUploadStore,
+    UploadIncomplete,
+    UploadOffsetMismatch,
+    UploadSessionNotFound,
+)
+from app.utils.upload_ingestion import DuplicateUpload, UploadRejected
+
+
+async def _body(data, piece=1000):
+    for start in range(0, len(data), piece):
+        yield data[start:start + piece]
+
+
+def _chunks(data, size):
+    return [(offset, data[offset:offset + size]) for offset in range(0, len(data), size)]
+
+
+def test_chunks_resume_and_assemble(tmp_path) -> None:
+    content = os.urandom(25_000)
+    staging, destination = str(tmp_path / "staging"), str(tmp_path / "laws")
+
+    async def scenario():
+        store = ResumableUploadStore(root=staging)
+        session = store.create("judgment.pdf", len(content), created_by=1, sha256=hashlib.sha256(content).hexdigest())
+        chunks = _chunks(content, 10_000)
+
+        await store.append(session.upload_id, 0, _body(chunks[0][1]), created_by=1)
+
+        # A resent chunk for an old offset is refused with the offset to resume from
+        with pytest.raises(UploadOffsetMismatch) as error:
+            await store.append(session.upload_id, 0, _body(chunks[0][1]), created_by=1)
+        assert error.value.expected == 10_000
+
+        # Another user cannot see the session
+        with pytest.raises(UploadSessionNotFound):
+            store.get(session.upload_id, created_by=2)
+
+        # A corrupted chunk is not recorded
+        with pytest.raises(UploadRejected, match="checksum"):
+            await store.append(session.upload_id, 10_000, _body(chunks[1][1]), created_by=1, chunk_sha256="0" * 64)
+        assert store.get(session.upload_id).offset == 10_000
+
+        await store.append(
+            session.upload_id, 10_000, _body(chunks[1][1]), created_by=1,
+            chunk_sha256=hashlib.sha256(chunks[1][1]).hexdigest(),
+        )
+        with pytest.raises(UploadIncomplete):
+            await store.finalize(session.upload_id, destination, created_by=1)
+
+        # Server restart: a new store continues from the persisted manifest
+        restarted = ResumableUploadStore(root=staging)
+        resumed = await restarted.append(session.upload_id, restarted.get(session.upload_id).offset,
+                                         _body(chunks[2][1]), created_by=1)
+        assert resumed.complete
+        return await restarted.finalize(session.upload_id, destination, created_by=1, allowed_extensions=[".pdf"])
+
+    upload = asyncio.run(scenario())
+
+    assert upload.size == len(content)
+    assert upload.sha256 == hashlib.sha256(content).hexdigest()
+    assert upload.filename == "judgment.pdf"
+    with open(upload.path, "rb") as f:
+        assert f.read() == content
+    assert os.listdir(staging) == []
+
+
+def test_finalize_rejects_duplicates_and_oversize(tmp_path) -> None:
+    content = b"%PDF-1.7 " * 500
+    staging = str(tmp_path / "staging")
+
+    async def lookup(sha256):
+        return {"id": 3} if sha256 == hashlib.sha256(content).hexdigest() else None
+
+    async def scenario():
+        store = ResumableUploadStore(root=staging, max_bytes=4096)
+        with pytest.raises(UploadRejected):
+            store.create("law.pdf", 5000)
+
+        store = ResumableUploadStore(root=staging)
+        session = store.create("law.pdf", len(content))
+        with pytest.raises(UploadRejected, match="total size"):
+            await store.append(session.upload_id, 0, _body(content + b"extra"))
+        for offset, data in _chunks(content, 1024):
+            await store.append(session.upload_id, offset, _body(data))
+        with pytest.raises(DuplicateUpload):
+            await store.finalize(session.upload_id, str(tmp_path / "laws"), duplicate_lookup=lookup)
+        with pytest.raises(UploadSessionNotFound):
+            store.get(session.upload_id)
+
+    asyncio.run(scenario())
+    assert os.listdir(staging) == []
@@ -0,0 +1,187 @@
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.models.legal_knowledge import KnowledgeChunk, KnowledgeDocument, LawArticle, LawSource
+from app.processors import hierarchical_document_processor as hdp
+from app.processors.hierarchical_document_processor import HierarchicalDocumentProcessor
+from app.services.legal.knowledge.legal_laws_service import LegalLawsService
+
+TOC = ["الفهرس", "الباب الأول ..... 3", "الفصل الأول ..... 4", "المادة الأولى ..... 5"]
+BODY = [
+    "الباب الأول",
+    "الفصل الأول",
+    "المادة الأولى",
+    "يسمى هذا النظام نظام العمل",
+    "المادة 2",
+    "أ- يلتزم صاحب العمل",
+    "يعمل بهذا النظام من تاريخ نشره",
+    "الباب الثاني",
+    "المادة 3",
+    "تلغى الأنظمة السابقة",
+]
+
+
+def _pages():
+    lines = TOC + BODY
+    # Page breaks in the middle of lines, as extraction delivers them
+    text = "\n".join(lines)
+    return [text[:25], text[25:140], text[140:]]
+
+
+async def _articles(mode, monkeypatch, flush_size=200):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def fake_chunks(self, file_path):
+        for page in _pages():
+            yield page
+
+    async def fake_text(self, file_path):
+        return "".join(_pages())
+
+    # The sample is already in logical order, so skip the visual-order fix
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_fix_arabic_text_direction", lambda self, text: text)
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_iter_text_chunks", fake_chunks)
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_extract_text_from_file", fake_text)
+    monkeypatch.setattr(hdp, "STREAM_FLUSH_SIZE", flush_size)
+
+    async with session_factory() as db:
+        processor = HierarchicalDocumentProcessor(db)
+        if mode == "streaming":
+            result = await processor.process_document_streaming("law.pdf", {"name": "نظام العمل"})
+        else:
+            result = await processor.process_document("law.pdf", {"name": "نظام العمل"})
+        rows = (await db.execute(select(LawArticle).order_by(LawArticle.order_index))).scalars().all()
+        articles = [(row.article_number, row.content) for row in rows]
+    await engine.dispose()
+    return result, articles
+
+
+def test_streaming_persists_same_articles_as_batch(monkeypatch) -> None:
+    batch_result, batch_articles = asyncio.run(_articles("batch", monkeypatch))
+    streamed_result, streamed_articles = asyncio.run(_articles("streaming", monkeypatch, flush_size=1))
+
+    assert batch_result["success"] and streamed_result["success"]
+    assert len(streamed_articles) == 3
+    assert sorted(streamed_articles) == sorted(batch_articles)
+    # Document order; the TOC entry for the first article is skipped
+    assert "نظام العمل" in streamed_articles[0][1]
+    assert [number for number, _ in streamed_articles[1:]] == ["2", "3"]
+    assert "تاريخ نشره" in streamed_articles[1][1]
+
+    structure = streamed_result["data"]["structure"]
+    assert structure.total_chapters == 2 and structure.total_sections == 1
+    assert structure.total_articles == 3
+    # Headings only: the articles were written to the database, not kept
+    assert structure.chapters[0].sections[0].articles == []
+    assert streamed_result["data"]["processing_report"].pages_processed == 3
+
+
+def test_streaming_without_text_fails_and_rolls_back(monkeypatch) -> None:
+    async def empty_chunks(self, file_path):
+        yield "  \n"
+
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_iter_text_chunks", empty_chunks)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            result = await HierarchicalDocumentProcessor(db).process_document_streaming("empty.pdf")
+        await engine.dispose()
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result["success"] is False
+    assert "no text" in result["message"]
+
+
+def _reparse_from_pages(monkeypatch) -> None:
+    async def fake_chunks(self, file_path):
+        for page in _pages():
+            yield page
+
+    async def buffered(self, file_path):
+        raise AssertionError("reparse must not buffer the whole document")
+
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_fix_arabic_text_direction", lambda self, text: text)
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_iter_text_chunks", fake_chunks)
+    monkeypatch.setattr(HierarchicalDocumentProcessor, "_extract_text_from_file", buffered)
+
+
+def test_reparse_streams_into_the_existing_law(monkeypatch) -> None:
+    _reparse_from_pages(monkeypatch)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            document = KnowledgeDocument(title="نظام العمل", category="law", file_path="law.pdf", file_hash="h")
+            db.add(document)
+            await db.flush()
+            law = LawSource(name="نظام العمل", type="law", status="raw", knowledge_document_id=document.id)
+            db.add(law)
+            await db.commit()
+
+            result = await LegalLawsService(db).reparse_law(law.id)
+            sources = (await db.execute(select(func.count()).select_from(LawSource))).scalar()
+            articles = (await db.execute(
+                select(LawArticle).order_by(LawArticle.order_index)
+            )).scalars().all()
+            chunks = (await db.execute(
+                select(KnowledgeChunk).order_by(KnowledgeChunk.chunk_index)
+            )).scalars().all()
+            status = law.status
+        await engine.dispose()
+        return result, sources, articles, chunks, status, law.id, document.id
+
+    result, sources, articles, chunks, status, law_id, document_id = asyncio.run(scenario())
+
+    assert result["success"], result["message"]
+    assert sources == 1 and status == "processed"
+    assert len(articles) == 3 and {a.law_source_id for a in articles} == {law_id}
+    assert {a.source_document_id for a in articles} == {document_id}
+    assert [c.article_id for c in chunks] == [a.id for a in articles]
+    assert [c.chunk_index for c in chunks] == [0, 1, 2]
+    assert chunks[2].content.endswith("تلغى الأنظمة السابقة")
+
+
+def test_reparse_commits_articles_and_chunks_together(monkeypatch) -> None:
+    _reparse_from_pages(monkeypatch)
+
+    async def failing_chunks(self, law):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(LegalLawsService, "_chunk_stored_articles", failing_chunks)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            document = KnowledgeDocument(title="نظام العمل", category="law", file_path="law.pdf", file_hash="h")
+            db.add(document)
+            await db.flush()
+            law = LawSource(name="نظام العمل", type="law", status="raw", knowledge_document_id=document.id)
+            db.add(law)
+            await db.commit()
+
+            result = await LegalLawsService(db).reparse_law(law.id)
+            articles = (await db.execute(select(func.count()).select_from(LawArticle))).scalar()
+            status = (await db.execute(select(LawSource.status))).scalar()
+        await engine.dispose()
+        return result, articles, status
+
+    result, articles, status = asyncio.run(scenario())
+
+    assert not result["success"] and "disk I/O error" in result["message"]
+    # The streamed articles went with the failed chunking instead of being left without chunks
+    assert articles == 0 and status == "raw"
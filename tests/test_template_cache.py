@@ -0,0 +1,146 @@
+import asyncio
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.template_cache import TemplateCache
+from app.services.template_service import TemplateService
+
+VARIABLES = [
+    {"name": "employer", "type": "text", "required": True},
+    {"name": "start_date", "type": "date"},
+    {"name": "salary", "type": "number", "default": "5000"},
+]
+
+
+class FakeRepository:
+    def __init__(self, template):
+        self.template = template
+
+    async def get_template_by_id(self, template_id):
+        return self.template if template_id == self.template.id else None
+
+
+def make_service(tmp_path, template, cache, renders, conversion_failures=0):
+    service = TemplateService.__new__(TemplateService)
+    service.db = None
+    service.repository = FakeRepository(template)
+    service.storage_path = tmp_path / "generated"
+    service.storage_path.mkdir(exist_ok=True)
+    service.template_cache = cache
+    failures = [conversion_failures]
+
+    def fake_render(compiled, filled_data):
+        renders.append(dict(filled_data))
+        path = service.storage_path / f"render-{len(renders)}.docx"
+        path.write_bytes(compiled.source)
+        return str(path)
+
+    async def fake_convert(docx_path):
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("LibreOffice conversion timed out")
+        path = os.path.splitext(docx_path)[0] + ".pdf"
+        with open(path, "wb") as pdf:
+            pdf.write(b"%PDF " + open(docx_path, "rb").read())
+        return path
+
+    service._render_docx = fake_render
+    service._convert_docx_to_pdf = fake_convert
+    return service
+
+
+def test_previews_are_rendered_once_per_template_version(tmp_path) -> None:
+    template_file = tmp_path / "employment.docx"
+    template_file.write_bytes(b"v1")
+    template = SimpleNamespace(
+        id="tpl-1", format="docx", file_path=str(template_file), variables=VARIABLES,
+        is_active=True, created_at=datetime(2026, 1, 1), updated_at=None
+    )
+    cache = TemplateCache(preview_dir=str(tmp_path / "previews"))
+    renders = []
+    service = make_service(tmp_path, template, cache, renders)
+
+    async def scenario():
+        first = await service.preview_template("tpl-1")
+        second = await service.preview_template("tpl-1")
+
+        # A new template file is a new version
+        template_file.write_bytes(b"version 2")
+        os.utime(template_file, ns=(0, 10 ** 18))
+        third = await service.preview_template("tpl-1")
+
+        with pytest.raises(ValueError, match="employer"):
+            await service.generate_contract("tpl-1", 1, {"start_date": "2026-02-01"})
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first == second and renders[0] == {"employer": "---", "start_date": "YYYY-MM-DD", "salary": "5000"}
+    assert len(renders) == 2 and third != first
+    assert not os.path.exists(first) and open(third, "rb").read() == b"%PDF version 2"
+    # Rendered previews are moved out of the generated contracts directory
+    assert list((tmp_path / "generated").iterdir()) == []
+    assert cache.stats() == {
+        "compiled_templates": 1, "hits": 2, "compiles": 2, "preview_hits": 1, "preview_renders": 2
+    }
+
+    service.invalidate_template_cache("tpl-1")
+    assert cache.stats()["compiled_templates"] == 0 and not os.path.exists(third)
+
+
+def test_updating_the_template_row_changes_its_version(tmp_path) -> None:
+    template_file = tmp_path / "lease.docx"
+    template_file.write_bytes(b"lease")
+    template = SimpleNamespace(
+        id="tpl-2", format="docx", file_path=str(template_file), variables=VARIABLES,
+        is_active=True, created_at=datetime(2026, 1, 1), updated_at=None
+    )
+    cache = TemplateCache(preview_dir=str(tmp_path / "previews"))
+
+    async def scenario():
+        before = await cache.get(template)
+        again = await cache.get(template)
+        template.variables = VARIABLES[:1]
+        template.updated_at = datetime(2026, 2, 1)
+        after = await cache.get(template)
+        return before, again, after
+
+    before, again, after = asyncio.run(scenario())
+    assert before is again
+    assert after.version != before.version and list(after.preview_data) == ["employer"]
+    assert after.required_fields == ["employer"]
+
+
+def test_html_fallback_previews_are_not_cached(tmp_path) -> None:
+    template_file = tmp_path / "nda.docx"
+    template_file.write_bytes(b"nda")
+    template = SimpleNamespace(
+        id="tpl-3", format="docx", file_path=str(template_file), variables=VARIABLES,
+        is_active=True, created_at=datetime(2026, 1, 1), updated_at=None
+    )
+    cache = TemplateCache(preview_dir=str(tmp_path / "previews"))
+    renders = []
+    service = make_service(tmp_path, template, cache, renders, conversion_failures=1)
+
+    async def html_preview(template, compiled, filled_data):
+        path = service.storage_path / "fallback.html"
+        path.write_text("<html>nda</html>")
+        return str(path)
+
+    service._generate_html_preview_from_docx = html_preview
+
+    async def scenario():
+        fallback = await service.preview_template("tpl-3")
+        recovered = await service.preview_template("tpl-3")
+        return fallback, recovered
+
+    fallback, recovered = asyncio.run(scenario())
+    assert fallback.endswith(".html") and recovered.endswith(".pdf")
+    # The filled DOCX of the failed conversion was not kept, and the PDF rendered afterwards is the cached preview
+    assert len(renders) == 2 and os.path.dirname(recovered) == str(tmp_path / "previews")
+    assert not any(path.suffix == ".docx" for path in (tmp_path / "generated").iterdir())
+    assert os.listdir(tmp_path / "previews") == [os.path.basename(recovered)]
+    assert cache.stats()["preview_renders"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.utils.upload_ingestion import DuplicateUpload, UploadRejected, UploadTooLarge, ingest_upload
+
+
+class FakeUpload:
+    """UploadFile stand-in that hands out its content in the requested chunk sizes."""
+
+    def __init__(self, filename, content, size=None):
+        self.filename = filename
+        self.size = size
+        self._content = content
+        self._position = 0
+        self.bytes_read = 0
+
+    async def read(self, size=-1):
+        end = len(self._content) if size < 0 else self._position + size
+        chunk = self._content[self._position:end]
+        self._position += len(chunk)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_streams_to_disk_with_hash_and_size(tmp_path) -> None:
+    content = os.urandom(300_000)
+    upload = FakeUpload("law.PDF", content)
+
+    result = asyncio.run(ingest_upload(upload, str(tmp_path), allowed_extensions=[".pdf"], chunk_size=64 * 1024))
+
+    assert result.extension == ".pdf"
+    assert result.size == len(content)
+    assert result.sha256 == hashlib.sha256(content).hexdigest()
+    with open(result.path, "rb") as stored:
+        assert stored.read() == content
+    assert os.listdir(tmp_path) == [os.path.basename(result.path)]
+
+
+def test_size_limit_aborts_and_leaves_nothing_behind(tmp_path) -> None:
+    upload = FakeUpload("law.pdf", b"x" * 10_000)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(upload, str(tmp_path), max_bytes=4096, chunk_size=1024))
+
+    assert upload.bytes_read < 10_000
+    assert os.listdir(tmp_path) == []
+
+    declared = FakeUpload("law.pdf", b"x" * 10, size=10_000)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(declared, str(tmp_path), max_bytes=4096))
+    assert declared.bytes_read == 0
+
+
+def test_duplicates_are_rejected(tmp_path) -> None:
+    content = b"{\"law_sources\": []}"
+    digest = hashlib.sha256(content).hexdigest()
+    lookups = []
+
+    async def lookup(sha256):
+        lookups.append(sha256)
+        return {"id": 7} if sha256 == digest else None
+
+    # Detected once the last chunk is hashed
+    with pytest.raises(DuplicateUpload) as error:
+        asyncio.run(ingest_upload(FakeUpload("law.json", content), str(tmp_path), duplicate_lookup=lookup))
+    assert error.value.existing == {"id": 7}
+    assert error.value.status_code == 409
+    assert os.listdir(tmp_path) == []
+
+    # Detected before reading when the client declares the hash
+    upload = FakeUpload("law.json", content)
+    with pytest.raises(DuplicateUpload):
+        asyncio.run(ingest_upload(upload, str(tmp_path), expected_sha256=digest.upper(), duplicate_lookup=lookup))
+    assert upload.bytes_read == 0
+    assert lookups == [digest, digest]
+
+
+def test_declared_hash_mismatch_and_bad_extension(tmp_path) -> None:
+    with pytest.raises(UploadRejected, match="Checksum mismatch"):
+        asyncio.run(ingest_upload(FakeUpload("law.json", b"abc"), str(tmp_path), expected_sha256="0" * 64))
+    with pytest.raises(UploadRejected, match="not supported"):
+        asyncio.run(ingest_upload(FakeUpload("law.exe", b"abc"), str(tmp_path), allowed_extensions=[".pdf"]))
+    assert os.listdir(tmp_path) == []
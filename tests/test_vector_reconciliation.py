@@ -0,0 +1,115 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.models.legal_knowledge import KnowledgeChunk, KnowledgeDocument, LawSource
+from app.services.legal.knowledge.vector_reconciliation_service import (
+    ReconciliationCheckpoint,
+    VectorReconciliationEngine,
+)
+
+
+class FakeCollection:
+    def __init__(self, ids):
+        self.ids = list(ids)
+
+    def get(self, ids=None, limit=None, offset=0, include=None):
+        if ids is not None:
+            return {"ids": [i for i in self.ids if i in ids]}
+        return {"ids": self.ids[offset:offset + limit]}
+
+    def delete(self, ids):
+        self.ids = [i for i in self.ids if i not in ids]
+
+
+class FakeVectorstore:
+    def __init__(self, ids):
+        self._collection = FakeCollection(ids)
+
+    def add_texts(self, texts, metadatas, ids):
+        self._collection.ids.extend(ids)
+
+
+async def _seed(session_factory):
+    async with session_factory() as db:
+        document = KnowledgeDocument(title="doc", category="law", file_path="x.json", file_hash="h1")
+        db.add(document)
+        await db.flush()
+        processed = LawSource(name="processed law", type="law", status="processed", knowledge_document_id=document.id)
+        raw = LawSource(name="raw law", type="law", status="raw", knowledge_document_id=document.id)
+        db.add_all([processed, raw])
+        await db.flush()
+        for i in range(5):
+            db.add(KnowledgeChunk(document_id=document.id, chunk_index=i, content=f"c{i}", law_source_id=processed.id))
+        db.add(KnowledgeChunk(document_id=document.id, chunk_index=5, content="raw", law_source_id=raw.id))
+        await db.commit()
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_streaming_diff_and_orphan_repair(tmp_path) -> None:
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        await _seed(session_factory)
+
+        # Chunks 1-3 embedded, 4-5 missing, 6 not yet embedded, 99/100 orphaned,
+        # and one UUID-keyed vector written by another service
+        foreign_id = "0b7c5f1e-3f7a-4d8e-9a51-6c2d0e4b7a10"
+        vectorstore = FakeVectorstore(["1", foreign_id, "2", "99", "3", "100"])
+        async with session_factory() as db:
+            reconciler = VectorReconciliationEngine(
+                db, vectorstore, page_size=2, checkpoint_path=str(tmp_path / "cp.json")
+            )
+            report = await reconciler.reconcile(repair=False, resume=False)
+            repaired = await reconciler.reconcile(repair=True, resume=False)
+        await engine.dispose()
+        return report, repaired, vectorstore
+
+    report, repaired, vectorstore = _run(scenario())
+
+    assert report.completed is True
+    assert report.sql_chunks == 6
+    assert report.synced == 3
+    assert report.missing_in_chroma == 2
+    assert report.pending_embedding == 1
+    assert report.missing_in_sql == 2
+    assert report.chroma_chunks == 5 and report.foreign_vectors == 1
+    assert report.sample_foreign_vectors == ["0b7c5f1e-3f7a-4d8e-9a51-6c2d0e4b7a10"]
+    assert report.sample_missing_in_chroma == [4, 5]
+    assert repaired.requeued == 2
+    assert repaired.orphans_deleted == 2
+    assert repaired.foreign_vectors == 1
+    assert vectorstore._collection.ids == ["1", "0b7c5f1e-3f7a-4d8e-9a51-6c2d0e4b7a10", "2", "3", "4", "5"]
+
+
+def test_checkpoint_resumes_after_page_budget(tmp_path) -> None:
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        await _seed(session_factory)
+
+        checkpoint_path = tmp_path / "cp.json"
+        async with session_factory() as db:
+            reconciler = VectorReconciliationEngine(
+                db, FakeVectorstore(["1"]), page_size=2, checkpoint_path=str(checkpoint_path)
+            )
+            first = await reconciler.reconcile(max_pages=2)
+            saved = ReconciliationCheckpoint.load(checkpoint_path)
+            second = await reconciler.reconcile()
+        await engine.dispose()
+        return first, saved, second
+
+    first, saved, second = _run(scenario())
+
+    assert first.completed is False
+    assert saved.phase == "sql" and saved.sql_after_id == 4
+    assert second.completed is True
+    assert first.sql_chunks + second.sql_chunks == 6